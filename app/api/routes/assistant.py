@@ -45,6 +45,8 @@ from app.models.assistant_models import (
 )
 from app.services.assistant_service import OptimizedAssistantService
 from app.services.factory import ServiceFactory
+from app.services.llm_resilience import get_llm_resilience_stats
+from app.services.llm_scheduler import get_llm_scheduler
 
 try:
     from app.common.logger import get_logger
@@ -357,6 +359,17 @@ async def get_assistant_config() -> Dict[str, Any]:
     return response.dict()
 
 
+@router.get(
+    "/llm/stats",
+    summary="LLM调度、熔断与对冲统计",
+    response_model=BaseResponse,
+)
+@api_response("LLM调度、熔断与对冲统计")
+async def get_llm_stats() -> Dict[str, Any]:
+    """各优先级排队耗时与请求合并次数、提供商熔断器状态以及对冲请求胜出次数"""
+    return {**get_llm_resilience_stats(), "scheduler": get_llm_scheduler().stats()}
+
+
 @router.get(
     "/info",
     summary="AI-CloudOps智能助手服务信息",
@@ -408,6 +421,7 @@ async def assistant_info() -> Dict[str, Any]:
             "config": ApiEndpoints.ASSISTANT_CONFIG,
             "ready": ApiEndpoints.ASSISTANT_READY,
             "info": ApiEndpoints.ASSISTANT_INFO,
+            "llm_stats": ApiEndpoints.ASSISTANT_LLM_STATS,
         },
         "workflow_nodes": [
             "输入验证",
@@ -10,10 +10,13 @@ Description: AI-CloudOps智能预测服务API接口
 """
 
 from datetime import datetime
+import json
 import logging
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional
 
 from fastapi import APIRouter, Body, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 from app.api.decorators import api_response, log_api_call
 from app.common.constants import ErrorMessages, HttpStatusCodes
@@ -25,10 +28,13 @@ from app.common.exceptions import (
 )
 from app.models import (
     BaseResponse,
+    BatchPredictionRequest,
     CpuPredictionRequest,
     DiskPredictionRequest,
+    LiveAnomalyRequest,
     MemoryPredictionRequest,
     ModelInfoResponse,
+    ModelReloadRequest,
     PredictionResponse,
     QpsPredictionRequest,
     ServiceInfoResponse,
@@ -447,6 +453,89 @@ async def predict_disk(
         raise PredictionError(ErrorMessages.PREDICTION_SERVICE_ERROR)
 
 
+@router.post(
+    "/batch",
+    summary="AI-CloudOps 批量预测（NDJSON流式返回）",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "每行一个JSON对象：各目标结果按完成顺序返回，最后一行为汇总",
+            "content": {"application/x-ndjson": {}},
+        }
+    },
+)
+@log_api_call(log_request=True)
+async def predict_batch(
+    request: BatchPredictionRequest = Body(
+        ...,
+        examples={
+            "default": {
+                "value": {
+                    "targets": [
+                        {
+                            "target_id": "order-service",
+                            "prediction_type": "qps",
+                            "current_value": 320.5,
+                        },
+                        {
+                            "target_id": "order-service",
+                            "prediction_type": "cpu",
+                            "current_value": 57.2,
+                            "metric_query": 'avg(rate(container_cpu_usage_seconds_total{pod=~"order-.*"}[5m])) * 100',
+                        },
+                    ],
+                    "prediction_hours": 24,
+                    "granularity": "hour",
+                    "max_concurrency": 8,
+                }
+            }
+        },
+    ),
+) -> StreamingResponse:
+    """批量预测，多个目标共享历史数据拉取与模型推理"""
+    service = await get_prediction_service()
+    await service.initialize()
+
+    try:
+        results = service.predict_batch(
+            targets=[target.model_dump() for target in request.targets],
+            prediction_hours=request.prediction_hours,
+            granularity=request.granularity.value,
+            include_confidence=request.include_confidence,
+            include_anomaly_detection=request.include_anomaly_detection,
+            consider_historical_pattern=request.consider_historical_pattern,
+            target_utilization=request.target_utilization,
+            sensitivity=request.sensitivity,
+            max_concurrency=request.max_concurrency,
+        )
+        # 预先取出第一条记录，使参数和初始化错误以普通HTTP错误返回
+        first_line = await results.__anext__()
+    except DomainValidationError as e:
+        raise HTTPException(status_code=HttpStatusCodes.BAD_REQUEST, detail=e.message)
+    except AIOpsException as e:
+        logger.error(f"批量预测失败: {e.message}")
+        raise HTTPException(status_code=HttpStatusCodes.BAD_GATEWAY, detail=e.message)
+
+    async def ndjson_stream() -> AsyncIterator[str]:
+        try:
+            yield _to_ndjson(first_line)
+            async for line in results:
+                yield _to_ndjson(line)
+        except Exception as e:
+            logger.error(f"批量预测流输出失败: {str(e)}")
+            yield _to_ndjson(
+                {"type": "error", "error": ErrorMessages.PREDICTION_SERVICE_ERROR}
+            )
+        finally:
+            await results.aclose()
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+
+def _to_ndjson(line: Dict[str, Any]) -> str:
+    return json.dumps(jsonable_encoder(line), ensure_ascii=False) + "\n"
+
+
 @router.get(
     "/ready",
     summary="AI-CloudOps 预测服务就绪检查",
@@ -523,6 +612,12 @@ async def prediction_info() -> Dict[str, Any]:
                 "description": "基于磁盘使用率预测存储需求并提供扩容建议",
                 "endpoint": "/disk",
             },
+            {
+                "type": "batch",
+                "name": "批量预测",
+                "description": "一次请求预测多个目标，按完成顺序以NDJSON流式返回",
+                "endpoint": "/batch",
+            },
         ],
         "capabilities": [
             "多类型资源预测",
@@ -542,9 +637,12 @@ async def prediction_info() -> Dict[str, Any]:
             "cpu_predict": "/cpu",
             "memory_predict": "/memory",
             "disk_predict": "/disk",
+            "batch_predict": "/batch",
             "ready": "/predict/ready",
             "info": "/predict/info",
             "models": "/predict/models",
+            "models_reload": "/predict/models/reload",
+            "live_anomalies": "/predict/anomalies/live",
         },
         "prediction_features": {
             "algorithms": ["时间序列分析", "机器学习回归", "历史模式识别"],
@@ -625,4 +723,60 @@ async def model_info() -> Dict[str, Any]:
         raise PredictionError("获取模型信息失败")
 
 
+@router.post(
+    "/models/reload",
+    summary="AI-CloudOps 模型热重载",
+    response_model=BaseResponse,
+)
+@api_response("AI-CloudOps 模型热重载")
+async def reload_models(
+    request: Optional[ModelReloadRequest] = Body(None),
+) -> Dict[str, Any]:
+    """从模型注册表重新加载模型，可指定切换到某个版本"""
+    request = request or ModelReloadRequest()
+    try:
+        service = await get_prediction_service()
+        await service.initialize()
+        return await service.reload_models(
+            prediction_type=request.prediction_type, version=request.version
+        )
+    except (AIOpsException, DomainValidationError) as e:
+        raise e
+    except Exception as e:
+        logger.error(f"模型热重载失败: {str(e)}")
+        raise PredictionError("模型热重载失败")
+
+
+@router.post(
+    "/anomalies/live",
+    summary="AI-CloudOps 实时序列异常检测",
+    response_model=BaseResponse,
+)
+@api_response("AI-CloudOps 实时序列异常检测")
+async def detect_live_anomalies(request: LiveAnomalyRequest) -> Dict[str, Any]:
+    """对Prometheus实时序列做增量异常检测，重复调用只处理新样本，适合定时轮询"""
+    try:
+        service = await get_prediction_service()
+        await service.initialize()
+        anomalies = await service.detect_live_anomalies(
+            query=request.query,
+            minutes=request.minutes,
+            method=request.method,
+            sensitivity=request.sensitivity,
+            step=request.step,
+        )
+        return {
+            "query": request.query,
+            "method": request.method,
+            "anomalies": jsonable_encoder(anomalies),
+            "anomaly_count": len(anomalies),
+            "timestamp": datetime.now().isoformat(),
+        }
+    except (AIOpsException, DomainValidationError) as e:
+        raise e
+    except Exception as e:
+        logger.error(f"实时序列异常检测失败: {str(e)}")
+        raise PredictionError("实时序列异常检测失败")
+
+
 __all__ = ["router"]
@@ -9,12 +9,18 @@ License: Apache 2.0
 Description: AI-CloudOps智能根因分析API接口
 """
 
+import asyncio
 from datetime import datetime
+import json
 import logging
 from typing import Any, Dict
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, Body, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError as PydanticValidationError
+from starlette.websockets import WebSocket, WebSocketDisconnect
 
 from app.api.decorators import api_response, log_api_call
 from app.common.constants import AppConstants, ErrorMessages, HttpStatusCodes
@@ -40,6 +46,9 @@ from app.models.rca_models import (
     RCAClearCacheResponse,
     RCAClearNamespaceCacheRequest,
     RCAClearOperationCacheRequest,
+    RCAClusterAnalyzeRequest,
+    RCAContinuousRequest,
+    RCAContinuousStopRequest,
     RCADataResponse,
     RCAErrorSummaryRequest,
     RCAEventPatternsRequest,
@@ -157,6 +166,184 @@ async def analyze_root_cause(
     return response.model_dump()
 
 
+def _sse_event(event: Dict[str, Any]) -> str:
+    data = json.dumps(jsonable_encoder(event["data"]), ensure_ascii=False)
+    return f"event: {event['stage']}\ndata: {data}\n\n"
+
+
+@router.post(
+    "/analyze/stream",
+    summary="AI-CloudOps流式根因分析（SSE）",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+@log_api_call(log_request=True)
+async def analyze_root_cause_stream(
+    request: RCAAnalyzeRequest, http_request: Request
+) -> StreamingResponse:
+    """以SSE逐阶段推送根因分析结果，客户端断开连接即取消剩余阶段"""
+    service = await get_rca_service()
+    await service.initialize()
+
+    async def event_source():
+        stream = service.analyze_root_cause_stream(
+            namespace=request.namespace,
+            time_window_hours=request.time_window_hours,
+            metrics=request.metrics,
+        )
+        try:
+            async for event in stream:
+                if await http_request.is_disconnected():
+                    break
+                yield _sse_event(event)
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/analyze/ws", name="AI-CloudOps流式根因分析")
+async def analyze_root_cause_ws(ws: WebSocket) -> None:
+    """WebSocket流式根因分析
+
+    首条消息为分析请求，之后逐阶段推送 {"stage", "data"}；
+    客户端发送 {"action": "cancel"} 或断开连接即取消剩余阶段。
+    """
+    await ws.accept()
+    try:
+        request = RCAAnalyzeRequest(**await ws.receive_json())
+    except (PydanticValidationError, ValueError, TypeError) as e:
+        await ws.send_json(
+            {"stage": "error", "data": {"message": f"参数校验失败: {str(e)}"}}
+        )
+        await ws.close()
+        return
+    except WebSocketDisconnect:
+        return
+
+    service = await get_rca_service()
+    await service.initialize()
+
+    async def produce() -> None:
+        stream = service.analyze_root_cause_stream(
+            namespace=request.namespace,
+            time_window_hours=request.time_window_hours,
+            metrics=request.metrics,
+        )
+        try:
+            async for event in stream:
+                await ws.send_json(jsonable_encoder(event))
+        finally:
+            await stream.aclose()
+
+    async def wait_for_cancel() -> None:
+        while True:
+            message = await ws.receive_json()
+            if isinstance(message, dict) and message.get("action") == "cancel":
+                return
+
+    producer = asyncio.create_task(produce())
+    canceller = asyncio.create_task(wait_for_cancel())
+    try:
+        await asyncio.wait({producer, canceller}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (producer, canceller):
+            task.cancel()
+        await asyncio.gather(producer, canceller, return_exceptions=True)
+
+    try:
+        if canceller.done() and not canceller.cancelled() and not canceller.exception():
+            await ws.send_json({"stage": "cancelled", "data": {}})
+        await ws.close()
+    except (WebSocketDisconnect, RuntimeError):
+        # 客户端已断开
+        pass
+
+
+@router.post(
+    "/analyze/cluster",
+    summary="AI-CloudOps集群级根因分析",
+    response_model=BaseResponse,
+)
+@api_response("AI-CloudOps集群级根因分析")
+@log_api_call(log_request=True)
+async def analyze_cluster_root_cause(
+    request: RCAClusterAnalyzeRequest,
+) -> Dict[str, Any]:
+    """一次分析多个命名空间，返回集群排名与各命名空间的详细结果"""
+    service = await get_rca_service()
+    await service.initialize()
+    return await service.analyze_cluster(
+        namespaces=request.namespaces,
+        time_window_hours=request.time_window_hours,
+        metrics=request.metrics,
+        max_concurrency=request.max_concurrency,
+    )
+
+
+@router.post(
+    "/continuous/start",
+    summary="AI-CloudOps启动持续根因分析",
+    response_model=BaseResponse,
+)
+@api_response("AI-CloudOps启动持续根因分析")
+async def start_continuous_rca(request: RCAContinuousRequest) -> Dict[str, Any]:
+    """启动命名空间的后台持续根因分析"""
+    service = await get_rca_service()
+    await service.initialize()
+    return service.start_continuous(
+        request.namespace,
+        interval_seconds=request.interval_seconds,
+        window_minutes=request.window_minutes,
+        metrics=request.metrics,
+    )
+
+
+@router.post(
+    "/continuous/stop",
+    summary="AI-CloudOps停止持续根因分析",
+    response_model=BaseResponse,
+)
+@api_response("AI-CloudOps停止持续根因分析")
+async def stop_continuous_rca(request: RCAContinuousStopRequest) -> Dict[str, Any]:
+    """停止命名空间的后台持续根因分析"""
+    service = await get_rca_service()
+    await service.initialize()
+    stopped = await service.stop_continuous(request.namespace)
+    return {"namespace": request.namespace, "stopped": stopped}
+
+
+@router.get(
+    "/continuous",
+    summary="AI-CloudOps持续根因分析状态",
+    response_model=BaseResponse,
+)
+@api_response("AI-CloudOps持续根因分析状态")
+async def get_continuous_rca_status() -> Dict[str, Any]:
+    """列出所有持续根因分析的运行状态"""
+    service = await get_rca_service()
+    await service.initialize()
+    items = service.get_continuous_status()
+    return {"items": items, "total": len(items)}
+
+
+@router.get(
+    "/continuous/{namespace}",
+    summary="AI-CloudOps获取持续根因分析最新结果",
+    response_model=BaseResponse,
+)
+@api_response("AI-CloudOps获取持续根因分析最新结果")
+async def get_continuous_rca_result(namespace: str) -> Dict[str, Any]:
+    """读取持续分析发布的最新结果，不触发数据收集"""
+    service = await get_rca_service()
+    await service.initialize()
+    return service.get_latest_analysis(namespace)
+
+
 @router.get(
     "/metrics",
     summary="AI-CloudOps获取所有可用的Prometheus指标",
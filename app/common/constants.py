@@ -52,6 +52,7 @@ class ServiceConstants:
     PREDICTION_MIN_QPS = 0.1
     PREDICTION_MAX_QPS = 10000.0
     PREDICTION_TIMEOUT = 120
+    PREDICTION_BATCH_MAX_TARGETS = 500
 
     RCA_MIN_METRICS = 1
     RCA_MAX_METRICS = 50
@@ -171,6 +172,8 @@ class ApiEndpoints:
     PREDICT_READY = f"{PREDICT}/ready"
     PREDICT_INFO = f"{PREDICT}/info"
     PREDICT_MODELS = f"{PREDICT}/models"
+    PREDICT_BATCH = f"{PREDICT}/batch"
+    PREDICT_MODELS_RELOAD = f"{PREDICT_MODELS}/reload"
 
     # RCA端点
     RCA = f"{AppConstants.API_VERSION_V1}/rca"
@@ -194,6 +197,7 @@ class ApiEndpoints:
     ASSISTANT_CONFIG = f"{ASSISTANT}/config"
     ASSISTANT_READY = f"{ASSISTANT}/ready"
     ASSISTANT_INFO = f"{ASSISTANT}/info"
+    ASSISTANT_LLM_STATS = f"{ASSISTANT}/llm/stats"
 
 
 def get_api_info() -> Dict[str, Any]:
@@ -210,6 +214,8 @@ def get_api_info() -> Dict[str, Any]:
                 "ready": ApiEndpoints.PREDICT_READY,
                 "info": ApiEndpoints.PREDICT_INFO,
                 "models": ApiEndpoints.PREDICT_MODELS,
+                "batch": ApiEndpoints.PREDICT_BATCH,
+                "models_reload": ApiEndpoints.PREDICT_MODELS_RELOAD,
             },
             "rca": {
                 "analyze": ApiEndpoints.RCA,
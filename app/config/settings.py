@@ -139,6 +139,62 @@ class LLMConfig:
             "LLM_REQUEST_TIMEOUT", "llm.request_timeout", 360, int
         )
     )
+    max_connections: int = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_MAX_CONNECTIONS", "llm.max_connections", 64, int
+        )
+    )
+    max_concurrency: int = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_MAX_CONCURRENCY", "llm.max_concurrency", 16, int
+        )
+    )
+    breaker_window_seconds: float = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_BREAKER_WINDOW_SECONDS",
+            "llm.circuit_breaker.window_seconds",
+            60.0,
+            float,
+        )
+    )
+    breaker_min_requests: int = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_BREAKER_MIN_REQUESTS", "llm.circuit_breaker.min_requests", 5, int
+        )
+    )
+    breaker_failure_rate: float = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_BREAKER_FAILURE_RATE", "llm.circuit_breaker.failure_rate", 0.5, float
+        )
+    )
+    breaker_open_seconds: float = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_BREAKER_OPEN_SECONDS", "llm.circuit_breaker.open_seconds", 30.0, float
+        )
+    )
+    breaker_slow_call_seconds: float = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_BREAKER_SLOW_CALL_SECONDS",
+            "llm.circuit_breaker.slow_call_seconds",
+            60.0,
+            float,
+        )
+    )
+    hedge_enabled: bool = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_HEDGE_ENABLED", "llm.hedge.enabled", False, bool
+        )
+    )
+    hedge_min_delay: float = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_HEDGE_MIN_DELAY", "llm.hedge.min_delay", 1.0, float
+        )
+    )
+    hedge_max_delay: float = field(
+        default_factory=lambda: get_env_or_config(
+            "LLM_HEDGE_MAX_DELAY", "llm.hedge.max_delay", 10.0, float
+        )
+    )
 
     ollama_model: str = field(
         default_factory=lambda: get_env_or_config(
@@ -150,6 +206,11 @@ class LLMConfig:
             "OLLAMA_BASE_URL", "llm.ollama_base_url", "http://127.0.0.1:11434/v1"
         )
     )
+    ollama_max_concurrency: int = field(
+        default_factory=lambda: get_env_or_config(
+            "OLLAMA_MAX_CONCURRENCY", "llm.ollama_max_concurrency", 4, int
+        )
+    )
 
     embedding_model: str = field(
         default_factory=lambda: get_env_or_config(
@@ -177,6 +238,11 @@ class LLMConfig:
     def effective_api_key(self) -> str:
         return "ollama" if self.provider.lower() == "ollama" else self.api_key
 
+    @property
+    def scheduler_config(self) -> Dict[str, Any]:
+        """获取LLM请求调度（优先级并发、限速与请求合并）配置"""
+        return CONFIG.get("llm", {}).get("scheduler", {})
+
 
 @dataclass
 class K8sConfig:
@@ -198,6 +264,11 @@ class K8sConfig:
             "K8S_NAMESPACE", "kubernetes.namespace", "default"
         )
     )
+    fast_list: bool = field(
+        default_factory=lambda: get_env_or_config(
+            "K8S_FAST_LIST", "kubernetes.fast_list", True, bool
+        )
+    )
 
 
 @dataclass
@@ -235,6 +306,40 @@ class RCAConfig:
         default_factory=lambda: get_env_or_config("RCA_TIMEOUT", "rca.timeout", 30, int)
     )
 
+    # 持续根因分析
+    continuous_enabled: bool = field(
+        default_factory=lambda: get_env_or_config(
+            "RCA_CONTINUOUS_ENABLED", "rca.continuous.enabled", False, bool
+        )
+    )
+    continuous_namespaces: List[str] = field(
+        default_factory=lambda: get_env_or_config(
+            "RCA_CONTINUOUS_NAMESPACES",
+            "rca.continuous.namespaces",
+            [],
+            lambda v: [ns.strip() for ns in v.split(",") if ns.strip()]
+            if isinstance(v, str)
+            else list(v),
+        )
+    )
+    continuous_interval: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RCA_CONTINUOUS_INTERVAL", "rca.continuous.interval", 60, int
+        )
+    )
+    continuous_window_minutes: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RCA_CONTINUOUS_WINDOW_MINUTES", "rca.continuous.window_minutes", 60, int
+        )
+    )
+
+    # 集群级根因分析的命名空间并发上限
+    cluster_max_concurrency: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RCA_CLUSTER_MAX_CONCURRENCY", "rca.cluster.max_concurrency", 5, int
+        )
+    )
+
     default_metrics: List[str] = field(
         default_factory=lambda: CONFIG.get("rca", {}).get(
             "default_metrics",
@@ -281,6 +386,12 @@ class PredictionConfig:
         )
     )
 
+    instance_count_query: str = field(
+        default_factory=lambda: get_env_or_config(
+            "PREDICTION_INSTANCE_COUNT_QUERY", "prediction.instance_count_query", ""
+        )
+    )
+
     default_prediction_hours: int = field(
         default_factory=lambda: get_env_or_config(
             "PREDICTION_DEFAULT_HOURS", "prediction.default_prediction_hours", 24, int
@@ -317,6 +428,29 @@ class PredictionConfig:
             float,
         )
     )
+    batch_max_concurrency: int = field(
+        default_factory=lambda: get_env_or_config(
+            "PREDICTION_BATCH_MAX_CONCURRENCY",
+            "prediction.batch_max_concurrency",
+            8,
+            int,
+        )
+    )
+    model_registry_path: str = field(
+        default_factory=lambda: get_env_or_config(
+            "PREDICTION_MODEL_REGISTRY_PATH",
+            "prediction.model_registry_path",
+            "data/models/registry",
+        )
+    )
+    model_watch_interval: int = field(
+        default_factory=lambda: get_env_or_config(
+            "PREDICTION_MODEL_WATCH_INTERVAL",
+            "prediction.model_watch_interval",
+            0,
+            int,
+        )
+    )
 
     @property
     def model_paths(self) -> Dict[str, Dict[str, str]]:
@@ -343,6 +477,11 @@ class PredictionConfig:
         """获取异常检测配置"""
         return CONFIG.get("prediction", {}).get("anomaly_detection", {})
 
+    @property
+    def ai_pipeline_config(self) -> Dict[str, Any]:
+        """获取AI增强预测阶段超时与预算配置"""
+        return CONFIG.get("prediction", {}).get("ai_pipeline", {})
+
 
 @dataclass
 class InspectionConfig:
@@ -575,6 +714,89 @@ class RAGConfig:
             "RAG_CACHE_EXPIRY", "rag.cache_expiry", 3600, int
         )
     )
+    stream_buffer_size: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_STREAM_BUFFER_SIZE", "rag.stream_buffer_size", 32, int
+        )
+    )
+    semantic_cache_enabled: bool = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SEMANTIC_CACHE_ENABLED", "rag.semantic_cache_enabled", True, bool
+        )
+    )
+    semantic_cache_threshold: float = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SEMANTIC_CACHE_THRESHOLD", "rag.semantic_cache_threshold", 0.92, float
+        )
+    )
+    semantic_cache_max_entries: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SEMANTIC_CACHE_MAX_ENTRIES",
+            "rag.semantic_cache_max_entries",
+            512,
+            int,
+        )
+    )
+    embedding_batch_size: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_EMBEDDING_BATCH_SIZE", "rag.embedding_batch_size", 32, int
+        )
+    )
+    embedding_batch_wait_ms: float = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_EMBEDDING_BATCH_WAIT_MS", "rag.embedding_batch_wait_ms", 5.0, float
+        )
+    )
+    context_token_budget: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_CONTEXT_TOKEN_BUDGET", "rag.context_token_budget", 3000, int
+        )
+    )
+    tokenizer: str = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_TOKENIZER", "rag.tokenizer", "cl100k_base"
+        )
+    )
+    stable_prompt_prefix: bool = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_STABLE_PROMPT_PREFIX", "rag.stable_prompt_prefix", True, bool
+        )
+    )
+    session_backend: str = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SESSION_BACKEND", "rag.session_backend", "memory"
+        )
+    )
+    session_ttl: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SESSION_TTL", "rag.session_ttl", 86400, int
+        )
+    )
+    session_max_sessions: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SESSION_MAX_SESSIONS", "rag.session_max_sessions", 10000, int
+        )
+    )
+    session_max_history: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SESSION_MAX_HISTORY", "rag.session_max_history", 50, int
+        )
+    )
+    session_max_bytes: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SESSION_MAX_BYTES", "rag.session_max_bytes", 32768, int
+        )
+    )
+    session_memory_limit_mb: int = field(
+        default_factory=lambda: get_env_or_config(
+            "RAG_SESSION_MEMORY_LIMIT_MB", "rag.session_memory_limit_mb", 64, int
+        )
+    )
+
+    @property
+    def context_token_budgets(self) -> Dict[str, int]:
+        """获取按模型区分的上下文token预算"""
+        return CONFIG.get("rag", {}).get("context_token_budgets", {}) or {}
 
     @property
     def effective_embedding_model(self) -> str:
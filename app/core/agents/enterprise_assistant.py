@@ -18,12 +18,38 @@ import hashlib
 import logging
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
 
+from app.core.cache.semantic_answer_cache import SemanticAnswerCache
+from app.core.cache.session_store import (
+    SessionStore,
+    append_history,
+    get_session_store,
+    new_session_record,
+    recent_queries,
+)
+from app.core.processors.context_packer import (
+    ContextPacker,
+    PackedContext,
+    get_token_counter,
+    split_stable_prefix,
+)
+from app.core.retrieval.near_duplicate import select_diverse
+
 logger = logging.getLogger("aiops.rag_assistant")
 
 
@@ -390,6 +416,12 @@ class DocumentRetriever:
         self, queries: List[str], weight: float
     ) -> List[Document]:
         """并行检索所有查询"""
+        if len(queries) > 1 and hasattr(self.vector_store, "multi_query_search"):
+            try:
+                return await self._retrieve_batched(queries, weight)
+            except Exception as e:
+                logger.warning(f"合并检索失败，改为逐个查询检索: {e}")
+
         tasks = [self._retrieve_single(q, weight) for q in queries]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -411,37 +443,52 @@ class DocumentRetriever:
         return all_docs[: self.strategy.initial_k]
 
     def _apply_diversity_filter(self, documents: List[Document]) -> List[Document]:
-        """多样性过滤"""
+        """多样性过滤（基于入库时生成的MinHash签名，一次计算全部两两相似度）"""
         if len(documents) <= self.strategy.final_k:
             return documents
 
-        selected = []
-        for doc in documents:
-            is_diverse = True
-            for selected_doc in selected:
-                similarity = self._calculate_document_similarity(doc, selected_doc)
-                if similarity > self.strategy.diversity_threshold:
-                    is_diverse = False
-                    break
-
-            if is_diverse:
-                selected.append(doc)
-                if len(selected) >= self.strategy.final_k:
-                    break
-
-        return selected
-
-    def _calculate_document_similarity(self, doc1: Document, doc2: Document) -> float:
-        word_limit = getattr(self.config, "similarity_word_limit", 50)
-        content1 = set(doc1.page_content.lower().split()[:word_limit])
-        content2 = set(doc2.page_content.lower().split()[:word_limit])
+        return select_diverse(
+            documents, self.strategy.diversity_threshold, self.strategy.final_k
+        )
 
-        if not content1 or not content2:
-            return 0.0
+    def _search_config(self, hierarchical: bool = True):
+        from app.core.vector.redis_vector_store import SearchConfig
+
+        return SearchConfig(
+            similarity_threshold=self.strategy.min_similarity,
+            use_cache=True,
+            use_mmr=True,
+            use_hierarchical_retrieval=hierarchical,
+            hierarchical_threshold=50,
+            auto_switch_retrieval=True,
+            prefer_structured_content=True,
+            boost_code_blocks=True,
+            boost_titles=True,
+        )
 
-        intersection = len(content1 & content2)
-        union = len(content1 | content2)
-        return intersection / union if union > 0 else 0.0
+    @staticmethod
+    def _scored_documents(results: List[Tuple[Document, float]]) -> List[Document]:
+        docs = []
+        for doc, score in results or []:
+            doc.metadata = doc.metadata or {}
+            doc.metadata["score"] = score
+            docs.append(doc)
+            logger.debug(f"文档得分: {score:.3f}, 内容: {doc.page_content[:50]}")
+        return docs
+
+    async def _retrieve_batched(
+        self, queries: List[str], weight: float
+    ) -> List[Document]:
+        """全部扩展查询合并为一次检索，结果已按RRF排序"""
+        logger.info(f"合并检索 {len(queries)} 个查询, 权重: {weight}")
+        results = await self.vector_store.multi_query_search(
+            queries,
+            k=self.strategy.initial_k,
+            # 层次化检索按单查询执行，合并检索不启用
+            config=self._search_config(hierarchical=False),
+        )
+        logger.info(f"返回结果: {len(results) if results else 0}")
+        return self._scored_documents(results)[: self.strategy.initial_k]
 
     async def _retrieve_single(self, query: str, weight: float) -> List[Document]:
         """单查询检索"""
@@ -456,36 +503,14 @@ class DocumentRetriever:
                 f"配置: k={self.strategy.initial_k}, sim={self.strategy.min_similarity}"
             )
 
-            from app.core.vector.redis_vector_store import SearchConfig
-
-            search_config = SearchConfig(
-                similarity_threshold=self.strategy.min_similarity,
-                use_cache=True,
-                use_mmr=True,
-                use_hierarchical_retrieval=True,
-                hierarchical_threshold=50,
-                auto_switch_retrieval=True,
-                prefer_structured_content=True,
-                boost_code_blocks=True,
-                boost_titles=True,
-            )
-
             results = await self.vector_store.similarity_search(
                 query=query,
                 k=self.strategy.initial_k,
-                config=search_config,
+                config=self._search_config(),
             )
 
             logger.info(f"返回结果: {len(results) if results else 0}")
-
-            docs = []
-            for doc, score in results:
-                doc.metadata = doc.metadata or {}
-                doc.metadata["score"] = score
-                docs.append(doc)
-                logger.debug(f"文档得分: {score:.3f}, 内容: {doc.page_content[:50]}")
-
-            return docs
+            return self._scored_documents(results)
 
         except Exception as e:
             logger.error(f"检索失败: {e}")
@@ -514,6 +539,17 @@ class RAGAssistant:
         # 上下文管理器
         self.context_manager = ContextManager(config=self.config)
 
+        # 语义答案缓存：复用检索用的问题向量查找相近问题的答案
+        self.semantic_cache = None
+        if getattr(self.config.rag, "semantic_cache_enabled", True):
+            self.semantic_cache = SemanticAnswerCache(
+                similarity_threshold=getattr(
+                    self.config.rag, "semantic_cache_threshold", 0.92
+                ),
+                max_entries=getattr(self.config.rag, "semantic_cache_max_entries", 512),
+                ttl=self.strategy.cache_ttl,
+            )
+
         # 构建工作流
         self.graph = self._build_graph()
 
@@ -585,7 +621,7 @@ class RAGAssistant:
         logger.info(f"检索阶段 - 问题: {state.question}")
         logger.info(f"扩展查询: {state.expanded_queries}")
 
-        context = self.context_manager.get_context(state.session_id)
+        context = await self.context_manager.get_context(state.session_id)
         docs = await self.retriever.retrieve(
             state.expanded_queries, state.weight or 1.0, context
         )
@@ -601,17 +637,23 @@ class RAGAssistant:
         state.documents = docs
         return state
 
-    async def _generate(self, state: EnhancedRAGState) -> EnhancedRAGState:
+    async def _generate(
+        self, state: EnhancedRAGState, config: RunnableConfig
+    ) -> EnhancedRAGState:
         logger.info(
             f"生成阶段 - 文档: {len(state.documents) if state.documents else 0}"
         )
 
-        context = self.context_manager.get_context(state.session_id)
+        # 流式调用时由 get_answer_stream 注入有界队列，增量文本逐段写入
+        token_sink = (config.get("configurable") or {}).get("token_sink")
+
+        context = await self.context_manager.get_context(state.session_id)
         result = await self.generator.generate(
             state.question,
             state.documents or [],
             state.query_type or QueryType.GENERAL,
             context,
+            on_delta=token_sink.put if token_sink is not None else None,
         )
 
         state.answer = result["answer"]
@@ -641,72 +683,204 @@ class RAGAssistant:
         self._stats["total_queries"] += 1
 
         try:
-            if self.cache_manager:
-                cache_key = hashlib.md5(question.encode()).hexdigest()
-                cached = await asyncio.to_thread(self.cache_manager.get, cache_key)
-                if cached:
-                    self._stats["cache_hits"] += 1
-                    cached["cache_hit"] = True
-                    cached["processing_time"] = time.time() - start_time
-                    return cached
-
-            if session_id:
-                self.context_manager.update_context(
-                    session_id, {"recent_queries": [question]}
+            cached, cache_key = await self._get_cached_answer(question, start_time)
+            if cached:
+                return cached
+
+            initial_state, config = await self._prepare_run(question, session_id)
+            result = await self.graph.ainvoke(initial_state, config=config)
+            return await self._finish_answer(
+                question, session_id, result, start_time, cache_key
+            )
+
+        except Exception as e:
+            return self._error_answer(e, start_time)
+
+    async def get_answer_stream(
+        self, question: str, session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """流式获取答案
+
+        生成阶段逐段产出 {"type": "delta", "content": 增量文本}，最后产出
+        {"type": "final", "data": 与 get_answer 相同的结果}。增量经有界队列传递，
+        消费方变慢时上游LLM流随之暂停；关闭生成器会取消整个工作流。
+        """
+        start_time = time.time()
+        self._stats["total_queries"] += 1
+
+        cached, cache_key = await self._get_cached_answer(question, start_time)
+        if cached:
+            yield {"type": "final", "data": cached}
+            return
+
+        buffer_size = getattr(self.config.rag, "stream_buffer_size", 32)
+        token_sink: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer_size))
+        initial_state, config = await self._prepare_run(question, session_id)
+        config["token_sink"] = token_sink
+        run = asyncio.create_task(self.graph.ainvoke(initial_state, config=config))
+
+        getter: Optional[asyncio.Future] = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(token_sink.get())
+                done, _ = await asyncio.wait(
+                    {getter, run}, return_when=asyncio.FIRST_COMPLETED
                 )
+                if getter not in done:
+                    break
+                yield {"type": "delta", "content": getter.result()}
 
-            initial_state = EnhancedRAGState(question=question, session_id=session_id)
-            config = {"thread_id": session_id or "default"}
+            while not token_sink.empty():
+                yield {"type": "delta", "content": token_sink.get_nowait()}
 
-            result = await self.graph.ainvoke(initial_state, config=config)
+            try:
+                result = run.result()
+                response = await self._finish_answer(
+                    question, session_id, result, start_time, cache_key
+                )
+            except Exception as e:
+                response = self._error_answer(e, start_time)
+            yield {"type": "final", "data": response}
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()
+            if not run.done():
+                run.cancel()
+                try:
+                    await run
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    async def _get_cached_answer(
+        self, question: str, start_time: float
+    ) -> Tuple[Optional[Dict[str, Any]], Tuple[Optional[int], Any]]:
+        """先查精确缓存，再按问题向量查语义缓存
+
+        返回 (缓存答案, (知识库版本, 问题向量))；两级缓存都按知识库版本区分，知识库
+        更新后旧答案不再命中。未命中时该键供生成完成后写入。缓存管理器自行做问题
+        标准化，这里直接传入原问题。
+        """
+        version = await self._knowledge_version()
+        cached = None
+        if self.cache_manager:
+            cached = await asyncio.to_thread(
+                self.cache_manager.get, question, version=version
+            )
 
-            if isinstance(result, dict):
-                answer = result.get("answer", "")
-                confidence = result.get("confidence", 0.0)
-                sources = result.get("sources", [])
-            else:
-                answer = getattr(result, "answer", "") or ""
-                confidence = getattr(result, "confidence", 0.0) or 0.0
-                sources = getattr(result, "sources", []) or []
-
-            response = {
-                "answer": answer,
-                "confidence_score": confidence,
-                "source_documents": sources,
-                "cache_hit": False,
-                "processing_time": time.time() - start_time,
-                "success": True,
-            }
+        embedding = None
+        similarity = None
+        if not cached and self.semantic_cache is not None and version is not None:
+            try:
+                embedding = await self._question_embedding(question)
+                hit = embedding is not None and self.semantic_cache.lookup(
+                    embedding, version
+                )
+                if hit:
+                    cached, similarity = hit
+            except Exception as e:
+                logger.warning(f"语义缓存查找失败: {e}")
+                embedding = None
+
+        if cached:
+            self._stats["cache_hits"] += 1
+            cached["cache_hit"] = True
+            if similarity is not None:
+                cached["semantic_similarity"] = round(similarity, 4)
+            cached["processing_time"] = time.time() - start_time
+            return cached, (version, None)
+        return None, (version, embedding)
+
+    async def _knowledge_version(self) -> Optional[int]:
+        """读取知识库版本，向量存储不支持版本时返回None"""
+        get_version = getattr(self.vector_store, "get_knowledge_version", None)
+        if get_version is None:
+            return None
+        try:
+            return await get_version()
+        except Exception as e:
+            logger.warning(f"读取知识库版本失败: {e}")
+            return None
+
+    async def _question_embedding(self, question: str) -> Optional[Any]:
+        """计算问题向量
+
+        问题按检索时相同的方式预处理，向量存储会缓存该向量，随后的检索直接复用。
+        """
+        embed = getattr(self.vector_store, "embed_query", None)
+        if embed is None:
+            return None
+        processed = self.query_processor._preprocess_query(question)
+        return await embed(processed or question)
+
+    async def _prepare_run(self, question: str, session_id: Optional[str]):
+        if session_id:
+            await self.context_manager.update_context(
+                session_id, {"recent_queries": [question]}
+            )
+        initial_state = EnhancedRAGState(question=question, session_id=session_id)
+        return initial_state, {"thread_id": session_id or "default"}
 
-            cache_threshold = getattr(self.config, "cache_confidence_threshold", 0.6)
-            if self.cache_manager and response["confidence_score"] > cache_threshold:
+    async def _finish_answer(
+        self,
+        question: str,
+        session_id: Optional[str],
+        result: Any,
+        start_time: float,
+        cache_key: Tuple[Optional[int], Any] = (None, None),
+    ) -> Dict[str, Any]:
+        """整理工作流结果，写入缓存和会话上下文"""
+        if isinstance(result, dict):
+            answer = result.get("answer", "")
+            confidence = result.get("confidence", 0.0)
+            sources = result.get("sources", [])
+        else:
+            answer = getattr(result, "answer", "") or ""
+            confidence = getattr(result, "confidence", 0.0) or 0.0
+            sources = getattr(result, "sources", []) or []
+
+        response = {
+            "answer": answer,
+            "confidence_score": confidence,
+            "source_documents": sources,
+            "cache_hit": False,
+            "processing_time": time.time() - start_time,
+            "success": True,
+        }
+
+        cache_threshold = getattr(self.config, "cache_confidence_threshold", 0.6)
+        if response["confidence_score"] > cache_threshold:
+            version, embedding = cache_key
+            if self.cache_manager:
                 await asyncio.to_thread(
                     self.cache_manager.set,
-                    cache_key,
+                    question,
                     response,
                     ttl=self.strategy.cache_ttl,
+                    version=version,
                 )
+            if self.semantic_cache is not None and embedding is not None:
+                self.semantic_cache.store(embedding, version, question, response)
 
-            if session_id:
-                self.context_manager.update_context(
-                    session_id, {"assistant_response": answer}
-                )
+        if session_id:
+            await self.context_manager.update_context(
+                session_id, {"assistant_response": answer}
+            )
 
-            self._stats["successful_queries"] += 1
+        self._stats["successful_queries"] += 1
 
-            return response
+        return response
 
-        except Exception as e:
-            logger.error(f"处理失败: {e}")
-            self._stats["failed_queries"] += 1
-            return {
-                "answer": f"处理出错: {str(e)}",
-                "confidence_score": 0.0,
-                "source_documents": [],
-                "success": False,
-                "error": str(e),
-                "processing_time": time.time() - start_time,
-            }
+    def _error_answer(self, error: Exception, start_time: float) -> Dict[str, Any]:
+        logger.error(f"处理失败: {error}")
+        self._stats["failed_queries"] += 1
+        return {
+            "answer": f"处理出错: {str(error)}",
+            "confidence_score": 0.0,
+            "source_documents": [],
+            "success": False,
+            "error": str(error),
+            "processing_time": time.time() - start_time,
+        }
 
     async def health_check(self) -> Dict[str, Any]:
         """健康检查"""
@@ -716,8 +890,16 @@ class RAGAssistant:
                 "vector_store": bool(self.vector_store),
                 "llm_service": bool(self.llm_service),
                 "cache": bool(self.cache_manager),
+                "semantic_cache": self.semantic_cache is not None,
             },
             "stats": self._stats,
+            "embedding_batching": (
+                self.vector_store.embedding_batcher.get_stats()
+                if hasattr(self.vector_store, "embedding_batcher")
+                else {}
+            ),
+            "context_packing": self.generator.get_stats(),
+            "sessions": self.context_manager.store.get_stats(),
             "timestamp": datetime.now().isoformat(),
         }
 
@@ -742,6 +924,13 @@ class RAGAssistant:
                 cache_results["reranker_cache"] = rerank_cache_count
                 logger.info(f"重排器缓存已清理: {rerank_cache_count} 项")
 
+            # 清理语义答案缓存
+            if self.semantic_cache is not None:
+                semantic_count = self.semantic_cache.clear()
+                cleared_items += semantic_count
+                cache_results["semantic_cache"] = semantic_count
+                logger.info(f"语义答案缓存已清理: {semantic_count} 项")
+
             # 清理缓存管理器
             if self.cache_manager:
                 try:
@@ -950,12 +1139,12 @@ class RAGAssistant:
     async def create_session(
         self, session_id: str, info: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        self.context_manager.update_context(session_id, info or {})
+        await self.context_manager.update_context(session_id, info or {})
         return {"success": True, "session_id": session_id}
 
     async def get_session_info(self, session_id: str) -> Dict[str, Any]:
-        context = self.context_manager.get_context(session_id)
-        session_details = self.context_manager.get_session_details(session_id)
+        context = await self.context_manager.get_context(session_id)
+        session_details = await self.context_manager.get_session_details(session_id)
 
         return {
             "success": True,
@@ -1074,11 +1263,13 @@ class RAGAssistant:
 
 
 class ContextManager:
-    def __init__(self, config=None):
+    """会话上下文管理，会话数据保存在共享的 SessionStore 中"""
+
+    def __init__(self, config=None, store: Optional[SessionStore] = None):
         from app.config.settings import config as app_config
 
         self.config = config or app_config
-        self.session_contexts = {}
+        self.store = store if store is not None else get_session_store()
         max_recent_patterns = 100
         self.global_context = {
             "system_status": "normal",
@@ -1086,74 +1277,62 @@ class ContextManager:
             "domain_preferences": defaultdict(float),
         }
 
-    def get_context(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_context(self, session_id: Optional[str] = None) -> Dict[str, Any]:
         context = self.global_context.copy()
-        if session_id and session_id in self.session_contexts:
-            context.update(self.session_contexts[session_id])
+        record = await self.store.aget(session_id) if session_id else None
+        if record:
+            context.update(record["fields"])
+            context.update(
+                {
+                    "created_at": datetime.fromtimestamp(record["created_at"]),
+                    "last_activity": datetime.fromtimestamp(record["last_activity"]),
+                    "query_count": record["query_count"],
+                    "message_count": record["message_count"],
+                    "recent_queries": deque(recent_queries(record), maxlen=10),
+                    "conversation_history": self._history(record),
+                }
+            )
         return context
 
-    def update_context(self, session_id: Optional[str], updates: Dict[str, Any]):
+    async def update_context(
+        self, session_id: Optional[str], updates: Dict[str, Any]
+    ) -> None:
         if not session_id:
             return
 
-        if session_id not in self.session_contexts:
-            current_time = datetime.now()
-            self.session_contexts[session_id] = {
-                "created_at": current_time,
-                "last_activity": current_time,
-                "query_count": 0,
-                "message_count": 0,
-                "recent_queries": deque(maxlen=10),
-                "conversation_history": [],
-                "user_preferences": [],
-                "domain": None,
-                "mode": updates.get("mode", 1),
-                "status": "active",
-            }
-
-        self.session_contexts[session_id]["last_activity"] = datetime.now()
-
-        if "recent_queries" in updates:
-            for query in updates["recent_queries"]:
-                self.session_contexts[session_id]["recent_queries"].append(query)
-                self.session_contexts[session_id]["query_count"] += 1
-                self.session_contexts[session_id]["message_count"] += 1
-
-                conversation_entry = {
-                    "type": "user",
-                    "content": query,
-                    "timestamp": datetime.now().isoformat(),
-                }
-                self.session_contexts[session_id]["conversation_history"].append(
-                    conversation_entry
-                )
-
-                if len(self.session_contexts[session_id]["conversation_history"]) > 50:
-                    self.session_contexts[session_id]["conversation_history"] = (
-                        self.session_contexts[session_id]["conversation_history"][-50:]
-                    )
-
-            updates.pop("recent_queries")
-
-        if "assistant_response" in updates:
-            response = updates["assistant_response"]
-            conversation_entry = {
-                "type": "assistant",
-                "content": response,
-                "timestamp": datetime.now().isoformat(),
+        now = time.time()
+        updates = dict(updates)
+        queries = updates.pop("recent_queries", [])
+        response = updates.pop("assistant_response", None)
+
+        # 在存储的原子更新内基于最新记录追加，避免并发请求互相覆盖历史
+        def mutate(record: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            if record is None:
+                record = new_session_record(now, mode=updates.get("mode", 1))
+            record["last_activity"] = now
+            for query in queries:
+                append_history(record, "user", query, now)
+            if response is not None:
+                append_history(record, "assistant", response, now)
+            record["fields"].update(updates)
+            return record
+
+        await self.store.aupdate(session_id, mutate)
+
+    @staticmethod
+    def _history(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "type": role,
+                "content": content,
+                "timestamp": datetime.fromtimestamp(ts).isoformat(),
             }
-            self.session_contexts[session_id]["conversation_history"].append(
-                conversation_entry
-            )
-            self.session_contexts[session_id]["message_count"] += 1
-            updates.pop("assistant_response")
-
-        for key, value in updates.items():
-            if key not in ["recent_queries", "assistant_response"]:
-                self.session_contexts[session_id][key] = value
+            for role, content, ts in record["history"]
+        ]
 
-    def get_session_details(self, session_id: str) -> Dict[str, Any]:
-        if session_id not in self.session_contexts:
+    async def get_session_details(self, session_id: str) -> Dict[str, Any]:
+        record = await self.store.aget(session_id)
+        if record is None:
             return {
                 "created_time": "",
                 "last_activity": "",
@@ -1163,14 +1342,16 @@ class ContextManager:
                 "conversation_history": [],
             }
 
-        session = self.session_contexts[session_id]
+        fields = record["fields"]
         return {
-            "created_time": session.get("created_at", datetime.now()).isoformat(),
-            "last_activity": session.get("last_activity", datetime.now()).isoformat(),
-            "message_count": session.get("message_count", 0),
-            "mode": session.get("mode", 1),
-            "status": session.get("status", "active"),
-            "conversation_history": session.get("conversation_history", []),
+            "created_time": datetime.fromtimestamp(record["created_at"]).isoformat(),
+            "last_activity": datetime.fromtimestamp(
+                record["last_activity"]
+            ).isoformat(),
+            "message_count": record["message_count"],
+            "mode": fields.get("mode", 1),
+            "status": fields.get("status", "active"),
+            "conversation_history": self._history(record),
         }
 
 
@@ -1211,12 +1392,10 @@ class DocumentReranker:
         scored_docs.sort(key=lambda x: x[1], reverse=True)
 
         # 多样性过滤
-        final_docs = []
-        for doc, score in scored_docs:
-            if score > self.rerank_threshold and self._is_diverse(doc, final_docs):
-                final_docs.append(doc)
-                if len(final_docs) >= top_k:
-                    break
+        candidates = [
+            doc for doc, score in scored_docs if score > self.rerank_threshold
+        ]
+        final_docs = select_diverse(candidates, 0.7, top_k)
 
         # 缓存结果（避免内存泄漏）
         max_cache_entries = 50
@@ -1252,29 +1431,6 @@ class DocumentReranker:
 
         return scored
 
-    def _is_diverse(
-        self, doc: Document, selected: List[Document], threshold: float = 0.7
-    ) -> bool:
-        """检查文档多样性"""
-        if not selected:
-            return True
-
-        diversity_word_limit = 50
-        doc_words = set(doc.page_content.lower().split()[:diversity_word_limit])
-
-        for selected_doc in selected:
-            selected_words = set(
-                selected_doc.page_content.lower().split()[:diversity_word_limit]
-            )
-            if doc_words and selected_words:
-                similarity = len(doc_words & selected_words) / len(
-                    doc_words | selected_words
-                )
-                if similarity > threshold:
-                    return False
-
-        return True
-
 
 class AnswerGenerator:
     def __init__(self, llm_service, config=None):
@@ -1286,6 +1442,15 @@ class AnswerGenerator:
         # 从配置加载模板
         self.base_prompt = self._load_prompt_template()
 
+        # 上下文打包统计
+        self._packing_stats = {
+            "requests": 0,
+            "context_tokens": 0,
+            "tokens_saved": 0,
+            "truncated_docs": 0,
+            "dropped_docs": 0,
+        }
+
     def _load_prompt_template(self) -> str:
         """从配置加载提示模板"""
         default_prompt = """你是AI-CloudOps智能运维平台的专业助手。请仔细分析用户问题，然后基于相关文档提供准确的回答。
@@ -1337,8 +1502,13 @@ class AnswerGenerator:
         docs: List[Document],
         query_type: QueryType,
         context: Optional[Dict] = None,
+        on_delta: Optional[Callable[[str], Awaitable[Any]]] = None,
     ) -> Dict[str, Any]:
-        """生成答案"""
+        """生成答案
+
+        Args:
+            on_delta: 提供时以流式调用LLM，每段增量文本依次await该回调
+        """
         if not docs:
             logger.warning(f"未找到相关文档进行回答：{question}")
             return {
@@ -1353,22 +1523,28 @@ class AnswerGenerator:
             context = {}
         context["recent_query"] = question
 
-        enhanced_context = self._prepare_enhanced_context(docs, context, is_md_content)
+        packed = self._prepare_enhanced_context(docs, context, is_md_content)
         generation_params = self._get_generation_params(query_type, context)
 
         try:
             prompt_template = (
                 self._load_md_prompt_template() if is_md_content else self.base_prompt
             )
-
-            prompt = prompt_template.format(context=enhanced_context, question=question)
-
-            if context and context.get("domain"):
-                prompt = f"领域: {context['domain']}\n\n{prompt}"
-
-            response = await self.llm_service.generate_response(
-                messages=[{"role": "user", "content": prompt}], **generation_params
+            messages = self._build_messages(
+                prompt_template, packed.text, question, context
             )
+            if on_delta is not None and hasattr(self.llm_service, "stream_response"):
+                chunks = []
+                async for delta in self.llm_service.stream_response(
+                    messages=messages, **generation_params
+                ):
+                    chunks.append(delta)
+                    await on_delta(delta)
+                response = "".join(chunks)
+            else:
+                response = await self.llm_service.generate_response(
+                    messages=messages, **generation_params
+                )
 
             if is_md_content:
                 response = self._post_process_md_response(response, docs)
@@ -1377,7 +1553,12 @@ class AnswerGenerator:
                 docs, len(response), context
             )
 
-            return {"answer": response, "confidence": confidence}
+            return {
+                "answer": response,
+                "confidence": confidence,
+                "context_tokens": packed.used_tokens,
+                "context_tokens_saved": packed.saved_tokens,
+            }
 
         except Exception as e:
             logger.error(f"答案生成失败: {e}")
@@ -1445,23 +1626,50 @@ class AnswerGenerator:
         else:
             return response
 
-    def _prepare_enhanced_context(
-        self, docs: List[Document], context: Optional[Dict], is_md_content: bool = False
-    ) -> str:
-        """准备增强的上下文"""
-        max_length = getattr(self.config.rag, "max_context_length", 4000)
-        context_parts = []
-        current_length = 0
+    def _build_messages(
+        self,
+        template: str,
+        context_text: str,
+        question: str,
+        context: Optional[Dict],
+    ) -> List[Dict[str, str]]:
+        """组装消息；启用稳定前缀时固定指令作为system消息，便于提供商提示缓存命中"""
+        domain = (
+            f"领域: {context['domain']}\n\n" if context and context.get("domain") else ""
+        )
+        parts = (
+            split_stable_prefix(template)
+            if getattr(self.config.rag, "stable_prompt_prefix", True)
+            else None
+        )
+        if parts is None:
+            prompt = template.format(context=context_text, question=question)
+            return [{"role": "user", "content": f"{domain}{prompt}"}]
+
+        body = parts["body"].format(context=context_text, question=question)
+        return [
+            {"role": "system", "content": parts["prefix"]},
+            {"role": "user", "content": f"{domain}{body}"},
+        ]
 
-        # 智能排序文档：根据内容类型和相关性重新排序
-        sorted_docs = self._smart_sort_documents(docs, context)
+    def _context_token_budget(self) -> int:
+        """当前模型的上下文token预算，未单独配置的模型使用默认预算"""
+        rag = self.config.rag
+        budget = getattr(rag, "context_token_budget", 3000)
+        llm = getattr(self.config, "llm", None)
+        model = getattr(llm, "effective_model", "") if llm else ""
+        budgets = getattr(rag, "context_token_budgets", None) or {}
+        return int(budgets.get(model, budget))
 
-        for i, doc in enumerate(sorted_docs):
-            content = doc.page_content
+    def _prepare_enhanced_context(
+        self, docs: List[Document], context: Optional[Dict], is_md_content: bool = False
+    ) -> PackedContext:
+        """按token预算准备上下文，优先放入排序靠前的文档"""
 
+        def header(index: int, doc: Document) -> str:
+            doc_info = f"[文档{index}"
             # 为MD文档添加更详细的元信息
             if is_md_content:
-                doc_info = f"[文档{i + 1}"
                 if doc.metadata.get("title_hierarchy"):
                     hierarchy = " > ".join(doc.metadata["title_hierarchy"])
                     doc_info += f" - 章节: {hierarchy}"
@@ -1475,40 +1683,63 @@ class AnswerGenerator:
                     doc_info += " - 包含表格"
                 if doc.metadata.get("source"):
                     doc_info += f" - 来源: {doc.metadata['source']}"
-                doc_info += "]"
             else:
-                # 普通文档信息
-                doc_info = f"[文档{i + 1}"
                 if doc.metadata.get("source"):
                     doc_info += f" - 来源: {doc.metadata['source']}"
                 if doc.metadata.get("score"):
                     doc_info += f" - 相关性: {doc.metadata['score']:.2f}"
-                doc_info += "]"
+            return doc_info + "]"
 
-            # 智能截断，对MD文档保持结构完整性
-            available_length = max_length - current_length - len(doc_info) - 10
-            if available_length <= 200:
-                break
-
-            if len(content) > available_length:
-                if is_md_content:
-                    # 对MD文档进行结构化截断
-                    content = self._smart_truncate_md_content(content, available_length)
-                else:
-                    content = content[:available_length] + "..."
+        def truncate(content: str, max_chars: int) -> str:
+            # 对MD文档保持结构完整性
+            if is_md_content:
+                return self._smart_truncate_md_content(content, max_chars)
+            return content[:max_chars] + "..." if len(content) > max_chars else content
 
-            full_content = f"{doc_info}\n{content}"
-            context_parts.append(full_content)
-            current_length += len(full_content)
+        counter = get_token_counter()
+        budget = self._context_token_budget()
 
-        # 添加上下文信息
+        # 为最近查询信息预留预算
+        recent_info = ""
         if context and context.get("recent_queries"):
             recent_queries = list(context["recent_queries"])[-3:]
-            recent_info = f"\n\n[最近相关查询]: {', '.join(recent_queries)}"
-            if current_length + len(recent_info) < max_length:
-                context_parts.append(recent_info)
+            recent_info = f"[最近相关查询]: {', '.join(recent_queries)}"
+            if counter.count(recent_info) * 4 < budget:
+                budget -= counter.count(recent_info) + 2
+            else:
+                recent_info = ""
 
-        return "\n\n".join(context_parts)
+        # 智能排序文档：根据内容类型和相关性重新排序
+        sorted_docs = self._smart_sort_documents(docs, context)
+        packed = ContextPacker(counter).pack(sorted_docs, budget, header, truncate)
+        if recent_info:
+            packed.text = f"{packed.text}\n\n{recent_info}"
+            packed.used_tokens += counter.count(recent_info) + 2
+
+        stats = self._packing_stats
+        stats["requests"] += 1
+        stats["context_tokens"] += packed.used_tokens
+        stats["tokens_saved"] += packed.saved_tokens
+        stats["truncated_docs"] += packed.truncated
+        stats["dropped_docs"] += packed.dropped
+        logger.info(
+            f"上下文打包: 预算={budget}, 使用={packed.used_tokens}, "
+            f"节省={packed.saved_tokens} tokens, 文档={packed.included}/{len(docs)}"
+        )
+        return packed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """上下文打包统计"""
+        stats = dict(self._packing_stats)
+        requests = stats["requests"]
+        stats["avg_context_tokens"] = (
+            round(stats["context_tokens"] / requests, 1) if requests else 0.0
+        )
+        stats["avg_tokens_saved"] = (
+            round(stats["tokens_saved"] / requests, 1) if requests else 0.0
+        )
+        stats["tokenizer"] = get_token_counter().name
+        return stats
 
     def _smart_sort_documents(
         self, docs: List[Document], context: Optional[Dict]
@@ -17,6 +17,7 @@ import hashlib
 import logging
 import re
 import struct
+import time
 from typing import Any, Dict, List, Optional
 import uuid
 
@@ -47,6 +48,13 @@ class ErrorCode(Enum):
 
 
 from app.config.settings import config
+from app.core.cache.session_store import (
+    SessionStore,
+    append_history,
+    get_session_store,
+    new_session_record,
+    recent_queries,
+)
 
 DEFAULT_EMBEDDING_DIMENSION = 384
 MAX_INPUT_LENGTH = config.rag.max_context_length
@@ -513,49 +521,73 @@ def generate_fallback_answer(context: Optional[ResponseContext] = None) -> str:
 
 
 class SessionManager:
-    """会话管理器"""
+    """会话管理器，与智能助手共用会话存储"""
 
-    def __init__(self):
-        self._sessions: Dict[str, SessionData] = {}
+    def __init__(self, store: Optional[SessionStore] = None):
+        self._store = store if store is not None else get_session_store()
+
+    @staticmethod
+    def _to_session(session_id: str, record: Dict[str, Any]) -> SessionData:
+        return SessionData(
+            session_id=session_id,
+            created_at=datetime.fromtimestamp(record["created_at"]),
+            last_activity=datetime.fromtimestamp(record["last_activity"]),
+            history=recent_queries(record, MAX_HISTORY_ITEMS),
+        )
 
     def get_session(self, session_id: str) -> Optional[SessionData]:
         """获取会话"""
         if not validate_session_id(session_id):
             return None
-        return self._sessions.get(session_id)
+        record = self._store.get(session_id)
+        return self._to_session(session_id, record) if record else None
 
     def create_session(self, session_id: Optional[str] = None) -> SessionData:
         """创建新会话"""
         if not session_id:
             session_id = create_session_id()
 
-        session = SessionData(session_id=session_id)
-        self._sessions[session_id] = session
-        return session
+        record = new_session_record(time.time())
+        self._store.save(session_id, record)
+        return self._to_session(session_id, record)
 
     def update_session(self, session_id: str, item: str) -> bool:
         """更新会话历史"""
-        session = self.get_session(session_id)
-        if session:
-            session.add_to_history(item)
-            return True
-        return False
+        if not validate_session_id(session_id):
+            return False
+        if not self._store.get(session_id):
+            return False
 
-    def cleanup_expired_sessions(self, max_age_hours: int = 24) -> int:
-        """清理过期会话"""
-        from datetime import timedelta
+        def mutate(record: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            now = time.time()
+            record = record or new_session_record(now)
+            append_history(record, "user", item, now)
+            return record
+
+        self._store.update(session_id, mutate)
+        return True
 
-        cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-        expired_sessions = [
-            sid
-            for sid, session in self._sessions.items()
-            if session.last_activity < cutoff_time
-        ]
+    async def aget_session(self, session_id: str) -> Optional[SessionData]:
+        """异步获取会话，供事件循环中的调用方使用"""
+        if not validate_session_id(session_id):
+            return None
+        record = await self._store.aget(session_id)
+        return self._to_session(session_id, record) if record else None
 
-        for sid in expired_sessions:
-            del self._sessions[sid]
+    async def aensure_session(self, session_id: Optional[str] = None) -> SessionData:
+        """异步获取会话，不存在时原子地创建；已有会话的历史保持不变"""
+        if not session_id:
+            session_id = create_session_id()
 
-        return len(expired_sessions)
+        def mutate(record: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            return record or new_session_record(time.time())
+
+        record = await self._store.aupdate(session_id, mutate)
+        return self._to_session(session_id, record)
+
+    def cleanup_expired_sessions(self, max_age_hours: int = 24) -> int:
+        """清理过期会话"""
+        return self._store.cleanup_expired(max_age_hours * 3600)
 
 
 __all__ = [
@@ -10,5 +10,13 @@ Description: 模块初始化文件
 """
 
 from .redis_cache_manager import CacheEntry, RedisCacheManager
+from .semantic_answer_cache import SemanticAnswerCache
+from .session_store import SessionStore, get_session_store
 
-__all__ = ["RedisCacheManager", "CacheEntry"]
+__all__ = [
+    "RedisCacheManager",
+    "CacheEntry",
+    "SemanticAnswerCache",
+    "SessionStore",
+    "get_session_store",
+]
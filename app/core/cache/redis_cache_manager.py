@@ -153,9 +153,13 @@ class RedisCacheManager:
         self.redis_client.hset(self.stats_key, mapping=stats)
 
     def _generate_cache_key(
-        self, question: str, session_id: str = None, history: List = None
+        self,
+        question: str,
+        session_id: str = None,
+        history: List = None,
+        version: Optional[int] = None,
     ) -> str:
-        """生成智能缓存键 - 支持相似问题匹配"""
+        """生成智能缓存键 - 支持相似问题匹配，指定知识库版本时按版本区分"""
         # 标准化问题文本
         normalized_question = self._normalize_question(question)
 
@@ -177,6 +181,9 @@ class RedisCacheManager:
                     context_key = "|".join(sorted(last_keywords))
                     cache_input = f"{cache_input}|ctx:{context_key}"
 
+        if version is not None:
+            cache_input = f"{cache_input}|kb:{version}"
+
         # 生成缓存键
         key_hash = hashlib.sha256(cache_input.encode("utf-8")).hexdigest()
         return f"{self.cache_prefix}smart:{key_hash}"
@@ -306,7 +313,11 @@ class RedisCacheManager:
             logger.warning(f"更新统计信息失败: {e}")
 
     def get(
-        self, question: str, session_id: str = None, history: List = None
+        self,
+        question: str,
+        session_id: str = None,
+        history: List = None,
+        version: Optional[int] = None,
     ) -> Optional[Dict[str, Any]]:
         """获取缓存"""
         if self._shutdown:
@@ -314,7 +325,9 @@ class RedisCacheManager:
 
         try:
             self._update_stats("request")
-            cache_key = self._generate_cache_key(question, session_id, history)
+            cache_key = self._generate_cache_key(
+                question, session_id, history, version
+            )
 
             # 从Redis获取数据
             cached_data = self.redis_client.get(cache_key)
@@ -363,13 +376,16 @@ class RedisCacheManager:
         session_id: str = None,
         history: List = None,
         ttl: int = None,
+        version: Optional[int] = None,
     ):
         """设置缓存"""
         if self._shutdown:
             return
 
         try:
-            cache_key = self._generate_cache_key(question, session_id, history)
+            cache_key = self._generate_cache_key(
+                question, session_id, history, version
+            )
             cache_ttl = ttl or self.default_ttl
 
             # 创建缓存条目
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 语义答案缓存 - 按问题向量相似度复用答案，知识库版本变化时整体失效
+"""
+
+import copy
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("aiops.semantic_cache")
+
+
+class _Entry:
+    __slots__ = ("question", "answer", "created_at", "last_hit", "hits")
+
+    def __init__(self, question: str, answer: Dict[str, Any], now: float) -> None:
+        self.question = question
+        self.answer = answer
+        self.created_at = now
+        self.last_hit = now
+        self.hits = 0
+
+
+class SemanticAnswerCache:
+    """进程内语义答案缓存
+
+    问题向量归一化后存放在一个连续矩阵中，查询时一次矩阵乘得到与全部条目的
+    余弦相似度，取最相近的一条；条目数有上限，规模下精确检索即可毫秒级返回。
+    缓存绑定知识库版本，版本变化（文档增删、清空）时所有答案一并作废。
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        max_entries: int = 512,
+        ttl: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._clock = clock
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[_Entry] = []
+        self._version: Any = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        if not vector.size or norm == 0.0:
+            return None
+        return vector / norm
+
+    def _sync_version(self, version: Any) -> None:
+        """知识库版本变化时丢弃全部条目"""
+        if version == self._version:
+            return
+        if self._entries:
+            self._stats["invalidations"] += 1
+            logger.info(f"知识库版本变化({self._version} -> {version})，语义缓存失效")
+        self._entries.clear()
+        self._vectors = None
+        self._version = version
+
+    def _remove(self, index: int) -> None:
+        """用最后一行覆盖被删除的行，保持矩阵紧凑"""
+        last = len(self._entries) - 1
+        if index != last:
+            self._vectors[index] = self._vectors[last]
+            self._entries[index] = self._entries[last]
+        self._entries.pop()
+
+    def _purge_expired(self, now: float) -> None:
+        """删除超过TTL的条目；从后往前删除，被移动的行都已检查过"""
+        for index in range(len(self._entries) - 1, -1, -1):
+            if now - self._entries[index].created_at > self.ttl:
+                self._remove(index)
+                self._stats["expired"] += 1
+
+    def lookup(
+        self, embedding: Sequence[float], version: Any
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """查找语义相近的已缓存答案，返回(答案副本, 相似度)"""
+        self._sync_version(version)
+        now = self._clock()
+        self._purge_expired(now)
+        query = self._normalize(embedding)
+        if query is None or not self._entries:
+            self._stats["misses"] += 1
+            return None
+        if query.shape[0] != self._vectors.shape[1]:
+            # 嵌入模型维度变化，旧条目不可比较
+            self.clear()
+            self._stats["misses"] += 1
+            return None
+
+        scores = self._vectors[: len(self._entries)] @ query
+        index = int(np.argmax(scores))
+        similarity = float(scores[index])
+        entry = self._entries[index]
+        if similarity < self.similarity_threshold:
+            self._stats["misses"] += 1
+            return None
+
+        entry.hits += 1
+        entry.last_hit = now
+        self._stats["hits"] += 1
+        logger.debug(f"语义缓存命中: similarity={similarity:.4f}, 原问题={entry.question}")
+        return copy.deepcopy(entry.answer), similarity
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        version: Any,
+        question: str,
+        answer: Dict[str, Any],
+    ) -> None:
+        """写入答案；先清理过期条目，仍写满时淘汰最久未命中的条目"""
+        self._sync_version(version)
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+            self._entries.clear()
+            self._vectors = np.empty(
+                (self.max_entries, vector.shape[0]), dtype=np.float32
+            )
+
+        now = self._clock()
+        self._purge_expired(now)
+        if len(self._entries) >= self.max_entries:
+            oldest = min(
+                range(len(self._entries)), key=lambda i: self._entries[i].last_hit
+            )
+            self._remove(oldest)
+
+        self._vectors[len(self._entries)] = vector
+        self._entries.append(_Entry(question, copy.deepcopy(answer), now))
+        self._stats["stores"] += 1
+
+    def clear(self) -> int:
+        """清空缓存，返回清理的条目数"""
+        count = len(self._entries)
+        self._entries.clear()
+        self._vectors = None
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "knowledge_version": self._version,
+        }
+
+
+__all__ = ["SemanticAnswerCache"]
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 会话存储 - 空闲过期、单会话与全局内存上限、紧凑编码，可选Redis共享
+"""
+
+import asyncio
+from collections import OrderedDict
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import zlib
+
+from redis.exceptions import WatchError
+
+logger = logging.getLogger("aiops.session_store")
+
+# 编码格式标记：j为JSON，z为zlib压缩后的JSON
+_PLAIN = b"j"
+_COMPRESSED = b"z"
+COMPRESSION_THRESHOLD = 512  # 编码后超过该字节数才压缩
+MAX_MESSAGE_CHARS = 4000  # 单条历史消息保留的最大字符数
+RECENT_QUERY_LIMIT = 10
+MAX_UPDATE_RETRIES = 5  # Redis乐观锁冲突时的最大重试次数
+
+USER = "user"
+ASSISTANT = "assistant"
+
+
+def new_session_record(now: float, **fields: Any) -> Dict[str, Any]:
+    """新会话记录；history 中每条为 [角色, 内容, 时间戳(秒)]"""
+    return {
+        "created_at": now,
+        "last_activity": now,
+        "query_count": 0,
+        "message_count": 0,
+        "history": [],
+        "fields": {
+            "user_preferences": [],
+            "domain": None,
+            "mode": 1,
+            "status": "active",
+            **fields,
+        },
+    }
+
+
+def append_history(record: Dict[str, Any], role: str, content: str, now: float):
+    """追加一条历史消息并更新计数"""
+    record["history"].append([role, str(content)[:MAX_MESSAGE_CHARS], int(now)])
+    record["message_count"] += 1
+    if role == USER:
+        record["query_count"] += 1
+    record["last_activity"] = now
+
+
+def recent_queries(
+    record: Dict[str, Any], limit: int = RECENT_QUERY_LIMIT
+) -> List[str]:
+    """从历史中取最近的用户问题"""
+    queries = [content for role, content, _ in record["history"] if role == USER]
+    return queries[-limit:]
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    data = json.dumps(
+        record, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    if len(data) > COMPRESSION_THRESHOLD:
+        return _COMPRESSED + zlib.compress(data, 6)
+    return _PLAIN + data
+
+
+def decode_record(data: bytes) -> Dict[str, Any]:
+    marker, payload = data[:1], data[1:]
+    if marker == _COMPRESSED:
+        payload = zlib.decompress(payload)
+    return json.loads(payload.decode("utf-8"))
+
+
+class SessionStore:
+    """会话存储
+
+    会话以紧凑编码的字节保存：历史消息为短数组，较大的记录整体压缩。写入时
+    截断历史到 max_history 条，编码后仍超过 max_session_bytes 时继续丢弃最早的
+    消息。会话空闲 ttl 秒后过期。
+
+    配置 Redis 客户端时会话保存在 Redis 中（带过期时间），多个 worker 共享；
+    否则保存在进程内，按最近写入顺序淘汰，会话数不超过 max_sessions、
+    总字节数不超过 max_total_bytes。Redis 访问失败时临时使用进程内存储。
+
+    update 以原子方式完成读取-修改-写入（Redis 使用 WATCH/MULTI），并发请求不会
+    丢失彼此追加的历史。异步代码应使用 aget/aupdate，Redis 后端的同步调用会放到
+    线程中执行，不阻塞事件循环。
+    """
+
+    def __init__(
+        self,
+        ttl: int = 86400,
+        max_sessions: int = 10000,
+        max_history: int = 50,
+        max_session_bytes: int = 32768,
+        max_total_bytes: int = 64 * 1024 * 1024,
+        redis_client: Any = None,
+        key_prefix: str = "aiops:session:",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = max(1, int(ttl))
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_history = max(1, int(max_history))
+        self.max_session_bytes = max(256, int(max_session_bytes))
+        self.max_total_bytes = max(self.max_session_bytes, int(max_total_bytes))
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self._clock = clock
+        self._lock = threading.Lock()
+        # 会话ID -> (编码数据, 写入时间)，按写入时间从旧到新排列
+        self._sessions: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._stats = {
+            "reads": 0,
+            "writes": 0,
+            "expired": 0,
+            "evicted": 0,
+            "trimmed_messages": 0,
+            "update_conflicts": 0,
+            "redis_errors": 0,
+        }
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self.redis_client is not None else "memory"
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """读取会话记录，不存在或已过期时返回None"""
+        self._stats["reads"] += 1
+        data = None
+        if self.redis_client is not None:
+            try:
+                data = self.redis_client.get(self.key_prefix + session_id)
+                if data is not None:
+                    return decode_record(data)
+            except Exception as e:
+                self._redis_failed("读取", e)
+
+        with self._lock:
+            self._purge_expired()
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            data = entry[0]
+        return decode_record(data)
+
+    def save(self, session_id: str, record: Dict[str, Any]) -> None:
+        """写入会话记录并刷新过期时间"""
+        data = self._encode_within_limits(record)
+        self._stats["writes"] += 1
+        if self.redis_client is not None:
+            try:
+                self.redis_client.set(self.key_prefix + session_id, data, ex=self.ttl)
+                return
+            except Exception as e:
+                self._redis_failed("写入", e)
+
+        with self._lock:
+            self._save_local(session_id, data)
+
+    def update(
+        self,
+        session_id: str,
+        mutate: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """原子地读取、修改并写回会话记录
+
+        mutate 接收当前记录（不存在时为None）并返回新记录；Redis 上发生并发冲突时
+        会以最新记录重新调用，因此 mutate 只应基于传入的记录计算结果。
+        """
+        if self.redis_client is not None:
+            try:
+                return self._update_redis(session_id, mutate)
+            except Exception as e:
+                self._redis_failed("更新", e)
+
+        with self._lock:
+            self._purge_expired()
+            entry = self._sessions.get(session_id)
+            record = mutate(decode_record(entry[0]) if entry else None)
+            self._save_local(session_id, self._encode_within_limits(record))
+        self._stats["writes"] += 1
+        return record
+
+    def _update_redis(
+        self,
+        session_id: str,
+        mutate: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        key = self.key_prefix + session_id
+        with self.redis_client.pipeline() as pipe:
+            for _ in range(MAX_UPDATE_RETRIES):
+                try:
+                    pipe.watch(key)
+                    data = pipe.get(key)
+                    record = mutate(decode_record(data) if data is not None else None)
+                    encoded = self._encode_within_limits(record)
+                    pipe.multi()
+                    pipe.set(key, encoded, ex=self.ttl)
+                    pipe.execute()
+                    self._stats["writes"] += 1
+                    return record
+                except WatchError:
+                    # 其他worker在读取后修改了该会话，基于最新记录重试
+                    self._stats["update_conflicts"] += 1
+        raise RuntimeError(f"会话{session_id}并发更新冲突，已重试{MAX_UPDATE_RETRIES}次")
+
+    async def aget(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """异步读取会话记录"""
+        return await self._offload(self.get, session_id)
+
+    async def aupdate(
+        self,
+        session_id: str,
+        mutate: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """异步原子更新会话记录"""
+        return await self._offload(self.update, session_id, mutate)
+
+    async def _offload(self, func: Callable[..., Any], *args: Any) -> Any:
+        # 进程内存储只做内存操作，直接执行；Redis 调用放到线程中
+        if self.redis_client is None:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    def _save_local(self, session_id: str, data: bytes) -> None:
+        """写入进程内存储并按上限淘汰（调用方持有锁）"""
+        self._discard(session_id)
+        self._sessions[session_id] = (data, self._clock())
+        self._total_bytes += len(data)
+        self._purge_expired()
+        while self._sessions and (
+            len(self._sessions) > self.max_sessions
+            or self._total_bytes > self.max_total_bytes
+        ):
+            oldest = next(iter(self._sessions))
+            self._discard(oldest)
+            self._stats["evicted"] += 1
+
+    def delete(self, session_id: str) -> bool:
+        deleted = False
+        if self.redis_client is not None:
+            try:
+                deleted = bool(self.redis_client.delete(self.key_prefix + session_id))
+            except Exception as e:
+                self._redis_failed("删除", e)
+        with self._lock:
+            return self._discard(session_id) or deleted
+
+    def cleanup_expired(self, max_age: Optional[float] = None) -> int:
+        """清理进程内空闲超过 max_age 秒（默认ttl）的会话，Redis中的会话自动过期"""
+        with self._lock:
+            return self._purge_expired(max_age)
+
+    def _encode_within_limits(self, record: Dict[str, Any]) -> bytes:
+        history = record.get("history", [])
+        if len(history) > self.max_history:
+            self._stats["trimmed_messages"] += len(history) - self.max_history
+            record["history"] = history = history[-self.max_history :]
+
+        data = encode_record(record)
+        while len(data) > self.max_session_bytes and len(history) > 1:
+            # 每次丢弃约四分之一的最早消息，避免逐条重复编码
+            drop = max(1, len(history) // 4)
+            self._stats["trimmed_messages"] += drop
+            record["history"] = history = history[drop:]
+            data = encode_record(record)
+        if len(data) > self.max_session_bytes and history:
+            role, content, ts = history[-1]
+            history[-1] = [role, content[: self.max_session_bytes // 4], ts]
+            data = encode_record(record)
+        return data
+
+    def _discard(self, session_id: str) -> bool:
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        self._total_bytes -= len(entry[0])
+        return True
+
+    def _purge_expired(self, max_age: Optional[float] = None) -> int:
+        """从最早写入的会话开始清理过期会话（调用方持有锁）"""
+        cutoff = self._clock() - (self.ttl if max_age is None else max_age)
+        removed = 0
+        while self._sessions:
+            session_id, (_, saved_at) = next(iter(self._sessions.items()))
+            if saved_at > cutoff:
+                break
+            self._discard(session_id)
+            removed += 1
+        self._stats["expired"] += removed
+        return removed
+
+    def _redis_failed(self, action: str, error: Exception) -> None:
+        self._stats["redis_errors"] += 1
+        logger.warning(f"Redis会话{action}失败，使用进程内存储: {error}")
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "backend": self.backend,
+            "local_sessions": len(self._sessions),
+            "local_bytes": self._total_bytes,
+            "max_sessions": self.max_sessions,
+            "max_total_bytes": self.max_total_bytes,
+            "max_session_bytes": self.max_session_bytes,
+            "ttl": self.ttl,
+        }
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def _create_redis_client():
+    import redis
+
+    from app.config.settings import config
+
+    client = redis.Redis(
+        host=config.redis.host,
+        port=config.redis.port,
+        db=config.redis.db + 1,  # 与答案缓存共用db
+        password=config.redis.password or None,
+        socket_timeout=config.redis.socket_timeout,
+        socket_connect_timeout=config.redis.connection_timeout,
+        max_connections=config.redis.max_connections,
+        decode_responses=False,
+    )
+    client.ping()
+    return client
+
+
+def get_session_store() -> SessionStore:
+    """获取按配置创建的共享会话存储"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from app.config.settings import config
+
+                rag = config.rag
+                memory_limit_mb = getattr(rag, "session_memory_limit_mb", 64)
+                redis_client = None
+                if getattr(rag, "session_backend", "memory") == "redis":
+                    try:
+                        redis_client = _create_redis_client()
+                    except Exception as e:
+                        logger.warning(f"连接Redis会话存储失败，使用进程内存储: {e}")
+                _store = SessionStore(
+                    ttl=getattr(rag, "session_ttl", 86400),
+                    max_sessions=getattr(rag, "session_max_sessions", 10000),
+                    max_history=getattr(rag, "session_max_history", 50),
+                    max_session_bytes=getattr(rag, "session_max_bytes", 32768),
+                    max_total_bytes=memory_limit_mb * 1024 * 1024,
+                    redis_client=redis_client,
+                )
+    return _store
+
+
+__all__ = [
+    "SessionStore",
+    "append_history",
+    "decode_record",
+    "encode_record",
+    "get_session_store",
+    "new_session_record",
+    "recent_queries",
+]
@@ -9,7 +9,7 @@ Description: Kubernetes 客户端接口定义与空实现（Core层）
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Tuple
 
 
 class K8sClient(Protocol):
@@ -26,6 +26,14 @@ class K8sClient(Protocol):
         limit: int = 100,
     ) -> List[Dict]: ...
 
+    async def list_events_page(
+        self,
+        namespace: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        limit: int = 500,
+        continue_token: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]: ...
+
     async def get_pod(self, namespace: str, pod_name: str) -> Optional[Dict]: ...
 
     async def get_pod_logs(
@@ -65,6 +73,15 @@ class NullK8sClient:
     ) -> List[Dict]:
         return []
 
+    async def list_events_page(
+        self,
+        namespace: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        limit: int = 500,
+        continue_token: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        return [], None
+
     async def get_pod(self, namespace: str, pod_name: str) -> Optional[Dict]:
         return None
 
@@ -9,7 +9,38 @@ License: Apache 2.0
 Description: Core层LLM客户端接口定义与空实现
 """
 
-from typing import Any, Dict, List, Optional, Protocol, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Protocol, Union
+
+
+class LLMPriority(str, Enum):
+    """LLM请求优先级，按声明顺序从高到低"""
+
+    INTERACTIVE = "interactive"  # 智能助手对话
+    ANALYSIS = "analysis"  # 根因分析建议、自动修复分析、预测解读
+    BACKGROUND = "background"  # 预测报告等后台生成
+
+
+_current_priority: ContextVar[LLMPriority] = ContextVar(
+    "llm_priority", default=LLMPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def llm_priority(priority: Union[LLMPriority, str]) -> Iterator[None]:
+    """在上下文内（含其中创建的子任务）发起的LLM请求使用指定优先级"""
+    token = _current_priority.set(LLMPriority(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_llm_priority() -> LLMPriority:
+    """当前上下文的LLM请求优先级"""
+    return _current_priority.get()
 
 
 class LLMClient(Protocol):
@@ -26,6 +57,15 @@ class LLMClient(Protocol):
         use_task_model: bool = False,
     ) -> Union[str, Dict[str, Any]]: ...
 
+    def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_task_model: bool = False,
+    ) -> AsyncIterator[str]: ...
+
     # 扩展能力：部分Core模块会直接调用这些高阶方法
     async def analyze_k8s_problem(
         self,
@@ -60,6 +100,17 @@ class NullLLMClient:
     ) -> Union[str, Dict[str, Any]]:
         return ""
 
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_task_model: bool = False,
+    ) -> AsyncIterator[str]:
+        return
+        yield
+
     async def analyze_k8s_problem(
         self,
         deployment_yaml: str,
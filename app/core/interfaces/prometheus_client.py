@@ -25,6 +25,14 @@ class PrometheusClient(Protocol):
         step: str = "1m",
     ) -> Optional[pd.DataFrame]: ...
 
+    async def query_range_series(
+        self,
+        query: str,
+        start_time: datetime,
+        end_time: datetime,
+        step: str = "1m",
+    ) -> Optional[List[Dict[str, Any]]]: ...
+
     async def query_instant(
         self, query: str, timestamp: Optional[datetime] = None
     ) -> Optional[List[Dict]]: ...
@@ -49,6 +57,15 @@ class NullPrometheusClient:
     ) -> Optional[pd.DataFrame]:
         return None
 
+    async def query_range_series(
+        self,
+        query: str,
+        start_time: datetime,
+        end_time: datetime,
+        step: str = "1m",
+    ) -> Optional[List[Dict[str, Any]]]:
+        return None
+
     async def query_instant(
         self, query: str, timestamp: Optional[datetime] = None
     ) -> Optional[List[Dict]]:
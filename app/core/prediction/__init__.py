@@ -10,13 +10,20 @@ Description: Core层预测模块初始化文件
 """
 
 from .anomaly_detector import AnomalyDetector
+from .anomaly_detectors import (
+    EWMADetector,
+    IsolationForestDetector,
+    RobustZScoreDetector,
+    StreamingDetector,
+)
 from .cost_analyzer import CostAnalyzer
 from .feature_extractor import FeatureExtractor
 
 # AI增强预测组件
 from .intelligent_predictor import IntelligentPredictor
 from .intelligent_report_generator import IntelligentReportGenerator, ReportContext
-from .model_manager import ModelManager
+from .model_manager import ModelBundle, ModelManager
+from .model_registry import ModelRegistry, ModelVersion
 from .prediction_analyzer import PredictionAnalyzer
 from .prompt_templates import (
     PredictionPromptBuilder,
@@ -25,6 +32,7 @@ from .prompt_templates import (
     template_manager,
 )
 from .scaling_advisor import ScalingAdvisor
+from .stage_executor import Stage, StageExecutor
 from .unified_predictor import UnifiedPredictor
 
 __all__ = [
@@ -32,14 +40,23 @@ __all__ = [
     "UnifiedPredictor",
     "FeatureExtractor",
     "AnomalyDetector",
+    "IsolationForestDetector",
+    "StreamingDetector",
+    "EWMADetector",
+    "RobustZScoreDetector",
     "ScalingAdvisor",
     "CostAnalyzer",
     "ModelManager",
+    "ModelBundle",
+    "ModelRegistry",
+    "ModelVersion",
     # AI增强预测组件
     "IntelligentPredictor",
     "PredictionAnalyzer",
     "IntelligentReportGenerator",
     "ReportContext",
+    "Stage",
+    "StageExecutor",
     # 提示词模板组件
     "PromptTemplateManager",
     "PredictionPromptBuilder",
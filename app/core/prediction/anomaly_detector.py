@@ -9,90 +9,130 @@ License: Apache 2.0
 Description: AI-CloudOps异常检测器 - 检测预测数据中的异常
 """
 
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
 import logging
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy import stats
 
+from app.core.prediction.anomaly_detectors import (
+    STREAMING_DETECTORS,
+    IsolationForestDetector,
+    StreamingDetector,
+    run_streaming_detection,
+)
 from app.models import AnomalyPrediction, PredictionDataPoint
 
 logger = logging.getLogger("aiops.core.anomaly_detector")
 
+DetectionMethod = Callable[[np.ndarray, float], Tuple[List[int], np.ndarray]]
+
 
 class AnomalyDetector:
     """异常检测器"""
 
     def __init__(self):
-        self.methods = {
+        from app.config.settings import config
+
+        self._config = config.prediction.anomaly_detection_config or {}
+        isolation_config = self._config.get("isolation_forest", {})
+        streaming_config = self._config.get("streaming", {})
+
+        self._isolation = IsolationForestDetector(
+            n_estimators=isolation_config.get("n_estimators", 100),
+            max_samples=isolation_config.get("max_samples", 256),
+            refit_interval=isolation_config.get("refit_interval", 3600),
+        )
+        self._streaming_params = {
+            "ewma": {
+                "alpha": streaming_config.get("ewma_alpha", 0.1),
+                "warmup": streaming_config.get("warmup", 10),
+            },
+            "robust_zscore": {
+                "step": streaming_config.get("robust_step", 0.05),
+                "warmup": streaming_config.get("warmup", 10),
+            },
+        }
+
+        # 流式检测状态：序列键 -> (检测器, 最后处理的时间戳, 连续异常数)
+        self._streams: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._max_streams = streaming_config.get("max_series", 1000)
+
+        self.methods: Dict[str, DetectionMethod] = {
             "zscore": self._zscore_detection,
             "iqr": self._iqr_detection,
             "isolation": self._isolation_forest_detection,
             "mad": self._mad_detection,
+            "ewma": self._ewma_detection,
+            "robust_zscore": self._robust_zscore_detection,
         }
 
+    def register_method(self, name: str, method: DetectionMethod) -> None:
+        """注册自定义检测方法，签名为 (values, sensitivity) -> (下标, 分数)"""
+        self.methods[name] = method
+
     async def detect_anomalies(
         self,
         predictions: List[PredictionDataPoint],
         sensitivity: float = None,
         method: str = None,
+        metric_key: Optional[str] = None,
     ) -> List[AnomalyPrediction]:
-        """检测预测数据中的异常"""
+        """检测预测数据中的异常
+
+        metric_key 仅用于 isolation 方法，按指标复用已训练的模型。
+        """
 
         if not predictions:
             return []
 
         try:
-            # 从配置文件获取默认值
-            from app.config.settings import config
-
-            anomaly_config = getattr(config.prediction, "anomaly_detection", {})
-
             # 使用传入值或配置文件默认值
             if sensitivity is None:
-                sensitivity = anomaly_config.get("default_sensitivity", 0.8)
+                sensitivity = self._config.get("default_sensitivity", 0.8)
             if method is None:
-                method = anomaly_config.get("default_method", "zscore")
+                method = self._config.get("default_method", "zscore")
 
             # 提取预测值
             values = np.array([p.predicted_value for p in predictions])
             timestamps = [p.timestamp for p in predictions]
 
-            # 选择检测方法
-            detection_method = self.methods.get(method, self._zscore_detection)
-
             # 执行异常检测
-            anomaly_indices, anomaly_scores = detection_method(values, sensitivity)
-
-            # 构建异常预测结果
-            anomalies = []
-            for idx in anomaly_indices:
-                # 计算期望值（使用邻近点的平均值）
-                expected_value = self._calculate_expected_value(values, idx)
-
-                # 评估影响等级
-                impact_level = self._assess_impact_level(
-                    values[idx], expected_value, anomaly_scores[idx]
+            if method == "isolation":
+                # 训练IsolationForest耗时较长，放到线程中避免阻塞事件循环
+                anomaly_indices, anomaly_scores = await asyncio.to_thread(
+                    self._isolation_forest_detection, values, sensitivity, metric_key
                 )
+            else:
+                detection_method = self.methods.get(method, self._zscore_detection)
+                anomaly_indices, anomaly_scores = detection_method(values, sensitivity)
 
-                # 确定异常类型
-                anomaly_type = self._determine_anomaly_type(
-                    values[idx], expected_value, idx, values
-                )
+            # 构建异常预测结果（期望值、影响等级、异常类型一次性向量化计算）
+            indices = np.asarray(anomaly_indices, dtype=int)
+            expected_values, impact_levels, anomaly_types = self._classify_anomalies(
+                values, indices, np.asarray(anomaly_scores, dtype=float)[indices]
+            )
 
-                # 确保异常分数在0-1范围内
-                normalized_score = min(1.0, max(0.0, float(anomaly_scores[idx]) / 5.0))
+            # 确保异常分数在0-1范围内
+            normalized_scores = np.clip(
+                np.asarray(anomaly_scores, dtype=float)[indices] / 5.0, 0.0, 1.0
+            )
 
-                anomaly = AnomalyPrediction(
+            anomalies = [
+                AnomalyPrediction(
                     timestamp=timestamps[idx],
-                    anomaly_score=normalized_score,
-                    anomaly_type=anomaly_type,
-                    impact_level=impact_level,
+                    anomaly_score=float(normalized_scores[i]),
+                    anomaly_type=str(anomaly_types[i]),
+                    impact_level=str(impact_levels[i]),
                     predicted_value=float(values[idx]),
-                    expected_value=float(expected_value),
+                    expected_value=float(expected_values[i]),
                 )
-
-                anomalies.append(anomaly)
+                for i, idx in enumerate(indices)
+            ]
 
             return anomalies
 
@@ -144,12 +184,9 @@ class AnomalyDetector:
         upper_bound = q3 + k * iqr
 
         # 计算异常分数
-        scores = np.zeros(len(values))
-        for i, v in enumerate(values):
-            if v < lower_bound:
-                scores[i] = abs(v - lower_bound) / iqr
-            elif v > upper_bound:
-                scores[i] = abs(v - upper_bound) / iqr
+        distance = np.maximum(lower_bound - values, values - upper_bound)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(distance > 0, distance / iqr, 0.0)
 
         # 找出异常点
         anomaly_indices = np.where((values < lower_bound) | (values > upper_bound))[
@@ -159,15 +196,123 @@ class AnomalyDetector:
         return anomaly_indices, scores
 
     def _isolation_forest_detection(
+        self, values: np.ndarray, sensitivity: float, metric_key: Optional[str] = None
+    ) -> Tuple[List[int], np.ndarray]:
+        """Isolation Forest检测"""
+
+        return self._isolation.detect(values, sensitivity, metric_key)
+
+    def _ewma_detection(
         self, values: np.ndarray, sensitivity: float
     ) -> Tuple[List[int], np.ndarray]:
-        """简化版Isolation Forest检测"""
+        """EWMA检测（按时间顺序逐点打分）"""
 
-        # 这是一个简化实现
-        # 实际应用中应使用sklearn的IsolationForest
+        return run_streaming_detection(
+            self._new_streaming_detector("ewma"), values, sensitivity
+        )
+
+    def _robust_zscore_detection(
+        self, values: np.ndarray, sensitivity: float
+    ) -> Tuple[List[int], np.ndarray]:
+        """流式鲁棒z-score检测（按时间顺序逐点打分）"""
+
+        return run_streaming_detection(
+            self._new_streaming_detector("robust_zscore"), values, sensitivity
+        )
+
+    def _new_streaming_detector(self, method: str) -> StreamingDetector:
+        return STREAMING_DETECTORS[method](**self._streaming_params[method])
+
+    def detect_stream(
+        self,
+        series_key: str,
+        samples: List[Dict[str, Any]],
+        sensitivity: float = None,
+        method: str = "ewma",
+    ) -> List[AnomalyPrediction]:
+        """对实时序列做增量异常检测
+
+        samples 为 {"timestamp", "value"} 列表（与Prometheus历史数据格式一致），
+        同一 series_key 的状态跨调用保留，只处理比上次更新的样本，每个样本O(1)。
+        """
+
+        if method not in STREAMING_DETECTORS:
+            from app.common.exceptions import ValidationError
+
+            raise ValidationError("method", f"不支持的流式检测方法: {method}")
+
+        if sensitivity is None:
+            sensitivity = self._config.get("default_sensitivity", 0.8)
+
+        stream_key = f"{method}:{series_key}"
+        stream = self._streams.get(stream_key)
+        if stream is None:
+            stream = [self._new_streaming_detector(method), None, 0]
+            self._streams[stream_key] = stream
+            while len(self._streams) > self._max_streams:
+                self._streams.popitem(last=False)
+        self._streams.move_to_end(stream_key)
+
+        detector, last_timestamp, run_length = stream
+        anomaly_times: List[datetime] = []
+        anomaly_values: List[float] = []
+        expected_values: List[float] = []
+        anomaly_scores: List[float] = []
+        sustained: List[bool] = []
+
+        for sample in samples:
+            timestamp = sample["timestamp"]
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            if last_timestamp is not None and timestamp <= last_timestamp:
+                continue
+            last_timestamp = timestamp
+
+            value = float(sample["value"])
+            expected = detector.expected
+            score = detector.update(value)
+
+            if detector.is_anomaly(score, sensitivity):
+                run_length += 1
+                anomaly_times.append(timestamp)
+                anomaly_values.append(value)
+                expected_values.append(expected)
+                anomaly_scores.append(score)
+                sustained.append(run_length >= 3)
+            else:
+                run_length = 0
 
-        # 使用MAD作为简化方案
-        return self._mad_detection(values, sensitivity)
+        stream[1], stream[2] = last_timestamp, run_length
+
+        if not anomaly_times:
+            return []
+
+        values = np.array(anomaly_values)
+        expected_arr = np.array(expected_values)
+        scores = np.array(anomaly_scores)
+        impact_levels = self._assess_impact_levels(values, expected_arr, scores)
+        base_types = np.where(values > expected_arr, "spike", "dip")
+
+        return [
+            AnomalyPrediction(
+                timestamp=anomaly_times[i],
+                anomaly_score=float(min(1.0, scores[i] / 5.0)),
+                anomaly_type=("sustained_" if sustained[i] else "") + base_types[i],
+                impact_level=str(impact_levels[i]),
+                predicted_value=float(values[i]),
+                expected_value=float(expected_arr[i]),
+            )
+            for i in range(len(anomaly_times))
+        ]
+
+    def reset_stream(self, series_key: Optional[str] = None) -> None:
+        """清除流式检测状态"""
+
+        if series_key is None:
+            self._streams.clear()
+            return
+        for method in STREAMING_DETECTORS:
+            self._streams.pop(f"{method}:{series_key}", None)
 
     def _mad_detection(
         self, values: np.ndarray, sensitivity: float
@@ -195,115 +340,129 @@ class AnomalyDetector:
 
         return anomaly_indices, scores
 
-    def _calculate_expected_value(self, values: np.ndarray, idx: int) -> float:
-        """计算期望值"""
+    def _classify_anomalies(
+        self, values: np.ndarray, indices: np.ndarray, scores: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """批量计算异常点的期望值、影响等级和异常类型"""
 
-        # 使用邻近点的中位数作为期望值
-        window_size = 5
-        start = max(0, idx - window_size)
-        end = min(len(values), idx + window_size + 1)
+        if len(indices) == 0:
+            empty = np.array([], dtype=object)
+            return np.array([], dtype=float), empty, empty
 
-        # 排除当前点
-        neighbor_values = np.concatenate([values[start:idx], values[idx + 1 : end]])
+        anomaly_values = values[indices]
+        expected = self._calculate_expected_values(values, indices)
+        impact_levels = self._assess_impact_levels(anomaly_values, expected, scores)
+        anomaly_types = self._determine_anomaly_types(
+            values, indices, anomaly_values, expected
+        )
+        return expected, impact_levels, anomaly_types
 
-        if len(neighbor_values) > 0:
-            return np.median(neighbor_values)
-        else:
-            return np.median(values)
+    def _calculate_expected_values(
+        self, values: np.ndarray, indices: np.ndarray
+    ) -> np.ndarray:
+        """计算期望值：邻近点（前后各5个，不含自身）的中位数"""
 
-    def _assess_impact_level(
-        self, anomaly_value: float, expected_value: float, anomaly_score: float
-    ) -> str:
+        window_size = 5
+        padded = np.pad(
+            values.astype(float), window_size, mode="constant", constant_values=np.nan
+        )
+        windows = sliding_window_view(padded, 2 * window_size + 1)[indices].copy()
+        windows[:, window_size] = np.nan
+
+        has_neighbor = ~np.all(np.isnan(windows), axis=1)
+        expected = np.full(len(indices), np.median(values), dtype=float)
+        if has_neighbor.any():
+            expected[has_neighbor] = np.nanmedian(windows[has_neighbor], axis=1)
+        return expected
+
+    def _assess_impact_levels(
+        self,
+        anomaly_values: np.ndarray,
+        expected_values: np.ndarray,
+        anomaly_scores: np.ndarray,
+    ) -> np.ndarray:
         """评估异常影响等级"""
 
         # 计算偏离程度
-        if expected_value != 0:
-            deviation_ratio = abs(anomaly_value - expected_value) / expected_value
-        else:
-            deviation_ratio = abs(anomaly_value)
+        nonzero = expected_values != 0
+        deviation_ratio = np.abs(anomaly_values)
+        deviation_ratio[nonzero] = (
+            np.abs(anomaly_values[nonzero] - expected_values[nonzero])
+            / expected_values[nonzero]
+        )
 
         # 综合考虑异常分数和偏离程度
-        combined_score = (anomaly_score + deviation_ratio * 10) / 2
-
-        if combined_score > 5:
-            return "critical"
-        elif combined_score > 3:
-            return "high"
-        elif combined_score > 1.5:
-            return "medium"
-        else:
-            return "low"
-
-    def _determine_anomaly_type(
-        self, anomaly_value: float, expected_value: float, idx: int, values: np.ndarray
-    ) -> str:
-        """确定异常类型"""
-
-        # 判断是峰值还是谷值
-        if anomaly_value > expected_value:
-            base_type = "spike"
-        else:
-            base_type = "dip"
-
-        # 检查是否为持续异常
-        if self._is_sustained_anomaly(idx, values):
-            return f"sustained_{base_type}"
+        combined_score = (anomaly_scores + deviation_ratio * 10) / 2
 
-        # 检查是否为突变
-        if self._is_sudden_change(idx, values):
-            return f"sudden_{base_type}"
+        return np.select(
+            [combined_score > 5, combined_score > 3, combined_score > 1.5],
+            ["critical", "high", "medium"],
+            default="low",
+        ).astype(object)
 
-        # 检查是否为渐变
-        if self._is_gradual_change(idx, values):
-            return f"gradual_{base_type}"
-
-        return base_type
-
-    def _is_sustained_anomaly(self, idx: int, values: np.ndarray) -> bool:
-        """检查是否为持续异常"""
-
-        if idx < 2 or idx >= len(values) - 2:
-            return False
-
-        # 检查前后的值是否也异常
-        threshold = np.std(values) * 2
-        mean_val = np.mean(values)
-
-        sustained = True
-        for i in range(max(0, idx - 2), min(len(values), idx + 3)):
-            if abs(values[i] - mean_val) < threshold:
-                sustained = False
-                break
-
-        return sustained
-
-    def _is_sudden_change(self, idx: int, values: np.ndarray) -> bool:
-        """检查是否为突变"""
-
-        if idx < 1 or idx >= len(values) - 1:
-            return False
-
-        # 计算变化率
-        prev_change = abs(values[idx] - values[idx - 1])
-        next_change = abs(values[idx + 1] - values[idx])
-
-        avg_change = np.mean(np.abs(np.diff(values)))
-
-        # 如果变化率远大于平均值，则为突变
-        return prev_change > avg_change * 3 or next_change > avg_change * 3
-
-    def _is_gradual_change(self, idx: int, values: np.ndarray) -> bool:
-        """检查是否为渐变"""
-
-        if idx < 3 or idx >= len(values) - 3:
-            return False
+    def _determine_anomaly_types(
+        self,
+        values: np.ndarray,
+        indices: np.ndarray,
+        anomaly_values: np.ndarray,
+        expected_values: np.ndarray,
+    ) -> np.ndarray:
+        """确定异常类型：持续 > 突变 > 渐变，前缀加在 spike/dip 上"""
 
-        # 检查趋势的单调性
-        window = values[idx - 3 : idx + 4]
-        diffs = np.diff(window)
+        # 判断是峰值还是谷值
+        base_types = np.where(anomaly_values > expected_values, "spike", "dip").astype(
+            object
+        )
 
-        # 如果差值符号一致，说明是渐变
-        return np.all(diffs > 0) or np.all(diffs < 0)
+        sustained = self._sustained_mask(values)[indices]
+        sudden = self._sudden_change_mask(values)[indices]
+        gradual = self._gradual_change_mask(values)[indices]
+
+        prefixes = np.select(
+            [sustained, sudden, gradual],
+            ["sustained_", "sudden_", "gradual_"],
+            default="",
+        ).astype(object)
+        return prefixes + base_types
+
+    def _sustained_mask(self, values: np.ndarray) -> np.ndarray:
+        """持续异常：前后各2个点都偏离均值超过2倍标准差"""
+
+        n = len(values)
+        mask = np.zeros(n, dtype=bool)
+        if n < 5:
+            return mask
+
+        deviated = np.abs(values - np.mean(values)) >= np.std(values) * 2
+        mask[2 : n - 2] = sliding_window_view(deviated, 5).all(axis=1)
+        return mask
+
+    def _sudden_change_mask(self, values: np.ndarray) -> np.ndarray:
+        """突变：与前一点或后一点的变化量超过平均变化量的3倍"""
+
+        n = len(values)
+        mask = np.zeros(n, dtype=bool)
+        if n < 3:
+            return mask
+
+        changes = np.abs(np.diff(values))
+        limit = np.mean(changes) * 3
+        mask[1 : n - 1] = (changes[:-1] > limit) | (changes[1:] > limit)
+        return mask
+
+    def _gradual_change_mask(self, values: np.ndarray) -> np.ndarray:
+        """渐变：前后各3个点构成的窗口严格单调"""
+
+        n = len(values)
+        mask = np.zeros(n, dtype=bool)
+        if n < 7:
+            return mask
+
+        diffs = np.diff(values)
+        rising = sliding_window_view(diffs > 0, 6).all(axis=1)
+        falling = sliding_window_view(diffs < 0, 6).all(axis=1)
+        mask[3 : n - 3] = rising | falling
+        return mask
 
     def analyze_anomaly_patterns(
         self, anomalies: List[AnomalyPrediction]
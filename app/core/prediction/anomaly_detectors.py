@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps异常检测算法 - IsolationForest与O(1)流式检测器
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+logger = logging.getLogger("aiops.core.anomaly_detectors")
+
+
+def sensitivity_threshold(base: float, sensitivity: float) -> float:
+    """与现有检测方法一致的阈值换算：灵敏度越高，阈值越低"""
+    return base * (1.5 - sensitivity)
+
+
+class IsolationForestDetector:
+    """IsolationForest异常检测
+
+    以 [取值, 一阶差分] 作为二维特征，既能发现离群值也能发现突变。
+    传入 metric_key 时按指标缓存已训练的模型，超过 refit_interval 后重新训练；
+    未传入时只在当前序列上临时训练。训练耗时较长，调用方可在线程中执行，
+    模型缓存由锁保护。
+    """
+
+    # 孤立分数（score_samples取反）在0.5附近为正常，越接近1越异常
+    SCORE_BASELINE = 0.5
+    SCORE_SCALE = 10.0
+
+    def __init__(
+        self,
+        n_estimators: int = 100,
+        max_samples: int = 256,
+        refit_interval: float = 3600.0,
+        max_cached_models: int = 128,
+        random_state: int = 42,
+    ) -> None:
+        self.n_estimators = n_estimators
+        self.max_samples = max_samples
+        self.refit_interval = refit_interval
+        self.max_cached_models = max_cached_models
+        self.random_state = random_state
+        self._models: "OrderedDict[str, Tuple[IsolationForest, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _features(values: np.ndarray) -> np.ndarray:
+        diffs = np.diff(values, prepend=values[:1])
+        return np.column_stack([values, diffs])
+
+    def fit(self, metric_key: Optional[str], values: np.ndarray) -> IsolationForest:
+        """训练模型，提供 metric_key 时写入缓存"""
+        model = IsolationForest(
+            n_estimators=self.n_estimators,
+            max_samples=min(self.max_samples, len(values)),
+            random_state=self.random_state,
+        ).fit(self._features(values))
+
+        if metric_key is not None:
+            with self._lock:
+                self._models[metric_key] = (model, time.monotonic())
+                self._models.move_to_end(metric_key)
+                while len(self._models) > self.max_cached_models:
+                    self._models.popitem(last=False)
+        return model
+
+    def _model_for(self, metric_key: Optional[str], values: np.ndarray):
+        if metric_key is not None:
+            with self._lock:
+                cached = self._models.get(metric_key)
+                if cached and time.monotonic() - cached[1] < self.refit_interval:
+                    self._models.move_to_end(metric_key)
+                    return cached[0]
+        return self.fit(metric_key, values)
+
+    def detect(
+        self,
+        values: np.ndarray,
+        sensitivity: float,
+        metric_key: Optional[str] = None,
+    ) -> Tuple[List[int], np.ndarray]:
+        """返回异常下标和与z-score同量级的异常分数"""
+        if len(values) < 8:
+            return [], np.zeros(len(values))
+
+        model = self._model_for(metric_key, values)
+        isolation = -model.score_samples(self._features(values))
+        scores = np.maximum(0.0, isolation - self.SCORE_BASELINE) * self.SCORE_SCALE
+
+        # 灵敏度0.8时孤立分数超过0.64判为异常
+        threshold = sensitivity_threshold(0.2, sensitivity) * self.SCORE_SCALE
+        return np.where(scores > threshold)[0].tolist(), scores
+
+    def invalidate(self, metric_key: Optional[str] = None) -> None:
+        """清除缓存的模型"""
+        with self._lock:
+            if metric_key is None:
+                self._models.clear()
+            else:
+                self._models.pop(metric_key, None)
+
+
+class StreamingDetector(ABC):
+    """流式检测器基类：每个新样本O(1)更新状态并给出异常分数"""
+
+    threshold_base = 3.0
+
+    def __init__(self, warmup: int = 10) -> None:
+        self.warmup = warmup
+        self.count = 0
+
+    @abstractmethod
+    def update(self, value: float) -> float:
+        """吸收一个新样本，返回该样本的异常分数（预热期内为0）"""
+
+    @property
+    @abstractmethod
+    def expected(self) -> float:
+        """当前状态下的期望值"""
+
+    def is_anomaly(self, score: float, sensitivity: float) -> bool:
+        return score > sensitivity_threshold(self.threshold_base, sensitivity)
+
+    def state(self) -> Dict[str, Any]:
+        return {"count": self.count}
+
+
+class EWMADetector(StreamingDetector):
+    """指数加权均值/方差检测器
+
+    先用更新前的均值和方差给新样本打分，再更新状态，避免异常值稀释自身分数。
+    """
+
+    def __init__(self, alpha: float = 0.1, warmup: int = 10) -> None:
+        super().__init__(warmup)
+        self.alpha = alpha
+        self.mean = 0.0
+        self.var = 0.0
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            return 0.0
+
+        deviation = value - self.mean
+        std = math.sqrt(self.var)
+        if std > 1e-10:
+            score = abs(deviation) / std
+        else:
+            score = 0.0 if abs(deviation) < 1e-10 else self.threshold_base * 2
+
+        increment = self.alpha * deviation
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + deviation * increment)
+
+        return score if self.count > self.warmup else 0.0
+
+    @property
+    def expected(self) -> float:
+        return self.mean
+
+    def state(self) -> Dict[str, Any]:
+        return {"count": self.count, "mean": self.mean, "std": math.sqrt(self.var)}
+
+
+class RobustZScoreDetector(StreamingDetector):
+    """流式鲁棒z-score检测器
+
+    预热样本上精确计算中位数和MAD，之后用随机逼近在线更新（每步按符号移动
+    当前尺度的固定比例），单个样本O(1)且对离群值不敏感。
+    分数为修正z-score：0.6745 * |x - median| / MAD。
+    """
+
+    threshold_base = 3.5
+
+    def __init__(self, step: float = 0.05, warmup: int = 10) -> None:
+        super().__init__(max(warmup, 1))
+        self.step = step
+        self.median = 0.0
+        self.mad = 0.0
+        self._warmup_values: List[float] = []
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count <= self.warmup:
+            self._warmup_values.append(value)
+            if self.count == self.warmup:
+                self.median = float(np.median(self._warmup_values))
+                self.mad = float(
+                    np.median(np.abs(np.array(self._warmup_values) - self.median))
+                )
+                self._warmup_values = []
+            return 0.0
+
+        deviation = abs(value - self.median)
+        if self.mad > 1e-10:
+            score = 0.6745 * deviation / self.mad
+        else:
+            score = 0.0 if deviation < 1e-10 else self.threshold_base * 2
+
+        # 步长与当前尺度成比例，收敛速度与数据量级无关
+        scale = max(self.mad, abs(self.median) * 1e-3, 1e-6)
+        if value > self.median:
+            self.median += self.step * scale
+        elif value < self.median:
+            self.median -= self.step * scale
+        self.mad = max(
+            0.0, self.mad + self.step * scale * (1.0 if deviation > self.mad else -1.0)
+        )
+
+        return score
+
+    @property
+    def expected(self) -> float:
+        return self.median
+
+    def state(self) -> Dict[str, Any]:
+        return {"count": self.count, "median": self.median, "mad": self.mad}
+
+
+STREAMING_DETECTORS = {
+    "ewma": EWMADetector,
+    "robust_zscore": RobustZScoreDetector,
+}
+
+
+def run_streaming_detection(
+    detector: StreamingDetector, values: np.ndarray, sensitivity: float
+) -> Tuple[List[int], np.ndarray]:
+    """把流式检测器按顺序应用到整段序列上"""
+    scores = np.fromiter(
+        (detector.update(float(v)) for v in values), dtype=float, count=len(values)
+    )
+    threshold = sensitivity_threshold(detector.threshold_base, sensitivity)
+    return np.where(scores > threshold)[0].tolist(), scores
+
+
+__all__ = [
+    "IsolationForestDetector",
+    "StreamingDetector",
+    "EWMADetector",
+    "RobustZScoreDetector",
+    "STREAMING_DETECTORS",
+    "run_streaming_detection",
+    "sensitivity_threshold",
+]
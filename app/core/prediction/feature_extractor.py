@@ -135,6 +135,46 @@ class FeatureExtractor:
             # 返回默认特征
             return self._get_default_features(prediction_type, current_value)
 
+    async def extract_features_batch(
+        self,
+        timestamp: datetime,
+        current_values: List[float],
+        historical_data_list: List[List[Dict[str, Any]]],
+        prediction_type: PredictionType,
+    ) -> pd.DataFrame:
+        """批量提取特征，每个目标一行，时间特征只计算一次"""
+
+        required_features = self.feature_config[prediction_type]
+        metric_name = prediction_type.value.upper()
+        time_features = self._extract_time_features(timestamp)
+        rows = []
+
+        for current_value, historical_data in zip(current_values, historical_data_list):
+            try:
+                features = {
+                    **time_features,
+                    **self._extract_historical_features(
+                        current_value, historical_data, prediction_type
+                    ),
+                    **self._extract_statistical_features(
+                        current_value, historical_data, prediction_type
+                    ),
+                }
+                features[metric_name] = current_value
+                for feature in required_features:
+                    if feature not in features:
+                        features[feature] = self._get_default_value(
+                            feature, current_value
+                        )
+            except Exception as e:
+                logger.error(f"批量特征提取失败: {str(e)}")
+                features = self._get_default_features(
+                    prediction_type, current_value
+                ).iloc[0].to_dict()
+            rows.append(features)
+
+        return pd.DataFrame(rows, columns=required_features)
+
     def _extract_time_features(self, timestamp: datetime) -> Dict[str, float]:
         """提取时间相关特征"""
 
@@ -16,12 +16,19 @@ import logging
 from typing import Any, Dict, List, Optional, Union
 
 from app.common.exceptions import PredictionError
-from app.core.interfaces.llm_client import LLMClient, NullLLMClient
+from app.config.settings import config as app_config
+from app.core.interfaces.llm_client import (
+    LLMClient,
+    LLMPriority,
+    NullLLMClient,
+    llm_priority,
+)
 from app.core.prediction.intelligent_report_generator import (
     IntelligentReportGenerator,
     ReportContext,
 )
 from app.core.prediction.prediction_analyzer import PredictionAnalyzer
+from app.core.prediction.stage_executor import Stage, StageExecutor
 from app.core.prediction.unified_predictor import UnifiedPredictor
 from app.models import PredictionDataPoint, PredictionGranularity, PredictionType
 
@@ -42,6 +49,16 @@ class IntelligentPredictor:
         self.analyzer = PredictionAnalyzer(self.llm_service)
         self.report_generator = IntelligentReportGenerator(self.llm_service)
 
+        # 阶段超时与整体预算（秒）
+        pipeline_config = app_config.prediction.ai_pipeline_config
+        self.stage_timeouts: Dict[str, float] = dict(
+            pipeline_config.get("stage_timeouts", {})
+        )
+        self.stage_budget: Optional[float] = pipeline_config.get("budget")
+        # 解读与洞察是否等待上下文分析：开启时结论基于历史上下文（两者之间仍并行），
+        # 关闭时与上下文分析并行
+        self.ground_stages: bool = bool(pipeline_config.get("ground_stages", True))
+
         # 状态管理
         self._initialized = False
         self._analysis_cache = {}  # 分析结果缓存
@@ -81,137 +98,107 @@ class IntelligentPredictor:
         try:
             logger.info(f"开始执行增强预测分析 - ID: {analysis_id}")
 
-            # 阶段1: 预测前 - 分析历史上下文
-            context_analysis = None
-            if enable_ai_insights:
-                logger.info("阶段1: 分析历史数据上下文")
-                context_analysis = await self.analyzer.analyze_historical_context(
+            async def forecast_stage(_: Dict[str, Any]):
+                predictions = await self.unified_predictor.predict(
                     prediction_type=prediction_type,
                     current_value=current_value,
                     historical_data=historical_data,
+                    prediction_hours=prediction_hours,
+                    granularity=granularity,
+                    consider_pattern=consider_pattern,
                 )
-                logger.debug(
-                    f"上下文分析完成: {context_analysis.get('status', 'unknown')}"
+                if not predictions:
+                    raise PredictionError("预测计算失败，未生成预测数据")
+                logger.info(f"预测计算完成，生成{len(predictions)}个预测点")
+                base_results = await self._build_base_prediction_results(
+                    prediction_type=prediction_type,
+                    current_value=current_value,
+                    predictions=predictions,
+                    prediction_hours=prediction_hours,
+                    granularity=granularity,
                 )
+                return predictions, base_results
 
-            # 阶段2: 执行预测
-            logger.info("阶段2: 执行预测计算")
-            predictions = await self.unified_predictor.predict(
-                prediction_type=prediction_type,
-                current_value=current_value,
-                historical_data=historical_data,
-                prediction_hours=prediction_hours,
-                granularity=granularity,
-                consider_pattern=consider_pattern,
-            )
-
-            if not predictions:
-                raise PredictionError("预测计算失败，未生成预测数据")
-
-            logger.info(f"预测计算完成，生成{len(predictions)}个预测点")
-
-            # 构建基础预测结果
-            base_prediction_results = await self._build_base_prediction_results(
-                prediction_type=prediction_type,
-                current_value=current_value,
-                predictions=predictions,
-                prediction_hours=prediction_hours,
-                granularity=granularity,
-            )
-
-            # 阶段3: 预测后 - 解读和分析
-            interpretation = None
-            insights = []
-
-            if enable_ai_insights:
-                logger.info("阶段3: 解读预测结果")
-
-                # 执行预测解读
-                interpretation = await self.analyzer.interpret_prediction_results(
+            async def context_stage(_: Dict[str, Any]):
+                return await self.analyzer.analyze_historical_context(
                     prediction_type=prediction_type,
-                    prediction_results=base_prediction_results,
-                    analysis_context=context_analysis,
-                )
-                logger.debug(
-                    f"预测解读完成: {interpretation.get('status', 'unknown') if isinstance(interpretation, dict) else 'string_response'}"
+                    current_value=current_value,
+                    historical_data=historical_data,
                 )
 
-                # 生成洞察（包含解读结果）
-                insights = await self.analyzer.generate_insights(
+            async def interpretation_stage(results: Dict[str, Any]):
+                # 未等待上下文分析时 results 中没有 context，量化指标只依赖预测结果
+                return await self.analyzer.interpret_prediction_results(
                     prediction_type=prediction_type,
-                    prediction_results=base_prediction_results,
-                    context_analysis=context_analysis or {},
-                    interpretation=interpretation or {},
-                )
-                logger.debug(f"生成洞察: {len(insights)}条")
-
-            # 阶段4: 生成报告
-            ai_report = None
-            if enable_ai_insights and context_analysis and interpretation:
-                logger.info("阶段4: 生成分析报告")
-
-                # 安全获取字典数据，防止类型错误
-                safe_base_results = (
-                    base_prediction_results
-                    if isinstance(base_prediction_results, dict)
-                    else {}
-                )
-                safe_interpretation = (
-                    interpretation if isinstance(interpretation, dict) else {}
+                    prediction_results=results["forecast"][1],
+                    analysis_context=results.get("context"),
                 )
 
-                report_context = ReportContext(
+            async def insights_stage(results: Dict[str, Any]):
+                # 与预测解读并行，只结合上下文分析
+                return await self.analyzer.generate_insights(
                     prediction_type=prediction_type,
-                    analysis_context=context_analysis,
-                    prediction_results=safe_base_results,
-                    interpretation=safe_interpretation,
-                    insights=insights,
-                    scaling_recommendations=safe_base_results.get(
-                        "scaling_recommendations", []
-                    ),
-                    cost_analysis=safe_base_results.get("cost_analysis"),
-                    quantitative_metrics=safe_interpretation.get(
-                        "quantitative_metrics", {}
-                    ),
+                    prediction_results=results["forecast"][1],
+                    context_analysis=results.get("context") or {},
+                    interpretation={},
                 )
 
-                # 并行生成多种报告
-                report_tasks = [
-                    self.report_generator.generate_comprehensive_report(
-                        report_context, report_style
-                    ),
-                    self.report_generator.generate_executive_summary(report_context),
-                    self.report_generator.generate_action_plan(report_context),
-                ]
-
-                # 如果有成本分析，也生成成本优化报告
-                if base_prediction_results.get("cost_analysis"):
-                    report_tasks.append(
-                        self.report_generator.generate_cost_optimization_report(
-                            report_context
-                        )
-                    )
-
-                reports = await asyncio.gather(*report_tasks, return_exceptions=True)
+            async def reports_stage(results: Dict[str, Any]):
+                return await self._generate_reports(
+                    prediction_type,
+                    results["forecast"][1],
+                    results.get("context"),
+                    results.get("interpretation"),
+                    results.get("insights") or [],
+                    report_style,
+                )
 
-                ai_report = {
-                    "comprehensive_report": (
-                        reports[0] if not isinstance(reports[0], Exception) else None
-                    ),
-                    "executive_summary": (
-                        reports[1] if not isinstance(reports[1], Exception) else None
+            timeouts = self.stage_timeouts
+            stage_deps = ("forecast",)
+            if self.ground_stages:
+                stage_deps += ("context",)
+            stages = [
+                Stage(
+                    "forecast",
+                    forecast_stage,
+                    timeout=timeouts.get("forecast"),
+                    required=True,
+                )
+            ]
+            if enable_ai_insights:
+                stages += [
+                    Stage("context", context_stage, timeout=timeouts.get("context")),
+                    Stage(
+                        "interpretation",
+                        interpretation_stage,
+                        stage_deps,
+                        timeout=timeouts.get("interpretation"),
                     ),
-                    "action_plan": (
-                        reports[2] if not isinstance(reports[2], Exception) else None
+                    Stage(
+                        "insights",
+                        insights_stage,
+                        stage_deps,
+                        timeout=timeouts.get("insights"),
+                        fallback=[],
                     ),
-                    "cost_optimization": (
-                        reports[3]
-                        if len(reports) > 3 and not isinstance(reports[3], Exception)
-                        else None
+                    Stage(
+                        "reports",
+                        reports_stage,
+                        ("context", "interpretation", "insights"),
+                        timeout=timeouts.get("reports"),
                     ),
-                }
+                ]
 
-                logger.info("分析报告生成完成")
+            # 预测解读类LLM调用按分析优先级调度，报告生成在其中降为后台优先级
+            with llm_priority(LLMPriority.ANALYSIS):
+                results, stage_timings = await StageExecutor(
+                    stages, budget=self.stage_budget
+                ).run()
+            predictions, base_prediction_results = results["forecast"]
+            context_analysis = results.get("context")
+            interpretation = results.get("interpretation")
+            insights = results.get("insights") or []
+            ai_report = results.get("reports")
 
             # 构建完整响应
             end_time = datetime.now()
@@ -232,6 +219,7 @@ class IntelligentPredictor:
                 "ai_processing_stages": self._get_processing_stages_summary(
                     enable_ai_insights, context_analysis, interpretation, ai_report
                 ),
+                "stage_timings": stage_timings,
                 "data_quality_assessment": self._assess_overall_data_quality(
                     historical_data, predictions, interpretation
                 ),
@@ -259,6 +247,77 @@ class IntelligentPredictor:
                 str(e),
             )
 
+    async def _generate_reports(
+        self,
+        prediction_type: PredictionType,
+        base_prediction_results: Dict[str, Any],
+        context_analysis: Optional[Dict[str, Any]],
+        interpretation: Optional[Dict[str, Any]],
+        insights: List[str],
+        report_style: str,
+    ) -> Optional[Dict[str, Any]]:
+        """并行生成多种分析报告，缺少上下文或解读时跳过"""
+        if not context_analysis or not interpretation:
+            return None
+
+        logger.info("生成分析报告")
+
+        # 安全获取字典数据，防止类型错误
+        safe_base_results = (
+            base_prediction_results if isinstance(base_prediction_results, dict) else {}
+        )
+        safe_interpretation = interpretation if isinstance(interpretation, dict) else {}
+
+        report_context = ReportContext(
+            prediction_type=prediction_type,
+            analysis_context=context_analysis,
+            prediction_results=safe_base_results,
+            interpretation=safe_interpretation,
+            insights=insights,
+            scaling_recommendations=safe_base_results.get(
+                "scaling_recommendations", []
+            ),
+            cost_analysis=safe_base_results.get("cost_analysis"),
+            quantitative_metrics=safe_interpretation.get("quantitative_metrics", {}),
+        )
+
+        # 并行生成多种报告
+        report_tasks = [
+            self.report_generator.generate_comprehensive_report(
+                report_context, report_style
+            ),
+            self.report_generator.generate_executive_summary(report_context),
+            self.report_generator.generate_action_plan(report_context),
+        ]
+
+        # 如果有成本分析，也生成成本优化报告
+        if safe_base_results.get("cost_analysis"):
+            report_tasks.append(
+                self.report_generator.generate_cost_optimization_report(report_context)
+            )
+
+        # 报告生成为后台优先级，不与交互式对话争抢LLM并发名额
+        with llm_priority(LLMPriority.BACKGROUND):
+            reports = await asyncio.gather(*report_tasks, return_exceptions=True)
+
+        logger.info("分析报告生成完成")
+        return {
+            "comprehensive_report": (
+                reports[0] if not isinstance(reports[0], Exception) else None
+            ),
+            "executive_summary": (
+                reports[1] if not isinstance(reports[1], Exception) else None
+            ),
+            "action_plan": (
+                reports[2] if not isinstance(reports[2], Exception) else None
+            ),
+            "cost_optimization": (
+                reports[3]
+                if len(reports) > 3 and not isinstance(reports[3], Exception)
+                else None
+            ),
+        }
+
     async def predict_multi_dimension_with_correlation(
         self,
         prediction_configs: List[Dict[str, Any]],
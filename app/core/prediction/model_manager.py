@@ -9,6 +9,8 @@ License: Apache 2.0
 Description: AI-CloudOps模型管理器 - 管理多种预测模型的加载和使用
 """
 
+import asyncio
+from dataclasses import dataclass, replace
 from datetime import datetime
 import json
 import logging
@@ -23,11 +25,23 @@ import numpy as np
 warnings.filterwarnings("ignore", message="X does not have valid feature names")
 
 from app.config.settings import config
+from app.core.prediction.model_registry import ModelRegistry
 from app.models import ModelInfo, PredictionType
 
 logger = logging.getLogger("aiops.core.model_manager")
 
 
+@dataclass(frozen=True)
+class ModelBundle:
+    """某一预测类型当前生效的模型快照，热切换时整体替换"""
+
+    model: Any
+    scaler: Any
+    metadata: Dict[str, Any]
+    version: Optional[str] = None
+    source: str = "legacy"  # registry / legacy / adapted
+
+
 class ModelManager:
     """模型管理器"""
 
@@ -35,8 +49,17 @@ class ModelManager:
         self.models = {}
         self.scalers = {}
         self.metadata = {}
+        self.bundles: Dict[PredictionType, ModelBundle] = {}
         self.models_loaded = False
         self.model_paths = self._init_model_paths()
+        self.registry = ModelRegistry(config.prediction.model_registry_path)
+
+        # 模型验证在后台线程中执行，不阻塞启动和预测请求
+        self._validated: Dict[PredictionType, bool] = {}
+        self._validation_tasks: Dict[PredictionType, asyncio.Task] = {}
+        self._registry_markers: Dict[PredictionType, Optional[int]] = {}
+        self._reload_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
 
     def _init_model_paths(self) -> Dict[PredictionType, Dict[str, str]]:
         """初始化模型路径配置"""
@@ -95,12 +118,19 @@ class ModelManager:
                     success_count += 1
 
         self.models_loaded = success_count > 0
+        self._snapshot_registry_markers()
+        for pred_type in list(self.bundles):
+            self._schedule_validation(pred_type)
 
         if self.models_loaded:
             logger.info(f"模型管理器初始化完成，成功加载{success_count}个模型")
         else:
             logger.error("模型管理器初始化失败，无可用模型")
 
+        watch_interval = config.prediction.model_watch_interval
+        if watch_interval > 0:
+            self.start_watching(watch_interval)
+
         return self.models_loaded
 
     def _load_model_for_type(
@@ -108,76 +138,144 @@ class ModelManager:
     ) -> bool:
         """加载特定类型的模型"""
 
-        model_path = paths["model"]
-        scaler_path = paths["scaler"]
-        metadata_path = paths["metadata"]
-
-        # 检查文件是否存在
-        if not os.path.exists(model_path):
+        bundle = self._read_bundle(pred_type, paths)
+        if bundle is None:
             return False
 
+        self._install_bundle(pred_type, bundle)
+        return True
+
+    def _read_bundle(
+        self,
+        pred_type: PredictionType,
+        paths: Dict[str, str],
+        source_type: Optional[PredictionType] = None,
+    ) -> Optional[ModelBundle]:
+        """读取模型产物：优先使用注册表当前版本，否则回落到配置中的文件路径"""
+
+        source_type = source_type or pred_type
+
         try:
-            # 加载模型
-            model = joblib.load(model_path)
-            self.models[pred_type] = model
+            if self.registry.current_version(source_type):
+                bundle = self._read_registry_bundle(source_type)
+                if bundle is not None:
+                    return bundle
+                logger.error(f"{source_type.value}模型当前版本不可用，回落到默认模型文件")
+
+            model_path = paths["model"]
+            scaler_path = paths["scaler"]
+            metadata_path = paths["metadata"]
+
+            # 检查文件是否存在
+            if not os.path.exists(model_path):
+                return None
+
+            # 只读内存映射加载，多个worker共享同一份页缓存
+            model = joblib.load(model_path, mmap_mode="r")
 
             # 加载标准化器
             if os.path.exists(scaler_path):
-                scaler = joblib.load(scaler_path)
-                self.scalers[pred_type] = scaler
+                scaler = joblib.load(scaler_path, mmap_mode="r")
             else:
                 logger.warning(f"{pred_type.value}标准化器不存在，将使用默认标准化")
-                self.scalers[pred_type] = None
+                scaler = None
 
             # 加载元数据
             if os.path.exists(metadata_path):
                 with open(metadata_path, "r") as f:
                     metadata = json.load(f)
-                    self.metadata[pred_type] = metadata
             else:
                 # 创建默认元数据
-                self.metadata[pred_type] = self._create_default_metadata(pred_type)
+                metadata = self._create_default_metadata(pred_type)
 
-            # 验证模型
-            if self._validate_model(model, self.scalers[pred_type], pred_type):
-                return True
-            else:
-                logger.error(f"{pred_type.value}模型验证失败")
-                # 清理加载的内容
-                self.models.pop(pred_type, None)
-                self.scalers.pop(pred_type, None)
-                self.metadata.pop(pred_type, None)
-                return False
+            return ModelBundle(
+                model=model,
+                scaler=scaler,
+                metadata=metadata,
+                version=metadata.get("model_version"),
+                source="legacy",
+            )
 
         except Exception as e:
             logger.error(f"加载{pred_type.value}模型时出错: {str(e)}")
-            return False
+            return None
+
+    def _read_registry_bundle(
+        self, pred_type: PredictionType, version: Optional[str] = None
+    ) -> Optional[ModelBundle]:
+        """读取注册表中的指定版本（默认当前版本），解析或校验失败时返回None"""
+
+        model_version = self.registry.resolve(pred_type, version)
+        if model_version is None:
+            return None
+        if not self.registry.verify(model_version):
+            logger.error(f"{pred_type.value}模型版本{model_version.version}校验失败")
+            return None
+
+        artifacts = self.registry.load_artifacts(model_version, mmap=True)
+        return ModelBundle(
+            model=artifacts["model"],
+            scaler=artifacts["scaler"],
+            metadata=artifacts["metadata"],
+            version=model_version.version,
+            source="registry",
+        )
+
+    def _read_default_bundle(self, pred_type: PredictionType) -> Optional[ModelBundle]:
+        """读取QPS模型供其他类型复用，QPS有注册表版本时同样严格校验"""
+
+        if self.registry.current_version(PredictionType.QPS):
+            return self._read_registry_bundle(PredictionType.QPS)
+        return self._read_bundle(
+            pred_type, self.model_paths[PredictionType.QPS], PredictionType.QPS
+        )
+
+    def _install_bundle(self, pred_type: PredictionType, bundle: ModelBundle) -> None:
+        """整体替换某类型的模型快照（同步执行，对事件循环而言是原子的）"""
+
+        self.bundles[pred_type] = bundle
+        self.models[pred_type] = bundle.model
+        self.scalers[pred_type] = bundle.scaler
+        self.metadata[pred_type] = bundle.metadata
+        self._validated.pop(pred_type, None)
 
     def _use_default_model(self, pred_type: PredictionType) -> bool:
         """使用默认模型（QPS模型）"""
 
         # 如果QPS模型已加载，复用它
-        if PredictionType.QPS in self.models:
-            self.models[pred_type] = self.models[PredictionType.QPS]
-            self.scalers[pred_type] = self.scalers.get(PredictionType.QPS)
-
-            # 复制并调整元数据
-            if PredictionType.QPS in self.metadata:
-                metadata = self.metadata[PredictionType.QPS].copy()
-                metadata["adapted_for"] = pred_type.value
-                self.metadata[pred_type] = metadata
-            else:
-                self.metadata[pred_type] = self._create_default_metadata(pred_type)
-
-            return True
-
-        # 尝试加载默认模型
-        default_paths = self.model_paths[PredictionType.QPS]
-        if self._load_model_for_type(pred_type, default_paths):
-            self.metadata[pred_type]["adapted_from"] = "QPS model"
-            return True
+        qps_bundle = self.bundles.get(PredictionType.QPS)
+        if qps_bundle is None:
+            # 尝试加载默认模型
+            qps_bundle = self._read_bundle(
+                pred_type,
+                self.model_paths[PredictionType.QPS],
+                source_type=PredictionType.QPS,
+            )
+            if qps_bundle is None:
+                return False
 
-        return False
+        # 复制并调整元数据
+        metadata = dict(qps_bundle.metadata)
+        metadata["adapted_for"] = pred_type.value
+        metadata["adapted_from"] = "QPS model"
+
+        self._install_bundle(
+            pred_type,
+            ModelBundle(
+                model=qps_bundle.model,
+                scaler=qps_bundle.scaler,
+                metadata=metadata,
+                version=qps_bundle.version,
+                source="adapted",
+            ),
+        )
+        return True
+
+    def _validate_bundle(self, pred_type: PredictionType, bundle: ModelBundle) -> bool:
+        """验证模型快照；复用QPS模型的类型按QPS的特征和取值范围验证"""
+
+        source_type = PredictionType.QPS if bundle.source == "adapted" else pred_type
+        return self._validate_model(bundle.model, bundle.scaler, source_type)
 
     def _validate_model(
         self, model: Any, scaler: Any, pred_type: PredictionType
@@ -373,13 +471,73 @@ class ModelManager:
                 "DISK_growth_rate",
             ]
 
+    def get_bundle(self, pred_type: PredictionType) -> Optional[ModelBundle]:
+        """获取指定类型的模型快照
+
+        验证在后台线程中进行，完成前先使用已加载的模型；验证失败后返回None，
+        调用方改用规则预测。
+        """
+
+        bundle = self.bundles.get(pred_type)
+        if bundle is None:
+            return None
+
+        if pred_type not in self._validated and not self._schedule_validation(
+            pred_type
+        ):
+            # 没有运行中的事件循环时直接验证
+            self._record_validation(
+                pred_type,
+                bundle,
+                self._validate_bundle(pred_type, bundle),
+            )
+
+        return bundle if self._validated.get(pred_type, True) else None
+
+    def _schedule_validation(self, pred_type: PredictionType) -> bool:
+        """在后台线程中验证当前模型快照，无运行中的事件循环时返回False"""
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        task = self._validation_tasks.get(pred_type)
+        if task is None or task.done():
+            self._validation_tasks[pred_type] = loop.create_task(
+                self._validate_in_background(pred_type, self.bundles[pred_type])
+            )
+        return True
+
+    async def _validate_in_background(
+        self, pred_type: PredictionType, bundle: ModelBundle
+    ) -> None:
+        try:
+            valid = await asyncio.to_thread(self._validate_bundle, pred_type, bundle)
+        except Exception as e:
+            logger.error(f"{pred_type.value}模型验证异常: {str(e)}")
+            valid = False
+        self._record_validation(pred_type, bundle, valid)
+
+    def _record_validation(
+        self, pred_type: PredictionType, bundle: ModelBundle, valid: bool
+    ) -> None:
+        # 验证期间模型已被替换时丢弃结果
+        if self.bundles.get(pred_type) is not bundle:
+            return
+        self._validated[pred_type] = valid
+        if not valid:
+            logger.error(f"{pred_type.value}模型验证失败，将使用规则预测")
+
     def get_model(self, pred_type: PredictionType) -> Optional[Any]:
         """获取指定类型的模型"""
-        return self.models.get(pred_type)
+        bundle = self.get_bundle(pred_type)
+        return bundle.model if bundle else None
 
     def get_scaler(self, pred_type: PredictionType) -> Optional[Any]:
         """获取指定类型的标准化器"""
-        return self.scalers.get(pred_type)
+        bundle = self.get_bundle(pred_type)
+        return bundle.scaler if bundle else None
 
     def get_metadata(self, pred_type: PredictionType) -> Dict[str, Any]:
         """获取指定类型的元数据"""
@@ -432,6 +590,13 @@ class ModelManager:
                 "created_at": metadata.get("created_at"),
                 "has_scaler": pred_type in self.scalers
                 and self.scalers[pred_type] is not None,
+                "registry_version": self.bundles[pred_type].version
+                if pred_type in self.bundles
+                else None,
+                "source": self.bundles[pred_type].source
+                if pred_type in self.bundles
+                else "unknown",
+                "validated": self._validated.get(pred_type),
             }
 
             # 添加模型特定信息
@@ -442,37 +607,139 @@ class ModelManager:
 
         return info
 
-    async def reload_model(self, pred_type: PredictionType) -> bool:
-        """重新加载特定类型的模型"""
+    async def reload_model(
+        self, pred_type: PredictionType, version: Optional[str] = None
+    ) -> bool:
+        """重新加载特定类型的模型
 
-        try:
-            paths = self.model_paths.get(pred_type)
-            if not paths:
-                logger.error(f"未找到{pred_type.value}的模型路径配置")
-                return False
+        新模型在后台线程中加载并验证，成功后才替换当前快照；
+        正在进行的预测继续使用旧模型引用，不受影响。
+        """
 
-            # 清理旧模型
-            self.models.pop(pred_type, None)
-            self.scalers.pop(pred_type, None)
-            self.metadata.pop(pred_type, None)
+        async with self._reload_lock:
+            try:
+                paths = self.model_paths.get(pred_type)
+                if not paths:
+                    logger.error(f"未找到{pred_type.value}的模型路径配置")
+                    return False
 
-            # 重新加载
-            success = self._load_model_for_type(pred_type, paths)
+                # 注册表中的版本严格按版本加载，校验失败时不回落到默认模型文件
+                target_version = version or self.registry.current_version(pred_type)
+                if target_version:
+                    bundle = await asyncio.to_thread(
+                        self._read_registry_bundle, pred_type, target_version
+                    )
+                else:
+                    bundle = await asyncio.to_thread(
+                        self._read_bundle, pred_type, paths
+                    )
+                    if bundle is None and pred_type != PredictionType.QPS:
+                        # 专用模型不存在时继续复用QPS模型
+                        bundle = await asyncio.to_thread(
+                            self._read_default_bundle, pred_type
+                        )
+                        if bundle is not None:
+                            bundle = replace(
+                                bundle,
+                                metadata={
+                                    **bundle.metadata,
+                                    "adapted_for": pred_type.value,
+                                    "adapted_from": "QPS model",
+                                },
+                                source="adapted",
+                            )
+                if bundle is None:
+                    logger.error(f"重新加载{pred_type.value}模型失败")
+                    return False
 
-            if not success:
-                # 尝试使用默认模型
-                success = self._use_default_model(pred_type)
+                valid = await asyncio.to_thread(
+                    self._validate_bundle, pred_type, bundle
+                )
+                if not valid:
+                    logger.error(f"{pred_type.value}新模型验证失败，保留当前版本")
+                    return False
 
-            if success:
-                logger.info(f"成功重新加载{pred_type.value}模型")
-            else:
-                logger.error(f"重新加载{pred_type.value}模型失败")
+                # 加载和验证都通过后才切换 CURRENT
+                if version:
+                    self.registry.activate(pred_type, version)
+                self._install_bundle(pred_type, bundle)
+                self._validated[pred_type] = True
+                self._registry_markers[pred_type] = self.registry.current_marker(
+                    pred_type
+                )
+                self.models_loaded = True
 
-            return success
+                logger.info(
+                    f"成功重新加载{pred_type.value}模型，版本: {bundle.version or 'unknown'}"
+                )
+                return True
 
-        except Exception as e:
-            logger.error(f"重新加载模型失败: {str(e)}")
-            return False
+            except Exception as e:
+                logger.error(f"重新加载模型失败: {str(e)}")
+                return False
+
+    def start_watching(self, interval: float) -> None:
+        """启动注册表监听，CURRENT 变化时自动热切换"""
+
+        if self._watch_task and not self._watch_task.done():
+            return
+        try:
+            self._watch_task = asyncio.get_running_loop().create_task(
+                self._watch_registry(interval)
+            )
+            logger.info(f"模型注册表监听已启动，间隔{interval}秒")
+        except RuntimeError:
+            logger.warning("当前无运行中的事件循环，跳过模型注册表监听")
+
+    async def stop_watching(self) -> None:
+        """停止注册表监听"""
+
+        if self._watch_task and not self._watch_task.done():
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+        self._watch_task = None
+
+    async def _watch_registry(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = [
+                    pred_type
+                    for pred_type in PredictionType
+                    if self.registry.current_marker(pred_type)
+                    != self._registry_markers.get(pred_type)
+                ]
+                if not changed:
+                    continue
+
+                # QPS 模型更新时，复用 QPS 模型的类型一并切换
+                if PredictionType.QPS in changed:
+                    changed += [
+                        pred_type
+                        for pred_type, bundle in self.bundles.items()
+                        if bundle.source == "adapted" and pred_type not in changed
+                    ]
+
+                for pred_type in changed:
+                    logger.info(f"检测到{pred_type.value}模型版本变化，开始热切换")
+                    if not await self.reload_model(pred_type):
+                        # 避免对同一个坏版本反复重试
+                        self._registry_markers[pred_type] = (
+                            self.registry.current_marker(pred_type)
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"模型注册表监听异常: {str(e)}")
+
+    def _snapshot_registry_markers(self) -> None:
+        self._registry_markers = {
+            pred_type: self.registry.current_marker(pred_type)
+            for pred_type in PredictionType
+        }
 
     async def is_healthy(self) -> bool:
         """健康检查"""
@@ -485,28 +752,25 @@ class ModelManager:
         metadata: Dict[str, Any],
         pred_type: PredictionType,
     ) -> bool:
-        """保存模型（用于模型更新）"""
+        """保存模型（用于模型更新），发布为注册表中的新版本并立即生效"""
 
         try:
-            paths = self.model_paths[pred_type]
-
-            # 保存模型
-            joblib.dump(model, paths["model"])
-
-            # 保存标准化器
-            if scaler is not None:
-                joblib.dump(scaler, paths["scaler"])
-
-            # 保存元数据
-            with open(paths["metadata"], "w") as f:
-                json.dump(metadata, f, indent=2)
+            model_version = self.registry.publish(pred_type, model, scaler, metadata)
 
-            logger.info(f"成功保存{pred_type.value}模型")
+            logger.info(f"成功保存{pred_type.value}模型，版本: {model_version.version}")
 
             # 更新内存中的模型
-            self.models[pred_type] = model
-            self.scalers[pred_type] = scaler
-            self.metadata[pred_type] = metadata
+            self._install_bundle(
+                pred_type,
+                ModelBundle(
+                    model=model,
+                    scaler=scaler,
+                    metadata={**metadata, "model_version": model_version.version},
+                    version=model_version.version,
+                    source="registry",
+                ),
+            )
+            self._registry_markers[pred_type] = self.registry.current_marker(pred_type)
 
             return True
 
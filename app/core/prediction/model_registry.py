@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps模型注册表 - 版本化模型产物、校验和与原子切换
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+from app.models import PredictionType
+
+logger = logging.getLogger("aiops.core.model_registry")
+
+MODEL_FILE = "model.pkl"
+SCALER_FILE = "scaler.pkl"
+METADATA_FILE = "metadata.json"
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+VERSION_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+def is_valid_version(version: str) -> bool:
+    """版本号只能是单级目录名，防止通过 ../ 访问注册表之外的文件"""
+    return bool(VERSION_PATTERN.match(version)) and ".." not in version
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """注册表中某个模型版本的描述"""
+
+    prediction_type: PredictionType
+    version: str
+    path: str
+    checksums: Dict[str, str] = field(default_factory=dict)
+    created_at: Optional[str] = None
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.path, MODEL_FILE)
+
+    @property
+    def scaler_path(self) -> str:
+        return os.path.join(self.path, SCALER_FILE)
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(self.path, METADATA_FILE)
+
+
+class ModelRegistry:
+    """模型注册表
+
+    目录结构::
+
+        <root>/<type>/<version>/model.pkl
+        <root>/<type>/<version>/scaler.pkl
+        <root>/<type>/<version>/metadata.json
+        <root>/<type>/<version>/manifest.json   # 版本号与sha256校验和
+        <root>/<type>/CURRENT                   # 当前生效版本号
+
+    版本目录写入完成后才会被重命名到位，CURRENT 通过 os.replace 原子更新，
+    读取方不会看到写了一半的产物。模型以未压缩格式保存，便于加载时内存映射。
+    """
+
+    def __init__(self, root_path: str) -> None:
+        self.root_path = root_path
+
+    def _type_dir(self, pred_type: PredictionType) -> str:
+        return os.path.join(self.root_path, pred_type.value)
+
+    def current_version(self, pred_type: PredictionType) -> Optional[str]:
+        """读取当前生效的版本号"""
+        current_file = os.path.join(self._type_dir(pred_type), CURRENT_FILE)
+        try:
+            with open(current_file, "r", encoding="utf-8") as f:
+                version = f.read().strip()
+            return version or None
+        except FileNotFoundError:
+            return None
+
+    def current_marker(self, pred_type: PredictionType) -> Optional[int]:
+        """CURRENT 文件的修改时间，供文件监听判断是否有新版本"""
+        current_file = os.path.join(self._type_dir(pred_type), CURRENT_FILE)
+        try:
+            return os.stat(current_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def resolve(
+        self, pred_type: PredictionType, version: Optional[str] = None
+    ) -> Optional[ModelVersion]:
+        """解析指定版本（默认当前版本）"""
+        version = version or self.current_version(pred_type)
+        if not version:
+            return None
+        if not is_valid_version(version):
+            logger.warning(f"{pred_type.value}模型版本号不合法: {version!r}")
+            return None
+
+        version_dir = os.path.join(self._type_dir(pred_type), version)
+        manifest_path = os.path.join(version_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            logger.warning(f"{pred_type.value}模型版本{version}缺少清单文件")
+            return None
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        return ModelVersion(
+            prediction_type=pred_type,
+            version=version,
+            path=version_dir,
+            checksums=manifest.get("checksums", {}),
+            created_at=manifest.get("created_at"),
+        )
+
+    def list_versions(self, pred_type: PredictionType) -> List[str]:
+        """列出某类型的全部版本（按版本号排序）"""
+        type_dir = self._type_dir(pred_type)
+        if not os.path.isdir(type_dir):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(type_dir)
+            if os.path.exists(os.path.join(type_dir, name, MANIFEST_FILE))
+        )
+
+    def verify(self, model_version: ModelVersion) -> bool:
+        """校验版本产物的sha256"""
+        for file_name, expected in model_version.checksums.items():
+            file_path = os.path.join(model_version.path, file_name)
+            if not os.path.exists(file_path):
+                logger.error(f"模型产物缺失: {file_path}")
+                return False
+            if _sha256(file_path) != expected:
+                logger.error(f"模型产物校验和不匹配: {file_path}")
+                return False
+        return True
+
+    def load_artifacts(
+        self, model_version: ModelVersion, mmap: bool = True
+    ) -> Dict[str, Any]:
+        """加载版本产物，默认以只读内存映射方式加载模型和标准化器"""
+        mmap_mode = "r" if mmap else None
+
+        model = joblib.load(model_version.model_path, mmap_mode=mmap_mode)
+        scaler = None
+        if os.path.exists(model_version.scaler_path):
+            scaler = joblib.load(model_version.scaler_path, mmap_mode=mmap_mode)
+
+        metadata: Dict[str, Any] = {}
+        if os.path.exists(model_version.metadata_path):
+            with open(model_version.metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+
+        metadata.setdefault("model_version", model_version.version)
+        metadata["registry_version"] = model_version.version
+        metadata["checksums"] = dict(model_version.checksums)
+
+        return {"model": model, "scaler": scaler, "metadata": metadata}
+
+    def publish(
+        self,
+        pred_type: PredictionType,
+        model: Any,
+        scaler: Any,
+        metadata: Dict[str, Any],
+        version: Optional[str] = None,
+        activate: bool = True,
+    ) -> ModelVersion:
+        """发布新版本，可选地设为当前版本"""
+        type_dir = self._type_dir(pred_type)
+        os.makedirs(type_dir, exist_ok=True)
+
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=type_dir)
+        try:
+            joblib.dump(model, os.path.join(staging_dir, MODEL_FILE))
+            if scaler is not None:
+                joblib.dump(scaler, os.path.join(staging_dir, SCALER_FILE))
+
+            checksums = {
+                name: _sha256(os.path.join(staging_dir, name))
+                for name in (MODEL_FILE, SCALER_FILE)
+                if os.path.exists(os.path.join(staging_dir, name))
+            }
+            version = version or (
+                f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{checksums[MODEL_FILE][:8]}"
+            )
+
+            metadata = dict(metadata)
+            metadata["model_version"] = version
+            with open(
+                os.path.join(staging_dir, METADATA_FILE), "w", encoding="utf-8"
+            ) as f:
+                json.dump(metadata, f, indent=2, ensure_ascii=False, default=str)
+            checksums[METADATA_FILE] = _sha256(os.path.join(staging_dir, METADATA_FILE))
+
+            created_at = datetime.now().isoformat()
+            with open(
+                os.path.join(staging_dir, MANIFEST_FILE), "w", encoding="utf-8"
+            ) as f:
+                json.dump(
+                    {
+                        "prediction_type": pred_type.value,
+                        "version": version,
+                        "created_at": created_at,
+                        "checksums": checksums,
+                    },
+                    f,
+                    indent=2,
+                )
+
+            version_dir = os.path.join(type_dir, version)
+            if os.path.exists(version_dir):
+                raise FileExistsError(f"模型版本已存在: {version_dir}")
+            os.rename(staging_dir, version_dir)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(pred_type, version)
+
+        logger.info(f"已发布{pred_type.value}模型版本: {version}")
+        return ModelVersion(
+            prediction_type=pred_type,
+            version=version,
+            path=version_dir,
+            checksums=checksums,
+            created_at=created_at,
+        )
+
+    def activate(self, pred_type: PredictionType, version: str) -> None:
+        """原子地切换当前版本"""
+        if not is_valid_version(version):
+            raise ValueError(f"{pred_type.value}模型版本号不合法: {version!r}")
+        type_dir = self._type_dir(pred_type)
+        if not os.path.exists(os.path.join(type_dir, version, MANIFEST_FILE)):
+            raise FileNotFoundError(f"{pred_type.value}模型版本不存在: {version}")
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".current-", dir=type_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(type_dir, CURRENT_FILE))
+
+
+def _sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps阶段DAG执行器 - 依赖满足即启动，阶段超时与整体预算控制
+"""
+
+import asyncio
+from dataclasses import dataclass
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("aiops.core.prediction.stages")
+
+# 阶段函数接收已完成阶段的结果字典（阶段名 -> 结果）
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    """DAG中的一个阶段"""
+
+    name: str
+    func: StageFunc
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None  # 秒，None表示只受整体预算限制
+    fallback: Any = None  # 失败、超时或预算耗尽时的结果
+    required: bool = False  # 必需阶段失败时终止整个DAG并抛出原始异常
+
+
+class StageExecutor:
+    """按依赖关系并发执行阶段
+
+    - 依赖全部结束（无论成功与否）的阶段立即启动，互不依赖的LLM调用与计算并行
+    - 每个阶段的超时取自身超时与剩余整体预算中的较小值
+    - 预算耗尽后尚未启动的阶段直接使用fallback
+    - 返回每个阶段的状态、相对起始时间和耗时
+    """
+
+    def __init__(self, stages: List[Stage], budget: Optional[float] = None) -> None:
+        self.stages = stages
+        self.budget = budget
+        self._validate()
+
+    def _validate(self) -> None:
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"阶段名称重复: {names}")
+        known = set(names)
+        for stage in self.stages:
+            missing = set(stage.depends_on) - known
+            if missing:
+                raise ValueError(f"阶段 {stage.name} 依赖未定义的阶段: {missing}")
+
+        # Kahn算法检查环
+        remaining = {stage.name: set(stage.depends_on) for stage in self.stages}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"阶段依赖存在环: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    async def run(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """执行全部阶段
+
+        Returns:
+            (results, timings): 各阶段结果与执行记录
+        """
+        loop = asyncio.get_running_loop()
+        origin = loop.time()
+        deadline = origin + self.budget if self.budget else None
+
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        waiting = {stage.name: stage for stage in self.stages}
+        running: Dict[asyncio.Task, Stage] = {}
+
+        try:
+            while waiting or running:
+                ready = [
+                    stage
+                    for stage in waiting.values()
+                    if all(dep in timings for dep in stage.depends_on)
+                ]
+                for stage in ready:
+                    del waiting[stage.name]
+                    task = loop.create_task(
+                        self._run_stage(stage, results, origin, deadline)
+                    )
+                    running[task] = stage
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    stage = running.pop(task)
+                    value, timing, error = task.result()
+                    results[stage.name] = value
+                    timings[stage.name] = timing
+                    if error is not None and stage.required:
+                        raise error
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return results, timings
+
+    @staticmethod
+    async def _run_stage(
+        stage: Stage,
+        results: Dict[str, Any],
+        origin: float,
+        deadline: Optional[float],
+    ) -> Tuple[Any, Dict[str, Any], Optional[BaseException]]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        timeout = stage.timeout
+        if deadline is not None:
+            remaining = deadline - started
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        timing: Dict[str, Any] = {
+            "status": "completed",
+            "start_seconds": round(started - origin, 4),
+            "duration_seconds": 0.0,
+        }
+        value, error = stage.fallback, None
+        if timeout is not None and timeout <= 0:
+            timing["status"] = "skipped"
+            timing["error"] = "预算耗尽"
+            return value, timing, asyncio.TimeoutError("预算耗尽")
+
+        try:
+            value = await asyncio.wait_for(stage.func(results), timeout)
+        except asyncio.TimeoutError as e:
+            timing["status"] = "timeout"
+            timing["error"] = f"超过 {timeout:.1f} 秒"
+            error = e
+        except Exception as e:
+            timing["status"] = "failed"
+            timing["error"] = str(e)
+            error = e
+        if error is not None:
+            logger.warning(f"阶段 {stage.name} {timing['status']}: {timing['error']}")
+        timing["duration_seconds"] = round(loop.time() - started, 4)
+        return value, timing, error
+
+
+__all__ = ["Stage", "StageExecutor", "StageFunc"]
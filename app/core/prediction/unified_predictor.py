@@ -71,19 +71,13 @@ class UnifiedPredictor:
                     prediction_type, current_value, prediction_hours, granularity
                 )
 
+            # 元数据在循环前取一次，热切换模型时本次预测保持一致
+            model_metadata = self.model_manager.metadata.get(prediction_type, {})
             predictions = []
             current_time = datetime.now()
 
             # 计算预测点数
-            if granularity == PredictionGranularity.MINUTE:
-                points = prediction_hours * 60
-                delta = timedelta(minutes=1)
-            elif granularity == PredictionGranularity.HOUR:
-                points = prediction_hours
-                delta = timedelta(hours=1)
-            else:  # DAY
-                points = prediction_hours // 24
-                delta = timedelta(days=1)
+            points, delta = self._resolve_steps(prediction_hours, granularity)
 
             # 逐点预测
             for i in range(points):
@@ -98,7 +92,6 @@ class UnifiedPredictor:
                 )
 
                 # 确保特征与模型训练时的格式一致
-                model_metadata = self.model_manager.metadata.get(prediction_type, {})
                 features_aligned = self._align_features_with_model(
                     features, prediction_type, model_metadata
                 )
@@ -153,6 +146,107 @@ class UnifiedPredictor:
                 prediction_type, current_value, prediction_hours, granularity
             )
 
+    async def predict_batch(
+        self,
+        prediction_type: PredictionType,
+        current_values: List[float],
+        historical_data_list: List[List[Dict[str, Any]]],
+        prediction_hours: int,
+        granularity: PredictionGranularity,
+        consider_pattern: bool = True,
+    ) -> List[List[PredictionDataPoint]]:
+        """批量预测 - 同类型目标共享模型，每个时间步堆叠为一个特征矩阵推理"""
+
+        if not self._initialized:
+            from app.common.exceptions import PredictionError
+
+            raise PredictionError("预测器未初始化")
+
+        if not current_values:
+            return []
+
+        try:
+            model = self.model_manager.get_model(prediction_type)
+            scaler = self.model_manager.get_scaler(prediction_type)
+
+            if model is None:
+                return [
+                    await self._rule_based_prediction(
+                        prediction_type, value, prediction_hours, granularity
+                    )
+                    for value in current_values
+                ]
+
+            model_metadata = self.model_manager.metadata.get(prediction_type, {})
+            points, delta = self._resolve_steps(prediction_hours, granularity)
+            current_time = datetime.now()
+            step_values = np.array(current_values, dtype=float)
+            results: List[List[PredictionDataPoint]] = [[] for _ in current_values]
+
+            for i in range(points):
+                future_time = current_time + delta * (i + 1)
+
+                features = await self.feature_extractor.extract_features_batch(
+                    timestamp=future_time,
+                    current_values=step_values.tolist(),
+                    historical_data_list=historical_data_list,
+                    prediction_type=prediction_type,
+                )
+                features_aligned = self._align_feature_matrix_with_model(
+                    features, prediction_type, model_metadata
+                )
+
+                matrix = features_aligned.values
+                if scaler is not None:
+                    matrix = scaler.transform(matrix)
+
+                predicted = np.asarray(model.predict(matrix), dtype=float)
+
+                for idx, raw_value in enumerate(predicted):
+                    predicted_value = self._adjust_prediction_range(
+                        raw_value, prediction_type
+                    )
+                    # 与单目标预测保持一致：置信度基于该目标本步的输入值
+                    confidence = self._calculate_confidence(
+                        predicted_value, step_values[idx], prediction_type, i
+                    )
+                    point = PredictionDataPoint(
+                        timestamp=future_time,
+                        predicted_value=float(predicted_value),
+                        confidence_level=confidence,
+                    )
+                    if consider_pattern:
+                        lower, upper = self._calculate_confidence_interval(
+                            predicted_value, confidence
+                        )
+                        point.confidence_lower = lower
+                        point.confidence_upper = upper
+                        step_values[idx] = predicted_value
+                    results[idx].append(point)
+
+            return results
+
+        except Exception as e:
+            logger.error(f"批量预测执行失败: {str(e)}")
+            return [
+                await self._rule_based_prediction(
+                    prediction_type, value, prediction_hours, granularity
+                )
+                for value in current_values
+            ]
+
+    def _resolve_steps(
+        self, prediction_hours: int, granularity: PredictionGranularity
+    ) -> tuple:
+        """根据粒度计算预测点数和步长"""
+
+        if granularity == PredictionGranularity.MINUTE:
+            return prediction_hours * 60, timedelta(minutes=1)
+        elif granularity == PredictionGranularity.HOUR:
+            return prediction_hours, timedelta(hours=1)
+        else:  # DAY
+            return prediction_hours // 24, timedelta(days=1)
+
     async def _rule_based_prediction(
         self,
         prediction_type: PredictionType,
@@ -348,6 +442,25 @@ class UnifiedPredictor:
 
         return result_df
 
+    def _align_feature_matrix_with_model(
+        self,
+        features: pd.DataFrame,
+        prediction_type: PredictionType,
+        model_data: Dict[str, Any],
+    ) -> pd.DataFrame:
+        """批量版本的特征对齐，按列补齐缺失特征并调整顺序"""
+
+        model_features = model_data.get("metadata", {}).get("features", [])
+        if not model_features:
+            model_features = self._get_default_model_features(prediction_type)
+
+        aligned = features.reindex(columns=model_features)
+        for feature in model_features:
+            if feature not in features.columns:
+                aligned[feature] = self._get_feature_default_value(feature)
+
+        return aligned
+
     def _get_default_model_features(self, prediction_type: PredictionType) -> List[str]:
         """获取默认的模型特征列表（与模型训练时一致）"""
 
@@ -9,6 +9,12 @@ License: Apache 2.0
 Description: 文档处理器模块
 """
 
+from .context_packer import (
+    ContextPacker,
+    PackedContext,
+    TokenCounter,
+    get_token_counter,
+)
 from .md_document_processor import (
     MDChunk,
     MDDocumentProcessor,
@@ -27,6 +33,10 @@ from .md_metadata_enhancer import (
 )
 
 __all__ = [
+    "ContextPacker",
+    "PackedContext",
+    "TokenCounter",
+    "get_token_counter",
     "MDDocumentProcessor",
     "MDEnhancedQueryProcessor",
     "MDElement",
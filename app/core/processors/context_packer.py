@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 按token预算打包检索上下文 - 分块token计数缓存、优先级贪心装箱
+"""
+
+from dataclasses import dataclass
+import logging
+import math
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger("aiops.context_packer")
+
+# 文档元数据中缓存token数的字段：{计数器名称: token数}
+TOKEN_COUNT_KEY = "token_counts"
+HEURISTIC = "heuristic"
+
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """近似token数：中日韩字符各约1个token，其余非空白字符约4个字符1个token"""
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    other = len(text) - cjk - sum(1 for ch in text if ch.isspace())
+    return cjk + math.ceil(max(other, 0) / 4)
+
+
+class TokenCounter:
+    """token计数器
+
+    指定tiktoken编码名时在后台线程加载编码（首次加载可能需要下载），加载完成前
+    以及加载失败时使用近似估算；计数器名称随之切换，缓存的计数不会混用。
+    """
+
+    def __init__(self, encoding: str = HEURISTIC) -> None:
+        self.encoding_name = encoding
+        self._encoding = None
+        if encoding and encoding != HEURISTIC:
+            threading.Thread(
+                target=self._load, name="tiktoken-loader", daemon=True
+            ).start()
+
+    def _load(self) -> None:
+        try:
+            import tiktoken
+
+            self._encoding = tiktoken.get_encoding(self.encoding_name)
+            logger.info(f"tiktoken编码已加载: {self.encoding_name}")
+        except Exception as e:
+            logger.warning(f"加载tiktoken编码失败，使用近似token估算: {e}")
+
+    @property
+    def name(self) -> str:
+        return self.encoding_name if self._encoding is not None else HEURISTIC
+
+    def count(self, text: str) -> int:
+        encoding = self._encoding
+        if encoding is None:
+            return estimate_tokens(text)
+        return len(encoding.encode(text or "", disallowed_special=()))
+
+    def count_document(self, doc: Document) -> int:
+        """文档token数，按计数器名称缓存在元数据中"""
+        metadata = doc.metadata if doc.metadata is not None else {}
+        counts = metadata.get(TOKEN_COUNT_KEY)
+        if not isinstance(counts, dict):
+            counts = {}
+        name = self.name
+        if name not in counts:
+            counts[name] = self.count(doc.page_content)
+            metadata[TOKEN_COUNT_KEY] = counts
+            doc.metadata = metadata
+        return counts[name]
+
+
+_counter: Optional[TokenCounter] = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """获取按配置创建的共享token计数器"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                from app.config.settings import config
+
+                _counter = TokenCounter(getattr(config.rag, "tokenizer", HEURISTIC))
+    return _counter
+
+
+@dataclass
+class PackedContext:
+    """打包结果"""
+
+    text: str
+    used_tokens: int  # 打包后的上下文token数
+    candidate_tokens: int  # 全部候选文档不截断时的token数
+    included: int
+    truncated: int
+    dropped: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(0, self.candidate_tokens - self.used_tokens)
+
+
+class ContextPacker:
+    """按优先级顺序把文档装入token预算
+
+    依次放入完整文档；放不下时若剩余预算不少于 min_chunk_tokens 则截断放入，
+    否则跳过，继续尝试后面更短的文档。
+    """
+
+    def __init__(self, counter: TokenCounter, min_chunk_tokens: int = 64) -> None:
+        self.counter = counter
+        self.min_chunk_tokens = min_chunk_tokens
+
+    def pack(
+        self,
+        docs: Sequence[Document],
+        budget: int,
+        header: Callable[[int, Document], str],
+        truncate: Callable[[str, int], str],
+        separator: str = "\n\n",
+    ) -> PackedContext:
+        """header(序号, 文档)生成文档标题行；truncate(内容, 字符数)按字符截断内容"""
+        separator_tokens = self.counter.count(separator)
+        parts: List[str] = []
+        used = candidate = 0
+        truncated = dropped = 0
+
+        for doc in docs:
+            title = header(len(parts) + 1, doc)
+            title_tokens = self.counter.count(title) + 1
+            content_tokens = self.counter.count_document(doc)
+            cost = title_tokens + content_tokens + (separator_tokens if parts else 0)
+            candidate += cost
+
+            if cost <= budget - used:
+                parts.append(f"{title}\n{doc.page_content}")
+                used += cost
+                continue
+
+            overhead = title_tokens + (separator_tokens if parts else 0)
+            room = budget - used - overhead
+            if room < self.min_chunk_tokens:
+                dropped += 1
+                continue
+
+            content = self._fit(doc.page_content, content_tokens, room, truncate)
+            if not content:
+                dropped += 1
+                continue
+            parts.append(f"{title}\n{content}")
+            used += overhead + self.counter.count(content)
+            truncated += 1
+
+        return PackedContext(
+            text=separator.join(parts),
+            used_tokens=used,
+            candidate_tokens=candidate,
+            included=len(parts),
+            truncated=truncated,
+            dropped=dropped,
+        )
+
+    def _fit(
+        self,
+        content: str,
+        content_tokens: int,
+        room: int,
+        truncate: Callable[[str, int], str],
+    ) -> str:
+        """按token与字符的比例估算截断长度，超出时逐步收缩"""
+        ratio = len(content) / max(content_tokens, 1)
+        max_chars = int(room * ratio)
+        for _ in range(4):
+            piece = truncate(content, max_chars)
+            if self.counter.count(piece) <= room:
+                return piece
+            max_chars = int(max_chars * 0.85)
+        return ""
+
+
+def split_stable_prefix(template: str) -> Optional[Dict[str, str]]:
+    """把提示模板拆成不含变量的固定前缀与含变量的后半部分
+
+    固定前缀作为system消息单独发送，每次请求完全相同，便于提供商的提示缓存命中。
+    模板中没有 {context} 占位符或前缀里含有其他占位符时返回None。
+    """
+    prefix, marker, rest = template.partition("{context}")
+    if not marker or "{" in prefix.replace("{{", "").replace("}}", ""):
+        return None
+    return {
+        "prefix": prefix.replace("{{", "{").replace("}}", "}").rstrip(),
+        "body": marker + rest,
+    }
+
+
+__all__ = [
+    "ContextPacker",
+    "PackedContext",
+    "TokenCounter",
+    "estimate_tokens",
+    "get_token_counter",
+    "split_stable_prefix",
+]
@@ -9,14 +9,24 @@ License: Apache 2.0
 Description: 模块初始化文件
 """
 
+from .cluster import ClusterRCAAnalyzer
+from .continuous import ContinuousRCAWorker
+from .correlation import CorrelationReport, CrossCorrelationAnalyzer
 from .events_collector import EventsCollector
 from .logs_collector import LogsCollector
 from .metrics_collector import MetricsCollector
 from .rca_engine import RCAAnalysisEngine
+from .series_cache import SeriesBlock, SeriesCache
 
 __all__ = [
     "RCAAnalysisEngine",
     "MetricsCollector",
     "EventsCollector",
     "LogsCollector",
+    "SeriesBlock",
+    "SeriesCache",
+    "CorrelationReport",
+    "CrossCorrelationAnalyzer",
+    "ContinuousRCAWorker",
+    "ClusterRCAAnalyzer",
 ]
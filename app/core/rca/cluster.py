@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps集群级根因分析 - 共享数据只收集一次，按命名空间有界并发分析
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.interfaces.llm_client import LLMPriority, llm_priority
+from app.models.rca_models import EventData, MetricData, RootCauseAnalysis
+
+from .events_collector import EventsCollector
+from .rca_engine import RCAAnalysisEngine
+
+logger = logging.getLogger("aiops.rca.cluster")
+
+
+class ClusterRCAAnalyzer:
+    """多命名空间根因分析
+
+    - 节点等集群级指标和整个集群的事件各收集一次，按命名空间分发
+    - 命名空间级指标与日志在信号量限制下并发收集和分析（跳过单命名空间LLM阶段）
+    - 所有命名空间的根因合并为一次LLM调用，生成集群摘要和各命名空间建议
+    """
+
+    def __init__(self, engine: RCAAnalysisEngine, max_concurrency: int = 5) -> None:
+        self.engine = engine
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def analyze(
+        self,
+        namespaces: Optional[List[str]] = None,
+        time_window: timedelta = timedelta(hours=1),
+        metrics: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        执行集群级根因分析
+
+        Args:
+            namespaces: 要分析的命名空间；为空时分析时间窗口内出现事件的全部命名空间
+            time_window: 分析时间窗口
+            metrics: 指标列表，为空则使用默认指标
+
+        Returns:
+            包含排名、集群摘要与各命名空间 RootCauseAnalysis 的字典
+        """
+        end_time = datetime.now(timezone.utc)
+        start_time = end_time - time_window
+        collector = self.engine.metrics_collector
+        metric_names = list(dict.fromkeys(metrics or collector.default_metrics))
+        shared_names = [m for m in metric_names if not collector.is_namespace_scoped(m)]
+        scoped_names = [m for m in metric_names if collector.is_namespace_scoped(m)]
+
+        # 共享数据：集群级指标与全集群事件各一次
+        shared_metrics, cluster_events = await self._collect_shared(
+            shared_names, start_time, end_time, namespaces
+        )
+        events_by_ns: Dict[str, List[EventData]] = {}
+        for event in cluster_events:
+            ns = (event.involved_object or {}).get("namespace") or ""
+            events_by_ns.setdefault(ns, []).append(event)
+
+        if not namespaces:
+            namespaces = sorted(ns for ns in events_by_ns if ns)
+        namespaces = list(dict.fromkeys(namespaces))
+
+        logger.info(
+            f"集群RCA: {len(namespaces)} 个命名空间, 共享指标 {len(shared_metrics)} 条, "
+            f"集群事件 {len(cluster_events)} 条"
+        )
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def analyze_one(namespace: str) -> RootCauseAnalysis:
+            async with semaphore:
+                return await self._analyze_namespace(
+                    namespace,
+                    start_time,
+                    end_time,
+                    scoped_names,
+                    shared_metrics,
+                    events_by_ns.get(namespace, []),
+                )
+
+        results = await asyncio.gather(
+            *[analyze_one(ns) for ns in namespaces], return_exceptions=True
+        )
+
+        details: Dict[str, RootCauseAnalysis] = {}
+        errors: Dict[str, str] = {}
+        for namespace, result in zip(namespaces, results):
+            if isinstance(result, Exception):
+                logger.warning(f"命名空间 {namespace} 分析失败: {result}")
+                errors[namespace] = str(result)
+            else:
+                details[namespace] = result
+
+        ranking = self._rank(details)
+        summary = await self._summarize(ranking, details)
+
+        return {
+            "timestamp": end_time,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "namespaces_analyzed": len(details),
+            "ranking": ranking,
+            "summary": summary,
+            "shared": {
+                "cluster_metrics": len(shared_metrics),
+                "cluster_events": len(cluster_events),
+            },
+            "errors": errors,
+            "details": details,
+        }
+
+    async def _collect_shared(
+        self,
+        shared_names: List[str],
+        start_time: datetime,
+        end_time: datetime,
+        namespaces: Optional[List[str]],
+    ) -> Tuple[List[MetricData], List[EventData]]:
+        engine = self.engine
+        events_collector = engine.events_collector
+        # 指定命名空间时逐个命名空间分页拉取，避免其他命名空间的事件占满扫描和
+        # 事件上限；未指定时单次扫描整个集群，以扫描上限为准
+        if namespaces:
+            event_scope = {"namespaces": namespaces}
+            max_events = events_collector.max_events_limit * len(namespaces)
+        else:
+            event_scope = {}
+            max_events = events_collector.max_scan_events
+
+        tasks = [
+            engine.metrics_collector.collect(
+                EventsCollector.ALL_NAMESPACES,
+                start_time,
+                end_time,
+                metrics=shared_names,
+            )
+            if shared_names
+            else asyncio.sleep(0, result=[]),
+            events_collector.collect(
+                EventsCollector.ALL_NAMESPACES,
+                start_time,
+                end_time,
+                max_events=max_events,
+                **event_scope,
+            ),
+        ]
+        shared_metrics, events = await asyncio.gather(*tasks, return_exceptions=True)
+        if isinstance(shared_metrics, Exception):
+            logger.warning(f"集群级指标收集失败: {shared_metrics}")
+            shared_metrics = []
+        if isinstance(events, Exception):
+            logger.warning(f"集群事件收集失败: {events}")
+            events = []
+        return shared_metrics, events
+
+    async def _analyze_namespace(
+        self,
+        namespace: str,
+        start_time: datetime,
+        end_time: datetime,
+        scoped_names: List[str],
+        shared_metrics: List[MetricData],
+        events: List[EventData],
+    ) -> RootCauseAnalysis:
+        engine = self.engine
+        tasks = [
+            engine.metrics_collector.collect(
+                namespace, start_time, end_time, metrics=scoped_names
+            )
+            if scoped_names
+            else asyncio.sleep(0, result=[]),
+            engine.logs_collector.collect(
+                namespace,
+                start_time,
+                end_time,
+                error_only=True,
+                max_lines=engine.logs_collector.error_lines,
+            ),
+        ]
+        metrics, logs = await asyncio.gather(*tasks, return_exceptions=True)
+        metrics = [] if isinstance(metrics, Exception) else metrics
+        logs = [] if isinstance(logs, Exception) else logs
+
+        analysis = None
+        stream = engine.analyze_collected_stream(
+            namespace,
+            start_time,
+            end_time,
+            metrics + shared_metrics,
+            events,
+            logs,
+            with_llm=False,
+        )
+        async for stage, payload in stream:
+            if stage == "complete":
+                analysis = payload
+        return analysis
+
+    @staticmethod
+    def _rank(details: Dict[str, RootCauseAnalysis]) -> List[Dict[str, Any]]:
+        """按最高根因置信度、关键事件数、异常指标数排序"""
+        rows = []
+        for namespace, analysis in details.items():
+            anomalies = analysis.anomalies or {}
+            critical_events = len(
+                anomalies.get("events", {}).get("critical_events", [])
+            )
+            anomalous_metrics = len(
+                anomalies.get("metrics", {}).get("high_anomaly_metrics", [])
+            )
+            top = max(analysis.root_causes, key=lambda c: c.confidence, default=None)
+            rows.append(
+                {
+                    "namespace": namespace,
+                    "score": round(top.confidence if top else 0.0, 4),
+                    "top_root_cause": top.cause_type if top else None,
+                    "root_causes": [c.cause_type for c in analysis.root_causes],
+                    "critical_events": critical_events,
+                    "anomalous_metrics": anomalous_metrics,
+                    "confidence_score": analysis.confidence_score,
+                }
+            )
+        rows.sort(
+            key=lambda r: (r["score"], r["critical_events"], r["anomalous_metrics"]),
+            reverse=True,
+        )
+        for rank, row in enumerate(rows, 1):
+            row["rank"] = rank
+        return rows
+
+    async def _summarize(
+        self, ranking: List[Dict[str, Any]], details: Dict[str, RootCauseAnalysis]
+    ) -> Optional[str]:
+        """一次LLM调用生成集群摘要，并回填各命名空间的建议"""
+        affected = [row for row in ranking if row["root_causes"]]
+        if not affected or not self.engine.llm_service:
+            return None
+
+        payload = [
+            {
+                "namespace": row["namespace"],
+                "root_causes": [
+                    {
+                        "type": cause.cause_type,
+                        "description": cause.description,
+                        "confidence": round(cause.confidence, 2),
+                        "affected_components": cause.affected_components[:3],
+                    }
+                    for cause in details[row["namespace"]].root_causes
+                ],
+            }
+            for row in affected[:20]
+        ]
+        system_prompt = """你是一个Kubernetes和云运维专家。基于多个命名空间的根因分析结果，输出JSON：
+{"summary": "不超过200字的集群整体结论", "recommendations": {"命名空间": ["不超过30字的建议", ...]}}
+每个命名空间最多3条建议，按优先级排序，只返回JSON。"""
+        try:
+            with llm_priority(LLMPriority.ANALYSIS):
+                response = await self.engine.llm_service.generate_response(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": json.dumps(payload, ensure_ascii=False),
+                        }
+                    ],
+                    system_prompt=system_prompt,
+                    temperature=0.3,
+                    max_tokens=1200,
+                    use_task_model=True,
+                )
+            parsed = self._parse_json(response)
+        except Exception as e:
+            logger.error(f"集群RCA摘要生成失败: {e}")
+            return None
+        if not parsed:
+            return response if isinstance(response, str) else None
+
+        for namespace, recommendations in (parsed.get("recommendations") or {}).items():
+            if namespace in details and isinstance(recommendations, list):
+                details[namespace].recommendations = [
+                    str(item) for item in recommendations[:3]
+                ]
+        return parsed.get("summary")
+
+    @staticmethod
+    def _parse_json(response: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(response, str):
+            return None
+        match = re.search(r"\{.*\}", response, re.DOTALL)
+        if not match:
+            return None
+        try:
+            parsed = json.loads(match.group(0))
+        except ValueError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+
+__all__ = ["ClusterRCAAnalyzer"]
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps持续根因分析 - 按命名空间维护滑动窗口，每次只拉取增量数据
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.rca_models import EventData, LogData, MetricData, RootCauseAnalysis
+
+from .rca_engine import RCAAnalysisEngine
+
+logger = logging.getLogger("aiops.rca.continuous")
+
+# listener(namespace, 上一次结果, 本次结果)，根因集合变化时调用
+RootCauseListener = Callable[
+    [str, Optional[RootCauseAnalysis], RootCauseAnalysis], Awaitable[None]
+]
+
+
+def _event_key(event: EventData) -> Tuple[Any, ...]:
+    # 事件重复发生时Kubernetes更新同一个Event的时间与次数，按对象身份去重
+    obj = event.involved_object or {}
+    return (
+        obj.get("kind"),
+        obj.get("namespace"),
+        obj.get("name"),
+        event.reason,
+        event.name,
+    )
+
+
+def _aware(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def _log_key(log: LogData) -> Tuple[Any, ...]:
+    return (log.pod_name, log.container_name, log.timestamp, log.message)
+
+
+def _root_cause_signature(analysis: Optional[RootCauseAnalysis]) -> Tuple[str, ...]:
+    if analysis is None:
+        return ()
+    return tuple(sorted(cause.cause_type for cause in analysis.root_causes))
+
+
+class ContinuousRCAWorker:
+    """单个命名空间的持续根因分析
+
+    - 首次执行收集完整窗口，之后每个周期只收集上次结束时间之后的增量
+    - 指标按序列名合并样本数组并裁剪到窗口内，再重新计算异常分数和趋势
+    - 事件按Event对象身份、日志按内容去重，保留最新一次后滑动裁剪
+    - 分析跳过LLM阶段，结果保存在内存中供API直接读取
+    """
+
+    def __init__(
+        self,
+        engine: RCAAnalysisEngine,
+        namespace: str,
+        window: timedelta = timedelta(hours=1),
+        interval: float = 60.0,
+        metrics: Optional[List[str]] = None,
+        overlap: timedelta = timedelta(minutes=2),
+    ) -> None:
+        self.engine = engine
+        self.namespace = namespace
+        self.window = window
+        self.interval = interval
+        self.metrics = metrics
+        # 增量窗口向前多取一段，吸收Prometheus和日志的延迟写入
+        self.overlap = overlap
+
+        self.latest: Optional[RootCauseAnalysis] = None
+        self.updated_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.stats = {"ticks": 0, "full_collections": 0, "errors": 0, "changes": 0}
+
+        self._metrics: Dict[str, MetricData] = {}
+        self._events: Dict[Tuple[Any, ...], EventData] = {}
+        self._logs: Dict[Tuple[Any, ...], LogData] = {}
+        self._last_end: Optional[datetime] = None
+        self._listeners: List[RootCauseListener] = []
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def add_listener(self, listener: RootCauseListener) -> None:
+        """注册根因变化回调"""
+        self._listeners.append(listener)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """在当前事件循环中启动后台任务"""
+        if self.running:
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(
+                f"持续RCA已启动: namespace={self.namespace}, 间隔{self.interval}秒"
+            )
+        except RuntimeError:
+            logger.warning("当前无运行中的事件循环，跳过持续RCA")
+
+    async def stop(self) -> None:
+        """停止后台任务"""
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.last_error = str(e)
+                logger.error(f"持续RCA执行失败: namespace={self.namespace}, {e}")
+            await asyncio.sleep(self.interval)
+
+    async def tick(self) -> RootCauseAnalysis:
+        """执行一个周期：拉取增量、更新窗口、重新分析并发布结果"""
+        async with self._lock:
+            end_time = datetime.now(timezone.utc)
+            window_start = end_time - self.window
+
+            full = self._last_end is None or self._last_end <= window_start
+            fetch_start = window_start if full else self._last_end - self.overlap
+            if full:
+                self.stats["full_collections"] += 1
+
+            metrics, events, logs = await self.engine.collect_all_data(
+                self.namespace, fetch_start, end_time, self.metrics
+            )
+            self._merge_metrics(metrics, window_start)
+            self._merge_records(self._events, events, _event_key, window_start)
+            self._merge_records(self._logs, logs, _log_key, window_start)
+            self._last_end = end_time
+
+            analysis = None
+            stream = self.engine.analyze_collected_stream(
+                self.namespace,
+                window_start,
+                end_time,
+                list(self._metrics.values()),
+                sorted(self._events.values(), key=lambda e: e.timestamp),
+                sorted(self._logs.values(), key=lambda log: log.timestamp),
+                with_llm=False,
+            )
+            async for stage, payload in stream:
+                if stage == "complete":
+                    analysis = payload
+
+            previous, self.latest = self.latest, analysis
+            self.updated_at = end_time
+            self.last_error = None
+            self.stats["ticks"] += 1
+
+        if _root_cause_signature(previous) != _root_cause_signature(analysis):
+            self.stats["changes"] += 1
+            await self._notify(previous, analysis)
+        return analysis
+
+    def _merge_metrics(self, metrics: List[MetricData], window_start: datetime) -> None:
+        """按序列名合并增量样本，重叠部分以新数据为准"""
+        oldest = int(window_start.timestamp())
+        touched = set()
+        for metric in metrics:
+            current = self._metrics.get(metric.name)
+            if current is not None and not metric.size:
+                # 本周期没有新样本，保留已累积的序列
+                continue
+            if current is not None:
+                keep = np.searchsorted(
+                    current.timestamps, metric.timestamps[0], side="left"
+                )
+                metric.timestamps = np.concatenate(
+                    [current.timestamps[:keep], metric.timestamps]
+                )
+                metric.samples = np.concatenate(
+                    [current.samples[:keep], metric.samples]
+                )
+            self._metrics[metric.name] = metric
+            touched.add(metric.name)
+
+        for name, metric in list(self._metrics.items()):
+            cut = np.searchsorted(metric.timestamps, oldest, side="left")
+            if cut >= metric.size:
+                del self._metrics[name]
+                continue
+            if cut or name in touched:
+                metric.timestamps = metric.timestamps[cut:]
+                metric.samples = metric.samples[cut:]
+                self.engine.metrics_collector.rescore(metric)
+
+    @staticmethod
+    def _merge_records(
+        store: Dict[Tuple[Any, ...], Any],
+        records: List[Any],
+        key: Callable[[Any], Tuple[Any, ...]],
+        window_start: datetime,
+    ) -> None:
+        for record in records:
+            # 同一记录以最新一次出现为准
+            record_key = key(record)
+            current = store.get(record_key)
+            if current is None or _aware(record.timestamp) >= _aware(
+                current.timestamp
+            ):
+                store[record_key] = record
+        for record_key, record in list(store.items()):
+            if _aware(record.timestamp) < window_start:
+                del store[record_key]
+
+    async def _notify(
+        self, previous: Optional[RootCauseAnalysis], current: RootCauseAnalysis
+    ) -> None:
+        for listener in self._listeners:
+            try:
+                await listener(self.namespace, previous, current)
+            except Exception as e:
+                logger.warning(f"根因变化回调失败: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """运行状态摘要"""
+        return {
+            "namespace": self.namespace,
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "window_minutes": self.window.total_seconds() / 60,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "last_error": self.last_error,
+            "buffered": {
+                "metrics": len(self._metrics),
+                "events": len(self._events),
+                "logs": len(self._logs),
+            },
+            "stats": dict(self.stats),
+        }
+
+
+__all__ = ["ContinuousRCAWorker", "RootCauseListener"]
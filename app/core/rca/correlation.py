@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps时间序列关联分析 - 统一时间网格上的FFT滞后互相关与变点对齐
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.rca_models import EventData, LogData, MetricData
+
+# 单次FFT互相关分块的元素上限，控制 (块行数, 信号数, FFT长度) 复数数组的内存
+_CHUNK_ELEMENTS = 4_000_000
+# 报告中保留的最强信号对数量
+_MAX_PAIRS = 50
+
+
+@dataclass
+class SignalGrid:
+    """对齐到统一时间网格的信号矩阵"""
+
+    start: int  # 网格起点 epoch秒
+    step: int  # 网格步长（秒）
+    names: List[str]
+    kinds: List[str]  # metric / event / log
+    matrix: np.ndarray  # (信号数, 网格点数) float64
+
+    def bin_time(self, index: int) -> datetime:
+        return datetime.fromtimestamp(self.start + index * self.step, timezone.utc)
+
+
+@dataclass
+class CorrelationReport:
+    """关联分析结果"""
+
+    step: int
+    pairs: List[Dict[str, Any]] = field(default_factory=list)  # 按强度降序
+    causes: List[Dict[str, Any]] = field(default_factory=list)  # 候选根因，按得分降序
+    change_points: Dict[str, datetime] = field(default_factory=dict)
+    # 领先关系邻接表: 信号名 -> [(被领先信号, 相关系数, 领先秒数)]
+    leads: Dict[str, List[Tuple[str, float, int]]] = field(default_factory=dict)
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def zscore(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """按行标准化，返回标准化矩阵和非常数行的掩码"""
+    centered = matrix - matrix.mean(axis=1, keepdims=True)
+    std = centered.std(axis=1, keepdims=True)
+    valid = std[:, 0] > 1e-12
+    return np.divide(centered, std, out=np.zeros_like(centered), where=std > 0), valid
+
+
+def lagged_cross_correlation(
+    matrix: np.ndarray, max_lag: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """对已标准化的信号两两计算 [-max_lag, max_lag] 内的滞后互相关
+
+    c[i, j, k] = sum_t x_i[t] * x_j[t + k] / T，k > 0 表示 i 领先 j。
+
+    Returns:
+        (best_corr, best_lag): 每对信号绝对值最大的相关系数及对应滞后步数
+    """
+    n, length = matrix.shape
+    max_lag = max(0, min(max_lag, length - 1))
+    # 补零到不小于 2T 的2的幂，循环相关等价于线性相关
+    fft_len = 1 << int(math.ceil(math.log2(max(2 * length, 2))))
+    spectrum = np.fft.rfft(matrix, n=fft_len, axis=1)
+    lag_index = np.r_[fft_len - max_lag : fft_len, 0 : max_lag + 1]
+
+    best_corr = np.zeros((n, n))
+    best_lag = np.zeros((n, n), dtype=np.int64)
+    chunk = max(1, _CHUNK_ELEMENTS // max(1, n * fft_len))
+    for lo in range(0, n, chunk):
+        hi = min(n, lo + chunk)
+        cross = np.conj(spectrum[lo:hi, None, :]) * spectrum[None, :, :]
+        corr = np.fft.irfft(cross, n=fft_len, axis=2)[:, :, lag_index] / length
+        k = np.abs(corr).argmax(axis=2)
+        best_corr[lo:hi] = np.take_along_axis(corr, k[:, :, None], axis=2)[:, :, 0]
+        best_lag[lo:hi] = k - max_lag
+    return best_corr, best_lag
+
+
+def change_points(matrix: np.ndarray) -> np.ndarray:
+    """CUSUM变点：标准化序列累积和绝对值最大处之后的第一个网格点"""
+    if not matrix.size:
+        return np.zeros(len(matrix), dtype=np.int64)
+    cusum = np.abs(np.cumsum(matrix, axis=1))
+    return np.minimum(cusum.argmax(axis=1) + 1, matrix.shape[1] - 1)
+
+
+class CrossCorrelationAnalyzer:
+    """把指标、事件与错误日志对齐到统一时间网格，按领先时间和相关强度排序候选根因
+
+    - 指标按网格点线性插值，事件和错误日志按网格计数
+    - 所有信号两两的滞后互相关通过一次批量FFT计算，复杂度 O(n² · T log T)
+    - 变点顺序与滞后方向一致的领先关系权重更高
+    """
+
+    def __init__(
+        self,
+        max_points: int = 120,
+        max_lag_ratio: float = 0.25,
+        threshold: float = 0.7,
+        max_signals: int = 300,
+    ) -> None:
+        self.max_points = max(8, max_points)
+        self.max_lag_ratio = max_lag_ratio
+        self.threshold = threshold
+        self.max_signals = max_signals
+
+    def build_grid(
+        self,
+        metrics: List[MetricData],
+        events: List[EventData],
+        logs: List[LogData],
+        start_time: datetime,
+        end_time: datetime,
+    ) -> Optional[SignalGrid]:
+        """生成信号矩阵，时间窗口过短或没有信号时返回None"""
+        start = int(_epoch(start_time))
+        end = int(_epoch(end_time))
+        step = max(1, math.ceil((end - start) / self.max_points))
+        points = (end - start) // step
+        if points < 8:
+            return None
+        centers = start + step * np.arange(points) + step / 2
+
+        names: List[str] = []
+        kinds: List[str] = []
+        rows: List[np.ndarray] = []
+
+        # 信号过多时优先保留异常分数高的指标
+        ranked = sorted(
+            (m for m in metrics if m.size >= 3),
+            key=lambda m: m.anomaly_score,
+            reverse=True,
+        )
+        for metric in ranked[: self.max_signals]:
+            names.append(metric.name)
+            kinds.append("metric")
+            rows.append(np.interp(centers, metric.timestamps, metric.samples))
+
+        counted: List[Tuple[str, str, List[datetime]]] = []
+        by_reason: Dict[str, List[datetime]] = {}
+        for event in events:
+            by_reason.setdefault(event.reason, []).append(event.timestamp)
+        counted.extend(("event", name, times) for name, times in by_reason.items())
+
+        by_pod: Dict[str, List[datetime]] = {}
+        for log in logs:
+            if log.is_error():
+                by_pod.setdefault(log.pod_name, []).append(log.timestamp)
+        counted.extend(("log", name, times) for name, times in by_pod.items())
+
+        if counted:
+            signal_ids, bins = [], []
+            for index, (_, _, times) in enumerate(counted):
+                stamps = np.fromiter((_epoch(t) for t in times), dtype=float)
+                idx = ((stamps - start) // step).astype(np.int64)
+                idx = idx[(idx >= 0) & (idx < points)]
+                signal_ids.append(np.full(len(idx), index))
+                bins.append(idx)
+            flat = np.concatenate(signal_ids) * points + np.concatenate(bins)
+            counts = np.bincount(flat, minlength=len(counted) * points)
+            rows.extend(counts.reshape(len(counted), points).astype(float))
+            for kind, name, _ in counted:
+                names.append(f"{kind}:{name}")
+                kinds.append(kind)
+
+        if not rows:
+            return None
+        return SignalGrid(start, step, names, kinds, np.vstack(rows))
+
+    def analyze(
+        self,
+        metrics: List[MetricData],
+        events: List[EventData],
+        logs: List[LogData],
+        start_time: datetime,
+        end_time: datetime,
+    ) -> Optional[CorrelationReport]:
+        """执行关联分析"""
+        grid = self.build_grid(metrics, events, logs, start_time, end_time)
+        if grid is None:
+            return None
+
+        normalized, valid = zscore(grid.matrix)
+        keep = np.flatnonzero(valid)
+        report = CorrelationReport(step=grid.step)
+        if not len(keep):
+            return report
+
+        normalized = normalized[keep]
+        names = [grid.names[i] for i in keep]
+        kinds = [grid.kinds[i] for i in keep]
+        points = np.asarray(change_points(normalized))
+        report.change_points = {
+            name: grid.bin_time(int(cp)) for name, cp in zip(names, points)
+        }
+        if len(keep) < 2:
+            return report
+
+        max_lag = int(normalized.shape[1] * self.max_lag_ratio)
+        corr, lag = lagged_cross_correlation(normalized, max_lag)
+
+        strength = np.abs(corr)
+        np.fill_diagonal(strength, 0.0)
+        significant = strength >= self.threshold
+
+        # 对称对只取一次：滞后为正的方向，或零滞后时的上三角
+        upper = np.triu(np.ones_like(significant), k=1)
+        pair_mask = significant & ((lag > 0) | ((lag == 0) & upper))
+        rows, cols = np.nonzero(pair_mask)
+        order = np.argsort(-strength[rows, cols])[:_MAX_PAIRS]
+        for i, j in zip(rows[order], cols[order]):
+            report.pairs.append(
+                {
+                    "leader": names[i],
+                    "follower": names[j],
+                    "correlation": round(float(corr[i, j]), 4),
+                    "lag_seconds": int(lag[i, j]) * grid.step,
+                }
+            )
+
+        # 领先关系：i 领先 j，且变点顺序一致时满权重，否则减半
+        leading = significant & (lag > 0)
+        aligned = points[:, None] <= points[None, :]
+        weight = np.where(leading, strength * np.where(aligned, 1.0, 0.5), 0.0)
+        led_count = leading.sum(axis=1)
+        score = weight.sum(axis=1)
+        lead_steps = np.where(leading, lag, 0).sum(axis=1) / np.maximum(led_count, 1)
+
+        for i in np.flatnonzero(led_count):
+            followers = np.flatnonzero(leading[i])
+            followers = followers[np.argsort(-strength[i, followers])]
+            report.leads[names[i]] = [
+                (names[j], float(corr[i, j]), int(lag[i, j]) * grid.step)
+                for j in followers
+            ]
+
+        ranked = sorted(
+            np.flatnonzero(led_count),
+            key=lambda i: (score[i], lead_steps[i]),
+            reverse=True,
+        )
+        for i in ranked:
+            report.causes.append(
+                {
+                    "signal": names[i],
+                    "kind": kinds[i],
+                    "score": round(float(score[i]), 4),
+                    "strength": round(float(weight[i].sum() / led_count[i]), 4),
+                    "lead_time_seconds": round(float(lead_steps[i]) * grid.step, 1),
+                    "leads": [name for name, _, _ in report.leads[names[i]][:5]],
+                    "change_point": report.change_points[names[i]].isoformat(),
+                }
+            )
+        return report
+
+
+__all__ = [
+    "CorrelationReport",
+    "CrossCorrelationAnalyzer",
+    "SignalGrid",
+    "change_points",
+    "lagged_cross_correlation",
+    "zscore",
+]
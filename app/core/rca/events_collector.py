@@ -12,7 +12,10 @@ Description: AI-CloudOps事件数据收集器
 import asyncio
 from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Set
+import heapq
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
 
 from app.config.settings import CONFIG, config
 from app.core.interfaces.k8s_client import K8sClient, NullK8sClient
@@ -24,6 +27,9 @@ from .base_collector import BaseDataCollector
 class EventsCollector(BaseDataCollector):
     """优化的Kubernetes事件数据收集器"""
 
+    # 跨所有命名空间收集
+    ALL_NAMESPACES = "*"
+
     # 严重程度映射 - 简化配置
     SEVERITY_MAPPING = {
         SeverityLevel.CRITICAL: {
@@ -71,8 +77,10 @@ class EventsCollector(BaseDataCollector):
         self.default_event_types = self.events_config.get(
             "default_event_types", ["Warning", "Normal"]
         )
-        self.batch_size = self.events_config.get("batch_size", 100)
+        self.page_size = self.events_config.get("page_size", 500)
         self.max_events_limit = self.events_config.get("max_events_limit", 1000)
+        self.max_scan_events = self.events_config.get("max_scan_events", 20000)
+        self.max_selector_fanout = self.events_config.get("max_selector_fanout", 10)
         self.concurrent_limit = self.events_config.get("concurrent_limit", 5)
 
         self._severity_cache = self._build_severity_cache()
@@ -120,13 +128,14 @@ class EventsCollector(BaseDataCollector):
         self, namespace: str, start_time: datetime, end_time: datetime, **kwargs
     ) -> List[EventData]:
         """
-        收集K8s事件数据（优化版本）
+        收集K8s事件数据（分页 + 服务端过滤）
 
         Args:
-            namespace: Kubernetes命名空间
+            namespace: Kubernetes命名空间，ALL_NAMESPACES 表示整个集群
             start_time: 开始时间
             end_time: 结束时间
-            **kwargs: 其他参数
+            **kwargs: event_types、object_names、namespaces（多个命名空间）、
+                max_events（覆盖 max_events_limit，跨命名空间收集时使用）
 
         Returns:
             List[EventData]: 事件数据列表
@@ -139,21 +148,45 @@ class EventsCollector(BaseDataCollector):
 
         event_types = set(kwargs.get("event_types", self.default_event_types))
         object_names = set(kwargs.get("object_names", []))
+        namespaces = kwargs.get("namespaces") or [namespace]
+        max_events = kwargs.get("max_events") or self.max_events_limit
 
         try:
-            # 获取事件
-            raw_events = await self.k8s.get_events(
-                namespace=namespace, limit=self.max_events_limit
-            )
-            self.logger.info(
-                f"获取到原始事件数量: {len(raw_events)}, 时间范围: {start_time} 到 {end_time}"
-            )
+            selectors = self._build_field_selectors(event_types, object_names)
+            semaphore = asyncio.Semaphore(self.concurrent_limit)
+
+            async def collect_with_limit(ns: Optional[str], selector: Optional[str]):
+                async with semaphore:
+                    return await self._collect_paged(
+                        ns,
+                        selector,
+                        start_time,
+                        end_time,
+                        event_types,
+                        object_names,
+                        max_events,
+                    )
 
-            # 批量处理事件
-            processed_events = await self._batch_process_events(
-                raw_events, start_time, end_time, event_types, object_names
+            results = await asyncio.gather(
+                *[
+                    collect_with_limit(
+                        None if ns == self.ALL_NAMESPACES else ns, selector
+                    )
+                    for ns in dict.fromkeys(namespaces)
+                    for selector in selectors
+                ]
             )
 
+            matched = [item for items, _ in results for item in items]
+            scanned = sum(count for _, count in results)
+
+            # 只保留时间窗口内最新的事件
+            matched.sort(key=lambda x: x[0], reverse=True)
+            processed_events = [
+                self._convert_to_event_data(event, timestamp)
+                for timestamp, event in matched[:max_events]
+            ]
+
             # 按严重程度和时间排序
             processed_events.sort(
                 key=lambda x: (self._severity_order(x.severity), x.timestamp),
@@ -161,7 +194,8 @@ class EventsCollector(BaseDataCollector):
             )
 
             self.logger.info(
-                f"成功收集 {len(processed_events)}/{len(raw_events)} 个事件"
+                f"成功收集 {len(processed_events)}/{scanned} 个事件, "
+                f"时间范围: {start_time} 到 {end_time}"
             )
             return processed_events
 
@@ -169,71 +203,107 @@ class EventsCollector(BaseDataCollector):
             self.logger.error(f"收集K8s事件失败: {str(e)}")
             return []
 
-    async def _batch_process_events(
+    def _build_field_selectors(
+        self, event_types: Set[str], object_names: Set[str]
+    ) -> List[Optional[str]]:
+        """把类型和对象名过滤下推为字段选择器
+
+        字段选择器不支持“或”，单一取值时直接下推；多个对象名时按名称拆分请求，
+        超过 max_selector_fanout 时改为只在本地过滤。
+        """
+        base = []
+        if len(event_types) == 1:
+            base.append(f"type={next(iter(event_types))}")
+
+        if object_names and len(object_names) <= self.max_selector_fanout:
+            return [
+                ",".join(base + [f"involvedObject.name={name}"])
+                for name in sorted(object_names)
+            ]
+        return [",".join(base) or None]
+
+    async def _collect_paged(
         self,
-        raw_events: List[Dict],
+        namespace: Optional[str],
+        field_selector: Optional[str],
         start_time: datetime,
         end_time: datetime,
         event_types: Set[str],
         object_names: Set[str],
-    ) -> List[EventData]:
-        """批量处理事件以提高性能"""
-        processed_events = []
+        max_events: Optional[int] = None,
+    ) -> Tuple[List[Tuple[datetime, Dict[str, Any]]], int]:
+        """按 continue 令牌分页拉取并逐页过滤，返回时间窗口内最新的事件和扫描总数
 
-        # 使用异步批处理
-        for i in range(0, len(raw_events), self.batch_size):
-            batch = raw_events[i : i + self.batch_size]
-            batch_results = await asyncio.gather(
-                *[
-                    self._process_single_event(
-                        event, start_time, end_time, event_types, object_names
-                    )
-                    for event in batch
-                ],
-                return_exceptions=True,
+        API按键而非时间顺序返回事件，后面的分页仍可能有更新的事件，因此一直扫描到
+        列表末尾或 max_scan_events，用容量为 max_events 的最小堆保留最新事件。
+        """
+        newest: List[Tuple[datetime, int, Dict[str, Any]]] = []
+        scanned = 0
+        continue_token = None
+        max_events = max_events or self.max_events_limit
+
+        while True:
+            page, continue_token = await self.k8s.list_events_page(
+                namespace=namespace,
+                field_selector=field_selector,
+                limit=self.page_size,
+                continue_token=continue_token,
             )
-
-            for result in batch_results:
-                if isinstance(result, EventData):
-                    processed_events.append(result)
-                elif isinstance(result, Exception):
-                    self.logger.warning(f"处理事件失败: {result}")
-
-        return processed_events
-
-    async def _process_single_event(
+            matched = self._filter_events(
+                page, start_time, end_time, event_types, object_names
+            )
+            for offset, (timestamp, event) in enumerate(matched):
+                # 扫描序号用于时间相同时的比较，避免比较事件字典
+                item = (timestamp, scanned + offset, event)
+                if len(newest) < max_events:
+                    heapq.heappush(newest, item)
+                elif timestamp > newest[0][0]:
+                    heapq.heapreplace(newest, item)
+            scanned += len(page)
+
+            # 没有下一页或扫描量超限时停止
+            if not continue_token or scanned >= self.max_scan_events:
+                break
+
+        return [(timestamp, event) for timestamp, _, event in newest], scanned
+
+    def _filter_events(
         self,
-        event: Dict,
+        events: List[Dict[str, Any]],
         start_time: datetime,
         end_time: datetime,
         event_types: Set[str],
         object_names: Set[str],
-    ) -> Optional[EventData]:
-        """处理单个事件"""
-        try:
-            # 解析时间
-            event_time = self._parse_event_time(event)
-
-            # 时间过滤
-            if not (start_time <= event_time <= end_time):
-                return None
+    ) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """一次向量化完成时间、类型和对象名过滤，返回 (时间, 事件) 列表"""
+        if not events:
+            return []
 
-            # 类型过滤
-            if event_types and event.get("type") not in event_types:
-                return None
+        timestamps = [self._parse_event_time(event) for event in events]
+        epochs = np.fromiter(
+            (ts.timestamp() for ts in timestamps), dtype=float, count=len(events)
+        )
+        mask = (epochs >= start_time.timestamp()) & (epochs <= end_time.timestamp())
 
-            # 对象名称过滤
-            if object_names:
-                involved_object = event.get("involvedObject", {})
-                if involved_object.get("name") not in object_names:
-                    return None
+        if event_types:
+            types = np.array(
+                [event.get("type") or "" for event in events], dtype=object
+            )
+            mask &= np.isin(types, list(event_types))
 
-            return self._convert_to_event_data(event)
-        except Exception as e:
-            self.logger.debug(
-                f"处理单个事件时出错: {e}, 事件: {event.get('reason', 'Unknown')}"
+        if object_names:
+            names = np.array(
+                [self._involved_object(event).get("name") or "" for event in events],
+                dtype=object,
             )
-            return None
+            mask &= np.isin(names, list(object_names))
+
+        return [(timestamps[i], events[i]) for i in np.flatnonzero(mask)]
+
+    @staticmethod
+    def _involved_object(event: Dict[str, Any]) -> Dict[str, Any]:
+        # KubernetesService 返回 snake_case，原始API对象为 involvedObject
+        return event.get("involved_object") or event.get("involvedObject") or {}
 
     def _parse_event_time(self, event: Dict[str, Any]) -> datetime:
         """优化的时间解析"""
@@ -256,7 +326,12 @@ class EventsCollector(BaseDataCollector):
                     continue
 
         # 尝试从metadata获取
-        creation_timestamp = event.get("metadata", {}).get("creationTimestamp")
+        metadata = event.get("metadata") or {}
+        creation_timestamp = metadata.get("creation_timestamp") or metadata.get(
+            "creationTimestamp"
+        )
+        if isinstance(creation_timestamp, datetime):
+            return self._ensure_timezone(creation_timestamp)
         if creation_timestamp:
             try:
                 if creation_timestamp.endswith("Z"):
@@ -275,9 +350,11 @@ class EventsCollector(BaseDataCollector):
             return dt.replace(tzinfo=timezone.utc)
         return dt
 
-    def _convert_to_event_data(self, event: Dict[str, Any]) -> EventData:
+    def _convert_to_event_data(
+        self, event: Dict[str, Any], timestamp: Optional[datetime] = None
+    ) -> EventData:
         """优化的事件转换"""
-        timestamp = self._parse_event_time(event)
+        timestamp = timestamp or self._parse_event_time(event)
         event_type = event.get("type", "Unknown")
         reason = event.get("reason", "Unknown")
         message = str(event.get("message", ""))
@@ -294,8 +371,7 @@ class EventsCollector(BaseDataCollector):
             except (ValueError, TypeError):
                 count = 1
 
-        # 注意：Kubernetes API返回的是involvedObject（驼峰命名）
-        involved_object = event.get("involvedObject", {})
+        involved_object = self._involved_object(event)
 
         # 确保所有字段都有值，避免空字段
         object_info = {
@@ -306,6 +382,7 @@ class EventsCollector(BaseDataCollector):
         }
 
         severity = self._determine_severity(event_type, reason, message)
+        metadata = event.get("metadata") or {}
 
         return EventData(
             timestamp=timestamp,
@@ -315,6 +392,7 @@ class EventsCollector(BaseDataCollector):
             involved_object=object_info,
             severity=severity,
             count=count,
+            name=str(metadata.get("name") or ""),
         )
 
     def _determine_severity(
@@ -10,8 +10,9 @@ Description: AI-CloudOps指标数据收集器
 """
 
 import asyncio
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -25,6 +26,7 @@ from app.core.interfaces.prometheus_client import (
 from app.models.rca_models import MetricData
 
 from .base_collector import BaseDataCollector
+from .series_cache import SeriesBlock, SeriesCache
 
 
 class MetricsCollector(BaseDataCollector):
@@ -45,11 +47,15 @@ class MetricsCollector(BaseDataCollector):
 
         # 缓存配置
         cache_config = self.metrics_config
-        self._query_cache = {}
         self._anomaly_cache = {}
         self.cache_size = cache_config.get("cache_size", 100)
-        self.cache_ttl = cache_config.get("cache_ttl", 60)
+        self.cache_ttl = cache_config.get("cache_ttl", 600)
         self.anomaly_cache_size = cache_config.get("anomaly_cache_size", 500)
+        self._series_cache = SeriesCache(
+            max_entries=self.cache_size,
+            refresh_interval=self.cache_ttl,
+            retention=int(self.rca_config.max_time_range) * 60,
+        )
 
         # 指标配置
         self.default_metrics = (
@@ -63,6 +69,7 @@ class MetricsCollector(BaseDataCollector):
             else self.metrics_config.get("step_interval", "1m")
         )
         self.concurrent_limit = self.metrics_config.get("concurrent_limit", 3)
+        self.max_batch_metrics = self.metrics_config.get("max_batch_metrics", 20)
 
         # 阈值配置
         self.thresholds = self.metrics_config.get("thresholds", {})
@@ -104,7 +111,7 @@ class MetricsCollector(BaseDataCollector):
         self, namespace: str, start_time: datetime, end_time: datetime, **kwargs
     ) -> List[MetricData]:
         """
-        收集指标数据（修复版本）
+        收集指标数据（按查询计划批量查询）
 
         Args:
             namespace: Kubernetes命名空间
@@ -122,130 +129,178 @@ class MetricsCollector(BaseDataCollector):
             start_time = self._ensure_timezone(start_time)
             end_time = self._ensure_timezone(end_time)
 
-            metrics_to_collect = kwargs.get("metrics", self.default_metrics)
+            # 显式传入 metrics=None 或空列表时同样使用默认指标
+            metrics_to_collect = kwargs.get("metrics") or self.default_metrics
 
             # 安全检查指标列表
             if not metrics_to_collect:
                 self.logger.debug("没有指定要收集的指标，返回空列表")
                 return []
 
-            # 并发收集所有指标
             collected_metrics = []
+            plan = self._plan_queries(
+                list(dict.fromkeys(metrics_to_collect)), namespace
+            )
+
+            # 窗口对齐到步长边界，相邻的分析可以复用缓存
+            step = self._step_seconds(self.step_interval)
+            start_ts, end_ts = SeriesCache.align(
+                start_time.timestamp(), end_time.timestamp(), step
+            )
 
             # 限制并发数
             semaphore = asyncio.Semaphore(self.concurrent_limit)
 
-            async def collect_with_limit(metric_name):
+            async def collect_with_limit(query: str, metric_names: List[str]):
                 async with semaphore:
-                    return await self._collect_single_metric(
-                        metric_name, namespace, start_time, end_time
+                    return await self._collect_batch(
+                        query, metric_names, step, start_ts, end_ts
                     )
 
-            # 创建任务
-            tasks = [collect_with_limit(metric) for metric in metrics_to_collect]
-
-            # 执行任务
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = await asyncio.gather(
+                *[collect_with_limit(query, names) for query, names in plan],
+                return_exceptions=True,
+            )
 
             # 处理结果
-            for i, result in enumerate(results):
+            for (query, metric_names), result in zip(plan, results):
                 if isinstance(result, list):
                     collected_metrics.extend(result)
                 elif isinstance(result, Exception):
-                    self.logger.warning(
-                        f"收集指标 {metrics_to_collect[i]} 失败: {result}"
-                    )
+                    self.logger.warning(f"收集指标 {metric_names} 失败: {result}")
 
-            self.logger.info(f"成功收集 {len(collected_metrics)} 个指标数据")
+            self.logger.info(
+                f"成功收集 {len(collected_metrics)} 个指标数据, "
+                f"{len(metrics_to_collect)} 个指标共 {len(plan)} 次查询"
+            )
             return collected_metrics
 
         except Exception as e:
             self.logger.error(f"指标收集失败: {str(e)}", exc_info=True)
             return []
 
-    async def _collect_single_metric(
-        self, metric_name: str, namespace: str, start_time: datetime, end_time: datetime
+    async def _collect_batch(
+        self,
+        query: str,
+        metric_names: List[str],
+        step: int,
+        start_ts: int,
+        end_ts: int,
     ) -> List[MetricData]:
-        """收集单个指标"""
-        try:
-            # 检查缓存
-            cache_key = f"{metric_name}:{namespace}:{start_time}:{end_time}"
-            if cache_key in self._query_cache:
-                cache_entry = self._query_cache[cache_key]
-                if (datetime.now() - cache_entry["timestamp"]).seconds < self.cache_ttl:
-                    return cache_entry["data"]
-
-            # 构建查询
-            query = self._build_optimized_query(metric_name, namespace)
-
-            # 执行查询
-            self.logger.info(f"执行Prometheus查询: {query}")
-            data = await self.prometheus.query_range(
-                query=query,
-                start_time=start_time,
-                end_time=end_time,
-                step=self.step_interval,
-            )
-
-            self.logger.info(f"查询 {metric_name} 返回数据类型: {type(data)}")
-            if data is not None:
-                self.logger.info(
-                    f"查询 {metric_name} 返回数据形状: {data.shape if hasattr(data, 'shape') else 'N/A'}"
-                )
-
-            if data is None:
-                self.logger.warning(
-                    f"Prometheus查询返回None: {metric_name}, 查询: {query}"
-                )
-                # 尝试不带聚合的查询作为回退
-                fallback_query = metric_name
-                self.logger.info(f"尝试回退查询: {fallback_query}")
-                data = await self.prometheus.query_range(
-                    query=fallback_query,
-                    start_time=start_time,
-                    end_time=end_time,
-                    step=self.step_interval,
-                )
-                if data is None:
-                    self.logger.error(f"回退查询也失败: {metric_name}")
-                    return []
-                else:
-                    self.logger.info(f"回退查询成功: {metric_name}")
+        """执行一次（可能合并了多个指标的）查询，并按 __name__ 拆分结果"""
+        series = await self._query_series(query, step, start_ts, end_ts)
+        by_name = self._split_by_name(series or [], metric_names)
+
+        # 带过滤和聚合的查询无结果时，对缺失指标统一做一次不带条件的回退查询
+        missing = [name for name in metric_names if name not in by_name]
+        if missing:
+            fallback_query = self._build_selector(missing, ())
+            self.logger.info(f"尝试回退查询: {fallback_query}")
+            fallback = await self._query_series(fallback_query, step, start_ts, end_ts)
+            by_name.update(self._split_by_name(fallback or [], missing))
 
-            if hasattr(data, "empty") and data.empty:
+        metric_data_list = []
+        for metric_name in metric_names:
+            if metric_name not in by_name:
                 self.logger.warning(f"Prometheus查询返回空数据: {metric_name}")
-                return []
-
-            # 处理数据
-            metric_data_list = self._process_metric_data_optimized(metric_name, data)
+                continue
 
-            # 只缓存非空结果
-            if metric_data_list:
-                self._query_cache[cache_key] = {
-                    "data": metric_data_list,
-                    "timestamp": datetime.now(),
-                }
+            data = self._series_to_frame(by_name[metric_name])
+            metric_data_list.extend(
+                self._process_metric_data_optimized(metric_name, data)
+            )
 
-            # 限制缓存大小
-            if len(self._query_cache) > self.cache_size:
-                # 删除最老的缓存项
-                oldest_key = min(
-                    self._query_cache.keys(),
-                    key=lambda k: self._query_cache[k]["timestamp"],
-                )
-                del self._query_cache[oldest_key]
+        return metric_data_list
 
-            return metric_data_list
+    async def _query_series(
+        self, query: str, step: int, start_ts: int, end_ts: int
+    ) -> Optional[List[SeriesBlock]]:
+        """经时间序列缓存查询，缓存覆盖不到的部分才请求Prometheus"""
 
-        except Exception as e:
-            self.logger.warning(f"收集指标 {metric_name} 失败: {str(e)}")
-            return []
+        async def loader(start: int, end: int):
+            self.logger.info(f"执行Prometheus查询: {query} [{start}, {end}]")
+            return await self.prometheus.query_range_series(
+                query=query,
+                start_time=datetime.fromtimestamp(start, timezone.utc),
+                end_time=datetime.fromtimestamp(end, timezone.utc),
+                step=self.step_interval,
+            )
 
-    def _build_optimized_query(self, metric_name: str, namespace: str) -> str:
-        """构建优化的Prometheus查询"""
-        # 基础查询
-        base_query = metric_name
+        return await self._series_cache.fetch(query, step, start_ts, end_ts, loader)
+
+    @staticmethod
+    def _split_by_name(
+        series: List[SeriesBlock], metric_names: List[str]
+    ) -> Dict[str, List[SeriesBlock]]:
+        """按 __name__ 把查询结果拆回各个指标"""
+        by_name: Dict[str, List[SeriesBlock]] = defaultdict(list)
+        for block in series:
+            name = block.labels.get("__name__")
+            # 单指标聚合查询的结果不带 __name__
+            if name is None and len(metric_names) == 1:
+                name = metric_names[0]
+            if name in metric_names and len(block.timestamps):
+                by_name[name].append(block)
+        return dict(by_name)
+
+    @staticmethod
+    def _series_to_frame(series: List[SeriesBlock]) -> pd.DataFrame:
+        """把序列数组转换为带 label_* 列的长表"""
+        frames = []
+        for block in series:
+            frame = pd.DataFrame(
+                {
+                    "timestamp": pd.to_datetime(block.timestamps, unit="s", utc=True),
+                    "value": block.values,
+                }
+            )
+            for label, value in block.labels.items():
+                if label != "__name__":
+                    frame[f"label_{label}"] = value
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _step_seconds(step: str) -> int:
+        """把 "30s"/"1m"/"1h" 形式的步长转换为秒"""
+        units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+        step = str(step).strip()
+        if step and step[-1] in units:
+            return max(1, int(float(step[:-1]) * units[step[-1]]))
+        return max(1, int(float(step)))
+
+    def _plan_queries(
+        self, metric_names: List[str], namespace: str
+    ) -> List[Tuple[str, List[str]]]:
+        """生成查询计划
+
+        标签过滤和聚合方式相同的指标合并为一个 __name__ 正则选择器，
+        聚合方式不同的指标各自单独查询。
 
+        Returns:
+            [(查询语句, 该查询覆盖的指标名列表)]
+        """
+        groups: Dict[Tuple, List[str]] = {}
+        for metric_name in metric_names:
+            spec = self._query_spec(metric_name, namespace)
+            groups.setdefault(spec, []).append(metric_name)
+
+        plan = []
+        for (by_labels, filters), names in groups.items():
+            for i in range(0, len(names), self.max_batch_metrics):
+                batch = names[i : i + self.max_batch_metrics]
+                plan.append((self._build_query(batch, by_labels, filters), batch))
+        return plan
+
+    def is_namespace_scoped(self, metric_name: str) -> bool:
+        """指标查询是否按命名空间过滤；否则为节点等集群级指标，可跨命名空间共享"""
+        _, filters = self._query_spec(metric_name, "")
+        return any(f.startswith("namespace=") for f in filters)
+
+    def _query_spec(
+        self, metric_name: str, namespace: str
+    ) -> Tuple[Optional[Tuple[str, ...]], Tuple[str, ...]]:
+        """确定指标的聚合标签和标签过滤器，返回 (sum by 标签或None, 过滤器)"""
         # 构建标签过滤器
         filters = []
 
@@ -275,24 +330,43 @@ class MetricsCollector(BaseDataCollector):
             elif "container_" in metric_name:
                 filters.append(f'namespace="{namespace}"')
 
-        # 组合查询
-        if filters:
-            query = f"{base_query}{{{','.join(filters)}}}"
-        else:
-            query = base_query
-
         # 添加聚合（如果需要）
+        by_labels = None
         if "container_" in metric_name:
             # 按Pod聚合
-            query = f"sum by (pod, container) ({query})"
+            by_labels = ("pod", "container")
         elif "node_" in metric_name:
             # 按节点聚合
-            query = f"sum by (instance) ({query})"
+            by_labels = ("instance",)
         elif "apiserver_" in metric_name:
             # API服务器指标按请求类型聚合
-            query = f"sum by (verb, resource) ({query})"
+            by_labels = ("verb", "resource")
+
+        return by_labels, tuple(filters)
+
+    @staticmethod
+    def _build_selector(metric_names: List[str], filters: Tuple[str, ...]) -> str:
+        if len(metric_names) == 1:
+            selector = metric_names[0]
+            return f"{selector}{{{','.join(filters)}}}" if filters else selector
 
-        self.logger.debug(f"构建查询: {metric_name} -> {query}")
+        # 指标名只含 [a-zA-Z0-9_:]，无需正则转义
+        pattern = "|".join(metric_names)
+        matchers = (f'__name__=~"{pattern}"',) + filters
+        return f"{{{','.join(matchers)}}}"
+
+    def _build_query(
+        self,
+        metric_names: List[str],
+        by_labels: Optional[Tuple[str, ...]],
+        filters: Tuple[str, ...],
+    ) -> str:
+        query = self._build_selector(metric_names, filters)
+        if by_labels:
+            # 合并查询需要保留 __name__ 才能拆分结果
+            if len(metric_names) > 1:
+                by_labels = ("__name__",) + by_labels
+            query = f"sum by ({', '.join(by_labels)}) ({query})"
         return query
 
     def _process_metric_data_optimized(
@@ -355,17 +429,12 @@ class MetricsCollector(BaseDataCollector):
         self, name: str, data: pd.DataFrame, labels: Dict[str, str]
     ) -> MetricData:
         """快速创建MetricData对象"""
-        # 提取时间序列值（优化：批量处理）
-        values = []
+        # 直接保存数组，JSON列表只在API边界按需生成
+        timestamps = samples = ()
         if "timestamp" in data.columns and "value" in data.columns:
-            # 使用向量化操作
-            timestamps = data["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-            values_array = data["value"].fillna(0.0).values
-
-            values = [
-                {"timestamp": ts, "value": float(val)}
-                for ts, val in zip(timestamps, values_array)
-            ]
+            epochs = data["timestamp"].values.astype("datetime64[s]")
+            timestamps = epochs.astype(np.int64)
+            samples = data["value"].fillna(0.0).to_numpy(dtype=np.float64)
 
         # 快速计算基础统计
         value_series = data["value"].dropna()
@@ -380,18 +449,32 @@ class MetricsCollector(BaseDataCollector):
 
         return MetricData(
             name=name,
-            values=values,
             labels=labels,
+            timestamps=timestamps,
+            samples=samples,
             anomaly_score=anomaly_score,
             trend=trend,
         )
 
-    def _calculate_anomaly_score_fast(self, values: pd.Series) -> float:
+    def rescore(self, metric: MetricData) -> MetricData:
+        """按当前样本重新计算异常分数和趋势，用于滑动窗口增量更新之后"""
+        values = pd.Series(metric.samples)
+        metric.anomaly_score = (
+            self._calculate_anomaly_score_fast(values, use_cache=False)
+            if len(values) >= 10
+            else 0.0
+        )
+        metric.trend = self._analyze_trend_fast(values)
+        return metric
+
+    def _calculate_anomaly_score_fast(
+        self, values: pd.Series, use_cache: bool = True
+    ) -> float:
         """快速计算异常分数"""
         try:
             # 使用缓存的异常分数
             values_hash = hash(tuple(values.head(20)))  # 使用前20个值的哈希
-            if values_hash in self._anomaly_cache:
+            if use_cache and values_hash in self._anomaly_cache:
                 return self._anomaly_cache[values_hash]
 
             scores = []
@@ -434,7 +517,7 @@ class MetricsCollector(BaseDataCollector):
                 final_score = 0.0
 
             # 缓存结果
-            if len(self._anomaly_cache) < self.anomaly_cache_size:
+            if use_cache and len(self._anomaly_cache) < self.anomaly_cache_size:
                 self._anomaly_cache[values_hash] = final_score
 
             return float(min(max(final_score, 0.0), 1.0))
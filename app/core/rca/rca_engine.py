@@ -14,12 +14,17 @@ from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import numpy as np
 
 from app.config.settings import CONFIG, config
-from app.core.interfaces.llm_client import LLMClient, NullLLMClient
+from app.core.interfaces.llm_client import (
+    LLMClient,
+    LLMPriority,
+    NullLLMClient,
+    llm_priority,
+)
 from app.models.rca_models import (
     CorrelationResult,
     EventData,
@@ -30,6 +35,7 @@ from app.models.rca_models import (
     SeverityLevel,
 )
 
+from .correlation import CorrelationReport, CrossCorrelationAnalyzer
 from .events_collector import EventsCollector
 from .logs_collector import LogsCollector
 from .metrics_collector import MetricsCollector
@@ -123,6 +129,15 @@ class RCAAnalysisEngine:
         self.max_retries = rca_config_dict.get("max_retries", 3)
         self.timeout = rca_config_dict.get("timeout", 30)
 
+        # 时间序列关联分析
+        correlation_config = rca_config_dict.get("correlation", {})
+        self.correlation_analyzer = CrossCorrelationAnalyzer(
+            max_points=correlation_config.get("max_points", 120),
+            max_lag_ratio=correlation_config.get("max_lag_ratio", 0.25),
+            threshold=self.correlation_threshold,
+            max_signals=correlation_config.get("max_signals", 300),
+        )
+
         # 初始化收集器（支持依赖注入）
         self.metrics_collector = metrics_collector or MetricsCollector(config_dict)
         self.events_collector = events_collector or EventsCollector(config_dict)
@@ -143,6 +158,17 @@ class RCAAnalysisEngine:
         )
         self.logger.info("RCA分析引擎初始化完成")
 
+    # analyze_stream 依次产出的阶段，recommendations 与 report 按完成先后产出
+    STREAM_STAGES = (
+        "collection",
+        "anomalies",
+        "correlations",
+        "root_causes",
+        "recommendations",
+        "report",
+        "complete",
+    )
+
     async def analyze(
         self,
         namespace: str,
@@ -152,6 +178,25 @@ class RCAAnalysisEngine:
         """
         执行根因分析
         """
+        result = None
+        stream = self.analyze_stream(namespace, time_window, metrics)
+        async for stage, payload in stream:
+            if stage == "complete":
+                result = payload
+        return result
+
+    async def analyze_stream(
+        self,
+        namespace: str,
+        time_window: timedelta = timedelta(hours=1),
+        metrics: Optional[List[str]] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        逐阶段执行根因分析，每个阶段完成后立即产出 (阶段名, 结果)
+
+        数据驱动的阶段先产出；两个LLM阶段并发执行，按完成先后产出。
+        调用方提前关闭生成器时，未完成的LLM任务会被取消。
+        """
         # 确定时间范围
         end_time = datetime.now(timezone.utc)
         start_time = end_time - time_window
@@ -162,18 +207,71 @@ class RCAAnalysisEngine:
         )
 
         # 并行收集三种数据
-        metrics_data, events_data, logs_data = await self._collect_all_data(
+        metrics_data, events_data, logs_data = await self.collect_all_data(
             namespace, start_time, end_time, metrics
         )
 
         # 记录数据收集情况
         self._log_data_collection_summary(metrics_data, events_data, logs_data)
 
+        stream = self.analyze_collected_stream(
+            namespace, start_time, end_time, metrics_data, events_data, logs_data
+        )
+        try:
+            async for item in stream:
+                yield item
+        finally:
+            # 提前关闭时同步关闭内层生成器，取消进行中的LLM任务
+            await stream.aclose()
+
+    async def analyze_collected_stream(
+        self,
+        namespace: str,
+        start_time: datetime,
+        end_time: datetime,
+        metrics_data: List[MetricData],
+        events_data: List[EventData],
+        logs_data: List[LogData],
+        with_llm: bool = True,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        对已收集的数据逐阶段分析，阶段与 analyze_stream 一致
+
+        with_llm=False 时跳过两个LLM阶段，recommendations 为空、报告为None，
+        供持续分析等对时延敏感的场景使用。
+        """
+        # 计算数据完整性
+        data_completeness = self._calculate_data_completeness(
+            metrics_data, events_data, logs_data
+        )
+        yield "collection", {
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "metrics_analyzed": len(metrics_data),
+            "events_analyzed": len(events_data),
+            "logs_analyzed": len(logs_data),
+            "data_completeness": data_completeness,
+        }
+
         # 执行多维度分析
         analysis_results = await self._perform_multi_dimensional_analysis(
             metrics_data, events_data, logs_data
         )
 
+        # 整合异常数据
+        anomalies = {
+            "metrics": analysis_results["metrics"],
+            "events": analysis_results["events"],
+            "logs": analysis_results["logs"],
+        }
+        yield "anomalies", anomalies
+
+        # 时间序列对齐与滞后互相关
+        correlation_report = self.correlation_analyzer.analyze(
+            metrics_data, events_data, logs_data, start_time, end_time
+        )
+        candidate_causes = correlation_report.causes[:5] if correlation_report else []
+
         # 关联分析
         correlations = self._correlate_data(
             analysis_results["metrics"],
@@ -181,7 +279,12 @@ class RCAAnalysisEngine:
             analysis_results["logs"],
             start_time,
             end_time,
+            correlation_report,
         )
+        yield "correlations", {
+            "correlations": correlations,
+            "candidate_causes": candidate_causes,
+        }
 
         # 识别根因
         root_causes = self._identify_root_causes(
@@ -196,36 +299,56 @@ class RCAAnalysisEngine:
 
         # 生成时间线
         timeline = self._build_timeline(metrics_data, events_data, logs_data)
-
-        # 生成建议（异步）
-        recommendations = await self._generate_recommendations(root_causes)
-
-        # 计算数据完整性
-        data_completeness = self._calculate_data_completeness(
-            metrics_data, events_data, logs_data
-        )
-
-        # 生成分析报告（调用外部服务）
-        analysis_report = await self._generate_analysis_report(
-            metrics_data, events_data, logs_data, root_causes, data_completeness
-        )
-
-        # 整合异常数据
-        anomalies = {
-            "metrics": analysis_results["metrics"],
-            "events": analysis_results["events"],
-            "logs": analysis_results["logs"],
+        confidence_score = self._calculate_confidence(root_causes)
+        yield "root_causes", {
+            "root_causes": root_causes,
+            "timeline": timeline,
+            "confidence_score": confidence_score,
         }
 
-        return RootCauseAnalysis(
+        # 生成建议和分析报告（调用外部服务），两者互不依赖，并发执行
+        llm_results: Dict[str, Any] = {"recommendations": [], "report": None}
+        llm_tasks: Dict[asyncio.Task, str] = {}
+        if with_llm:
+            llm_tasks = {
+                asyncio.create_task(
+                    self._generate_recommendations(root_causes)
+                ): "recommendations",
+                asyncio.create_task(
+                    self._generate_analysis_report(
+                        metrics_data,
+                        events_data,
+                        logs_data,
+                        root_causes,
+                        data_completeness,
+                    )
+                ): "report",
+            }
+        try:
+            pending = set(llm_tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    stage = llm_tasks[task]
+                    llm_results[stage] = task.result()
+                    yield stage, llm_results[stage]
+        finally:
+            for task in llm_tasks:
+                task.cancel()
+            if llm_tasks:
+                await asyncio.gather(*llm_tasks, return_exceptions=True)
+
+        yield "complete", RootCauseAnalysis(
             timestamp=datetime.now(timezone.utc),
             namespace=namespace,
             root_causes=root_causes,
             anomalies=anomalies,
             correlations=correlations,
             timeline=timeline,
-            recommendations=recommendations,
-            confidence_score=self._calculate_confidence(root_causes),
+            recommendations=llm_results["recommendations"],
+            confidence_score=confidence_score,
             analysis_metadata={
                 "start_time": start_time.isoformat(),
                 "end_time": end_time.isoformat(),
@@ -233,7 +356,8 @@ class RCAAnalysisEngine:
                 "events_analyzed": len(events_data),
                 "logs_analyzed": len(logs_data),
                 "data_completeness": data_completeness,
-                "analysis_report": analysis_report,
+                "analysis_report": llm_results["report"],
+                "candidate_causes": candidate_causes,
             },
         )
 
@@ -259,7 +383,7 @@ class RCAAnalysisEngine:
             self.logger.info(f"收集到的指标: {metric_names}")
             for metric in metrics[:3]:  # 记录前3个指标的详细信息
                 self.logger.debug(
-                    f"指标 {metric.name}: 值数量={len(metric.values)}, "
+                    f"指标 {metric.name}: 值数量={metric.size}, "
                     f"异常分数={metric.anomaly_score:.2f}, 趋势={metric.trend}"
                 )
         else:
@@ -355,7 +479,7 @@ class RCAAnalysisEngine:
                 "未识别到任何根因，可能原因：1)数据不足 2)没有明显异常 3)异常模式未知"
             )
 
-    async def _collect_all_data(
+    async def collect_all_data(
         self,
         namespace: str,
         start_time: datetime,
@@ -523,13 +647,19 @@ class RCAAnalysisEngine:
         log_patterns: Dict[str, Any],
         start_time: datetime,
         end_time: datetime,
+        report: Optional[CorrelationReport] = None,
     ) -> List[CorrelationResult]:
         """关联三种数据源"""
         correlations = []
 
         # 时间关联 - 查找同一时间窗口内的异常
         time_correlated = self._find_temporal_correlations(
-            metric_anomalies, event_patterns, log_patterns, start_time, end_time
+            metric_anomalies,
+            event_patterns,
+            log_patterns,
+            start_time,
+            end_time,
+            report,
         )
         if time_correlated:
             correlations.append(time_correlated)
@@ -543,7 +673,7 @@ class RCAAnalysisEngine:
 
         # 因果关联 - 识别因果链
         causal_chain = self._find_causal_chain(
-            metric_anomalies, event_patterns, log_patterns
+            metric_anomalies, event_patterns, log_patterns, report
         )
         if causal_chain:
             correlations.append(causal_chain)
@@ -723,8 +853,8 @@ class RCAAnalysisEngine:
         for metric in metrics:
             if metric.anomaly_score > 0.6:  # 降低阈值从0.8到0.6
                 # 取最新的值
-                if metric.values:
-                    latest_value = metric.values[-1]
+                latest_value = metric.get_latest_point()
+                if latest_value:
                     timeline.append(
                         {
                             "timestamp": latest_value["timestamp"],
@@ -786,13 +916,14 @@ class RCAAnalysisEngine:
                 user_prompt = "当前没有发现明确的根因，请生成通用的系统运维和监控建议"
 
             # 生成建议
-            response = await self.llm_service.generate_response(
-                messages=[{"role": "user", "content": user_prompt}],
-                system_prompt=system_prompt,
-                temperature=0.7,
-                max_tokens=300,
-                use_task_model=True,  # 简单操作：生成建议列表，使用task_model
-            )
+            with llm_priority(LLMPriority.ANALYSIS):
+                response = await self.llm_service.generate_response(
+                    messages=[{"role": "user", "content": user_prompt}],
+                    system_prompt=system_prompt,
+                    temperature=0.7,
+                    max_tokens=300,
+                    use_task_model=True,  # 简单操作：生成建议列表，使用task_model
+                )
 
             if response:
                 # 解析响应为建议列表
@@ -883,8 +1014,8 @@ class RCAAnalysisEngine:
         for key, threshold in thresholds.items():
             if key in metric_name_lower:
                 # 检查最新值
-                if metric.values:
-                    latest = metric.values[-1]
+                latest = metric.get_latest_point()
+                if latest:
                     if latest["value"] > threshold:
                         violations.append(
                             {
@@ -934,11 +1065,17 @@ class RCAAnalysisEngine:
         log_patterns: Dict[str, Any],
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
+        report: Optional[CorrelationReport] = None,
     ) -> Optional[CorrelationResult]:
         """
         查找时间相关性
         """
-        # 简化实现 - 实际应该使用更复杂的时间序列分析
+        # 有对齐后的时间序列时，以滞后互相关结果为准
+        if report and report.pairs:
+            return self._temporal_correlation_from_report(report)
+
+        # 缺少可对齐的序列时，退化为按数据源是否同时存在异常判断
+        change_points = report.change_points if report else {}
         evidence = []
 
         if metric_anomalies.get("high_anomaly_metrics"):
@@ -954,8 +1091,10 @@ class RCAAnalysisEngine:
 
             # 添加指标异常到时间线
             for metric in metric_anomalies.get("high_anomaly_metrics", []):
-                # 使用传入的时间范围或当前时间
-                timestamp = end_time if end_time else datetime.now(timezone.utc)
+                # 优先使用序列的变点时间，其次是传入的时间范围或当前时间
+                timestamp = change_points.get(metric.get("name")) or (
+                    end_time if end_time else datetime.now(timezone.utc)
+                )
                 timeline.append(
                     {
                         "timestamp": timestamp.isoformat(),
@@ -994,6 +1133,47 @@ class RCAAnalysisEngine:
 
         return None
 
+    def _temporal_correlation_from_report(
+        self, report: CorrelationReport
+    ) -> CorrelationResult:
+        """根据滞后互相关最强的信号对构建时间关联"""
+        top_pairs = report.pairs[:5]
+        evidence = []
+        for pair in top_pairs:
+            if pair["lag_seconds"] > 0:
+                relation = f"领先 {pair['lag_seconds']}秒"
+            else:
+                relation = "同步变化"
+            evidence.append(
+                f"{pair['leader']} {relation} {pair['follower']} "
+                f"(r={pair['correlation']:.2f})"
+            )
+
+        leaders = {pair["leader"] for pair in top_pairs if pair["lag_seconds"] > 0}
+        timeline = []
+        for name in dict.fromkeys(
+            name for pair in top_pairs for name in (pair["leader"], pair["follower"])
+        ):
+            changed_at = report.change_points.get(name)
+            if changed_at is None:
+                continue
+            timeline.append(
+                {
+                    "timestamp": changed_at.isoformat(),
+                    "type": "change_point",
+                    "description": f"{name} 发生突变",
+                    "severity": "high" if name in leaders else "medium",
+                }
+            )
+        timeline.sort(key=lambda x: x["timestamp"])
+
+        return CorrelationResult(
+            confidence=min(0.95, abs(top_pairs[0]["correlation"])),
+            correlation_type="temporal",
+            evidence=evidence,
+            timeline=timeline[:10],
+        )
+
     def _find_component_correlations(
         self,
         metric_anomalies: Dict[str, Any],
@@ -1061,11 +1241,18 @@ class RCAAnalysisEngine:
         metric_anomalies: Dict[str, Any],
         event_patterns: Dict[str, Any],
         log_patterns: Dict[str, Any],
+        report: Optional[CorrelationReport] = None,
     ) -> Optional[CorrelationResult]:
         """
         识别因果链
         """
-        # 简化的因果链检测
+        # 优先沿领先关系最强的路径构建因果链
+        if report and report.causes:
+            causal = self._causal_chain_from_report(report)
+            if causal:
+                return causal
+
+        # 没有可用的领先关系时，按常见因果模式匹配
         chain = []
 
         # 检查常见的因果模式
@@ -1128,6 +1315,53 @@ class RCAAnalysisEngine:
 
         return None
 
+    def _causal_chain_from_report(
+        self, report: CorrelationReport, max_steps: int = 4
+    ) -> Optional[CorrelationResult]:
+        """从得分最高的候选根因出发，贪心沿最强的领先边延伸因果链"""
+        chain = [report.causes[0]["signal"]]
+        strengths = []
+        total_lag = 0
+        while len(chain) < max_steps:
+            step = next(
+                (
+                    lead
+                    for lead in report.leads.get(chain[-1], [])
+                    if lead[0] not in chain
+                ),
+                None,
+            )
+            if step is None:
+                break
+            chain.append(step[0])
+            strengths.append(abs(step[1]))
+            total_lag += step[2]
+
+        if len(chain) < 2:
+            return None
+
+        timeline = []
+        for i, name in enumerate(chain):
+            timeline.append(
+                {
+                    "timestamp": report.change_points[name].isoformat(),
+                    "type": "causal_step",
+                    "description": name,
+                    "step_number": i + 1,
+                    "severity": "high" if i == 0 else "medium",
+                }
+            )
+
+        return CorrelationResult(
+            confidence=min(0.95, float(np.mean(strengths))),
+            correlation_type="causal",
+            evidence=[
+                f"因果链: {' -> '.join(chain)}",
+                f"累计领先时间: {total_lag}秒",
+            ],
+            timeline=timeline,
+        )
+
     def _derive_root_cause_from_correlation(
         self, correlation: CorrelationResult
     ) -> Optional[RootCause]:
@@ -1233,9 +1467,9 @@ class RCAAnalysisEngine:
         if metrics:
             quality_scores = []
             for metric in metrics:
-                if metric.values:
+                if metric.size:
                     # 有数据的指标得分高
-                    quality_scores.append(min(len(metric.values) / 10, 1.0))
+                    quality_scores.append(min(metric.size / 10, 1.0))
                 else:
                     quality_scores.append(0.0)
             completeness["metrics"]["quality_score"] = (
@@ -1327,13 +1561,14 @@ class RCAAnalysisEngine:
 请生成一份专业的根因分析总结。"""
 
             # 生成报告
-            llm_summary = await self.llm_service.generate_response(
-                messages=[{"role": "user", "content": user_prompt}],
-                system_prompt=system_prompt,
-                temperature=0.3,
-                max_tokens=300,
-                use_task_model=False,  # 复杂操作：生成分析总结，使用主模型
-            )
+            with llm_priority(LLMPriority.ANALYSIS):
+                llm_summary = await self.llm_service.generate_response(
+                    messages=[{"role": "user", "content": user_prompt}],
+                    system_prompt=system_prompt,
+                    temperature=0.3,
+                    max_tokens=300,
+                    use_task_model=False,  # 复杂操作：生成分析总结，使用主模型
+                )
 
             if llm_summary:
                 base_report["llm_summary"] = llm_summary.strip()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps指标时间序列缓存 - 按步长对齐窗口，重叠时只增量查询尾部
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# loader(start_ts, end_ts) -> Prometheus 原始序列 [{"metric": {...}, "values": [...]}]
+SeriesLoader = Callable[[int, int], Awaitable[Optional[List[Dict[str, Any]]]]]
+
+
+@dataclass
+class SeriesBlock:
+    """一条时间序列：epoch秒时间戳与取值数组"""
+
+    labels: Dict[str, str]
+    timestamps: np.ndarray  # int64, 升序
+    values: np.ndarray  # float64
+
+    @classmethod
+    def from_prometheus(cls, item: Dict[str, Any]) -> "SeriesBlock":
+        samples = item.get("values") or []
+        timestamps = np.fromiter(
+            (float(ts) for ts, _ in samples), dtype=float, count=len(samples)
+        ).astype(np.int64)
+        values = np.fromiter(
+            (_to_float(value) for _, value in samples), dtype=float, count=len(samples)
+        )
+        return cls(dict(item.get("metric") or {}), timestamps, values)
+
+    def window(self, start: int, end: int) -> "SeriesBlock":
+        """返回 [start, end] 内的样本视图"""
+        lo = np.searchsorted(self.timestamps, start, side="left")
+        hi = np.searchsorted(self.timestamps, end, side="right")
+        return SeriesBlock(self.labels, self.timestamps[lo:hi], self.values[lo:hi])
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _labels_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+class _Entry:
+    __slots__ = ("series", "start", "end", "refreshed_at")
+
+    def __init__(self, series: List[SeriesBlock], start: int, end: int) -> None:
+        self.series = {_labels_key(s.labels): s for s in series}
+        self.start = start
+        self.end = end
+        self.refreshed_at = time.monotonic()
+
+    def merge(self, series: List[SeriesBlock], end: int) -> None:
+        """按时间戳合并新样本，相同时间戳以新数据为准
+
+        并发的增量查询可能以任意顺序返回且窗口互相重叠，按时间戳去重排序后
+        结果与合并顺序无关，序列始终严格递增。
+        """
+        for block in series:
+            key = _labels_key(block.labels)
+            old = self.series.get(key)
+            if old is None:
+                self.series[key] = block
+                continue
+            kept = ~np.isin(old.timestamps, block.timestamps)
+            timestamps = np.concatenate([old.timestamps[kept], block.timestamps])
+            values = np.concatenate([old.values[kept], block.values])
+            order = np.argsort(timestamps, kind="stable")
+            self.series[key] = SeriesBlock(old.labels, timestamps[order], values[order])
+        self.end = max(self.end, end)
+
+    def trim(self, oldest: int) -> None:
+        """丢弃早于 oldest 的样本，避免长期运行时无限增长"""
+        if oldest <= self.start:
+            return
+        for key, block in list(self.series.items()):
+            trimmed = block.window(oldest, self.end)
+            if len(trimmed.timestamps):
+                self.series[key] = trimmed
+            else:
+                del self.series[key]
+        self.start = oldest
+
+
+class SeriesCache:
+    """按 (查询, 步长) 缓存对齐后的时间序列
+
+    - 查询窗口按步长向下取整，几秒内先后发起的分析共享同一个窗口
+    - 新窗口与缓存重叠时，只从缓存末尾开始增量查询
+    - 超过 refresh_interval 的条目整体重新查询，吸收Prometheus的延迟写入
+    - LRU淘汰，O(1)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100,
+        refresh_interval: float = 600.0,
+        retention: int = 86400,
+    ) -> None:
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self.retention = retention
+        self._entries: "OrderedDict[Tuple[str, int], _Entry]" = OrderedDict()
+        self.stats = {"hits": 0, "partial": 0, "misses": 0}
+
+    @staticmethod
+    def align(start: float, end: float, step: int) -> Tuple[int, int]:
+        """把窗口边界向下对齐到步长"""
+        return int(start // step * step), int(end // step * step)
+
+    async def fetch(
+        self, query: str, step: int, start: int, end: int, loader: SeriesLoader
+    ) -> Optional[List[SeriesBlock]]:
+        """返回 [start, end] 内的序列，缓存不足的部分通过 loader 补齐
+
+        Returns:
+            序列列表；查询失败且没有可用缓存时返回None
+        """
+        key = (query, step)
+        entry = self._entries.get(key)
+
+        reusable = (
+            entry is not None
+            and entry.start <= start <= entry.end
+            and time.monotonic() - entry.refreshed_at < self.refresh_interval
+        )
+
+        if reusable and end <= entry.end:
+            self.stats["hits"] += 1
+        elif reusable:
+            self.stats["partial"] += 1
+            # 最后一个点可能是写入中的不完整数据，从它开始重新查询
+            raw = await loader(entry.end, end)
+            if raw is not None:
+                blocks = [SeriesBlock.from_prometheus(item) for item in raw]
+                entry.merge(blocks, end)
+        else:
+            self.stats["misses"] += 1
+            raw = await loader(start, end)
+            if not raw:
+                # 失败或空结果都不缓存，下次重新查询
+                return raw
+            blocks = [SeriesBlock.from_prometheus(item) for item in raw]
+            entry = _Entry(blocks, start, end)
+            self._entries[key] = entry
+
+        entry.trim(entry.end - self.retention)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        result = [block.window(start, end) for block in entry.series.values()]
+        return [block for block in result if len(block.timestamps)]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+__all__ = ["SeriesBlock", "SeriesCache", "SeriesLoader"]
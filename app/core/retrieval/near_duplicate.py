@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 近重复检测 - 入库时生成MinHash签名，检索时按签名做多样性过滤
+"""
+
+import base64
+import hashlib
+import logging
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+import numpy as np
+
+logger = logging.getLogger("aiops.near_duplicate")
+
+# 文档元数据中保存签名的字段
+SIGNATURE_KEY = "minhash"
+# 与原先逐对比较一致：取前50个小写词构成集合
+SIGNATURE_WORD_LIMIT = 50
+NUM_PERMUTATIONS = 64
+
+_PRIME = np.uint64(4294967311)  # 大于2^32的素数
+_MASK = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(20240601)  # 固定种子，保证各进程签名一致
+_A = _rng.randint(1, 2**31 - 1, size=NUM_PERMUTATIONS).astype(np.uint64)
+_B = _rng.randint(0, 2**31 - 1, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+
+def _words(text: str) -> List[str]:
+    return list(set(text.lower().split()[:SIGNATURE_WORD_LIMIT]))
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """计算文本词集合的MinHash签名；无词时返回None"""
+    words = _words(text or "")
+    if not words:
+        return None
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(w.encode(), digest_size=4).digest(), "big")
+            for w in words
+        ],
+        dtype=np.uint64,
+    )
+    # (a*h + b) mod p，a、b < 2^31 且 h < 2^32，乘积不会溢出uint64
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return (permuted.min(axis=1) & _MASK).astype(np.uint32)
+
+
+def encode_signature(signature: Optional[np.ndarray]) -> Optional[str]:
+    """签名编码为base64字符串，可随元数据序列化"""
+    if signature is None:
+        return None
+    return base64.b64encode(signature.astype(np.uint32).tobytes()).decode("ascii")
+
+
+def decode_signature(value: Optional[str]) -> Optional[np.ndarray]:
+    if not value:
+        return None
+    try:
+        signature = np.frombuffer(base64.b64decode(value), dtype=np.uint32)
+    except (ValueError, TypeError):
+        return None
+    return signature if signature.shape[0] == NUM_PERMUTATIONS else None
+
+
+def document_signature(doc: Document) -> Optional[np.ndarray]:
+    """读取入库时保存的签名；旧数据没有签名时现算一次并写回元数据"""
+    metadata = doc.metadata if doc.metadata is not None else {}
+    signature = decode_signature(metadata.get(SIGNATURE_KEY))
+    if signature is None:
+        signature = minhash_signature(doc.page_content)
+        if signature is not None:
+            metadata[SIGNATURE_KEY] = encode_signature(signature)
+            doc.metadata = metadata
+    return signature
+
+
+def estimated_similarity(
+    first: Optional[np.ndarray], second: Optional[np.ndarray]
+) -> float:
+    """按签名估计两段文本词集合的Jaccard相似度"""
+    if first is None or second is None:
+        return 0.0
+    return float(np.mean(first == second))
+
+
+def similarity_matrix(docs: Sequence[Document]) -> np.ndarray:
+    """一次计算候选文档两两之间的估计相似度，没有签名的文档相似度为0"""
+    count = len(docs)
+    signatures = [document_signature(doc) for doc in docs]
+    valid = np.array([s is not None for s in signatures], dtype=bool)
+    if not valid.any():
+        return np.zeros((count, count), dtype=np.float32)
+
+    stacked = np.zeros((count, NUM_PERMUTATIONS), dtype=np.uint32)
+    for i, signature in enumerate(signatures):
+        if signature is not None:
+            stacked[i] = signature
+    matrix = (stacked[:, None, :] == stacked[None, :, :]).mean(axis=2)
+    matrix[~valid, :] = 0.0
+    matrix[:, ~valid] = 0.0
+    return matrix.astype(np.float32)
+
+
+def select_diverse(
+    docs: Sequence[Document], threshold: float, limit: int
+) -> List[Document]:
+    """按原顺序贪心选择文档，跳过与已选文档估计相似度超过阈值的近重复文档"""
+    if not docs or limit <= 0:
+        return []
+    matrix = similarity_matrix(docs)
+    selected: List[int] = []
+    for i in range(len(docs)):
+        if selected and matrix[i, selected].max() > threshold:
+            continue
+        selected.append(i)
+        if len(selected) >= limit:
+            break
+    return [docs[i] for i in selected]
+
+
+__all__ = [
+    "NUM_PERMUTATIONS",
+    "SIGNATURE_KEY",
+    "decode_signature",
+    "document_signature",
+    "encode_signature",
+    "estimated_similarity",
+    "minhash_signature",
+    "select_diverse",
+    "similarity_matrix",
+]
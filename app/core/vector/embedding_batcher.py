@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 查询嵌入微批处理 - 合并短时间内的并发嵌入请求为一次批量调用
+"""
+
+import asyncio
+from collections import deque
+import logging
+import math
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+import numpy as np
+
+logger = logging.getLogger("aiops.embedding_batcher")
+
+_SAMPLES = 512
+
+
+class EmbeddingBatcher:
+    """跨请求的查询嵌入微批处理
+
+    在 max_wait_ms 内到达的嵌入请求（最多 max_batch_size 条）合并为一次
+    embed_documents 调用，结果按顺序分发回各调用方；同一批内的重复文本只计算一次。
+    max_wait_ms 为0时不合并，每个请求单独调用。批次在线程中执行，不阻塞事件循环。
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self.embedding_model = embedding_model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._batch_sizes: Deque[int] = deque(maxlen=_SAMPLES)
+        self._waits: Deque[float] = deque(maxlen=_SAMPLES)
+        self._latencies: Deque[float] = deque(maxlen=_SAMPLES)
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "texts_embedded": 0,
+            "deduplicated": 0,
+            "failed_batches": 0,
+            "max_batch_size_seen": 0,
+        }
+
+    async def embed(self, text: str) -> np.ndarray:
+        """生成单条文本的向量，与并发请求合并执行"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, loop.time()))
+        self._stats["requests"] += 1
+
+        if len(self._pending) >= self.max_batch_size or not self.max_wait:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            # 保留引用，避免任务在完成前被回收
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        live = [(text, future, at) for text, future, at in batch if not future.done()]
+        if not live:
+            return
+
+        texts = list(dict.fromkeys(text for text, _, _ in live))
+        for _, _, enqueued_at in live:
+            self._waits.append(started - enqueued_at)
+        self._stats["batches"] += 1
+        self._stats["texts_embedded"] += len(texts)
+        self._stats["deduplicated"] += len(live) - len(texts)
+        self._stats["max_batch_size_seen"] = max(
+            self._stats["max_batch_size_seen"], len(texts)
+        )
+        self._batch_sizes.append(len(texts))
+
+        try:
+            embeddings = await asyncio.to_thread(
+                self.embedding_model.embed_documents, texts
+            )
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"嵌入结果数量({len(embeddings)})与请求数量({len(texts)})不一致"
+                )
+        except Exception as e:
+            self._stats["failed_batches"] += 1
+            logger.warning(f"批量嵌入失败({len(texts)}条): {e}")
+            for _, future, _ in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._latencies.append(loop.time() - started)
+
+        vectors = {
+            text: np.array(embedding, dtype=np.float32)
+            for text, embedding in zip(texts, embeddings)
+        }
+        for text, future, _ in live:
+            if not future.done():
+                future.set_result(vectors[text])
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        p95 = ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+        return {
+            "avg": round(sum(ordered) / len(ordered), 6),
+            "p95": round(p95, 6),
+            "max": round(ordered[-1], 6),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """批大小、排队等待与批次耗时统计（秒）"""
+        sizes = self._batch_sizes
+        return {
+            **self._stats,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "pending": len(self._pending),
+            "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "queue_wait_seconds": self._summary(self._waits),
+            "batch_latency_seconds": self._summary(self._latencies),
+        }
+
+
+__all__ = ["EmbeddingBatcher"]
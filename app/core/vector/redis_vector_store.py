@@ -10,7 +10,7 @@ Description: Redis向量存储
 """
 
 import asyncio
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 import hashlib
@@ -26,6 +26,14 @@ from langchain_core.embeddings import Embeddings
 import numpy as np
 import redis
 
+from app.core.processors.context_packer import get_token_counter
+from app.core.retrieval.near_duplicate import (
+    SIGNATURE_KEY,
+    encode_signature,
+    minhash_signature,
+)
+from app.core.vector.embedding_batcher import EmbeddingBatcher
+
 # MD文档处理器导入
 try:
     from app.core.processors.md_document_processor import (
@@ -131,8 +139,21 @@ class EnhancedRedisVectorStore:
         # 查询缓存（减少内存占用）
         self.query_cache = QueryCache(self.client, ttl=1800, max_cache_size=1000)
 
-        # 批处理队列
-        self.batch_queue = BatchQueue(max_size=30)
+        # 最近查询向量（同一问题的答案缓存查找与检索共用一次嵌入计算）
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._max_query_embeddings = 256
+
+        # 知识库版本：文档增删或清空时递增，存于Redis供多个进程共享
+        self._kb_version_key = f"{collection_name}:kb_version"
+        self._local_kb_version = 0
+
+        # 查询嵌入微批处理：合并并发请求的嵌入调用
+        rag_config = getattr(config, "rag", None)
+        self.embedding_batcher = EmbeddingBatcher(
+            embedding_model,
+            max_batch_size=getattr(rag_config, "embedding_batch_size", 32),
+            max_wait_ms=getattr(rag_config, "embedding_batch_wait_ms", 5.0),
+        )
 
         # 性能监控
         self.stats = {
@@ -305,6 +326,7 @@ class EnhancedRedisVectorStore:
 
         # 清理相关缓存
         await self.query_cache.invalidate_pattern("*")
+        await self._bump_knowledge_version()
 
         logger.info(f"成功添加 {len(doc_ids)} 个文档")
         return doc_ids
@@ -374,6 +396,14 @@ class EnhancedRedisVectorStore:
 
         for doc in documents:
             processed_doc = doc
+            processed_doc.metadata = processed_doc.metadata or {}
+
+            # 近重复签名随文档入库，检索时多样性过滤直接比较签名
+            processed_doc.metadata[SIGNATURE_KEY] = encode_signature(
+                minhash_signature(doc.page_content)
+            )
+            # 分块token数随文档入库，生成答案时按预算打包无需重新计数
+            get_token_counter().count_document(processed_doc)
 
             # 检测是否是MD文档
             if self._is_markdown_content(doc.page_content):
@@ -715,10 +745,7 @@ class EnhancedRedisVectorStore:
     ) -> List[Tuple[Document, float]]:
         """标准搜索"""
         # 生成查询向量
-        query_embedding = await asyncio.to_thread(
-            self.embedding_model.embed_query, query
-        )
-        query_vector = np.array(query_embedding, dtype=np.float32)
+        query_vector = await self.embed_query(query)
 
         # 执行混合搜索
         results = await self._hybrid_search(
@@ -736,6 +763,36 @@ class EnhancedRedisVectorStore:
 
         return results
 
+    async def embed_query(self, query: str) -> np.ndarray:
+        """生成查询向量，最近的查询直接复用已计算的结果"""
+        cached = self._query_embeddings.get(query)
+        if cached is not None:
+            self._query_embeddings.move_to_end(query)
+            return cached
+
+        vector = await self.embedding_batcher.embed(query)
+        self._query_embeddings[query] = vector
+        if len(self._query_embeddings) > self._max_query_embeddings:
+            self._query_embeddings.popitem(last=False)
+        return vector
+
+    async def get_knowledge_version(self) -> int:
+        """获取知识库版本号，Redis不可用时使用本进程计数"""
+        try:
+            version = await asyncio.to_thread(self.client.get, self._kb_version_key)
+            return int(version or 0)
+        except Exception as e:
+            logger.warning(f"读取知识库版本失败: {e}")
+            return self._local_kb_version
+
+    async def _bump_knowledge_version(self) -> None:
+        """知识库内容变化后递增版本号，使依赖旧内容的答案缓存失效"""
+        self._local_kb_version += 1
+        try:
+            await asyncio.to_thread(self.client.incr, self._kb_version_key)
+        except Exception as e:
+            logger.warning(f"更新知识库版本失败: {e}")
+
     async def _hybrid_search(
         self, query: str, query_vector: np.ndarray, k: int, config: SearchConfig
     ) -> List[Tuple[Document, float]]:
@@ -1128,6 +1185,7 @@ class EnhancedRedisVectorStore:
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
         stats = self.stats.copy()
+        stats["embedding_batching"] = self.embedding_batcher.get_stats()
 
         try:
             # 添加Redis状态
@@ -1294,6 +1352,204 @@ class EnhancedRedisVectorStore:
             # 返回空结果而不是抛出异常
             return [[] for _ in queries]
 
+    async def multi_query_search(
+        self,
+        queries: List[str],
+        k: int = 5,
+        config: Optional[SearchConfig] = None,
+        rrf_k: int = 60,
+    ) -> List[Tuple[Document, float]]:
+        """多查询合并检索（用于查询扩展）
+
+        全部查询向量一次生成、一次矩阵检索，词汇检索一次取回全部词项，候选文档
+        取并集后只读取一次，再按倒数排名融合(RRF)排序。返回分数为文档在各查询上
+        的最高混合分数，与单查询检索的分数含义一致。层次化检索配置对本方法无效。
+        """
+        if self._closed:
+            raise RuntimeError("向量存储已关闭")
+
+        queries = list(dict.fromkeys(q for q in queries if q))
+        if not queries:
+            return []
+
+        config = config or SearchConfig()
+        self.stats["search_count"] += 1
+        start_time = time.time()
+
+        cache_key = None
+        if config.use_cache:
+            cache_key = self._get_search_cache_key("\n".join(queries), k, config)
+            cached = self.query_cache.get(cache_key)
+            if cached:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        try:
+            # 不论知识库规模是否满足层次化检索条件，扩展查询都批量执行
+            results = await self._batched_hybrid_search(queries, k, config, rrf_k)
+
+            if config.use_cache and results:
+                self.query_cache.set(cache_key, results, config.cache_ttl)
+
+            logger.info(
+                f"多查询检索完成: {len(queries)} 个查询，返回 {len(results)} 个结果，"
+                f"耗时 {time.time() - start_time:.3f}秒"
+            )
+            return results
+
+        except Exception as e:
+            self.stats["error_count"] += 1
+            self.stats["last_error"] = str(e)
+            logger.error(f"多查询检索失败: {e}")
+            raise
+
+    async def _batched_hybrid_search(
+        self, queries: List[str], k: int, config: SearchConfig, rrf_k: int
+    ) -> List[Tuple[Document, float]]:
+        """批量混合检索：语义与词汇检索各执行一次，结果按RRF融合"""
+        query_vectors = await self._embed_queries(queries)
+        candidates = k * 3
+
+        semantic_lists, lexical_lists = await asyncio.gather(
+            self._semantic_search_batch(query_vectors, candidates),
+            self._lexical_search_batch(queries, candidates),
+        )
+
+        rrf_scores: Dict[str, float] = defaultdict(float)
+        best_scores: Dict[str, float] = defaultdict(float)
+        for semantic, lexical in zip(semantic_lists, lexical_lists):
+            combined: Dict[str, float] = defaultdict(float)
+            for rank, (doc_id, score) in enumerate(semantic):
+                rrf_scores[doc_id] += config.semantic_weight / (rrf_k + rank + 1)
+                combined[doc_id] += score * config.semantic_weight
+            for rank, (doc_id, score) in enumerate(lexical):
+                rrf_scores[doc_id] += config.lexical_weight / (rrf_k + rank + 1)
+                combined[doc_id] += score * config.lexical_weight
+            for doc_id, score in combined.items():
+                best_scores[doc_id] = max(best_scores[doc_id], score)
+
+        # 与单查询融合相同的自适应阈值
+        adaptive_threshold = max(config.similarity_threshold * 0.5, 0.1)
+        ranked_ids = [
+            doc_id
+            for doc_id in sorted(rrf_scores, key=rrf_scores.get, reverse=True)
+            if best_scores[doc_id] >= adaptive_threshold
+        ][:candidates]
+        if not ranked_ids:
+            return []
+
+        docs_map = await self._get_documents_bulk(ranked_ids)
+        results = [
+            (docs_map[doc_id], best_scores[doc_id])
+            for doc_id in ranked_ids
+            if doc_id in docs_map
+        ]
+
+        if config.use_mmr and len(results) > k:
+            # 以原始问题（第一个查询）的向量做多样性重排
+            return self._mmr_rerank(results, query_vectors[0], k, config.mmr_lambda)
+        return results[:k]
+
+    async def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """生成多个查询的向量矩阵，未缓存的查询经微批处理合并为一次嵌入请求"""
+        vectors = await asyncio.gather(*[self.embed_query(q) for q in queries])
+        return np.vstack(vectors)
+
+    async def _semantic_search_batch(
+        self, query_vectors: np.ndarray, k: int
+    ) -> List[List[Tuple[str, float]]]:
+        """批量语义检索，索引不可用时一次扫描全部向量"""
+        results = await self.index_manager.search_vectors_batch(query_vectors, k)
+        if any(results):
+            return results
+        return await self._fallback_semantic_search_batch(query_vectors, k)
+
+    async def _fallback_semantic_search_batch(
+        self, query_vectors: np.ndarray, k: int
+    ) -> List[List[Tuple[str, float]]]:
+        """扫描全部向量一次，逐页以矩阵乘计算与所有查询的余弦相似度"""
+        norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        queries = query_vectors / np.where(norms == 0, 1.0, norms)
+        heaps: List[List[Tuple[float, str]]] = [[] for _ in range(len(queries))]
+        threshold = 0.05
+        pattern = f"{self.collection_name}:vec:*"
+        cursor = 0
+
+        try:
+            while True:
+                cursor, keys = await asyncio.to_thread(
+                    self.client.scan, cursor, match=pattern, count=500
+                )
+                if keys:
+                    pipe = self.client.pipeline()
+                    for key in keys:
+                        pipe.get(key)
+                    values = await asyncio.to_thread(pipe.execute)
+
+                    doc_ids, vectors = [], []
+                    for key, vec_bytes in zip(keys, values):
+                        if not vec_bytes:
+                            continue
+                        vector = np.frombuffer(vec_bytes, dtype=np.float32)
+                        if vector.shape[0] != queries.shape[1]:
+                            continue
+                        kstr = key.decode() if isinstance(key, bytes) else str(key)
+                        doc_ids.append(kstr.split(":")[-1])
+                        vectors.append(vector)
+
+                    if vectors:
+                        page = np.vstack(vectors)
+                        page_norms = np.linalg.norm(page, axis=1)
+                        sims = (queries @ page.T) / np.where(
+                            page_norms == 0, 1.0, page_norms
+                        )
+                        for heap, row in zip(heaps, sims):
+                            for j in np.flatnonzero(row > threshold):
+                                item = (float(row[j]), doc_ids[j])
+                                if len(heap) < k:
+                                    heapq.heappush(heap, item)
+                                elif item[0] > heap[0][0]:
+                                    heapq.heapreplace(heap, item)
+                if cursor == 0:
+                    break
+        except redis.RedisError as e:
+            logger.error(f"批量Fallback搜索Redis错误: {e}")
+            self.stats["error_count"] += 1
+
+        return [
+            [(doc_id, sim) for sim, doc_id in sorted(heap, reverse=True)]
+            for heap in heaps
+        ]
+
+    async def _lexical_search_batch(
+        self, queries: List[str], k: int
+    ) -> List[List[Tuple[str, float]]]:
+        """批量词汇检索，所有查询的词项只读取一次倒排索引"""
+        query_terms = [set(self._tokenize_text(q)) for q in queries]
+        all_terms = sorted(set().union(*query_terms))
+        if not all_terms:
+            return [[] for _ in queries]
+
+        pipe = self.client.pipeline()
+        for term in all_terms:
+            pipe.smembers(f"{self.collection_name}:term:{term}")
+        members = await asyncio.to_thread(pipe.execute)
+        postings = {
+            term: [d.decode() if isinstance(d, bytes) else d for d in doc_ids or ()]
+            for term, doc_ids in zip(all_terms, members)
+        }
+
+        results = []
+        for terms in query_terms:
+            doc_scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                for doc_id in postings[term]:
+                    doc_scores[doc_id] += 1.0 / len(terms)
+            results.append(
+                sorted(doc_scores.items(), key=lambda x: x[1], reverse=True)[:k]
+            )
+        return results
+
     async def _batch_embed_queries(
         self, queries: List[str]
     ) -> List[Optional[np.ndarray]]:
@@ -1475,6 +1731,7 @@ class EnhancedRedisVectorStore:
 
                 # 清理相关缓存
                 await self.query_cache.invalidate_pattern("*")
+                await self._bump_knowledge_version()
 
                 logger.info(f"成功删除 {len(doc_ids)} 个文档")
                 return True
@@ -1740,6 +1997,8 @@ class EnhancedRedisVectorStore:
                 except Exception as e:
                     logger.warning(f"清理查询缓存失败: {e}")
 
+            await self._bump_knowledge_version()
+
             # 7. 清理层次化检索器
             if self.hierarchical_retriever:
                 try:
@@ -1986,6 +2245,62 @@ class IndexManager:
             logger.error(f"向量搜索失败: {e}")
             return []
 
+    async def search_vectors_batch(
+        self, query_vectors: np.ndarray, k: int
+    ) -> List[List[Tuple[str, float]]]:
+        """一次矩阵检索多个查询向量，索引号到文档ID的映射只取一次"""
+        empty: List[List[Tuple[str, float]]] = [[] for _ in range(len(query_vectors))]
+        if (
+            not self.faiss_available
+            or not self.faiss_index
+            or self.faiss_index.ntotal == 0
+            or not len(query_vectors)
+        ):
+            return empty
+
+        self._index_stats["search_count"] += 1
+        try:
+            if query_vectors.shape[1] != self.faiss_index.d:
+                raise ValueError(
+                    f"查询向量维度不匹配: 期望 {self.faiss_index.d}, "
+                    f"实际 {query_vectors.shape[1]}"
+                )
+
+            norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+            queries = (query_vectors / (norms + 1e-10)).astype(np.float32)
+            search_k = min(k * 2, self.faiss_index.ntotal)
+            scores, indices = self.faiss_index.search(queries, search_k)
+
+            unique_indices = sorted({int(i) for i in indices.ravel() if i >= 0})
+            if not unique_indices:
+                return empty
+            pipe = self.client.pipeline()
+            for idx in unique_indices:
+                pipe.get(f"{self.collection_name}:idx:{idx}")
+            id_values = await asyncio.to_thread(pipe.execute)
+            idx_to_doc = {}
+            for idx, doc_id in zip(unique_indices, id_values):
+                if doc_id:
+                    idx_to_doc[idx] = (
+                        doc_id.decode() if isinstance(doc_id, bytes) else doc_id
+                    )
+
+            results = []
+            for row_scores, row_indices in zip(scores, indices):
+                row = []
+                for score, idx in zip(row_scores, row_indices):
+                    doc_id = idx_to_doc.get(int(idx))
+                    if doc_id:
+                        row.append((doc_id, float(score)))
+                    if len(row) >= k:
+                        break
+                results.append(row)
+            return results
+
+        except Exception as e:
+            logger.error(f"批量向量搜索失败: {e}")
+            return empty
+
     def get_stats(self) -> Dict[str, Any]:
         """获取索引统计信息"""
         stats = self._index_stats.copy()
@@ -2107,31 +2422,3 @@ class QueryCache:
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         return self._cache_stats.copy()
-
-
-class BatchQueue:
-    """批处理队列"""
-
-    def __init__(self, max_size: int = 50):
-        self.max_size = max_size
-        self.queue = []
-        self.lock = asyncio.Lock()
-
-    async def add(self, item: Any) -> Optional[List[Any]]:
-        """添加项目，如果达到批量大小则返回批次"""
-        async with self.lock:
-            self.queue.append(item)
-
-            if len(self.queue) >= self.max_size:
-                batch = self.queue[: self.max_size]
-                self.queue = self.queue[self.max_size :]
-                return batch
-
-        return None
-
-    async def flush(self) -> List[Any]:
-        """清空队列"""
-        async with self.lock:
-            batch = self.queue[:]
-            self.queue = []
-            return batch
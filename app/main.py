@@ -193,6 +193,15 @@ async def _cleanup_global_resources():
         except Exception as e:
             logger.debug(f"缓存资源清理检查时出错: {e}")
 
+        # 关闭LLM共享HTTP连接池
+        try:
+            from app.services.llm_pool import close_llm_client_pool
+
+            await close_llm_client_pool()
+            logger.debug("LLM连接池已关闭")
+        except Exception as e:
+            logger.debug(f"关闭LLM连接池时出错: {e}")
+
         # 强制垃圾回收
         import gc
 
@@ -48,12 +48,16 @@ from .predict_models import (  # 枚举类型; 基础数据模型; 请求模型;
     AIReport,
     AnomalyPrediction,
     BasePredictionRequest,
+    BatchPredictionRequest,
+    BatchPredictionTarget,
     CostAnalysis,
     CpuPredictionRequest,
     DiskPredictionRequest,
+    LiveAnomalyRequest,
     MemoryPredictionRequest,
     ModelInfo,
     ModelInfoResponse,
+    ModelReloadRequest,
     MultiDimensionPredictionResponse,
     PredictionDataPoint,
     PredictionGranularity,
@@ -122,6 +126,10 @@ __all__ = [
     "CpuPredictionRequest",
     "MemoryPredictionRequest",
     "DiskPredictionRequest",
+    "BatchPredictionTarget",
+    "BatchPredictionRequest",
+    "ModelReloadRequest",
+    "LiveAnomalyRequest",
     # 基础预测响应模型
     "PredictionResponse",
     "PredictionServiceHealthResponse",
@@ -23,6 +23,9 @@ class AssistantRequest(BaseModel):
     )
     use_web_search: bool = Field(default=False, description="是否使用网络搜索")
     session_id: Optional[str] = Field(default=None, description="会话ID")
+    stream: bool = Field(
+        default=True, description="WebSocket下是否逐段推送回答，False时只返回完整结果"
+    )
 
 
 class AddDocumentRequest(BaseModel):
@@ -151,6 +151,83 @@ class DiskPredictionRequest(BasePredictionRequest):
         return v
 
 
+class BatchPredictionTarget(BaseModel):
+    """批量预测中的单个预测目标"""
+
+    model_config = ConfigDict(extra="forbid")
+
+    target_id: Optional[str] = Field(None, description="调用方自定义的目标标识，原样返回")
+    prediction_type: PredictionType = Field(..., description="预测类型")
+    current_value: float = Field(..., ge=0, description="当前指标值")
+    metric_query: Optional[str] = Field(None, description="自定义Prometheus查询")
+    resource_constraints: Optional[ResourceConstraints] = Field(None)
+
+    @field_validator("metric_query")
+    @classmethod
+    def validate_metric_query(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v.strip() == "":
+            raise ValueError("指标查询不能为空字符串")
+        return v
+
+
+class BatchPredictionRequest(BaseModel):
+    """批量预测请求模型 - 公共预测参数作用于全部目标"""
+
+    model_config = ConfigDict(extra="forbid")
+
+    targets: List[BatchPredictionTarget] = Field(
+        ..., min_length=1, max_length=ServiceConstants.PREDICTION_BATCH_MAX_TARGETS
+    )
+    prediction_hours: int = Field(default=24, ge=1, le=168)
+    granularity: PredictionGranularity = Field(default=PredictionGranularity.HOUR)
+    include_confidence: bool = Field(default=True)
+    include_anomaly_detection: bool = Field(default=True)
+    consider_historical_pattern: bool = Field(default=True)
+    target_utilization: float = Field(default=0.7, ge=0.1, le=0.9)
+    sensitivity: float = Field(default=0.8, ge=0.1, le=1.0)
+    max_concurrency: Optional[int] = Field(
+        None, ge=1, le=64, description="历史数据并发拉取上限，默认取配置值"
+    )
+
+
+class ModelReloadRequest(BaseModel):
+    """模型热重载请求模型"""
+
+    model_config = ConfigDict(extra="forbid")
+
+    prediction_type: Optional[PredictionType] = Field(
+        None, description="需要重载的预测类型，为空时重载全部"
+    )
+    version: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=128,
+        pattern=r"^[\w.-]+$",
+        description="切换到注册表中的指定版本",
+    )
+
+    @field_validator("version")
+    @classmethod
+    def validate_version(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and ".." in v:
+            raise ValueError("版本号不能包含 ..")
+        return v
+
+
+class LiveAnomalyRequest(BaseModel):
+    """实时序列异常检测请求模型"""
+
+    model_config = ConfigDict(extra="forbid")
+
+    query: str = Field(..., min_length=1, description="Prometheus查询语句")
+    minutes: int = Field(default=60, ge=5, le=1440, description="回看时长（分钟）")
+    method: str = Field(
+        default="ewma", pattern="^(ewma|robust_zscore)$", description="流式检测方法"
+    )
+    sensitivity: Optional[float] = Field(None, ge=0.1, le=1.0)
+    step: str = Field(default="1m", pattern=r"^\d+[smh]$", description="采样步长")
+
+
 class PredictionDataPoint(BaseModel):
     """预测数据点模型"""
 
@@ -381,6 +458,9 @@ class AIEnhancedPredictionResponse(BaseModel):
     ai_processing_stages: Dict[str, str] = Field(
         default_factory=dict, description="AI处理阶段状态"
     )
+    stage_timings: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict, description="各阶段状态、相对起始时间与耗时(秒)"
+    )
     data_quality_assessment: Dict[str, Any] = Field(
         default_factory=dict, description="数据质量评估"
     )
@@ -469,6 +549,9 @@ __all__ = [
     "CpuPredictionRequest",
     "MemoryPredictionRequest",
     "DiskPredictionRequest",
+    "BatchPredictionTarget",
+    "BatchPredictionRequest",
+    "ModelReloadRequest",
     "PredictionResponse",
     "PredictionServiceHealthResponse",
     "AIAnalysisContext",
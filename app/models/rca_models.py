@@ -10,10 +10,14 @@ Description: 根因分析模型定义
 """
 
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+import json
+import struct
 from typing import Any, Dict, List, Optional
+import zlib
 
+import numpy as np
 from pydantic import BaseModel, Field
 
 
@@ -56,28 +60,131 @@ class RootCause:
     recommendations: List[str]  # 建议
 
 
+def _empty_timestamps() -> np.ndarray:
+    return np.empty(0, dtype=np.int64)
+
+
+def _empty_samples() -> np.ndarray:
+    return np.empty(0, dtype=np.float64)
+
+
+# 二进制格式: 魔数 + 头部JSON长度，头部为名称/标签等元数据，之后是增量编码的时间戳与取值
+_METRIC_MAGIC = b"MD1"
+_METRIC_HEADER = struct.Struct("<3sI")
+
+
 @dataclass
 class MetricData:
-    """指标数据模型"""
+    """指标数据模型
+
+    样本以 int64 epoch秒时间戳和 float64 取值两个数组保存，
+    只在API边界通过 values 转换为 [{timestamp, value}] 列表。
+    """
 
     name: str  # 指标名称
-    values: List[Dict[str, Any]]  # 时间序列值 [{timestamp, value}]
     labels: Dict[str, str]  # 标签
+    timestamps: np.ndarray = field(default_factory=_empty_timestamps)  # epoch秒
+    samples: np.ndarray = field(default_factory=_empty_samples)  # 取值
     anomaly_score: float = 0.0  # 异常分数 (0-1)
     trend: str = "stable"  # 趋势: increasing, decreasing, stable
 
+    def __post_init__(self) -> None:
+        self.timestamps = np.asarray(self.timestamps, dtype=np.int64)
+        self.samples = np.asarray(self.samples, dtype=np.float64)
+
+    @classmethod
+    def from_values(
+        cls, name: str, values: List[Dict[str, Any]], labels: Dict[str, str], **kwargs
+    ) -> "MetricData":
+        """从 [{timestamp, value}] 列表构建"""
+        timestamps = [_to_epoch(v.get("timestamp")) for v in values]
+        samples = [v.get("value", 0.0) for v in values]
+        return cls(name, labels, timestamps, samples, **kwargs)
+
+    @property
+    def size(self) -> int:
+        """样本数量"""
+        return len(self.samples)
+
+    @property
+    def values(self) -> List[Dict[str, Any]]:
+        """转换为JSON友好的 [{timestamp, value}] 列表，仅在API边界使用"""
+        return [
+            {"timestamp": ts, "value": value}
+            for ts, value in zip(_format_epochs(self.timestamps), self.samples.tolist())
+        ]
+
+    def get_latest_point(self) -> Optional[Dict[str, Any]]:
+        """获取最新的 {timestamp, value}"""
+        if not self.size:
+            return None
+        return {
+            "timestamp": _format_epochs(self.timestamps[-1:])[0],
+            "value": float(self.samples[-1]),
+        }
+
     def get_latest_value(self) -> Optional[float]:
         """获取最新值"""
-        if self.values:
-            return self.values[-1].get("value")
+        if self.size:
+            return float(self.samples[-1])
         return None
 
     def get_average_value(self) -> float:
         """计算平均值"""
-        if not self.values:
+        if not self.size:
             return 0.0
-        values = [v.get("value", 0) for v in self.values]
-        return sum(values) / len(values)
+        return float(self.samples.mean())
+
+    def to_bytes(self) -> bytes:
+        """序列化为紧凑的二进制格式"""
+        header = json.dumps(
+            {
+                "name": self.name,
+                "labels": self.labels,
+                "anomaly_score": self.anomaly_score,
+                "trend": self.trend,
+                "size": self.size,
+            },
+            ensure_ascii=False,
+        ).encode()
+        # 等步长时间戳增量编码后几乎全是重复值，压缩率很高
+        deltas = np.diff(self.timestamps, prepend=np.int64(0))
+        body = zlib.compress(deltas.tobytes() + self.samples.tobytes(), 1)
+        return _METRIC_HEADER.pack(_METRIC_MAGIC, len(header)) + header + body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MetricData":
+        """从 to_bytes 的结果还原"""
+        magic, header_len = _METRIC_HEADER.unpack_from(data)
+        if magic != _METRIC_MAGIC:
+            raise ValueError("无效的MetricData二进制数据")
+        offset = _METRIC_HEADER.size
+        header = json.loads(data[offset : offset + header_len])
+        body = zlib.decompress(data[offset + header_len :])
+        size = header.pop("size")
+        timestamps = np.cumsum(np.frombuffer(body, dtype=np.int64, count=size))
+        samples = np.frombuffer(body, dtype=np.float64, offset=size * 8).copy()
+        return cls(timestamps=timestamps, samples=samples, **header)
+
+    def __reduce__(self):
+        # pickle（Redis缓存）同样走二进制格式，避免逐个样本序列化
+        return (MetricData.from_bytes, (self.to_bytes(),))
+
+
+def _to_epoch(value: Any) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def _format_epochs(timestamps: np.ndarray) -> List[str]:
+    """epoch秒数组格式化为 ISO8601 UTC 字符串"""
+    text = np.datetime_as_string(timestamps.astype("datetime64[s]"), unit="us")
+    return [f"{ts}Z" for ts in text.tolist()]
 
 
 @dataclass
@@ -91,6 +198,7 @@ class EventData:
     involved_object: Dict[str, str]  # 涉及的对象
     severity: SeverityLevel  # 严重程度
     count: int = 1  # 事件次数
+    name: str = ""  # Event对象名称，同一事件重复发生时不变
 
     def is_critical(self) -> bool:
         """是否为关键事件"""
@@ -324,6 +432,45 @@ class RCAClearOperationCacheRequest(BaseModel):
     operation: str = Field(..., description="操作类型")
 
 
+class RCAContinuousRequest(BaseModel):
+    """持续根因分析启动请求模型"""
+
+    namespace: str = Field(..., description="Kubernetes命名空间")
+    interval_seconds: Optional[int] = Field(
+        None, ge=10, le=3600, description="分析周期（秒），为空则使用配置值"
+    )
+    window_minutes: Optional[int] = Field(
+        None, ge=5, le=1440, description="滑动窗口大小（分钟），为空则使用配置值"
+    )
+    metrics: Optional[List[str]] = Field(
+        None, description="要分析的Prometheus指标列表，为空则使用默认指标"
+    )
+
+
+class RCAContinuousStopRequest(BaseModel):
+    """持续根因分析停止请求模型"""
+
+    namespace: str = Field(..., description="Kubernetes命名空间")
+
+
+class RCAClusterAnalyzeRequest(BaseModel):
+    """集群级根因分析请求模型"""
+
+    namespaces: Optional[List[str]] = Field(
+        None,
+        description="要分析的命名空间列表，为空则分析时间窗口内有事件的全部命名空间",
+    )
+    time_window_hours: float = Field(
+        1.0, ge=0.1, le=24, description="分析时间窗口（小时）"
+    )
+    metrics: Optional[List[str]] = Field(
+        None, description="要分析的Prometheus指标列表，为空则使用默认指标"
+    )
+    max_concurrency: Optional[int] = Field(
+        None, ge=1, le=50, description="命名空间并发上限，为空则使用配置值"
+    )
+
+
 # API响应模型
 class RCAAnalysisResponse(BaseModel):
     """根因分析响应模型"""
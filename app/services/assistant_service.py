@@ -16,8 +16,9 @@ import traceback
 from datetime import datetime
 import logging
 import os
-from typing import TYPE_CHECKING, Any, Dict, Optional, Union, Type
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional, Union, Type
 import uuid
+from collections import deque
 
 from pydantic import BaseModel
 from starlette.websockets import WebSocket
@@ -46,18 +47,43 @@ class OptimizedAssistantService(BaseService):
         self.websocket = WebSocketManager(self.handle_ws_answer, AssistantRequest)
 
     async def handle_ws_answer(self, websocket: WebSocket, req: AssistantRequest):
-        """WebSocket 消息处理适配器"""
+        """WebSocket 消息处理适配器
+
+        stream=True 时先逐段发送 {"type": "delta"} 帧，最后发送带来源和置信度的
+        {"type": "final"} 帧；每帧发送完成后才读取下一段，慢客户端自然反压上游。
+        """
         try:
-            result = await self.get_answer(
+            if not req.stream:
+                result = await self.get_answer(
+                    question=req.question,
+                    mode=req.mode,
+                    session_id=req.session_id
+                )
+                await websocket.send_json(StreamResponse(
+                    data=result,
+                    success=True,
+                    timestamp=datetime.now().isoformat(),
+                ).dict())
+                return
+
+            stream = self.get_answer_stream(
                 question=req.question,
                 mode=req.mode,
-                session_id=req.session_id
+                session_id=req.session_id,
             )
-            await websocket.send_json(StreamResponse(
-                data=result,
-                success=True,
-                timestamp=datetime.now().isoformat(),
-            ).dict())
+            try:
+                async for event in stream:
+                    if event["type"] == "final":
+                        data = {**event["data"], "type": "final"}
+                    else:
+                        data = event
+                    await websocket.send_json(StreamResponse(
+                        data=data,
+                        success=True,
+                        timestamp=datetime.now().isoformat(),
+                    ).dict())
+            finally:
+                await stream.aclose()
 
         except Exception as e:
 
@@ -129,6 +155,62 @@ class OptimizedAssistantService(BaseService):
         else:  # RAG模式 (mode == 1 或其他值默认为RAG)
             return await self._handle_rag_mode(question, session_id)
 
+    async def get_answer_stream(
+        self,
+        question: str,
+        mode: int = 1,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """流式获取回答：产出 {"type": "delta", "content": ...}，最后产出 {"type": "final", "data": ...}
+
+        MCP模式不支持增量输出，只产出 final。
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+            logger.info(f"为请求创建新会话: {session_id}")
+
+        self._validate_question(question)
+        self._validate_mode(mode)
+
+        if mode == 2:
+            result = await self._handle_mcp_mode(question, session_id)
+            yield {"type": "final", "data": result}
+            return
+
+        await self._ensure_ready()
+        # 超时按相邻两段输出之间的间隔计算，长回答只要持续输出就不会被截断
+        timeout = self._calculate_timeout(question)
+        stream = self._assistant.get_answer_stream(
+            question=question, session_id=session_id
+        )
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(stream.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                if event["type"] == "final":
+                    self._performance_monitor.record_success()
+                    result = self._enhance_result(event["data"], question, session_id)
+                    result["mode"] = "rag"
+                    event = {"type": "final", "data": result}
+                yield event
+        except asyncio.TimeoutError:
+            logger.error(f"RAG流式请求超时: {timeout}秒")
+            yield {
+                "type": "final",
+                "data": await self._use_fallback_response(question, session_id, "超时"),
+            }
+        except Exception as e:
+            self._performance_monitor.record_failure()
+            logger.error(f"RAG流式获取答案失败: {str(e)}")
+            yield {
+                "type": "final",
+                "data": await self._use_fallback_response(question, session_id, str(e)),
+            }
+        finally:
+            await stream.aclose()
+
     async def _use_fallback_response(
         self, question: str, session_id: Optional[str], error_reason: str
     ) -> Dict[str, Any]:
@@ -146,9 +228,8 @@ class OptimizedAssistantService(BaseService):
             session_manager = SessionManager()
             session = None
             if session_id:
-                session = session_manager.get_session(session_id)
-                if not session:
-                    session = session_manager.create_session(session_id)
+                # 问题已在助手准备阶段写入共享会话，这里只确保会话存在，不重复追加
+                session = await session_manager.aensure_session(session_id)
 
             context = ResponseContext(
                 user_input=cleaned_question,
@@ -161,9 +242,6 @@ class OptimizedAssistantService(BaseService):
 
             fallback_answer = generate_fallback_answer(context)
 
-            if session:
-                session_manager.update_session(session_id, cleaned_question)
-
             return {
                 "answer": fallback_answer,
                 "confidence_score": config.rag.similarity_threshold * 0.4,
@@ -274,7 +352,7 @@ class OptimizedAssistantService(BaseService):
                 from app.core.agents.fallback_models import SessionManager
 
                 session_manager = SessionManager()
-                session_manager.create_session(session_id)
+                await session_manager.aensure_session(session_id)
 
                 return {
                     "session_id": session_id,
@@ -308,7 +386,7 @@ class OptimizedAssistantService(BaseService):
                     if session_info.get("success") and session_info.get("session_id"):
                         # 会话已存在，更新最后活动时间
                         if hasattr(self._assistant, "context_manager"):
-                            self._assistant.context_manager.update_context(
+                            await self._assistant.context_manager.update_context(
                                 session_id,
                                 {
                                     "mode": mode,
@@ -316,7 +394,7 @@ class OptimizedAssistantService(BaseService):
                                 },
                             )
 
-                        session_details = (
+                        session_details = await (
                             self._assistant.context_manager.get_session_details(
                                 session_id
                             )
@@ -343,7 +421,8 @@ class OptimizedAssistantService(BaseService):
                     },
                 )
 
-                session_details = self._assistant.context_manager.get_session_details(
+                context_manager = self._assistant.context_manager
+                session_details = await context_manager.get_session_details(
                     session_id
                 )
                 return {
@@ -361,10 +440,10 @@ class OptimizedAssistantService(BaseService):
                 from app.core.agents.fallback_models import SessionManager
 
                 session_manager = SessionManager()
-                session = session_manager.get_session(session_id)
+                session = await session_manager.aget_session(session_id)
 
                 if not session:
-                    session = session_manager.create_session(session_id)
+                    session = await session_manager.aensure_session(session_id)
                     created = True
                     message = "新会话创建成功（使用备用实现）"
                 else:
@@ -420,6 +499,7 @@ class OptimizedAssistantService(BaseService):
                 ),
                 "components": components,
                 "performance": perf_stats,
+                "embedding_batching": health.get("embedding_batching", {}),
                 "fallback_capabilities": fallback_status,
                 "timestamp": datetime.now().isoformat(),
             }
@@ -1161,18 +1241,74 @@ class WebSocketManager:
             await message_queue.put(None)
 
     async def websocket_handler(self, websocket: WebSocket, message_queue: asyncio.Queue, **kwargs) -> None:
-        """循环消费消息队列并调用业务处理器"""
+        """循环消费消息队列并调用业务处理器
+
+        处理器运行期间继续监听队列：收到 {"action": "cancel"} 或连接断开时取消
+        正在进行的处理（连同上游生成），其他消息在当前处理结束后依次处理。
+        """
+        backlog: deque = deque()
         while True:
-            info_raw = await message_queue.get()
+            info_raw = backlog.popleft() if backlog else await message_queue.get()
             if info_raw is None:  # 结束信号
                 break
+            if self._is_cancel(info_raw):  # 没有进行中的处理，忽略
+                continue
             # 尝试解析数据
             parsed = await self._parse_message(info_raw, websocket)
             if parsed is None:  # 解析失败，继续下一条
                 continue
             # 调用业务逻辑
             if self.message_handler:
-                await self.message_handler(websocket, parsed, **kwargs)
+                task = asyncio.create_task(
+                    self.message_handler(websocket, parsed, **kwargs)
+                )
+                if not await self._watch(task, message_queue, backlog, websocket):
+                    break
+
+    async def _watch(
+        self,
+        task: asyncio.Task,
+        message_queue: asyncio.Queue,
+        backlog: deque,
+        websocket: WebSocket,
+    ) -> bool:
+        """等待处理器完成，期间响应取消；连接已断开时返回False"""
+        connected = True
+        while not task.done():
+            getter = asyncio.ensure_future(message_queue.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                continue
+            info_raw = getter.result()
+            if info_raw is None or self._is_cancel(info_raw):
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                if info_raw is None:
+                    connected = False
+                else:
+                    await websocket.send_json(StreamResponse(
+                        data={"type": "cancelled"},
+                        success=False,
+                        timestamp=datetime.now().isoformat(),
+                        message="已取消",
+                    ).dict())
+                break
+            backlog.append(info_raw)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"WebSocket消息处理失败: {task.exception()}")
+        return connected
+
+    @staticmethod
+    def _is_cancel(info_raw: Union[str, bytes]) -> bool:
+        try:
+            data = json.loads(info_raw)
+        except (TypeError, ValueError):
+            return False
+        return isinstance(data, dict) and data.get("action") == "cancel"
 
     async def _parse_message(self, info_raw: Union[str, bytes], websocket: WebSocket) -> Optional[BaseModel] | None:
         """解析原始数据"""
@@ -20,6 +20,7 @@ from ..common.exceptions import AutoFixError, ResourceNotFoundError, ValidationE
 from ..core.agents.k8s_fixer import K8sFixerAgent
 from ..core.agents.supervisor import SupervisorAgent
 from ..core.interfaces.k8s_client import K8sClient
+from ..core.interfaces.llm_client import LLMPriority, llm_priority
 from .base import BaseService
 
 logger = logging.getLogger("aiops.services.autofix")
@@ -235,13 +236,15 @@ class AutoFixService(BaseService):
             else:
                 error_desc = ""
 
-            fix_result = await self.execute_with_timeout(
-                lambda: self._k8s_fixer.analyze_and_fix_deployment(
-                    deployment, namespace, error_desc
-                ),
-                timeout=ServiceConstants.AUTOFIX_ANALYSIS_TIMEOUT,
-                operation_name="k8s_fix_analysis",
-            )
+            # 自动修复分析中的LLM调用按分析优先级调度
+            with llm_priority(LLMPriority.ANALYSIS):
+                fix_result = await self.execute_with_timeout(
+                    lambda: self._k8s_fixer.analyze_and_fix_deployment(
+                        deployment, namespace, error_desc
+                    ),
+                    timeout=ServiceConstants.AUTOFIX_ANALYSIS_TIMEOUT,
+                    operation_name="k8s_fix_analysis",
+                )
 
             return self._wrap_fix_result(
                 fix_result, deployment, namespace, "k8s_fixer", dry_run
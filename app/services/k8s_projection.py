@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: Kubernetes列表响应的原始JSON投影 - 跳过模型对象直接生成to_dict等价字典
+"""
+
+from datetime import date, datetime
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from kubernetes import client
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson 为可选加速依赖
+    json_loads = json.loads
+
+# 投影规则：键为 snake_case 字段名，True 表示完整保留该字段，
+# 嵌套字典表示只保留其中的子字段（列表和字典值逐项应用）
+Projection = Dict[str, Union[bool, "Projection"]]
+
+_METADATA: Projection = {
+    "name": True,
+    "namespace": True,
+    "labels": True,
+    "creation_timestamp": True,
+    "deletion_timestamp": True,
+    "owner_references": True,
+}
+
+_CONTAINER: Projection = {
+    "name": True,
+    "image": True,
+    "ports": True,
+    "resources": True,
+    "security_context": True,
+    "liveness_probe": True,
+    "readiness_probe": True,
+    "startup_probe": True,
+}
+
+# 各资源类型保留的字段，取巡检规则、RCA事件收集器与K8s修复Agent读取字段的并集
+PROJECTIONS: Dict[str, Projection] = {
+    "V1Pod": {
+        "metadata": _METADATA,
+        "spec": {
+            "node_name": True,
+            "service_account_name": True,
+            "restart_policy": True,
+            "containers": _CONTAINER,
+            "init_containers": _CONTAINER,
+        },
+        "status": {
+            "phase": True,
+            "reason": True,
+            "message": True,
+            "pod_ip": True,
+            "host_ip": True,
+            "start_time": True,
+            "qos_class": True,
+            "conditions": True,
+            "container_statuses": True,
+            "init_container_statuses": True,
+        },
+    },
+    "CoreV1Event": {
+        "metadata": {"name": True, "namespace": True, "creation_timestamp": True},
+        "type": True,
+        "reason": True,
+        "message": True,
+        "count": True,
+        "first_timestamp": True,
+        "last_timestamp": True,
+        "event_time": True,
+        "involved_object": True,
+        "source": True,
+        "reporting_component": True,
+    },
+    "V1Node": {
+        "metadata": _METADATA,
+        "spec": {"unschedulable": True, "taints": True},
+        "status": {
+            "conditions": True,
+            "capacity": True,
+            "allocatable": True,
+            "addresses": True,
+            "node_info": True,
+        },
+    },
+    "V1Service": {
+        "metadata": _METADATA,
+        "spec": {"type": True, "selector": True, "ports": True, "cluster_ip": True},
+    },
+    "V1Endpoints": {"metadata": _METADATA, "subsets": True},
+    "V1PersistentVolumeClaim": {
+        "metadata": _METADATA,
+        "spec": {
+            "access_modes": True,
+            "resources": True,
+            "storage_class_name": True,
+            "volume_name": True,
+        },
+        "status": {"phase": True, "capacity": True, "conditions": True},
+    },
+    "V1ResourceQuota": {"metadata": _METADATA, "spec": True, "status": True},
+}
+
+_LIST_TYPE = re.compile(r"^list\[(.*)\]$")
+_DICT_TYPE = re.compile(r"^dict\(([^,]*), (.*)\)$")
+_PRIMITIVE_TYPES = {"str", "int", "float", "bool", "object", "bytes"}
+
+Converter = Callable[[Any], Any]
+
+# 完整转换器按类型名缓存，支持自引用模型
+_full_converters: Dict[str, Converter] = {}
+
+
+def _parse_datetime(value: Any) -> Any:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _parse_date(value: Any) -> Any:
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _compile(
+    type_name: str, projection: Union[bool, Projection]
+) -> Optional[Converter]:
+    """为 openapi 类型生成转换函数，返回 None 表示原样保留"""
+    if type_name in _PRIMITIVE_TYPES:
+        return None
+    if type_name == "datetime":
+        return _parse_datetime
+    if type_name == "date":
+        return _parse_date
+
+    match = _LIST_TYPE.match(type_name)
+    if match:
+        item = _compile(match.group(1), projection)
+        if item is None:
+            return None
+        return lambda values: [item(v) for v in values]
+
+    match = _DICT_TYPE.match(type_name)
+    if match:
+        item = _compile(match.group(2), projection)
+        if item is None:
+            return None
+        return lambda values: {k: item(v) for k, v in values.items()}
+
+    if projection is True:
+        return _full_converter(type_name)
+    return _model_converter(type_name, projection)
+
+
+def _full_converter(type_name: str) -> Converter:
+    converter = _full_converters.get(type_name)
+    if converter is None:
+        fields: List[tuple] = []
+        converter = _make_model_converter(fields)
+        # 先登记再编译子字段，自引用类型会复用同一个转换器
+        _full_converters[type_name] = converter
+        model = getattr(client, type_name)
+        for attr, attr_type in model.openapi_types.items():
+            fields.append(
+                (model.attribute_map[attr], attr, _compile(attr_type, True))
+            )
+    return converter
+
+
+def _model_converter(type_name: str, projection: Projection) -> Converter:
+    model = getattr(client, type_name)
+    fields = []
+    for attr, sub_projection in projection.items():
+        # 字段名写错时在导入阶段直接报错
+        attr_type = model.openapi_types[attr]
+        fields.append(
+            (model.attribute_map[attr], attr, _compile(attr_type, sub_projection))
+        )
+    return _make_model_converter(fields)
+
+
+def _make_model_converter(fields: List[tuple]) -> Converter:
+    def convert(obj: Dict[str, Any]) -> Dict[str, Any]:
+        result = {}
+        for json_key, key, sub in fields:
+            value = obj.get(json_key)
+            if value is not None:
+                result[key] = value if sub is None else sub(value)
+        return result
+
+    return convert
+
+
+_projectors: Dict[str, Converter] = {
+    type_name: _model_converter(type_name, projection)
+    for type_name, projection in PROJECTIONS.items()
+}
+
+
+def project_list(
+    payload: Union[bytes, str, Dict[str, Any]], type_name: str
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """把列表接口的原始JSON投影为 snake_case 字典列表，并返回分页 continue 令牌
+
+    键名和时间字段与模型对象 to_dict() 的结果一致，但只保留 PROJECTIONS
+    中声明的字段，取值为空的字段直接省略。
+    """
+    if isinstance(payload, (bytes, str)):
+        payload = json_loads(payload)
+    project = _projectors[type_name]
+    items = [project(item) for item in payload.get("items") or []]
+    return items, (payload.get("metadata") or {}).get("continue") or None
+
+
+def project_items(
+    payload: Union[bytes, str, Dict[str, Any]], type_name: str
+) -> List[Dict[str, Any]]:
+    """投影列表响应，只返回条目"""
+    return project_list(payload, type_name)[0]
+
+
+__all__ = ["PROJECTIONS", "json_loads", "project_list", "project_items"]
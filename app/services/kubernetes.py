@@ -15,12 +15,13 @@ import json
 import logging
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from kubernetes import client, config as k8s_config, utils as k8s_utils
 from kubernetes.client.rest import ApiException
 
 from app.config.settings import config
+from app.services.k8s_projection import project_list
 
 logger = logging.getLogger("aiops.kubernetes")
 
@@ -119,20 +120,42 @@ class KubernetesService:
 
         return True  # 始终返回True，让调用者继续执行
 
+    def _list_items(self, list_call, type_name: str, **kwargs) -> List[Dict[str, Any]]:
+        """调用列表接口并转换为字典列表"""
+        return self._list_page(list_call, type_name, **kwargs)[0]
+
+    def _list_page(
+        self, list_call, type_name: str, **kwargs
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """调用列表接口，返回字典列表和下一页的 continue 令牌
+
+        默认请求原始JSON一次解码，只投影下游读取的字段；关闭 kubernetes.fast_list
+        时回退为逐个模型对象 to_dict() 的完整转换。
+        """
+        if config.k8s.fast_list:
+            response = list_call(_preload_content=False, **kwargs)
+            try:
+                return project_list(response.data, type_name)
+            finally:
+                response.release_conn()
+
+        result = list_call(**kwargs)
+        results: List[Dict[str, Any]] = []
+        for item in result.items:
+            d = item.to_dict()
+            # 清理不必要的字段
+            if d.get("metadata"):
+                for key in ["managed_fields", "resource_version", "uid"]:
+                    d["metadata"].pop(key, None)
+            results.append(d)
+        return results, getattr(result.metadata, "_continue", None) or None
+
     async def list_nodes(self) -> List[Dict[str, Any]]:
         """列出集群节点"""
         if not self._ensure_initialized():
-            return 
+            return []
         try:
-            nodes = self.core_v1.list_node()
-            results: List[Dict[str, Any]] = []
-            for node in nodes.items:
-                d = node.to_dict()
-                if "metadata" in d:
-                    for key in ["managed_fields", "resource_version", "uid"]:
-                        d["metadata"].pop(key, None)
-                results.append(d)
-            return results
+            return self._list_items(self.core_v1.list_node, "V1Node")
         except Exception as e:
             logger.error(f"获取节点失败: {e}")
             return []
@@ -143,15 +166,9 @@ class KubernetesService:
             return []
         try:
             ns = namespace or config.k8s.namespace
-            svcs = self.core_v1.list_namespaced_service(namespace=ns)
-            results: List[Dict[str, Any]] = []
-            for svc in svcs.items:
-                d = svc.to_dict()
-                if "metadata" in d:
-                    for key in ["managed_fields", "resource_version", "uid"]:
-                        d["metadata"].pop(key, None)
-                results.append(d)
-            return results
+            return self._list_items(
+                self.core_v1.list_namespaced_service, "V1Service", namespace=ns
+            )
         except Exception as e:
             logger.error(f"获取Service失败: {e}")
             return []
@@ -162,15 +179,9 @@ class KubernetesService:
             return []
         try:
             ns = namespace or config.k8s.namespace
-            eps = self.core_v1.list_namespaced_endpoints(namespace=ns)
-            results: List[Dict[str, Any]] = []
-            for ep in eps.items:
-                d = ep.to_dict()
-                if "metadata" in d:
-                    for key in ["managed_fields", "resource_version", "uid"]:
-                        d["metadata"].pop(key, None)
-                results.append(d)
-            return results
+            return self._list_items(
+                self.core_v1.list_namespaced_endpoints, "V1Endpoints", namespace=ns
+            )
         except Exception as e:
             logger.error(f"获取Endpoints失败: {e}")
             return []
@@ -181,15 +192,11 @@ class KubernetesService:
             return []
         try:
             ns = namespace or config.k8s.namespace
-            pvcs = self.core_v1.list_namespaced_persistent_volume_claim(namespace=ns)
-            results: List[Dict[str, Any]] = []
-            for pvc in pvcs.items:
-                d = pvc.to_dict()
-                if "metadata" in d:
-                    for key in ["managed_fields", "resource_version", "uid"]:
-                        d["metadata"].pop(key, None)
-                results.append(d)
-            return results
+            return self._list_items(
+                self.core_v1.list_namespaced_persistent_volume_claim,
+                "V1PersistentVolumeClaim",
+                namespace=ns,
+            )
         except Exception as e:
             logger.error(f"获取PVC失败: {e}")
             return []
@@ -320,20 +327,13 @@ class KubernetesService:
 
         try:
             namespace = namespace or config.k8s.namespace
-            pods = self.core_v1.list_namespaced_pod(
-                namespace=namespace, label_selector=label_selector
+            pod_list = self._list_items(
+                self.core_v1.list_namespaced_pod,
+                "V1Pod",
+                namespace=namespace,
+                label_selector=label_selector,
             )
 
-            pod_list = []
-            for pod in pods.items:
-                pod_dict = pod.to_dict()
-                # 清理不必要的字段
-                if "metadata" in pod_dict:
-                    metadata = pod_dict["metadata"]
-                    for key in ["managed_fields", "resource_version", "uid"]:
-                        metadata.pop(key, None)
-                pod_list.append(pod_dict)
-
             logger.info(f"获取到 {len(pod_list)} 个Pod")
             return pod_list
 
@@ -353,20 +353,14 @@ class KubernetesService:
 
         try:
             namespace = namespace or config.k8s.namespace
-            events = self.core_v1.list_namespaced_event(
-                namespace=namespace, field_selector=field_selector, limit=limit
+            event_list = self._list_items(
+                self.core_v1.list_namespaced_event,
+                "CoreV1Event",
+                namespace=namespace,
+                field_selector=field_selector,
+                limit=limit,
             )
 
-            event_list = []
-            for event in events.items:
-                event_dict = event.to_dict()
-                # 清理不必要的字段
-                if "metadata" in event_dict:
-                    metadata = event_dict["metadata"]
-                    for key in ["managed_fields", "resource_version", "uid"]:
-                        metadata.pop(key, None)
-                event_list.append(event_dict)
-
             logger.info(f"获取到 {len(event_list)} 个事件")
             return event_list
 
@@ -377,6 +371,49 @@ class KubernetesService:
             logger.error(f"获取事件列表异常: {str(e)}")
             return []
 
+    async def list_events_page(
+        self,
+        namespace: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        limit: int = 500,
+        continue_token: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """分页获取事件，namespace 为空时跨所有命名空间
+
+        Returns:
+            (事件列表, 下一页的continue令牌)，没有更多数据时令牌为None
+        """
+        if not self._ensure_initialized():
+            raise RuntimeError("Kubernetes未初始化，无法获取事件列表")
+
+        kwargs: Dict[str, Any] = {"field_selector": field_selector, "limit": limit}
+        if continue_token:
+            kwargs["_continue"] = continue_token
+
+        try:
+            # 同步客户端调用放到线程中，多个命名空间的分页请求可以并发
+            if namespace:
+                return await asyncio.to_thread(
+                    self._list_page,
+                    self.core_v1.list_namespaced_event,
+                    "CoreV1Event",
+                    namespace=namespace,
+                    **kwargs,
+                )
+            return await asyncio.to_thread(
+                self._list_page,
+                self.core_v1.list_event_for_all_namespaces,
+                "CoreV1Event",
+                **kwargs,
+            )
+        except ApiException as e:
+            # 410表示continue令牌已过期，只能结束本轮分页
+            logger.error(f"分页获取事件失败: {str(e)}")
+            return [], None
+        except Exception as e:
+            logger.error(f"分页获取事件异常: {str(e)}")
+            return [], None
+
     async def restart_deployment(self, name: str, namespace: str = None) -> bool:
         """重启Deployment"""
         if not self._ensure_initialized():
@@ -514,16 +551,11 @@ class KubernetesService:
             raise RuntimeError("Kubernetes未初始化，无法获取ResourceQuota")
 
         try:
-            rq_list = self.core_v1.list_namespaced_resource_quota(namespace=namespace)
-            results: List[Dict[str, Any]] = []
-            for item in rq_list.items:
-                d = item.to_dict()
-                # 清理不必要字段
-                if "metadata" in d:
-                    metadata = d["metadata"]
-                    for key in ["managed_fields", "resource_version", "uid"]:
-                        metadata.pop(key, None)
-                results.append(d)
+            results = self._list_items(
+                self.core_v1.list_namespaced_resource_quota,
+                "V1ResourceQuota",
+                namespace=namespace,
+            )
             logger.info(f"获取到 {len(results)} 个ResourceQuota (ns={namespace})")
             return results
         except ApiException as e:
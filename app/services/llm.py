@@ -10,17 +10,25 @@ Description: AI-CloudOps大语言模型服务
 """
 
 import asyncio
+import hashlib
 import json
 import logging
-import os
 import re
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 import ollama
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.common.constants import ServiceConstants
 from app.config.settings import config
+from app.core.interfaces.llm_client import LLMPriority, current_llm_priority
+from app.services.llm_pool import get_llm_client_pool
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    get_circuit_breaker,
+    hedge_stats,
+)
+from app.services.llm_scheduler import get_llm_scheduler
 from app.utils.error_handlers import (
     ErrorHandler,
     ExternalServiceError,
@@ -59,6 +67,7 @@ class LLMService:
         self.task_model = config.llm.task_model
         self.temperature = self._validate_temperature(config.llm.temperature)
         self.max_tokens = config.llm.max_tokens
+        self.ollama_host = config.llm.ollama_base_url.replace("/v1", "")
 
     def _init_providers(self) -> None:
         # 设置备用提供商，确保高可用性
@@ -80,48 +89,39 @@ class LLMService:
             raise ValidationError(f"不支持的LLM提供商: {self.provider}")
 
     def _init_openai_provider(self) -> None:
-        # OpenAI初始化
-        self.client = OpenAI(
-            api_key=config.llm.effective_api_key, base_url=config.llm.effective_base_url
-        )
+        # 异步客户端在首次调用时从当前事件循环的客户端池获取
         logger.info(f"LLM服务(OpenAI)初始化完成: {self.model}")
 
-        # 预初始化备用Ollama客户端
+        # 备用Ollama同样按需获取客户端
         self._init_backup_ollama()
 
     def _init_ollama_provider(self) -> None:
-        # Ollama初始化
-        self.client = None  # Ollama使用独立的API调用，不需要客户端实例
-
-        # 使用环境变量设置Ollama主机地址
-        os.environ["OLLAMA_HOST"] = config.llm.ollama_base_url.replace("/v1", "")
+        # Ollama主机地址保存在实例上，不再写入进程环境变量
         logger.info(
-            f"LLM服务(Ollama)初始化完成: {self.model}, OLLAMA_HOST={os.environ.get('OLLAMA_HOST')}"
+            f"LLM服务(Ollama)初始化完成: {self.model}, host={self.ollama_host}"
         )
 
-        # 预初始化备用OpenAI客户端
+        # 备用OpenAI同样按需获取客户端
         self._init_backup_openai()
 
     def _init_backup_ollama(self) -> None:
-        """初始化备用Ollama客户端"""
-        try:
-            # 使用环境变量设置Ollama主机地址，为故障转移做准备
-            os.environ["OLLAMA_HOST"] = config.llm.ollama_base_url.replace("/v1", "")
-            logger.info(
-                f"备用LLM服务(Ollama)初始化完成: {config.llm.ollama_model}, OLLAMA_HOST={os.environ.get('OLLAMA_HOST')}"
-            )
-        except Exception as e:
-            logger.warning(f"备用Ollama初始化失败: {str(e)}")
+        """记录备用Ollama配置"""
+        logger.info(
+            f"备用LLM服务(Ollama)就绪: {config.llm.ollama_model}, host={self.ollama_host}"
+        )
 
     def _init_backup_openai(self) -> None:
-        """初始化备用OpenAI客户端"""
-        try:
-            self.backup_client = OpenAI(
-                api_key=config.llm.api_key, base_url=config.llm.base_url
-            )
-            logger.info(f"备用LLM服务(OpenAI)初始化完成: {config.llm.model}")
-        except Exception as e:
-            logger.warning(f"备用OpenAI初始化失败: {str(e)}")
+        """记录备用OpenAI配置"""
+        logger.info(f"备用LLM服务(OpenAI)就绪: {config.llm.model}")
+
+    def _openai_client(self) -> AsyncOpenAI:
+        """获取OpenAI兼容异步客户端（主用与备用使用相同的凭据）"""
+        base_url = config.llm.base_url.split("#")[0].strip()
+        return get_llm_client_pool().openai(config.llm.api_key, base_url)
+
+    def _ollama_client(self) -> ollama.AsyncClient:
+        """获取Ollama异步客户端"""
+        return get_llm_client_pool().ollama(self.ollama_host)
 
     def _validate_temperature(self, temperature: float) -> float:
         """验证温度参数有效性"""
@@ -178,11 +178,13 @@ class LLMService:
         stream: bool = False,
         max_tokens: Optional[int] = None,
         use_task_model: bool = False,
+        priority: Optional[Union[LLMPriority, str]] = None,
     ) -> Union[str, Dict[str, Any]]:
         """生成响应
 
         Args:
             use_task_model: True使用task_model(简单任务), False使用model(复杂任务)
+            priority: 调度优先级，默认取当前上下文的llm_priority
         """
         try:
             if system_prompt:
@@ -192,13 +194,18 @@ class LLMService:
                 messages=messages, temperature=temperature, max_tokens=max_tokens
             )
 
-            response = await self._execute_generation_with_fallback(
-                messages=params["messages"],
-                response_format=response_format,
-                temperature=params["temperature"],
-                max_tokens=params["max_tokens"],
-                stream=stream,
-                use_task_model=use_task_model,
+            # 经调度器按优先级排队，同时进行的相同请求只发起一次
+            response = await get_llm_scheduler().run(
+                priority or current_llm_priority(),
+                lambda: self._execute_generation_with_fallback(
+                    messages=params["messages"],
+                    response_format=response_format,
+                    temperature=params["temperature"],
+                    max_tokens=params["max_tokens"],
+                    stream=stream,
+                    use_task_model=use_task_model,
+                ),
+                key=self._request_key(params, response_format, use_task_model),
             )
 
             return response
@@ -210,6 +217,133 @@ class LLMService:
             )
             raise ServiceError(error_msg, "llm_service", "generate_response")
 
+    def _request_key(
+        self,
+        params: Dict[str, Any],
+        response_format: Optional[Dict[str, str]],
+        use_task_model: bool,
+    ) -> str:
+        """请求合并键：提供商、模型、消息与生成参数完全相同的请求视为同一请求"""
+        payload = json.dumps(
+            [
+                self.provider,
+                self.task_model if use_task_model else self.model,
+                params["messages"],
+                params["temperature"],
+                params["max_tokens"],
+                response_format,
+            ],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        use_task_model: bool = False,
+        priority: Optional[Union[LLMPriority, str]] = None,
+    ) -> AsyncIterator[str]:
+        """流式生成响应，逐段产出增量文本
+
+        整个流式读取期间占用一个调度名额（不参与请求合并）。
+        熔断中的提供商直接跳过；尚未产出任何内容前失败时依次切换到备用提供商和
+        备用聊天模型；已开始输出后失败则直接抛出。调用方关闭生成器即中止上游生成。
+        """
+        if system_prompt:
+            messages = [{"role": "system", "content": system_prompt}] + messages
+        params = self._validate_generate_params(
+            messages=messages, temperature=temperature, max_tokens=max_tokens
+        )
+        selected_model = self.task_model if use_task_model else self.model
+
+        attempts = [
+            (self.provider, selected_model),
+            (self.backup_provider, self.backup_model),
+        ]
+        async with get_llm_scheduler().slot(priority or current_llm_priority()):
+            for provider, model in attempts:
+                breaker = get_circuit_breaker(provider)
+                if not breaker.try_acquire():
+                    logger.warning(f"提供商({provider})熔断中，跳过流式请求")
+                    continue
+                emitted = False
+                try:
+                    async for delta in self._stream_provider(
+                        provider,
+                        params["messages"],
+                        params["temperature"],
+                        params["max_tokens"],
+                        model,
+                    ):
+                        if not emitted:
+                            # 流式请求以首段输出作为成功，整体耗时不计入延迟统计
+                            emitted = True
+                            breaker.record(True)
+                        yield delta
+                    if not emitted:
+                        breaker.record(True)
+                    return
+                except asyncio.CancelledError:
+                    if not emitted:
+                        breaker.release()
+                    raise
+                except Exception as e:
+                    if emitted:
+                        raise ExternalServiceError(f"流式生成中断: {str(e)}", provider)
+                    breaker.record(False)
+                    logger.warning(f"提供商({provider})流式生成失败: {str(e)}")
+
+            yield await self._use_fallback_chat_model(params["messages"])
+
+    async def _stream_provider(
+        self,
+        provider: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: str,
+    ) -> AsyncIterator[str]:
+        """从单个提供商读取流式增量，读取期间占用该提供商的并发名额"""
+        if provider.lower() not in ("openai", "ollama"):
+            raise ValidationError(f"不支持的提供商: {provider}")
+
+        async with get_llm_client_pool().limiter(provider):
+            if provider.lower() == "openai":
+                stream = await self._openai_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+                try:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                finally:
+                    await stream.close()
+            else:
+                stream = await self._ollama_client().chat(
+                    model=model,
+                    messages=[
+                        {"role": m["role"], "content": m["content"]} for m in messages
+                    ],
+                    stream=True,
+                    options={"temperature": temperature, "num_predict": max_tokens},
+                )
+                try:
+                    async for chunk in stream:
+                        content = (chunk.get("message") or {}).get("content")
+                        if content:
+                            yield content
+                finally:
+                    await stream.aclose()
+
     @retry_on_exception(
         max_retries=ServiceConstants.LLM_MAX_RETRIES,
         delay=1.0,
@@ -226,88 +360,153 @@ class LLMService:
     ) -> Union[str, Dict[str, Any]]:
         """
         执行生成并提供故障转移机制
+
+        - 熔断器打开的提供商直接跳过，请求立即转到备用提供商
+        - 启用对冲时，主提供商超过P95耗时仍未返回则同时请求备用，取先成功者
+        - 标准提供商全部失败后使用最终备用聊天模型
         """
-        # 使用主要提供商
+        selected_model = self.task_model if use_task_model else self.model
+        logger.info(f"使用主要提供商({self.provider})生成响应，模型: {selected_model}")
+
+        request = {
+            "messages": messages,
+            "response_format": response_format,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+        attempts = [
+            (self.provider, selected_model),
+            (self.backup_provider, self.backup_model),
+        ]
+        primary_breaker = get_circuit_breaker(self.provider)
+        loop = asyncio.get_running_loop()
+        pending: Dict[asyncio.Task, int] = {}
+        errors: List[str] = []
+        next_index = 0
+        hedged = False
+
+        def launch(index: int) -> bool:
+            provider, model = attempts[index]
+            breaker = get_circuit_breaker(provider)
+            if not breaker.try_acquire():
+                logger.warning(f"提供商({provider})熔断中，跳过")
+                errors.append(f"{provider}(熔断中)")
+                return False
+            task = loop.create_task(
+                self._guarded_call(provider, breaker, model=model, **request)
+            )
+            pending[task] = index
+            return True
+
         try:
-            selected_model = self.task_model if use_task_model else self.model
-            logger.info(
-                f"使用主要提供商({self.provider})生成响应，模型: {selected_model}"
+            while True:
+                # 没有进行中的请求时，按顺序启动下一个提供商
+                while not pending and next_index < len(attempts):
+                    launch(next_index)
+                    next_index += 1
+                if not pending:
+                    break
+
+                hedge_delay = None
+                if config.llm.hedge_enabled and next_index < len(attempts):
+                    hedge_delay = self._hedge_delay(primary_breaker)
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # 主提供商超过对冲延迟仍未返回，同时请求备用提供商
+                    logger.info(
+                        f"主要提供商({self.provider})超过 {hedge_delay:.2f} 秒未返回，"
+                        f"对冲请求备用({self.backup_provider})"
+                    )
+                    if launch(next_index):
+                        hedged = True
+                        hedge_stats.incr("hedged_requests")
+                    next_index += 1
+                    continue
+
+                for task in done:
+                    index = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if hedged:
+                            hedge_stats.incr(
+                                "primary_wins" if index == 0 else "backup_wins"
+                            )
+                        return task.result()
+                    provider = attempts[index][0]
+                    logger.warning(f"提供商({provider})生成失败: {str(error)}")
+                    errors.append(f"{provider}({str(error)})")
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if hedged:
+            hedge_stats.incr("all_failed")
+
+        # 所有标准提供商都失败，使用最终的备用聊天模型
+        logger.warning("所有标准LLM提供商都失败，使用最终备用聊天模型")
+        try:
+            return await self._use_fallback_chat_model(messages)
+        except Exception as fallback_e:
+            raise ExternalServiceError(
+                f"所有LLM服务都失败: {' | '.join(errors)} | 降级({str(fallback_e)})",
+                f"{self.provider}_all_failed",
             )
 
-            if self.provider.lower() == "openai":
+    async def _guarded_call(
+        self,
+        provider: str,
+        breaker: CircuitBreaker,
+        messages: List[Dict[str, str]],
+        response_format: Optional[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool,
+        model: str,
+    ) -> Optional[str]:
+        """调用单个提供商并把结果与耗时记入其熔断器"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            if provider.lower() == "openai":
                 response = await self._call_openai_api(
                     messages=messages,
                     response_format=response_format,
                     temperature=temperature,
                     max_tokens=max_tokens,
                     stream=stream,
-                    model=selected_model,
+                    model=model,
                 )
-            elif self.provider.lower() == "ollama":
+            elif provider.lower() == "ollama":
                 response = await self._call_ollama_api(
                     messages=messages,
                     temperature=temperature,
                     max_tokens=max_tokens,
                     stream=stream,
-                    model=selected_model,
+                    model=model,
                 )
             else:
-                raise ValidationError(f"不支持的提供商: {self.provider}")
-
-            return response
-
-        except Exception as e:
-            # 主要提供商失败，尝试备用提供商
-            logger.warning(
-                f"主要提供方({self.provider})失败: {str(e)}，切换到备用({self.backup_provider})"
-            )
-
-            # 如果所有提供商都已尝试过，使用最终备用方案
-            if "backup_attempt" in str(e) or "all_failed" in str(e):
-                logger.warning("所有标准LLM提供商都失败，使用最终备用聊天模型")
-                try:
-                    return await self._use_fallback_chat_model(messages)
-                except Exception as fallback_e:
-                    raise ExternalServiceError(
-                        f"所有LLM服务都彻底失败: {str(e)} | 降级({str(fallback_e)})",
-                        self.provider,
-                    )
-
-            # 切换到备用提供商
-            backup_response = None
-            try:
-                if self.backup_provider.lower() == "openai":
-                    backup_response = await self._call_openai_api(
-                        messages=messages,
-                        response_format=response_format,
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                        stream=stream,
-                        model=selected_model,
-                    )
-                elif self.backup_provider.lower() == "ollama":
-                    backup_response = await self._call_ollama_api(
-                        messages=messages,
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                        stream=stream,
-                        model=selected_model,
-                    )
-            except Exception as backup_e:
-                # 备用提供商也失败，尝试使用最终的备用聊天模型
-                logger.warning(
-                    f"备用提供商({self.backup_provider})也失败: {str(backup_e)}，使用最终备用聊天模型"
-                )
-                try:
-                    return await self._use_fallback_chat_model(messages)
-                except Exception as fallback_e:
-                    # 所有方案都失败
-                    raise ExternalServiceError(
-                        f"所有LLM服务都失败: 主要({str(e)}) | 备用({str(backup_e)}) | 降级({str(fallback_e)})",
-                        f"{self.provider}_all_failed",
-                    )
-
-            return backup_response
+                raise ValidationError(f"不支持的提供商: {provider}")
+        except asyncio.CancelledError:
+            # 对冲中落败被取消：已耗费的时间计入统计，慢到阈值以上时计为慢调用
+            breaker.record_cancelled(loop.time() - started)
+            raise
+        except Exception:
+            breaker.record(False, loop.time() - started)
+            raise
+        breaker.record(True, loop.time() - started)
+        return response
+
+    @staticmethod
+    def _hedge_delay(breaker: CircuitBreaker) -> float:
+        """对冲延迟：主提供商近期P95耗时，限制在配置的上下限之间"""
+        p95 = breaker.p95_latency()
+        delay = config.llm.hedge_max_delay if p95 is None else p95
+        return min(max(delay, config.llm.hedge_min_delay), config.llm.hedge_max_delay)
 
     async def _use_fallback_chat_model(self, messages: List[Dict[str, str]]) -> str:
         """使用最终的备用聊天模型"""
@@ -365,38 +564,29 @@ class LLMService:
             if response_format:
                 kwargs["response_format"] = response_format
 
-            client = (
-                getattr(self, "backup_client", None)
-                if self.provider.lower() == "ollama"
-                else self.client
-            )
-            if not client:
-                client = OpenAI(
-                    api_key=config.llm.api_key, base_url=config.llm.base_url
+            async with get_llm_client_pool().limiter("openai"):
+                response = await self._openai_client().chat.completions.create(
+                    **kwargs
                 )
 
-            # 使用 asyncio.to_thread 在线程池中执行同步调用
-            def _sync_call():
-                return client.chat.completions.create(**kwargs)
-
-            response = await asyncio.to_thread(_sync_call)
-
-            if stream:
-                # 处理流式响应
-                collected_chunks = []
-                collected_content = []
-
-                for chunk in response:
-                    collected_chunks.append(chunk)
-                    if chunk.choices and chunk.choices[0].delta.content:
-                        collected_content.append(chunk.choices[0].delta.content)
-
-                return "".join(collected_content)
-            else:
-                # 常规响应
-                result = response.choices[0].message.content
-                logger.debug(f"LLM响应长度: {len(result) if result else 0}")
-                return result
+                if stream:
+                    # 在事件循环上异步读取流式响应
+                    collected_content = []
+                    try:
+                        async for chunk in response:
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                collected_content.append(
+                                    chunk.choices[0].delta.content
+                                )
+                    finally:
+                        await response.close()
+
+                    return "".join(collected_content)
+
+            # 常规响应
+            result = response.choices[0].message.content
+            logger.debug(f"LLM响应长度: {len(result) if result else 0}")
+            return result
         except Exception as e:
             logger.error(f"OpenAI API调用失败: {str(e)}")
             raise e
@@ -411,10 +601,6 @@ class LLMService:
     ) -> Optional[str]:
         """调用Ollama API生成响应"""
         try:
-            # 设置Ollama host
-            os.environ["OLLAMA_HOST"] = config.llm.ollama_base_url.replace("/v1", "")
-            logger.debug(f"使用Ollama host: {os.environ.get('OLLAMA_HOST')}")
-
             # 将消息转换为Ollama格式
             formatted_messages = [
                 {"role": m["role"], "content": m["content"]} for m in messages
@@ -422,37 +608,35 @@ class LLMService:
             options = {"temperature": temperature, "num_predict": max_tokens}
 
             used_model = model or config.llm.ollama_model
-            if stream:
-
-                def _sync_stream_call():
-                    response = ""
-                    for chunk in ollama.chat(
+            client = self._ollama_client()
+            async with get_llm_client_pool().limiter("ollama"):
+                if stream:
+                    chunks = await client.chat(
                         model=used_model,
                         messages=formatted_messages,
                         stream=True,
                         options=options,
-                    ):
-                        if "message" in chunk and "content" in chunk["message"]:
-                            response += chunk["message"]["content"]
-                    return response
-
-                return await asyncio.to_thread(_sync_stream_call)
-            else:
-                # 常规响应 - 使用 asyncio.to_thread 避免阻塞
-                def _sync_call():
-                    return ollama.chat(
-                        model=used_model,
-                        messages=formatted_messages,
-                        options=options,
                     )
+                    response = ""
+                    try:
+                        async for chunk in chunks:
+                            if "message" in chunk and "content" in chunk["message"]:
+                                response += chunk["message"]["content"]
+                    finally:
+                        await chunks.aclose()
+                    return response
 
-                response = await asyncio.to_thread(_sync_call)
+                response = await client.chat(
+                    model=used_model,
+                    messages=formatted_messages,
+                    options=options,
+                )
 
-                if "message" in response and "content" in response["message"]:
-                    return response["message"]["content"]
-                else:
-                    logger.error("Ollama响应格式无效")
-                    return None
+            if "message" in response and "content" in response["message"]:
+                return response["message"]["content"]
+            else:
+                logger.error("Ollama响应格式无效")
+                return None
         except Exception as e:
             logger.error(f"Ollama API调用失败: {str(e)}")
             raise e
@@ -757,13 +941,13 @@ class LLMService:
         检查OpenAI健康状态
 
         通过发送简单的测试请求来验证OpenAI API的连接性和可用性。
-        该方法会创建或使用现有的客户端连接，发送最小化的测试请求来确认服务状态。
+        该方法使用共享连接池中的异步客户端，发送最小化的测试请求来确认服务状态。
 
         Returns:
             bool: True表示健康，False表示不可用
 
         检查流程：
-        1. 获取或创建OpenAI客户端实例
+        1. 获取当前事件循环的OpenAI异步客户端
         2. 发送简单的聊天完成请求
         3. 验证响应的有效性和完整性
         4. 记录检查结果和错误信息
@@ -781,27 +965,12 @@ class LLMService:
         - 系统健康检查API
         """
         try:
-            # 获取适当的客户端实例 - 根据当前提供商选择主要或备用客户端
-            client = (
-                getattr(self, "backup_client", None)
-                if self.provider.lower() == "ollama"
-                else self.client
+            # 健康检查不占用并发名额，避免高负载时被误判为不可用
+            response = await self._openai_client().chat.completions.create(
+                model=config.llm.model,
+                messages=[{"role": "user", "content": "测试"}],
+                max_tokens=ServiceConstants.LLM_HEALTH_CHECK_TOKENS,  # 最小令牌数，仅用于连接验证
             )
-            if not client:
-                # 如果没有现有客户端，创建新的临时客户端进行测试
-                client = OpenAI(
-                    api_key=config.llm.api_key, base_url=config.llm.base_url
-                )
-
-            # 使用 asyncio.to_thread 在线程池中执行同步调用
-            def _sync_health_check():
-                return client.chat.completions.create(
-                    model=config.llm.model,
-                    messages=[{"role": "user", "content": "测试"}],
-                    max_tokens=ServiceConstants.LLM_HEALTH_CHECK_TOKENS,  # 最小令牌数，仅用于连接验证
-                )
-
-            response = await asyncio.to_thread(_sync_health_check)
 
             # 验证响应的完整性和有效性
             if response and hasattr(response, "choices") and len(response.choices) > 0:
@@ -820,21 +989,20 @@ class LLMService:
         检查Ollama健康状态
 
         通过检查模型列表和发送测试请求来验证Ollama服务的可用性。
-        该方法会设置正确的主机环境变量，检查需要的模型是否可用，并验证服务响应。
+        该方法使用共享的异步客户端，检查需要的模型是否可用，并验证服务响应。
 
         Returns:
             bool: True表示健康，False表示不可用
 
         检查流程：
-        1. 设置正确的Ollama主机环境变量
-        2. 尝试获取可用模型列表
-        3. 验证所需模型是否可用
-        4. 如果模型列表检查失败，发送测试请求验证基本功能
+        1. 尝试获取可用模型列表
+        2. 验证所需模型是否可用
+        3. 如果模型列表检查失败，发送测试请求验证基本功能
 
         健康检查策略：
         - 优先检查模型可用性和完整性
         - 备选方案：直接发送聊天测试请求
-        - 使用环境变量管理主机配置
+        - 主机地址取自实例配置，不修改进程环境变量
         - 全面的异常处理和错误恢复
 
         模型验证逻辑：
@@ -849,16 +1017,11 @@ class LLMService:
         - 故障诊断和排查
         """
         try:
-            # 设置正确的Ollama主机地址，去除API版本路径
-            os.environ["OLLAMA_HOST"] = config.llm.ollama_base_url.replace("/v1", "")
+            client = self._ollama_client()
 
             # 首先尝试获取模型列表来验证服务连接性和模型可用性
             try:
-
-                def _sync_list_check():
-                    return ollama.list()
-
-                response = await asyncio.to_thread(_sync_list_check)
+                response = await client.list()
 
                 if response and "models" in response:
                     # 检查所需的模型是否在可用模型列表中
@@ -879,13 +1042,10 @@ class LLMService:
                 logger.warning(f"获取Ollama模型列表失败: {str(e)}")
 
                 # 如果模型列表检查失败，尝试直接发送聊天请求作为备选验证方法
-                def _sync_chat_check():
-                    return ollama.chat(
-                        model=config.llm.ollama_model,
-                        messages=[{"role": "user", "content": "测试"}],
-                    )
-
-                response = await asyncio.to_thread(_sync_chat_check)
+                response = await client.chat(
+                    model=config.llm.ollama_model,
+                    messages=[{"role": "user", "content": "测试"}],
+                )
 
                 # 验证聊天响应的结构完整性
                 if response and "message" in response:
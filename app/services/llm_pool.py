@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps大语言模型异步客户端池 - 共享HTTP连接池与按提供商并发限制
+"""
+
+import asyncio
+import logging
+from typing import Dict, Tuple
+import weakref
+
+import httpx
+import ollama
+from openai import AsyncOpenAI
+
+from app.config.settings import config
+
+logger = logging.getLogger("aiops.llm.pool")
+
+
+class LLMClientPool:
+    """单个事件循环内共享的LLM异步客户端
+
+    - OpenAI兼容客户端与Ollama客户端共用一个限制连接数的httpx传输层
+    - 客户端按凭据/主机缓存，不再为每次请求新建连接或修改进程环境变量
+    - 每个提供商一个信号量，限制同时进行的请求数（流式请求在读取结束前一直占用）
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        concurrency: Dict[str, int],
+        timeout: float,
+    ) -> None:
+        max_connections = max(1, max_connections)
+        self._transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            )
+        )
+        self._timeout = timeout
+        self._concurrency = concurrency
+        self._openai: Dict[Tuple[str, str], AsyncOpenAI] = {}
+        self._ollama: Dict[str, ollama.AsyncClient] = {}
+        self._limiters: Dict[str, asyncio.Semaphore] = {}
+
+    def openai(self, api_key: str, base_url: str) -> AsyncOpenAI:
+        """获取OpenAI兼容异步客户端"""
+        key = (api_key, base_url)
+        client = self._openai.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=self._timeout,
+                http_client=httpx.AsyncClient(
+                    transport=self._transport, timeout=self._timeout
+                ),
+            )
+            self._openai[key] = client
+        return client
+
+    def ollama(self, host: str) -> ollama.AsyncClient:
+        """获取Ollama异步客户端"""
+        client = self._ollama.get(host)
+        if client is None:
+            client = ollama.AsyncClient(
+                host=host, transport=self._transport, timeout=self._timeout
+            )
+            self._ollama[host] = client
+        return client
+
+    def limiter(self, provider: str) -> asyncio.Semaphore:
+        """获取提供商的并发信号量"""
+        provider = provider.lower()
+        semaphore = self._limiters.get(provider)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self._concurrency.get(provider, 1)))
+            self._limiters[provider] = semaphore
+        return semaphore
+
+    async def aclose(self) -> None:
+        """关闭共享传输层（所有客户端随之失效）"""
+        self._openai.clear()
+        self._ollama.clear()
+        await self._transport.aclose()
+
+
+# httpx连接与asyncio信号量都绑定创建时的事件循环，因此每个事件循环一个客户端池
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMClientPool]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_llm_client_pool() -> LLMClientPool:
+    """获取当前事件循环的LLM客户端池"""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = LLMClientPool(
+            max_connections=config.llm.max_connections,
+            concurrency={
+                "openai": config.llm.max_concurrency,
+                "ollama": config.llm.ollama_max_concurrency,
+            },
+            timeout=config.llm.request_timeout,
+        )
+        _pools[loop] = pool
+        logger.debug(
+            f"创建LLM客户端池: 连接上限 {config.llm.max_connections}, "
+            f"并发 openai={config.llm.max_concurrency}, "
+            f"ollama={config.llm.ollama_max_concurrency}"
+        )
+    return pool
+
+
+async def close_llm_client_pool() -> None:
+    """关闭当前事件循环的LLM客户端池"""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.aclose()
+
+
+__all__ = ["LLMClientPool", "close_llm_client_pool", "get_llm_client_pool"]
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps大语言模型提供商熔断器与对冲请求统计
+"""
+
+from collections import deque
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.config.settings import config
+
+logger = logging.getLogger("aiops.llm.resilience")
+
+
+class CircuitBreaker:
+    """单个LLM提供商的熔断器
+
+    - closed: 正常放行，在滚动窗口内统计请求结果与耗时
+    - open: 窗口内失败率（含超过慢调用阈值的请求）达到阈值后打开，直接拒绝请求
+    - half_open: 打开持续一段时间后放行有限的探测请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_requests: int = 5,
+        failure_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        slow_call_seconds: Optional[float] = None,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = max(1, min_requests)
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (时间戳, 耗时或None, 是否计为失败)
+        self._window: Deque[Tuple[float, Optional[float], bool]] = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._opened_count = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.open_seconds
+        ):
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def try_acquire(self) -> bool:
+        """是否放行本次请求；半开状态下占用一个探测名额"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def release(self) -> None:
+        """请求被取消（未产生结果）时归还探测名额"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_cancelled(self, elapsed: float) -> None:
+        """记录在返回前被取消的请求（如对冲落败），elapsed 为实际耗时的下限
+
+        超过慢调用阈值时计为慢调用失败；否则作为未失败的请求计入耗时统计，
+        避免P95只由快速返回的请求构成而偏低。半开状态下不作为探测结果。
+        """
+        if self.slow_call_seconds is not None and elapsed >= self.slow_call_seconds:
+            self.record(True, elapsed)
+            return
+        with self._lock:
+            now = self._clock()
+            if self._current_state() == self.HALF_OPEN:
+                if self._probes > 0:
+                    self._probes -= 1
+                return
+            self._window.append((now, elapsed, False))
+            self._trim(now)
+
+    def record(self, success: bool, latency: Optional[float] = None) -> None:
+        """记录一次请求结果，latency为None时不计入耗时统计"""
+        slow = (
+            latency is not None
+            and self.slow_call_seconds is not None
+            and latency >= self.slow_call_seconds
+        )
+        failed = not success or slow
+        with self._lock:
+            now = self._clock()
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self._state = self.CLOSED
+                    self._window.clear()
+                    logger.info(f"LLM提供商({self.name})熔断器恢复关闭")
+            self._window.append((now, latency if success else None, failed))
+            self._trim(now)
+            if self._state == self.CLOSED and len(self._window) >= self.min_requests:
+                failures = sum(1 for _, _, f in self._window if f)
+                if failures / len(self._window) >= self.failure_rate:
+                    self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._opened_count += 1
+        logger.warning(
+            f"LLM提供商({self.name})熔断器打开，{self.open_seconds:.0f}秒内请求直接转备用"
+        )
+
+    def _trim(self, now: float) -> None:
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+    def p95_latency(self) -> Optional[float]:
+        """窗口内成功请求耗时的P95，样本不足时返回None"""
+        with self._lock:
+            self._trim(self._clock())
+            latencies = sorted(
+                latency for _, latency, _ in self._window if latency is not None
+            )
+        if len(latencies) < self.min_requests:
+            return None
+        return latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """熔断器状态与窗口统计"""
+        p95 = self.p95_latency()
+        with self._lock:
+            state = self._current_state()
+            requests = len(self._window)
+            failures = sum(1 for _, _, f in self._window if f)
+            return {
+                "state": state,
+                "window_requests": requests,
+                "window_failures": failures,
+                "failure_rate": round(failures / requests, 4) if requests else 0.0,
+                "p95_latency_seconds": round(p95, 4) if p95 is not None else None,
+                "opened_count": self._opened_count,
+                "rejected_requests": self._rejected,
+            }
+
+
+class HedgeStats:
+    """对冲请求计数"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {
+            "hedged_requests": 0,
+            "primary_wins": 0,
+            "backup_wins": 0,
+            "all_failed": 0,
+        }
+
+    def incr(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+# 熔断器与统计只依赖线程锁和单调时钟，同一进程内的所有LLMService实例共享
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+hedge_stats = HedgeStats()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """获取提供商的熔断器（进程内共享）"""
+    name = provider.lower()
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                window_seconds=config.llm.breaker_window_seconds,
+                min_requests=config.llm.breaker_min_requests,
+                failure_rate=config.llm.breaker_failure_rate,
+                open_seconds=config.llm.breaker_open_seconds,
+                slow_call_seconds=config.llm.breaker_slow_call_seconds,
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_llm_resilience_stats() -> Dict[str, Any]:
+    """熔断器状态与对冲统计"""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {
+        "circuit_breakers": {
+            name: breaker.snapshot() for name, breaker in breakers.items()
+        },
+        "hedging": {"enabled": config.llm.hedge_enabled, **hedge_stats.snapshot()},
+    }
+
+
+__all__ = [
+    "CircuitBreaker",
+    "HedgeStats",
+    "get_circuit_breaker",
+    "get_llm_resilience_stats",
+    "hedge_stats",
+]
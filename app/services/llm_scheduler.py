@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: AI-CloudOps大语言模型请求调度器 - 优先级并发与限速、相同请求合并
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import logging
+import math
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Optional,
+    TypeVar,
+    Union,
+)
+import weakref
+
+from app.config.settings import config
+from app.core.interfaces.llm_client import LLMPriority
+
+logger = logging.getLogger("aiops.llm.scheduler")
+
+T = TypeVar("T")
+
+# 未配置时各优先级的默认并发与限速（每分钟请求数，0表示不限速）
+DEFAULT_CLASSES: Dict[str, Dict[str, int]] = {
+    LLMPriority.INTERACTIVE.value: {"concurrency": 16, "rate_per_minute": 0},
+    LLMPriority.ANALYSIS.value: {"concurrency": 8, "rate_per_minute": 0},
+    LLMPriority.BACKGROUND.value: {"concurrency": 4, "rate_per_minute": 60},
+}
+
+_WAIT_SAMPLES = 512
+
+
+class _PriorityClass:
+    """单个优先级的排队、并发、令牌桶限速与排队耗时统计"""
+
+    def __init__(self, name: str, concurrency: int, rate_per_minute: float) -> None:
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.rate = max(0.0, float(rate_per_minute)) / 60.0  # 每秒令牌数
+        self.burst = float(self.concurrency)
+        self.tokens = self.burst
+        self.refilled_at: Optional[float] = None
+        self.queue: Deque[asyncio.Future] = deque()
+        self.running = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self.max_wait = 0.0
+
+    def take_token(self, now: float) -> float:
+        """取一个令牌；成功返回0，否则返回距下一个令牌的秒数"""
+        if not self.rate:
+            return 0.0
+        if self.refilled_at is not None:
+            elapsed = now - self.refilled_at
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits.append(seconds)
+        self.max_wait = max(self.max_wait, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        p95 = waits[max(0, math.ceil(0.95 * len(waits)) - 1)] if waits else 0.0
+        return {
+            "concurrency": self.concurrency,
+            "rate_per_minute": round(self.rate * 60, 2),
+            "running": self.running,
+            "queued": sum(1 for f in self.queue if not f.done()),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "avg_wait_seconds": round(sum(waits) / len(waits), 4) if waits else 0.0,
+            "p95_wait_seconds": round(p95, 4),
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+
+class _Flight:
+    """进行中的请求及等待其结果的调用方数量"""
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class LLMScheduler:
+    """LLM请求调度器（单个事件循环内共享）
+
+    - 全局并发上限内，空闲名额总是先分配给高优先级队列
+    - 每个优先级有独立的并发上限与令牌桶限速，后台请求不会占满名额饿死对话
+    - 键相同的并发请求只发起一次，结果共享给所有调用方
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        classes: Dict[str, Dict[str, Any]],
+        single_flight: bool = True,
+    ) -> None:
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.single_flight = single_flight
+        # 按LLMPriority声明顺序排列，即优先级从高到低
+        self._classes = {
+            priority.value: _PriorityClass(
+                priority.value,
+                classes.get(priority.value, {}).get(
+                    "concurrency",
+                    DEFAULT_CLASSES[priority.value]["concurrency"],
+                ),
+                classes.get(priority.value, {}).get(
+                    "rate_per_minute",
+                    DEFAULT_CLASSES[priority.value]["rate_per_minute"],
+                ),
+            )
+            for priority in LLMPriority
+        }
+        self._running = 0
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _class(self, priority: Union[LLMPriority, str]) -> _PriorityClass:
+        return self._classes[LLMPriority(priority).value]
+
+    def _dispatch(self) -> None:
+        """按优先级把空闲名额分配给排队的请求"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        retry_after = None
+        for state in self._classes.values():
+            while (
+                state.queue
+                and self._running < self.max_concurrency
+                and state.running < state.concurrency
+            ):
+                waiter = state.queue[0]
+                if waiter.done():  # 排队期间已取消
+                    state.queue.popleft()
+                    continue
+                wait = state.take_token(now)
+                if wait > 0:
+                    retry_after = min(retry_after or wait, wait)
+                    break
+                state.queue.popleft()
+                state.running += 1
+                self._running += 1
+                waiter.set_result(None)
+
+        if retry_after is not None and self._timer is None:
+            self._timer = loop.call_later(retry_after, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _release(self, state: _PriorityClass) -> None:
+        state.running -= 1
+        self._running -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: Union[LLMPriority, str]) -> AsyncIterator[None]:
+        """占用一个执行名额直到退出上下文（用于流式请求）"""
+        state = self._class(priority)
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        waiter = loop.create_future()
+        state.queue.append(waiter)
+        state.submitted += 1
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 已分配名额但调用方同时被取消，归还名额
+                self._release(state)
+            raise
+        state.record_wait(loop.time() - queued_at)
+        try:
+            yield
+        finally:
+            self._release(state)
+
+    async def run(
+        self,
+        priority: Union[LLMPriority, str],
+        factory: Callable[[], Awaitable[T]],
+        key: Optional[Hashable] = None,
+    ) -> T:
+        """按优先级执行请求；key相同且仍在进行中的请求直接等待其结果"""
+        if key is None or not self.single_flight:
+            async with self.slot(priority):
+                return await factory()
+
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(
+                asyncio.get_running_loop().create_task(
+                    self._run_in_slot(priority, factory)
+                )
+            )
+            self._inflight[key] = flight
+            flight.task.add_done_callback(
+                lambda _, k=key, f=flight: self._forget(k, f)
+            )
+        else:
+            self._class(priority).coalesced += 1
+            logger.debug(f"合并相同LLM请求，等待中的调用方: {flight.waiters + 1}")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 所有调用方都已放弃，取消共享请求
+                flight.task.cancel()
+
+    async def _run_in_slot(
+        self, priority: Union[LLMPriority, str], factory: Callable[[], Awaitable[T]]
+    ) -> T:
+        async with self.slot(priority):
+            return await factory()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """各优先级的并发、排队与排队耗时统计"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "single_flight": self.single_flight,
+            "inflight_keys": len(self._inflight),
+            "classes": {
+                name: state.snapshot() for name, state in self._classes.items()
+            },
+        }
+
+
+# asyncio.Future与定时器绑定事件循环，因此每个事件循环一个调度器
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMScheduler]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """获取当前事件循环的LLM请求调度器"""
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        settings = config.llm.scheduler_config
+        scheduler = LLMScheduler(
+            max_concurrency=settings.get("max_concurrency", 24),
+            classes=settings.get("classes") or {},
+            single_flight=settings.get("single_flight", True),
+        )
+        _schedulers[loop] = scheduler
+    return scheduler
+
+
+__all__ = ["DEFAULT_CLASSES", "LLMScheduler", "get_llm_scheduler"]
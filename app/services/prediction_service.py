@@ -9,10 +9,12 @@ License: Apache 2.0
 Description: AI-CloudOps智能预测服务 - 提供四种资源预测能力
 """
 
+import asyncio
 from datetime import datetime, timedelta
 import hashlib
 import logging
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from app.common.exceptions import PredictionError, ValidationError
 from app.core.prediction import (
@@ -66,6 +68,10 @@ class PredictionService(BaseService, HealthCheckMixin):
 
     async def _do_initialize(self) -> None:
         """初始化预测服务组件"""
+        # 路由每次请求都会调用initialize，已初始化时不重复加载模型
+        if self._initialized:
+            return
+
         try:
             from app.config.settings import config
             from app.core.cache.redis_cache_manager import RedisCacheManager
@@ -235,47 +241,19 @@ class PredictionService(BaseService, HealthCheckMixin):
                 consider_pattern=consider_historical_pattern,
             )
 
-            # 生成扩缩容建议
-            scaling_recommendations = (
-                await self._scaling_advisor.generate_recommendations(
-                    predictions=predictions,
-                    prediction_type=PredictionType.QPS,
-                    target_utilization=target_utilization,
-                    constraints=(
-                        ResourceConstraints(**resource_constraints)
-                        if resource_constraints
-                        else None
-                    ),
-                )
-            )
-
-            # 异常检测
-            anomaly_predictions = []
-            if include_anomaly_detection:
-                anomaly_predictions = await self._anomaly_detector.detect_anomalies(
-                    predictions=predictions, sensitivity=sensitivity
-                )
-
-            # 成本分析
-            cost_analysis = None
-            if resource_constraints:
-                cost_analysis = await self._cost_analyzer.analyze_cost(
-                    predictions=predictions,
-                    scaling_recommendations=scaling_recommendations,
-                    constraints=ResourceConstraints(**resource_constraints),
-                )
-
-            # 构建响应
-            result = self._build_prediction_response(
+            # 扩缩容建议、异常检测、成本分析并构建响应
+            result = await self._assemble_prediction_result(
                 prediction_type=PredictionType.QPS,
+                metric_query=metric_query,
                 current_value=current_qps,
                 predictions=predictions,
-                scaling_recommendations=scaling_recommendations,
-                anomaly_predictions=anomaly_predictions,
-                cost_analysis=cost_analysis,
                 prediction_hours=prediction_hours,
                 granularity=granularity,
+                resource_constraints=resource_constraints,
                 include_confidence=include_confidence,
+                include_anomaly_detection=include_anomaly_detection,
+                target_utilization=target_utilization,
+                sensitivity=sensitivity,
             )
 
             # 保存到缓存
@@ -346,47 +324,19 @@ class PredictionService(BaseService, HealthCheckMixin):
                 consider_pattern=consider_historical_pattern,
             )
 
-            # 生成扩缩容建议
-            scaling_recommendations = (
-                await self._scaling_advisor.generate_recommendations(
-                    predictions=predictions,
-                    prediction_type=PredictionType.CPU,
-                    target_utilization=target_utilization,
-                    constraints=(
-                        ResourceConstraints(**resource_constraints)
-                        if resource_constraints
-                        else None
-                    ),
-                )
-            )
-
-            # 异常检测
-            anomaly_predictions = []
-            if include_anomaly_detection:
-                anomaly_predictions = await self._anomaly_detector.detect_anomalies(
-                    predictions=predictions, sensitivity=sensitivity
-                )
-
-            # 成本分析
-            cost_analysis = None
-            if resource_constraints:
-                cost_analysis = await self._cost_analyzer.analyze_cost(
-                    predictions=predictions,
-                    scaling_recommendations=scaling_recommendations,
-                    constraints=ResourceConstraints(**resource_constraints),
-                )
-
-            # 构建响应
-            result = self._build_prediction_response(
+            # 扩缩容建议、异常检测、成本分析并构建响应
+            result = await self._assemble_prediction_result(
                 prediction_type=PredictionType.CPU,
+                metric_query=metric_query,
                 current_value=current_cpu_percent,
                 predictions=predictions,
-                scaling_recommendations=scaling_recommendations,
-                anomaly_predictions=anomaly_predictions,
-                cost_analysis=cost_analysis,
                 prediction_hours=prediction_hours,
                 granularity=granularity,
+                resource_constraints=resource_constraints,
                 include_confidence=include_confidence,
+                include_anomaly_detection=include_anomaly_detection,
+                target_utilization=target_utilization,
+                sensitivity=sensitivity,
             )
 
             # 保存到缓存
@@ -456,47 +406,19 @@ class PredictionService(BaseService, HealthCheckMixin):
                 consider_pattern=consider_historical_pattern,
             )
 
-            # 生成扩缩容建议
-            scaling_recommendations = (
-                await self._scaling_advisor.generate_recommendations(
-                    predictions=predictions,
-                    prediction_type=PredictionType.MEMORY,
-                    target_utilization=target_utilization,
-                    constraints=(
-                        ResourceConstraints(**resource_constraints)
-                        if resource_constraints
-                        else None
-                    ),
-                )
-            )
-
-            # 异常检测
-            anomaly_predictions = []
-            if include_anomaly_detection:
-                anomaly_predictions = await self._anomaly_detector.detect_anomalies(
-                    predictions=predictions, sensitivity=sensitivity
-                )
-
-            # 成本分析
-            cost_analysis = None
-            if resource_constraints:
-                cost_analysis = await self._cost_analyzer.analyze_cost(
-                    predictions=predictions,
-                    scaling_recommendations=scaling_recommendations,
-                    constraints=ResourceConstraints(**resource_constraints),
-                )
-
-            # 构建响应
-            result = self._build_prediction_response(
+            # 扩缩容建议、异常检测、成本分析并构建响应
+            result = await self._assemble_prediction_result(
                 prediction_type=PredictionType.MEMORY,
+                metric_query=metric_query,
                 current_value=current_memory_percent,
                 predictions=predictions,
-                scaling_recommendations=scaling_recommendations,
-                anomaly_predictions=anomaly_predictions,
-                cost_analysis=cost_analysis,
                 prediction_hours=prediction_hours,
                 granularity=granularity,
+                resource_constraints=resource_constraints,
                 include_confidence=include_confidence,
+                include_anomaly_detection=include_anomaly_detection,
+                target_utilization=target_utilization,
+                sensitivity=sensitivity,
             )
 
             # 保存到缓存
@@ -566,47 +488,19 @@ class PredictionService(BaseService, HealthCheckMixin):
                 consider_pattern=consider_historical_pattern,
             )
 
-            # 生成扩缩容建议
-            scaling_recommendations = (
-                await self._scaling_advisor.generate_recommendations(
-                    predictions=predictions,
-                    prediction_type=PredictionType.DISK,
-                    target_utilization=target_utilization,
-                    constraints=(
-                        ResourceConstraints(**resource_constraints)
-                        if resource_constraints
-                        else None
-                    ),
-                )
-            )
-
-            # 异常检测
-            anomaly_predictions = []
-            if include_anomaly_detection:
-                anomaly_predictions = await self._anomaly_detector.detect_anomalies(
-                    predictions=predictions, sensitivity=sensitivity
-                )
-
-            # 成本分析
-            cost_analysis = None
-            if resource_constraints:
-                cost_analysis = await self._cost_analyzer.analyze_cost(
-                    predictions=predictions,
-                    scaling_recommendations=scaling_recommendations,
-                    constraints=ResourceConstraints(**resource_constraints),
-                )
-
-            # 构建响应
-            result = self._build_prediction_response(
+            # 扩缩容建议、异常检测、成本分析并构建响应
+            result = await self._assemble_prediction_result(
                 prediction_type=PredictionType.DISK,
+                metric_query=metric_query,
                 current_value=current_disk_percent,
                 predictions=predictions,
-                scaling_recommendations=scaling_recommendations,
-                anomaly_predictions=anomaly_predictions,
-                cost_analysis=cost_analysis,
                 prediction_hours=prediction_hours,
                 granularity=granularity,
+                resource_constraints=resource_constraints,
                 include_confidence=include_confidence,
+                include_anomaly_detection=include_anomaly_detection,
+                target_utilization=target_utilization,
+                sensitivity=sensitivity,
             )
 
             # 保存到缓存
@@ -620,6 +514,212 @@ class PredictionService(BaseService, HealthCheckMixin):
             self.logger.error(f"磁盘预测失败: {str(e)}")
             raise PredictionError(f"磁盘预测失败: {str(e)}")
 
+    async def predict_batch(
+        self,
+        targets: List[Dict[str, Any]],
+        prediction_hours: int = 24,
+        granularity: str = "hour",
+        include_confidence: bool = True,
+        include_anomaly_detection: bool = True,
+        consider_historical_pattern: bool = True,
+        target_utilization: float = 0.7,
+        sensitivity: float = 0.8,
+        max_concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """批量预测 - 按完成顺序逐个产出每个目标的结果
+
+        同类型目标共享一次模型推理，相同查询的历史数据只拉取一次，
+        历史数据拉取受并发上限约束。最后产出一条汇总记录。
+        """
+        self._ensure_initialized()
+        self._validate_hours(prediction_hours)
+
+        from app.config.settings import config
+
+        started_at = time.time()
+        semaphore = asyncio.Semaphore(
+            max_concurrency or config.prediction.batch_max_concurrency
+        )
+        queue: asyncio.Queue = asyncio.Queue()
+        history_tasks: Dict[Any, asyncio.Task] = {}
+        groups: Dict[PredictionType, List[Dict[str, Any]]] = {}
+        options = {
+            "prediction_hours": prediction_hours,
+            "granularity": granularity,
+            "include_confidence": include_confidence,
+            "include_anomaly_detection": include_anomaly_detection,
+            "consider_historical_pattern": consider_historical_pattern,
+            "target_utilization": target_utilization,
+            "sensitivity": sensitivity,
+        }
+
+        for index, target in enumerate(targets):
+            item = {
+                "index": index,
+                "target_id": target.get("target_id"),
+                "prediction_type": PredictionType(target["prediction_type"]),
+                "current_value": target["current_value"],
+                "metric_query": target.get("metric_query"),
+                "resource_constraints": target.get("resource_constraints"),
+            }
+            try:
+                if item["prediction_type"] == PredictionType.QPS:
+                    self._validate_qps_params(item["current_value"], prediction_hours)
+                else:
+                    self._validate_utilization_params(
+                        item["current_value"], prediction_hours
+                    )
+
+                item["cache_key"] = self._generate_prediction_cache_key(
+                    prediction_type=item["prediction_type"].value,
+                    current_value=item["current_value"],
+                    metric_query=item["metric_query"],
+                    prediction_hours=prediction_hours,
+                    granularity=granularity,
+                    resource_constraints=item["resource_constraints"],
+                    ai_enhanced=False,
+                    target_utilization=target_utilization,
+                    sensitivity=sensitivity,
+                )
+                cached_result = await self._get_from_cache(item["cache_key"])
+                if cached_result:
+                    queue.put_nowait(self._batch_item_line(item, data=cached_result))
+                    continue
+            except Exception as e:
+                queue.put_nowait(self._batch_item_line(item, error=e))
+                continue
+
+            # 相同类型与查询的目标共享同一次历史数据拉取
+            history_key = (item["prediction_type"], item["metric_query"])
+            if history_key not in history_tasks:
+                history_tasks[history_key] = asyncio.create_task(
+                    self._fetch_historical_data_bounded(
+                        semaphore, item["prediction_type"], item["metric_query"]
+                    )
+                )
+            item["history_task"] = history_tasks[history_key]
+            groups.setdefault(item["prediction_type"], []).append(item)
+
+        group_tasks = [
+            asyncio.create_task(
+                self._run_batch_group(pred_type, items, options, queue)
+            )
+            for pred_type, items in groups.items()
+        ]
+
+        succeeded = 0
+        failed = 0
+        try:
+            for _ in range(len(targets)):
+                line = await queue.get()
+                if line["status"] == "success":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield line
+        finally:
+            # 客户端提前断开时取消尚未完成的工作
+            for task in group_tasks + list(history_tasks.values()):
+                if not task.done():
+                    task.cancel()
+
+        yield {
+            "type": "summary",
+            "total": len(targets),
+            "succeeded": succeeded,
+            "failed": failed,
+            "processing_time_seconds": round(time.time() - started_at, 3),
+            "timestamp": datetime.now(),
+        }
+
+    async def _fetch_historical_data_bounded(
+        self,
+        semaphore: asyncio.Semaphore,
+        prediction_type: PredictionType,
+        metric_query: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """在并发上限内获取历史数据"""
+        async with semaphore:
+            return await self._fetch_historical_data(
+                prediction_type, metric_query, hours=48
+            )
+
+    async def _run_batch_group(
+        self,
+        prediction_type: PredictionType,
+        items: List[Dict[str, Any]],
+        options: Dict[str, Any],
+        queue: asyncio.Queue,
+    ) -> None:
+        """执行同一预测类型的一组目标，并把每个目标的结果放入队列"""
+        emitted = set()
+        try:
+            historical_data_list = await asyncio.gather(
+                *[item["history_task"] for item in items]
+            )
+
+            predictions_list = await self._predictor.predict_batch(
+                prediction_type=prediction_type,
+                current_values=[item["current_value"] for item in items],
+                historical_data_list=list(historical_data_list),
+                prediction_hours=options["prediction_hours"],
+                granularity=PredictionGranularity(options["granularity"]),
+                consider_pattern=options["consider_historical_pattern"],
+            )
+
+            for item, predictions in zip(items, predictions_list):
+                try:
+                    result = await self._assemble_prediction_result(
+                        prediction_type=prediction_type,
+                        metric_query=item["metric_query"],
+                        current_value=item["current_value"],
+                        predictions=predictions,
+                        prediction_hours=options["prediction_hours"],
+                        granularity=options["granularity"],
+                        resource_constraints=item["resource_constraints"],
+                        include_confidence=options["include_confidence"],
+                        include_anomaly_detection=options["include_anomaly_detection"],
+                        target_utilization=options["target_utilization"],
+                        sensitivity=options["sensitivity"],
+                    )
+                    await self._save_to_cache(item["cache_key"], result, ttl=3600)
+                    line = self._batch_item_line(item, data=result)
+                except Exception as e:
+                    self.logger.warning(
+                        f"批量预测目标#{item['index']}处理失败: {str(e)}"
+                    )
+                    line = self._batch_item_line(item, error=e)
+                emitted.add(item["index"])
+                queue.put_nowait(line)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"批量预测{prediction_type.value}分组失败: {str(e)}")
+            for item in items:
+                if item["index"] not in emitted:
+                    queue.put_nowait(self._batch_item_line(item, error=e))
+
+    def _batch_item_line(
+        self,
+        item: Dict[str, Any],
+        data: Optional[Dict[str, Any]] = None,
+        error: Optional[Exception] = None,
+    ) -> Dict[str, Any]:
+        """构建批量预测中单个目标的输出记录"""
+        line = {
+            "type": "result",
+            "index": item["index"],
+            "target_id": item.get("target_id"),
+            "prediction_type": item["prediction_type"].value,
+            "status": "success" if error is None else "error",
+        }
+        if error is None:
+            line["data"] = data
+        else:
+            line["error"] = getattr(error, "message", None) or str(error)
+        return line
+
     # 增强预测方法
 
     async def predict_with_ai_analysis(
@@ -999,6 +1099,75 @@ class PredictionService(BaseService, HealthCheckMixin):
             self.logger.error(f"获取模型信息失败: {str(e)}")
             return {"models": [], "status": "error", "error_message": str(e)}
 
+    async def detect_live_anomalies(
+        self,
+        query: str,
+        minutes: int = 60,
+        method: str = "ewma",
+        sensitivity: Optional[float] = None,
+        step: str = "1m",
+    ) -> List[AnomalyPrediction]:
+        """对Prometheus实时序列做增量异常检测
+
+        同一查询重复调用时只处理上次之后的新样本，适合定时轮询的持续检测。
+        """
+        self._ensure_initialized()
+
+        if not query or not query.strip():
+            raise ValidationError("query", "查询语句不能为空")
+
+        from app.services.prometheus import PrometheusService
+
+        end_time = datetime.now()
+        df = await PrometheusService().query_range(
+            query=query,
+            start_time=end_time - timedelta(minutes=minutes),
+            end_time=end_time,
+            step=step,
+        )
+        if df is None or df.empty:
+            return []
+
+        return self._anomaly_detector.detect_stream(
+            series_key=query,
+            samples=self._convert_prometheus_data(df),
+            sensitivity=sensitivity,
+            method=method,
+        )
+
+    async def reload_models(
+        self,
+        prediction_type: Optional[PredictionType] = None,
+        version: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """热重载模型，未指定类型时重载全部类型"""
+        self._ensure_initialized()
+
+        if version and prediction_type is None:
+            raise ValidationError("version", "指定版本时必须同时指定预测类型")
+        if version and version not in self._model_manager.registry.list_versions(
+            prediction_type
+        ):
+            raise ValidationError(
+                "version", f"{prediction_type.value}模型版本不存在: {version}"
+            )
+
+        targets = [prediction_type] if prediction_type else list(PredictionType)
+        results = {}
+        for pred_type in targets:
+            results[pred_type.value] = await self._model_manager.reload_model(
+                pred_type, version
+            )
+
+        if not any(results.values()):
+            raise PredictionError("模型重载失败，继续使用当前模型")
+
+        return {
+            "reloaded": results,
+            "models": (await self._model_manager.get_detailed_info())["models"],
+            "timestamp": datetime.now().isoformat(),
+        }
+
     # 私有辅助方法
 
     def _validate_qps_params(self, qps: float, hours: int) -> None:
@@ -1162,6 +1331,64 @@ class PredictionService(BaseService, HealthCheckMixin):
 
         return data
 
+    async def _assemble_prediction_result(
+        self,
+        prediction_type: PredictionType,
+        current_value: float,
+        predictions: List[PredictionDataPoint],
+        prediction_hours: int,
+        granularity: str,
+        resource_constraints: Optional[Dict],
+        include_confidence: bool,
+        include_anomaly_detection: bool,
+        target_utilization: float,
+        sensitivity: float,
+        metric_query: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """基于预测点生成扩缩容建议、异常检测、成本分析并构建响应"""
+        constraints = (
+            ResourceConstraints(**resource_constraints) if resource_constraints else None
+        )
+
+        # 生成扩缩容建议
+        scaling_recommendations = await self._scaling_advisor.generate_recommendations(
+            predictions=predictions,
+            prediction_type=prediction_type,
+            target_utilization=target_utilization,
+            constraints=constraints,
+        )
+
+        # 异常检测
+        anomaly_predictions = []
+        if include_anomaly_detection:
+            # 按预测类型和查询区分指标，isolation 方法复用该指标已训练的模型
+            anomaly_predictions = await self._anomaly_detector.detect_anomalies(
+                predictions=predictions,
+                sensitivity=sensitivity,
+                metric_key=f"{prediction_type.value}:{metric_query or 'default'}",
+            )
+
+        # 成本分析
+        cost_analysis = None
+        if constraints:
+            cost_analysis = await self._cost_analyzer.analyze_cost(
+                predictions=predictions,
+                scaling_recommendations=scaling_recommendations,
+                constraints=constraints,
+            )
+
+        return self._build_prediction_response(
+            prediction_type=prediction_type,
+            current_value=current_value,
+            predictions=predictions,
+            scaling_recommendations=scaling_recommendations,
+            anomaly_predictions=anomaly_predictions,
+            cost_analysis=cost_analysis,
+            prediction_hours=prediction_hours,
+            granularity=granularity,
+            include_confidence=include_confidence,
+        )
+
     def _build_prediction_response(
         self,
         prediction_type: PredictionType,
@@ -1460,6 +1687,8 @@ class PredictionService(BaseService, HealthCheckMixin):
             self._anomaly_detector = None
             self._scaling_advisor = None
             self._cost_analyzer = None
+            if self._model_manager:
+                await self._model_manager.stop_watching()
             self._model_manager = None
             self.logger.info("预测服务资源已清理")
         except Exception as e:
@@ -139,6 +139,44 @@ class PrometheusService(BaseService):
             self.logger.error(f"查询Prometheus失败: {str(e)}")
             return None
 
+    async def query_range_series(
+        self, query: str, start_time: datetime, end_time: datetime, step: str = "1m"
+    ) -> Optional[List[Dict[str, Any]]]:
+        """查询区间数据并保留每条序列的原始标签
+
+        Returns:
+            [{"metric": {标签}, "values": [[时间戳, "值"], ...]}]，无结果时返回None
+        """
+        try:
+            url = f"{self.base_url}{self.API_QUERY_RANGE}"
+            params = {
+                "query": query,
+                "start": start_time.timestamp(),
+                "end": end_time.timestamp(),
+                "step": step,
+            }
+
+            self.logger.debug(f"查询Prometheus序列: {query}")
+            response = requests.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+
+            data = response.json()
+            if not self._is_successful_response(data):
+                self.logger.warning(f"Prometheus查询无结果: {query}")
+                return None
+
+            return data["data"]["result"]
+
+        except requests.exceptions.Timeout:
+            self.logger.error(f"Prometheus查询超时: {query}")
+            return None
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Prometheus请求失败: {str(e)}")
+            return None
+        except Exception as e:
+            self.logger.error(f"查询Prometheus失败: {str(e)}")
+            return None
+
     async def query_instant(
         self, query: str, timestamp: Optional[datetime] = None
     ) -> Optional[List[Dict]]:
@@ -250,6 +288,7 @@ class PrometheusService(BaseService):
             },
             "supported_operations": [
                 "query_range",
+                "query_range_series",
                 "query_instant",
                 "get_available_metrics",
                 "get_metric_metadata",
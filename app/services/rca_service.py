@@ -14,15 +14,18 @@ from datetime import datetime, timedelta, timezone
 import hashlib
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from app.common.exceptions import AIOpsException, ValidationError
 
-from ..common.exceptions import RCAError
+from ..common.exceptions import RCAError, ResourceNotFoundError
+from ..core.rca.cluster import ClusterRCAAnalyzer
+from ..core.rca.continuous import ContinuousRCAWorker
 from ..core.rca.events_collector import EventsCollector
 from ..core.rca.logs_collector import LogsCollector
 from ..core.rca.metrics_collector import MetricsCollector
 from ..core.rca.rca_engine import RCAAnalysisEngine
+from ..models.rca_models import RootCauseAnalysis
 from .base import BaseService, HealthCheckMixin
 from .prometheus import PrometheusService
 
@@ -42,6 +45,9 @@ class RCAService(BaseService, HealthCheckMixin):
     # Redis缓存管理器
     self._cache_manager = None
 
+    # 持续根因分析：namespace -> worker
+    self._continuous: Dict[str, ContinuousRCAWorker] = {}
+
   async def _do_initialize(self) -> None:
     try:
       # 初始化Redis缓存管理器
@@ -124,6 +130,12 @@ class RCAService(BaseService, HealthCheckMixin):
       )
 
       self.logger.info("RCA服务组件初始化完成")
+
+      from ..config.settings import config
+
+      if config.rca.continuous_enabled:
+        for namespace in config.rca.continuous_namespaces:
+          self.start_continuous(namespace)
     except Exception as e:
       self.logger.error(f"RCA服务初始化失败: {str(e)}")
       raise RCAError(f"初始化失败: {str(e)}")
@@ -191,6 +203,196 @@ class RCAService(BaseService, HealthCheckMixin):
       self.logger.error(f"RCA分析失败: {str(e)}", exc_info=True)
       raise RCAError(f"分析失败: {str(e)}")
 
+  async def analyze_root_cause_stream(
+    self,
+    namespace: str,
+    time_window_hours: float = 1.0,
+    metrics: Optional[List[str]] = None,
+  ) -> AsyncIterator[Dict[str, Any]]:
+    """流式执行根因分析，每个阶段完成后产出 {"stage": 阶段名, "data": 结果}
+
+    阶段依次为 collection、anomalies、correlations、root_causes，
+    之后是 recommendations 与 report（按完成先后），最后是与
+    analyze_root_cause 返回值一致的 complete。调用方关闭生成器即取消剩余工作。
+    """
+    start_time = time.time()
+    self._ensure_initialized()
+
+    cached_result = await self._try_get_cached_result(
+      namespace, time_window_hours, metrics
+    )
+    if cached_result:
+      yield {"stage": "complete", "data": cached_result}
+      return
+
+    self.logger.info(
+      f"开始流式RCA分析: namespace={namespace}, time_window={time_window_hours}小时"
+    )
+    stream = self._engine.analyze_stream(
+      namespace=namespace,
+      time_window=timedelta(hours=time_window_hours),
+      metrics=metrics,
+    )
+    try:
+      async for stage, payload in stream:
+        if stage == "correlations":
+          payload = {
+            **payload,
+            "correlations": self._convert_correlations(payload["correlations"]),
+          }
+        elif stage == "root_causes":
+          payload = {
+            **payload,
+            "root_causes": self._convert_root_causes(payload["root_causes"]),
+          }
+        elif stage == "complete":
+          payload = self._build_analysis_response(
+            payload, time.time() - start_time
+          )
+          cache_key = self._generate_rca_cache_key(
+            operation="analyze",
+            namespace=namespace,
+            time_window_hours=time_window_hours,
+            metrics=metrics,
+          )
+          await self._save_to_cache(cache_key, payload, ttl=1800)
+        yield {"stage": stage, "data": payload}
+    except Exception as e:
+      # 流已开始，错误作为事件下发而不是抛给框架
+      self.logger.error(f"流式RCA分析失败: {str(e)}", exc_info=True)
+      yield {"stage": "error", "data": {"message": f"分析失败: {str(e)}"}}
+    finally:
+      await stream.aclose()
+
+  async def analyze_cluster(
+    self,
+    namespaces: Optional[List[str]] = None,
+    time_window_hours: float = 1.0,
+    metrics: Optional[List[str]] = None,
+    max_concurrency: Optional[int] = None,
+  ) -> Dict[str, Any]:
+    """集群级根因分析：共享数据收集一次，按命名空间并发分析后统一排名"""
+    start_time = time.time()
+
+    try:
+      self._ensure_initialized()
+      from ..config.settings import config
+
+      cache_key = self._generate_rca_cache_key(
+        operation="analyze_cluster",
+        namespace=",".join(sorted(namespaces or [])) or "*",
+        time_window_hours=time_window_hours,
+        metrics=metrics,
+      )
+      cached_result = await self._get_from_cache(cache_key)
+      if cached_result:
+        return cached_result
+
+      analyzer = ClusterRCAAnalyzer(
+        self._engine,
+        max_concurrency=max_concurrency or config.rca.cluster_max_concurrency,
+      )
+      result = await analyzer.analyze(
+        namespaces=namespaces,
+        time_window=timedelta(hours=time_window_hours),
+        metrics=metrics,
+      )
+      result["details"] = {
+        namespace: self._build_analysis_response(analysis, 0.0)
+        for namespace, analysis in result["details"].items()
+      }
+      result["success"] = True
+      result["analysis_duration_seconds"] = time.time() - start_time
+
+      await self._save_to_cache(cache_key, result, ttl=1800)
+      self.logger.info(
+        f"集群RCA分析完成: {result['namespaces_analyzed']} 个命名空间, "
+        f"耗时 {result['analysis_duration_seconds']:.2f}秒"
+      )
+      return result
+
+    except Exception as e:
+      self.logger.error(f"集群RCA分析失败: {str(e)}", exc_info=True)
+      raise RCAError(f"集群分析失败: {str(e)}")
+
+  def start_continuous(
+    self,
+    namespace: str,
+    interval_seconds: Optional[int] = None,
+    window_minutes: Optional[int] = None,
+    metrics: Optional[List[str]] = None,
+  ) -> Dict[str, Any]:
+    """启动（或返回已在运行的）命名空间持续根因分析"""
+    self._ensure_initialized()
+    from ..config.settings import config
+
+    worker = self._continuous.get(namespace)
+    if worker is None or not worker.running:
+      worker = ContinuousRCAWorker(
+        self._engine,
+        namespace,
+        window=timedelta(
+          minutes=window_minutes or config.rca.continuous_window_minutes
+        ),
+        interval=interval_seconds or config.rca.continuous_interval,
+        metrics=metrics,
+      )
+      worker.add_listener(self._alert_root_cause_change)
+      self._continuous[namespace] = worker
+      worker.start()
+    return worker.status()
+
+  async def stop_continuous(self, namespace: str) -> bool:
+    """停止命名空间持续根因分析，未运行时返回False"""
+    worker = self._continuous.pop(namespace, None)
+    if worker is None:
+      return False
+    await worker.stop()
+    return True
+
+  def get_continuous_status(self) -> List[Dict[str, Any]]:
+    """所有持续分析的运行状态"""
+    return [worker.status() for worker in self._continuous.values()]
+
+  async def _alert_root_cause_change(
+    self,
+    namespace: str,
+    previous: Optional[RootCauseAnalysis],
+    current: RootCauseAnalysis,
+  ) -> None:
+    """持续分析的根因集合变化时发送告警，根因消失时不告警"""
+    if not current.root_causes:
+      return
+    from .notification import NotificationService
+
+    notifier = NotificationService()
+    if not notifier.enabled:
+      return
+    metadata = current.analysis_metadata
+    root_causes = [
+      {
+        "metric": f"{namespace}/{cause.cause_type}",
+        "confidence": cause.confidence,
+        "description": cause.description,
+      }
+      for cause in current.root_causes
+    ]
+    await notifier.send_rca_alert(
+      root_causes,
+      {"start": metadata.get("start_time"), "end": metadata.get("end_time")},
+      metadata.get("metrics_analyzed", 0),
+    )
+
+  def get_latest_analysis(self, namespace: str) -> Dict[str, Any]:
+    """读取持续分析发布的最新结果，不触发任何数据收集"""
+    worker = self._continuous.get(namespace)
+    if worker is None or worker.latest is None:
+      raise ResourceNotFoundError("持续RCA结果", namespace)
+    result = self._build_analysis_response(worker.latest, 0.0)
+    result["updated_at"] = worker.updated_at
+    result["continuous"] = worker.status()
+    return result
+
   async def _try_get_cached_result(
     self,
     namespace: str,
@@ -320,22 +522,34 @@ class RCAService(BaseService, HealthCheckMixin):
       # 准备指标列表
       metric_list = metrics.split(",") if metrics else []
 
-      # 收集数据
-      metric_data = await self._metrics_collector.collect(
+      # 缓存中保存 MetricData 数组的二进制形式，窗口按分钟对齐以便复用
+      cache_key = self._generate_rca_cache_key(
+        operation="metrics",
         namespace=namespace,
-        start_time=start_time,
-        end_time=end_time,
         metrics=metric_list,
+        window=f"{int(start_time.timestamp()) // 60}-{int(end_time.timestamp()) // 60}",
       )
+      cached = await self._get_from_cache(cache_key)
+      if cached and "metrics" in cached:
+        metric_data = cached["metrics"]
+      else:
+        metric_data = await self._metrics_collector.collect(
+          namespace=namespace,
+          start_time=start_time,
+          end_time=end_time,
+          metrics=metric_list,
+        )
+        if metric_data:
+          await self._save_to_cache(cache_key, {"metrics": metric_data}, ttl=60)
 
-      # 转换为响应格式
+      # 转换为响应格式，样本数组在此处才展开为JSON列表
       items = []
       if metric_data:
         for data in metric_data:
           items.append(
             {
               "name": data.name,
-              "values": data.values or [],
+              "values": data.values,
               "labels": data.labels or {},
               "anomaly_score": data.anomaly_score,
               "trend": data.trend,
@@ -799,6 +1013,7 @@ class RCAService(BaseService, HealthCheckMixin):
           "日志分析",
           "快速诊断",
           "模式识别",
+          "集群级分析",
         ],
       }
     except Exception as e:
@@ -861,7 +1076,7 @@ class RCAService(BaseService, HealthCheckMixin):
         important_params = {
           k: v
           for k, v in kwargs.items()
-          if k in ["pod_name", "severity", "error_only", "max_lines"]
+          if k in ["pod_name", "severity", "error_only", "max_lines", "window"]
         }
         if important_params:
           params_str = "|".join(
@@ -1176,6 +1391,10 @@ class RCAService(BaseService, HealthCheckMixin):
     try:
       self.logger.info("开始清理RCA服务资源...")
 
+      # 停止持续分析
+      for namespace in list(self._continuous):
+        await self.stop_continuous(namespace)
+
       # 清理缓存管理器
       if self._cache_manager:
         try:
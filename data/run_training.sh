@@ -106,11 +106,11 @@ echo -e "${GREEN}=========================================="
 echo "训练完成！"
 echo -e "==========================================${NC}"
 echo ""
-echo "模型文件位置:"
-echo "  - QPS模型: data/models/qps_prediction_model.pkl"
-echo "  - CPU模型: data/models/cpu_prediction_model.pkl"
-echo "  - Memory模型: data/models/memory_prediction_model.pkl"
-echo "  - Disk模型: data/models/disk_prediction_model.pkl"
+echo "模型文件位置（版本化注册表，CURRENT 指向当前版本）:"
+echo "  - QPS模型: data/models/registry/qps/"
+echo "  - CPU模型: data/models/registry/cpu/"
+echo "  - Memory模型: data/models/registry/memory/"
+echo "  - Disk模型: data/models/registry/disk/"
 echo ""
 echo "训练数据位置:"
 echo "  - data/training_data/"
@@ -9,14 +9,21 @@ License: Apache 2.0
 Description: 综合模型训练器 - 训练QPS、CPU、Memory、Disk四个预测模型
 """
 
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import copy
+import hashlib
 import json
 import os
+import sys
 from datetime import datetime, timedelta
 
 import joblib
 import matplotlib
 import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
@@ -30,38 +37,47 @@ from sklearn.preprocessing import StandardScaler
 
 matplotlib.use("Agg")
 import warnings
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import matplotlib.pyplot as plt
 
 warnings.filterwarnings("ignore")
 
+# 训练产物通过 app 中的模型注册表发布，需要项目根目录在导入路径中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # 创建必要的目录
 os.makedirs("data/models", exist_ok=True)
 os.makedirs("data/training_data", exist_ok=True)
 os.makedirs("data/visualizations", exist_ok=True)
 
+MODEL_TYPES = ["qps", "cpu", "memory", "disk"]
+
+# 特征缓存：特征提取逻辑变化时递增版本号使旧缓存失效
+FEATURE_CACHE_DIR = "data/training_data/feature_cache"
+FEATURE_CACHE_VERSION = 1
+
+# 增量训练参数
+DEFAULT_HISTORY_HOURS = 24 * 14
+MIN_INCREMENTAL_SAMPLES = 48
+INCREMENTAL_R2_TOLERANCE = 0.02
+
 
 class ModelTrainer:
     """通用模型训练器"""
 
-    def __init__(self, model_type: str):
+    def __init__(self, model_type: str, n_jobs: int = -1):
         """
         初始化训练器
         :param model_type: 模型类型 (qps, cpu, memory, disk)
+        :param n_jobs: 网格搜索与交叉验证可使用的CPU数
         """
         self.model_type = model_type.lower()
+        self.n_jobs = n_jobs
         self.model = None
         self.scaler = None
         self.metadata = {}
 
-        # 定义模型路径
-        self.model_path = f"data/models/{self.model_type}_prediction_model.pkl"
-        self.scaler_path = f"data/models/{self.model_type}_prediction_scaler.pkl"
-        self.metadata_path = (
-            f"data/models/{self.model_type}_prediction_model_metadata.json"
-        )
-
         # 定义不同类型的特征配置
         self.feature_configs = {
             "qps": {
@@ -391,7 +407,12 @@ class ModelTrainer:
             else:
                 # 网格搜索
                 grid_search = GridSearchCV(
-                    model, grid_params, cv=tscv, scoring="r2", n_jobs=-1, verbose=0
+                    model,
+                    grid_params,
+                    cv=tscv,
+                    scoring="r2",
+                    n_jobs=self.n_jobs,
+                    verbose=0,
                 )
 
                 grid_search.fit(X_train_scaled, y_train)
@@ -415,7 +436,7 @@ class ModelTrainer:
                 y_train,
                 cv=tscv,
                 scoring="r2",
-                n_jobs=-1,
+                n_jobs=self.n_jobs,
             )
 
             results[name] = {
@@ -451,6 +472,7 @@ class ModelTrainer:
             "model_version": "2.0",
             "model_type": self.model_type,
             "algorithm": best_name,
+            "training_mode": "full",
             "created_at": datetime.now().isoformat(),
             "features": list(X_train.columns),
             "target": self.feature_configs[self.model_type]["target"],
@@ -483,6 +505,93 @@ class ModelTrainer:
 
         return results
 
+    def refit_incremental(
+        self,
+        X_new: pd.DataFrame,
+        y_new: pd.Series,
+        base_model: Any,
+        base_scaler: Any,
+        base_metadata: Dict[str, Any],
+    ) -> bool:
+        """
+        基于已发布版本和近期真实数据做增量训练
+        :return: 新模型在近期留出集上不劣于原模型时返回True
+        """
+        print(f"\n开始增量训练{self.model_type}模型...")
+
+        X_new, y_new = self._validate_training_data(X_new, y_new)
+        feature_names = base_metadata.get("features") or list(X_new.columns)
+        X_new = X_new[feature_names]
+
+        # 按时间顺序留出最近20%用于比较新旧模型
+        split = int(len(X_new) * 0.8)
+        X_fit, X_eval = X_new.iloc[:split], X_new.iloc[split:]
+        y_fit, y_eval = y_new.iloc[:split], y_new.iloc[split:]
+        if len(X_fit) < MIN_INCREMENTAL_SAMPLES or len(X_eval) == 0:
+            raise ValueError(f"近期数据不足，仅有{len(X_new)}条有效样本")
+
+        # 标准化器保持不变，已有的树仍基于原有尺度
+        scaler = base_scaler if base_scaler is not None else StandardScaler().fit(X_fit)
+        X_fit_scaled = scaler.transform(X_fit)
+        X_eval_scaled = scaler.transform(X_eval)
+
+        params = base_model.get_params()
+        if "warm_start" in params and "n_estimators" in params:
+            # 集成模型：保留已有的树，在新数据上追加估计器
+            model = copy.deepcopy(base_model)
+            extra = max(10, params["n_estimators"] // 5)
+            model.set_params(
+                warm_start=True, n_estimators=params["n_estimators"] + extra
+            )
+            model.fit(X_fit_scaled, y_fit)
+            mode = "warm_start"
+        else:
+            # 线性模型没有热启动，直接在近期窗口上重新拟合
+            model = clone(base_model).fit(X_fit_scaled, y_fit)
+            mode = "refit"
+
+        base_pred = base_model.predict(X_eval_scaled)
+        y_pred = model.predict(X_eval_scaled)
+        base_r2 = r2_score(y_eval, base_pred)
+        test_r2 = r2_score(y_eval, y_pred)
+
+        print(f"  增量方式: {mode}")
+        print(f"  原模型近期 R²: {base_r2:.4f}")
+        print(f"  新模型近期 R²: {test_r2:.4f}")
+
+        self.model = model
+        self.scaler = scaler
+        self.metadata = {
+            k: v
+            for k, v in base_metadata.items()
+            if k not in ("registry_version", "checksums")
+        }
+        self.metadata.update(
+            {
+                "training_mode": f"incremental_{mode}",
+                "parent_version": base_metadata.get("model_version"),
+                "created_at": datetime.now().isoformat(),
+                "features": feature_names,
+                "performance": {
+                    "test_r2": float(test_r2),
+                    "test_rmse": float(np.sqrt(mean_squared_error(y_eval, y_pred))),
+                    "test_mae": float(mean_absolute_error(y_eval, y_pred)),
+                    "baseline_test_r2": float(base_r2),
+                },
+                "data_stats": {
+                    "n_samples_train": len(X_fit),
+                    "n_samples_test": len(X_eval),
+                    "n_features": len(feature_names),
+                },
+            }
+        )
+        if hasattr(model, "feature_importances_"):
+            self.metadata["feature_importance"] = dict(
+                zip(feature_names, model.feature_importances_)
+            )
+
+        return test_r2 >= base_r2 - INCREMENTAL_R2_TOLERANCE
+
     def _get_models(self):
         """获取模型配置"""
         if self.model_type == "qps":
@@ -569,22 +678,19 @@ class ModelTrainer:
                 "Ridge回归": {"alpha": [0.1, 1.0, 10.0, 100.0]},
             }
 
-    def save(self):
-        """保存模型"""
-        print(f"\n保存{self.model_type}模型...")
+    def save(self) -> str:
+        """发布模型到注册表，返回版本号"""
+        print(f"\n发布{self.model_type}模型到注册表...")
 
-        # 保存模型
-        joblib.dump(self.model, self.model_path)
-        print(f"模型已保存到: {self.model_path}")
+        from app.models import PredictionType
 
-        # 保存标准化器
-        joblib.dump(self.scaler, self.scaler_path)
-        print(f"标准化器已保存到: {self.scaler_path}")
+        model_version = get_registry().publish(
+            PredictionType(self.model_type), self.model, self.scaler, self.metadata
+        )
+        self.metadata["model_version"] = model_version.version
+        print(f"模型已发布: {model_version.path}")
 
-        # 保存元数据
-        with open(self.metadata_path, "w") as f:
-            json.dump(self.metadata, f, indent=2, default=str)
-        print(f"元数据已保存到: {self.metadata_path}")
+        return model_version.version
 
     def visualize(self, X_test, y_test, save_path=None):
         """可视化预测结果"""
@@ -894,87 +1000,344 @@ def generate_synthetic_data(model_type: str, n_samples: int = 8760) -> pd.DataFr
     return df
 
 
-def train_all_models():
-    """训练所有模型的主函数"""
-    print("=" * 80)
-    print("开始训练所有预测模型")
-    print("=" * 80)
+def get_registry():
+    """获取模型注册表（与 ModelManager 读取的目录一致）"""
+    from app.config.settings import config
+    from app.core.prediction.model_registry import ModelRegistry
 
-    model_types = ["qps", "cpu", "memory", "disk"]
-    results_summary = {}
+    return ModelRegistry(config.prediction.model_registry_path)
 
-    for model_type in model_types:
-        print(f"\n{'=' * 40}")
-        print(f"训练 {model_type.upper()} 模型")
-        print(f"{'=' * 40}")
 
-        # 生成或加载数据
-        data_file = f"data/training_data/{model_type}_data.csv"
+def load_or_extract_features(
+    trainer: ModelTrainer, df: pd.DataFrame, use_cache: bool = True
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """提取特征，结果按数据内容和特征配置缓存到磁盘"""
+    if not use_cache:
+        return trainer.extract_features(df)
 
-        if os.path.exists(data_file):
-            print(f"从文件加载数据: {data_file}")
-            df = pd.read_csv(data_file)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-        else:
-            print("生成合成数据...")
-            df = generate_synthetic_data(model_type)
-            # 保存数据
-            os.makedirs("data/training_data", exist_ok=True)
-            df.to_csv(data_file, index=False)
-            print(f"数据已保存到: {data_file}")
-
-        # 创建训练器
-        trainer = ModelTrainer(model_type)
-
-        # 提取特征
-        features, target = trainer.extract_features(df)
-
-        # 划分数据集
-        X_train, X_test, y_train, y_test = train_test_split(
-            features, target, test_size=0.2, random_state=42, shuffle=False
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            {
+                "version": FEATURE_CACHE_VERSION,
+                "model_type": trainer.model_type,
+                "config": trainer.feature_configs[trainer.model_type],
+                "columns": list(df.columns),
+            },
+            sort_keys=True,
+        ).encode("utf-8")
+    )
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    prefix = f"{trainer.model_type}-"
+    cache_path = os.path.join(
+        FEATURE_CACHE_DIR, f"{prefix}{digest.hexdigest()[:16]}.pkl"
+    )
+
+    if os.path.exists(cache_path):
+        try:
+            features, target = joblib.load(cache_path)
+            print(f"使用特征缓存: {cache_path}")
+            return features, target
+        except Exception as e:
+            print(f"特征缓存读取失败，重新提取: {str(e)}")
+
+    features, target = trainer.extract_features(df)
+
+    # 先写临时文件再替换，避免并发训练读到写了一半的缓存；同时清理该类型的旧缓存
+    os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+    for name in os.listdir(FEATURE_CACHE_DIR):
+        if name.startswith(prefix) and name.endswith(".pkl"):
+            os.remove(os.path.join(FEATURE_CACHE_DIR, name))
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    joblib.dump((features, target), tmp_path)
+    os.replace(tmp_path, cache_path)
+
+    return features, target
+
+
+def fetch_recent_history(model_type: str, hours: int) -> Optional[pd.DataFrame]:
+    """从Prometheus拉取近期真实数据，整理成与训练数据相同的列"""
+    from app.config.settings import config as app_config
+    from app.models import PredictionType
+    from app.services.prediction_service import PredictionService
+    from app.services.prometheus import PrometheusService
+
+    query = PredictionService()._get_default_query(PredictionType(model_type))
+    if not query:
+        return None
+
+    # QPS模型的目标是实例数，必须来自真实的副本数序列，不能由QPS反推
+    instance_query = None
+    if model_type == "qps":
+        instance_query = app_config.prediction.instance_count_query
+        if not instance_query:
+            print(
+                "未配置 prediction.instance_count_query，"
+                "缺少真实实例数作为训练目标，跳过QPS增量训练"
+            )
+            return None
+
+    end_time = datetime.now()
+    start_time = end_time - timedelta(hours=hours)
+    prometheus = PrometheusService()
+
+    def hourly(promql: str) -> Optional[pd.Series]:
+        raw = asyncio.run(
+            prometheus.query_range(promql, start_time, end_time, step="1h")
+        )
+        if raw is None or raw.empty:
+            return None
+        return raw["value"].resample("1h").mean().dropna()
+
+    series = hourly(query)
+    if series is None:
+        return None
+
+    trainer = ModelTrainer(model_type)
+    config = trainer.feature_configs[model_type]
+    main_metric = config["main_metric"]
+
+    df = pd.DataFrame({"timestamp": series.index, main_metric: series.values})
+    if instance_query:
+        instances = hourly(instance_query)
+        if instances is None:
+            print("实例数查询没有返回数据，跳过QPS增量训练")
+            return None
+        df = df.set_index("timestamp").join(
+            instances.rename(config["target"]), how="inner"
         )
+        df = df.dropna().rename_axis("timestamp").reset_index()
+        df[config["target"]] = np.round(df[config["target"]]).astype(int)
+    else:
+        # 目标为下一小时的值，最后一行没有目标
+        df[config["target"]] = df[main_metric].shift(-1)
+        df = df.iloc[:-1]
+
+    print(f"从Prometheus获取{model_type}近期数据 {len(df)} 条")
+    return df
+
+
+def plan_cpu_budget(n_tasks: int, cpus: Optional[int] = None) -> Tuple[int, int]:
+    """
+    在全局CPU预算内分配并行度
+    :return: (并行训练的进程数, 每个进程内 sklearn 可用的 n_jobs)
+    """
+    budget = max(1, cpus or os.cpu_count() or 1)
+    workers = max(1, min(n_tasks, budget))
+    return workers, max(1, budget // workers)
+
 
-        print(f"训练集大小: {X_train.shape}")
-        print(f"测试集大小: {X_test.shape}")
+def _full_train(trainer: ModelTrainer, use_cache: bool) -> Dict[str, Any]:
+    """使用训练数据文件（不存在时生成合成数据）完整训练"""
+    model_type = trainer.model_type
+
+    # 生成或加载数据
+    data_file = f"data/training_data/{model_type}_data.csv"
+
+    if os.path.exists(data_file):
+        print(f"从文件加载数据: {data_file}")
+        df = pd.read_csv(data_file)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+    else:
+        print("生成合成数据...")
+        df = generate_synthetic_data(model_type)
+        # 保存数据
+        os.makedirs("data/training_data", exist_ok=True)
+        df.to_csv(data_file, index=False)
+        print(f"数据已保存到: {data_file}")
+
+    # 提取特征
+    features, target = load_or_extract_features(trainer, df, use_cache)
+
+    # 划分数据集
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, target, test_size=0.2, random_state=42, shuffle=False
+    )
+
+    print(f"训练集大小: {X_train.shape}")
+    print(f"测试集大小: {X_test.shape}")
+
+    # 训练模型
+    trainer.train(X_train, y_train, X_test, y_test)
+
+    # 发布模型
+    version = trainer.save()
+
+    # 可视化
+    viz_path = f"data/visualizations/{model_type}_results.png"
+    trainer.visualize(X_test, y_test, save_path=viz_path)
+
+    return {
+        "mode": "full",
+        "version": version,
+        "performance": trainer.metadata["performance"],
+    }
+
+
+def _incremental_train(
+    trainer: ModelTrainer, history_hours: int, use_cache: bool
+) -> Optional[Dict[str, Any]]:
+    """在当前发布版本上用近期真实数据增量训练，条件不满足时返回None"""
+    from app.models import PredictionType
+
+    model_type = trainer.model_type
+    registry = get_registry()
+    model_version = registry.resolve(PredictionType(model_type))
+    if model_version is None:
+        print(f"注册表中没有{model_type}模型，无法增量训练")
+        return None
+
+    try:
+        history = fetch_recent_history(model_type, history_hours)
+    except Exception as e:
+        print(f"获取{model_type}近期数据失败: {str(e)}")
+        history = None
+    if history is None:
+        return None
+
+    # 增量训练会修改模型，不使用内存映射
+    artifacts = registry.load_artifacts(model_version, mmap=False)
+    features, target = load_or_extract_features(trainer, history, use_cache)
+
+    try:
+        accepted = trainer.refit_incremental(
+            features,
+            target,
+            artifacts["model"],
+            artifacts["scaler"],
+            artifacts["metadata"],
+        )
+    except ValueError as e:
+        print(f"{model_type}增量训练跳过: {str(e)}")
+        return None
+
+    if not accepted:
+        print(f"{model_type}新模型效果不及当前版本，保留 {model_version.version}")
+        return {
+            "mode": trainer.metadata["training_mode"],
+            "version": model_version.version,
+            "published": False,
+            "performance": trainer.metadata["performance"],
+        }
+
+    version = trainer.save()
+    return {
+        "mode": trainer.metadata["training_mode"],
+        "version": version,
+        "published": True,
+        "performance": trainer.metadata["performance"],
+    }
 
-        # 训练模型
-        results = trainer.train(X_train, y_train, X_test, y_test)
 
-        # 保存模型
-        trainer.save()
+def train_model_type(
+    model_type: str,
+    n_jobs: int = -1,
+    incremental: bool = False,
+    history_hours: int = DEFAULT_HISTORY_HOURS,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """训练单个类型的模型（可在子进程中执行）"""
+    print(f"\n{'=' * 40}")
+    print(f"训练 {model_type.upper()} 模型")
+    print(f"{'=' * 40}")
+
+    trainer = ModelTrainer(model_type, n_jobs=n_jobs)
+
+    if incremental:
+        result = _incremental_train(trainer, history_hours, use_cache)
+        if result is not None:
+            return result
+        print(f"{model_type}增量训练不可用，执行完整训练")
+
+    return _full_train(trainer, use_cache)
+
+
+def train_all_models(
+    model_types: Optional[List[str]] = None,
+    cpus: Optional[int] = None,
+    incremental: bool = False,
+    history_hours: int = DEFAULT_HISTORY_HOURS,
+    use_cache: bool = True,
+) -> bool:
+    """训练所有模型的主函数，各类型在进程池中并行训练"""
+    print("=" * 80)
+    print("开始训练所有预测模型")
+    print("=" * 80)
 
-        # 可视化
-        viz_path = f"data/visualizations/{model_type}_results.png"
-        trainer.visualize(X_test, y_test, save_path=viz_path)
+    model_types = model_types or MODEL_TYPES
+    workers, n_jobs = plan_cpu_budget(len(model_types), cpus)
+    print(f"并行训练进程数: {workers}，每个进程CPU数: {n_jobs}")
 
-        # 记录结果
-        results_summary[model_type] = trainer.metadata["performance"]
+    options = {
+        "n_jobs": n_jobs,
+        "incremental": incremental,
+        "history_hours": history_hours,
+        "use_cache": use_cache,
+    }
+    results_summary = {}
+    failures = {}
+
+    if workers == 1:
+        for model_type in model_types:
+            try:
+                results_summary[model_type] = train_model_type(model_type, **options)
+            except Exception as e:
+                failures[model_type] = str(e)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(train_model_type, model_type, **options): model_type
+                for model_type in model_types
+            }
+            for future in as_completed(futures):
+                model_type = futures[future]
+                try:
+                    results_summary[model_type] = future.result()
+                except Exception as e:
+                    failures[model_type] = str(e)
 
     # 打印总结
     print("\n" + "=" * 80)
     print("训练完成 - 结果总结")
     print("=" * 80)
 
-    for model_type, performance in results_summary.items():
-        print(f"\n{model_type.upper()} 模型:")
+    for model_type in model_types:
+        if model_type in failures:
+            print(f"\n{model_type.upper()} 模型训练失败: {failures[model_type]}")
+            continue
+
+        result = results_summary[model_type]
+        performance = result["performance"]
+        print(f"\n{model_type.upper()} 模型 ({result['mode']}, 版本 {result['version']}):")
         print(f"  测试集 R²: {performance['test_r2']:.4f}")
         print(f"  测试集 RMSE: {performance['test_rmse']:.4f}")
         print(f"  测试集 MAE: {performance['test_mae']:.4f}")
-        print(
-            f"  交叉验证 R²: {performance['cv_mean']:.4f} (+/- {performance['cv_std']:.4f})"
-        )
+        if "cv_mean" in performance:
+            print(
+                f"  交叉验证 R²: {performance['cv_mean']:.4f} (+/- {performance['cv_std']:.4f})"
+            )
 
     # 保存总结
     summary_file = "data/models/training_summary.json"
     with open(summary_file, "w") as f:
         json.dump(
-            {"training_date": datetime.now().isoformat(), "models": results_summary},
+            {
+                "training_date": datetime.now().isoformat(),
+                "models": results_summary,
+                "failures": failures,
+            },
             f,
             indent=2,
+            default=str,
         )
 
     print(f"\n训练总结已保存到: {summary_file}")
+    if failures:
+        print(f"\n以下模型训练失败: {', '.join(failures)}")
+        return False
+
     print("\n所有模型训练完成！")
+    return True
 
 
 def test_models():
@@ -983,27 +1346,30 @@ def test_models():
     print("测试已训练的模型")
     print("=" * 80)
 
-    model_types = ["qps", "cpu", "memory", "disk"]
+    from app.models import PredictionType
 
-    for model_type in model_types:
+    registry = get_registry()
+
+    for model_type in MODEL_TYPES:
         print(f"\n测试 {model_type.upper()} 模型:")
         print("-" * 40)
 
         # 加载模型
-        model_path = f"data/models/{model_type}_prediction_model.pkl"
-        scaler_path = f"data/models/{model_type}_prediction_scaler.pkl"
-        metadata_path = f"data/models/{model_type}_prediction_model_metadata.json"
-
-        if not os.path.exists(model_path):
-            print(f"模型文件不存在: {model_path}")
+        model_version = registry.resolve(PredictionType(model_type))
+        if model_version is None:
+            print(f"注册表中没有{model_type}模型")
             continue
 
         try:
-            model = joblib.load(model_path)
-            scaler = joblib.load(scaler_path)
+            if not registry.verify(model_version):
+                print(f"模型版本校验失败: {model_version.version}")
+                continue
 
-            with open(metadata_path, "r") as f:
-                metadata = json.load(f)
+            artifacts = registry.load_artifacts(model_version)
+            model = artifacts["model"]
+            scaler = artifacts["scaler"]
+            metadata = artifacts["metadata"]
+            print(f"  版本: {model_version.version}")
 
             # 创建测试数据
             test_cases = generate_test_cases(model_type)
@@ -1109,15 +1475,52 @@ def build_features_dict(model_type: str, case: Dict) -> Dict:
 
 
 if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) > 1 and sys.argv[1] == "test":
+    parser = argparse.ArgumentParser(description="AI-CloudOps 预测模型训练")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["train", "test"],
+        default="train",
+        help="train: 训练并测试（默认）；test: 只测试已有模型",
+    )
+    parser.add_argument(
+        "--types", nargs="+", choices=MODEL_TYPES, help="只训练指定类型的模型"
+    )
+    parser.add_argument(
+        "--cpus", type=int, default=None, help="训练可使用的CPU总数，默认使用全部"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="基于当前发布版本和Prometheus近期数据增量训练",
+    )
+    parser.add_argument(
+        "--history-hours",
+        type=int,
+        default=DEFAULT_HISTORY_HOURS,
+        help="增量训练拉取的近期数据时长（小时）",
+    )
+    parser.add_argument(
+        "--no-feature-cache", action="store_true", help="不使用磁盘特征缓存"
+    )
+    args = parser.parse_args()
+
+    if args.command == "test":
         # 只测试已有模型
         test_models()
     else:
         # 训练所有模型
-        train_all_models()
+        succeeded = train_all_models(
+            model_types=args.types,
+            cpus=args.cpus,
+            incremental=args.incremental,
+            history_hours=args.history_hours,
+            use_cache=not args.no_feature_cache,
+        )
 
         # 测试模型
         print("\n" + "=" * 80)
         test_models()
+
+        if not succeeded:
+            sys.exit(1)
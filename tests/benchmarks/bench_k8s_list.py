@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: Kubernetes列表解析基准 - 对比模型对象to_dict与原始JSON投影的吞吐量和峰值RSS
+
+用法: python tests/benchmarks/bench_k8s_list.py [--sizes 500 5000 20000]
+每种解析路径在独立子进程中运行，峰值RSS互不影响。
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from kubernetes import client  # noqa: E402
+
+from app.services.k8s_projection import project_items  # noqa: E402
+
+PATHS = ["to_dict", "projection"]
+
+
+def _pod(i: int) -> client.V1Pod:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    container = client.V1Container(
+        name="app",
+        image="registry.local/app:1.0",
+        env=[client.V1EnvVar(name=f"ENV_{k}", value="x" * 32) for k in range(10)],
+        resources=client.V1ResourceRequirements(
+            requests={"cpu": "100m", "memory": "128Mi"},
+            limits={"cpu": "500m", "memory": "512Mi"},
+        ),
+        volume_mounts=[
+            client.V1VolumeMount(name=f"vol-{k}", mount_path=f"/data/{k}")
+            for k in range(4)
+        ],
+    )
+    return client.V1Pod(
+        api_version="v1",
+        kind="Pod",
+        metadata=client.V1ObjectMeta(
+            name=f"app-{i}",
+            namespace="default",
+            uid=f"uid-{i}",
+            resource_version=str(i),
+            labels={"app": "app", "pod-template-hash": "abc123"},
+            annotations={
+                "kubectl.kubernetes.io/last-applied-configuration": "{}" * 200
+            },
+            creation_timestamp=now,
+            managed_fields=[
+                client.V1ManagedFieldsEntry(
+                    manager="kube-controller-manager",
+                    operation="Update",
+                    time=now,
+                    fields_v1={
+                        "f:metadata": {"f:labels": {f"f:{k}": {} for k in range(20)}}
+                    },
+                )
+                for _ in range(3)
+            ],
+        ),
+        spec=client.V1PodSpec(
+            containers=[container, container],
+            node_name="node-1",
+            volumes=[client.V1Volume(name=f"vol-{k}") for k in range(4)],
+        ),
+        status=client.V1PodStatus(
+            phase="Running",
+            start_time=now,
+            conditions=[
+                client.V1PodCondition(type=t, status="True", last_transition_time=now)
+                for t in ["Initialized", "Ready", "ContainersReady", "PodScheduled"]
+            ],
+            container_statuses=[
+                client.V1ContainerStatus(
+                    name="app",
+                    image="registry.local/app:1.0",
+                    image_id="sha256:" + "0" * 64,
+                    ready=True,
+                    restart_count=i % 5,
+                    state=client.V1ContainerState(
+                        running=client.V1ContainerStateRunning(started_at=now)
+                    ),
+                )
+            ],
+        ),
+    )
+
+
+def _payload(size: int) -> bytes:
+    body = {
+        "apiVersion": "v1",
+        "kind": "PodList",
+        "items": [
+            client.ApiClient().sanitize_for_serialization(_pod(i))
+            for i in range(size)
+        ],
+    }
+    return json.dumps(body).encode()
+
+
+class _Response:
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _legacy(data: bytes):
+    # 与 KubernetesService 原实现一致：反序列化为模型对象后逐个 to_dict
+    pods = client.ApiClient().deserialize(_Response(data), "V1PodList")
+    results = []
+    for pod in pods.items:
+        d = pod.to_dict()
+        for key in ["managed_fields", "resource_version", "uid"]:
+            d["metadata"].pop(key, None)
+        results.append(d)
+    return results
+
+
+def _max_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为KB，macOS 为字节
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _child(path: str, size: int) -> None:
+    data = _payload(size)
+    baseline = _max_rss_mb()
+    start = time.perf_counter()
+    if path == "to_dict":
+        items = _legacy(data)
+    else:
+        items = project_items(data, "V1Pod")
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "objects_per_sec": len(items) / elapsed,
+                "peak_rss_mb": _max_rss_mb(),
+                "rss_growth_mb": _max_rss_mb() - baseline,
+            }
+        )
+    )
+
+
+def run(sizes) -> None:
+    header = (
+        f"{'size':>8} {'path':<12} {'objects/s':>14}"
+        f" {'peak RSS':>12} {'RSS growth':>12}"
+    )
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        for path in PATHS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", path, "--sizes", str(size)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{size:>8} {path:<12} {result['objects_per_sec']:>12,.0f}/s"
+                f" {result['peak_rss_mb']:>9.1f} MB {result['rss_growth_mb']:>9.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kubernetes列表解析基准")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[500, 5000, 20000])
+    parser.add_argument("--child", choices=PATHS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.sizes[0])
+    else:
+        run(args.sizes)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: RCA滞后互相关基准 - 不同信号数量下批量FFT互相关的耗时
+
+用法: python tests/benchmarks/bench_rca_correlation.py [--signals 50 200 500]
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import numpy as np  # noqa: E402
+
+from app.core.rca.correlation import CrossCorrelationAnalyzer  # noqa: E402
+from app.models.rca_models import MetricData  # noqa: E402
+
+
+def _metrics(count: int, start: datetime, minutes: int):
+    rng = np.random.default_rng(0)
+    timestamps = int(start.timestamp()) + 60 * np.arange(minutes + 1)
+    walk = rng.normal(size=(count, minutes + 1)).cumsum(axis=1)
+    return [
+        MetricData(f"metric_{i}", {}, timestamps, walk[i], anomaly_score=0.5)
+        for i in range(count)
+    ]
+
+
+def run(signals, points: int) -> None:
+    end = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    start = end - timedelta(hours=1)
+    analyzer = CrossCorrelationAnalyzer(max_points=points, max_signals=max(signals))
+    print(f"{'signals':>8} {'pairs':>10} {'seconds':>10}")
+    for count in signals:
+        metrics = _metrics(count, start, 60)
+        began = time.perf_counter()
+        analyzer.analyze(metrics, [], [], start, end)
+        elapsed = time.perf_counter() - began
+        print(f"{count:>8} {count * count:>10,} {elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RCA滞后互相关基准")
+    parser.add_argument("--signals", nargs="+", type=int, default=[50, 200, 500])
+    parser.add_argument("--points", type=int, default=120)
+    args = parser.parse_args()
+    run(args.signals, args.points)
@@ -33,3 +33,38 @@ async def test_predict_qps_400_on_extra_field():
         assert resp.status_code == 400
         body = resp.json()
         assert body.get("code") == 400
+
+
+@pytest.mark.asyncio
+async def test_live_anomalies_route(monkeypatch):
+    from app.api.routes import predict
+
+    class _Service:
+        async def initialize(self):
+            return True
+
+        async def detect_live_anomalies(self, **kwargs):
+            self.kwargs = kwargs
+            return []
+
+    service = _Service()
+
+    async def get_service():
+        return service
+
+    monkeypatch.setattr(predict, "get_prediction_service", get_service)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        resp = await ac.post(
+            "/api/v1/predict/anomalies/live",
+            json={"query": "rate(http_requests_total[5m])", "minutes": 30},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["data"]["anomaly_count"] == 0
+        assert service.kwargs["minutes"] == 30 and service.kwargs["method"] == "ewma"
+
+        resp = await ac.post(
+            "/api/v1/predict/anomalies/live", json={"query": "up", "method": "x"}
+        )
+        assert resp.status_code in (400, 422)
@@ -118,6 +118,9 @@ class TestPredictionService:
         mock_predictor.predict.assert_called_once()
         prediction_service._anomaly_detector.detect_anomalies.assert_called_once()
         prediction_service._scaling_advisor.generate_recommendations.assert_called_once()
+        # 按指标传入键，isolation 方法可复用已训练的模型
+        call = prediction_service._anomaly_detector.detect_anomalies.call_args
+        assert call.kwargs["metric_key"] == "qps:default"
 
     @pytest.mark.asyncio
     async def test_cpu_prediction_with_constraints(
@@ -455,6 +458,20 @@ class TestPredictionServiceErrorHandling:
             await prediction_service.predict_qps(current_qps=100.0)
         assert "QPS预测失败" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_reload_rejects_unknown_version(
+        self, prediction_service, mock_model_manager
+    ):
+        """测试重载未发布的模型版本被拒绝"""
+        mock_model_manager.registry = Mock()
+        mock_model_manager.registry.list_versions.return_value = ["v1"]
+        prediction_service._model_manager = mock_model_manager
+        prediction_service._initialized = True
+
+        with pytest.raises(ValidationError):
+            await prediction_service.reload_models(PredictionType.QPS, "v2")
+        mock_model_manager.reload_model.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_health_check_failure_handling(self, prediction_service):
         """测试健康检查失败处理"""
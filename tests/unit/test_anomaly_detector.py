@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 异常检测器单元测试
+"""
+
+from datetime import datetime, timedelta
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.prediction import AnomalyDetector, StreamingDetector
+from app.models import PredictionDataPoint
+
+
+def _points(values):
+    start = datetime(2025, 1, 1)
+    return [
+        PredictionDataPoint(
+            timestamp=start + timedelta(minutes=i), predicted_value=float(v)
+        )
+        for i, v in enumerate(values)
+    ]
+
+
+def test_classify_anomalies_types_and_expected_values():
+    detector = AnomalyDetector()
+    values = np.full(40, 50.0)
+    values[5] = 150.0  # 单点突变
+    values[20:25] = 200.0  # 持续异常
+    values[30:37] = [50, 60, 70, 80, 90, 100, 110]  # 单调渐变
+
+    indices = np.array([5, 22, 33])
+    expected, impact, types = detector._classify_anomalies(
+        values, indices, np.array([4.0, 4.0, 1.0])
+    )
+
+    assert expected[0] == 50.0
+    assert list(types) == ["sudden_spike", "sustained_spike", "gradual_spike"]
+    assert impact[0] == "critical"
+
+
+@pytest.mark.asyncio
+async def test_detect_anomalies_on_long_horizon():
+    rng = np.random.default_rng(0)
+    values = 50 + rng.normal(0, 2, 5000)
+    spikes = rng.choice(5000, 50, replace=False)
+    values[spikes] += 40
+
+    anomalies = await AnomalyDetector().detect_anomalies(
+        _points(values), sensitivity=0.8, method="mad"
+    )
+
+    start = datetime(2025, 1, 1)
+    flagged = {int((a.timestamp - start).total_seconds() // 60) for a in anomalies}
+    assert set(spikes.tolist()) <= flagged
+    assert all(
+        a.anomaly_type.endswith("spike") for a in anomalies if a.predicted_value > 80
+    )
+    assert all(0.0 <= a.anomaly_score <= 1.0 for a in anomalies)
+
+
+@pytest.mark.parametrize("method", ["isolation", "ewma", "robust_zscore"])
+@pytest.mark.asyncio
+async def test_new_methods_flag_spikes(method):
+    rng = np.random.default_rng(1)
+    values = 50 + rng.normal(0, 1, 600)
+    values[[200, 400]] += 30
+
+    anomalies = await AnomalyDetector().detect_anomalies(
+        _points(values), sensitivity=0.5, method=method
+    )
+
+    start = datetime(2025, 1, 1)
+    flagged = {int((a.timestamp - start).total_seconds() // 60) for a in anomalies}
+    assert {200, 400} <= flagged
+    assert len(flagged) < 30
+
+
+def test_isolation_forest_model_is_cached_per_metric():
+    detector = AnomalyDetector()
+    values = np.random.default_rng(2).normal(50, 1, 300)
+
+    detector._isolation_forest_detection(values, 0.8, "cpu")
+    cached = detector._isolation._models["cpu"][0]
+    detector._isolation_forest_detection(values * 2, 0.8, "cpu")
+
+    assert detector._isolation._models["cpu"][0] is cached
+
+
+@pytest.mark.asyncio
+async def test_isolation_forest_fits_off_the_event_loop():
+    detector = AnomalyDetector()
+    threads = []
+    fit = detector._isolation.fit
+
+    def recording_fit(*args):
+        threads.append(threading.current_thread())
+        return fit(*args)
+
+    detector._isolation.fit = recording_fit
+    values = np.random.default_rng(4).normal(50, 1, 300)
+    await detector.detect_anomalies(_points(values), method="isolation")
+
+    assert threads and threading.main_thread() not in threads
+
+
+def test_streaming_detector_is_abstract():
+    with pytest.raises(TypeError):
+        StreamingDetector()
+
+
+@pytest.mark.parametrize("method", ["ewma", "robust_zscore"])
+def test_detect_stream_keeps_state_across_calls(method):
+    detector = AnomalyDetector()
+    start = datetime(2025, 1, 1)
+    rng = np.random.default_rng(3)
+    samples = [
+        {"timestamp": start + timedelta(minutes=i), "value": 50 + rng.normal(0, 1)}
+        for i in range(100)
+    ]
+
+    detector.detect_stream("q", samples[:60], method=method)
+    # 重复送入已处理的样本不会重复计算
+    assert detector.detect_stream("q", samples[:60], method=method) == []
+    assert detector._streams[f"{method}:q"][0].count == 60
+
+    spike = {"timestamp": start + timedelta(minutes=100), "value": 90.0}
+    anomalies = detector.detect_stream("q", samples[60:] + [spike], method=method)
+
+    assert anomalies[-1].timestamp == spike["timestamp"]
+    assert anomalies[-1].anomaly_type == "spike"
+    assert abs(anomalies[-1].expected_value - 50) < 3
+    assert detector._streams[f"{method}:q"][0].count == 101
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 智能助手逐段流式输出、反压与取消单元测试
+"""
+
+import asyncio
+import json
+
+from langchain_core.documents import Document
+import pytest
+
+from app.core.agents.enterprise_assistant import RAGAssistant
+from app.services.assistant_service import WebSocketManager
+
+
+class _StreamingLLM:
+    """逐段产出固定文本，并记录已产出段数和是否被关闭"""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.produced = 0
+        self.closed = False
+
+    async def generate_response(self, messages, **kwargs):
+        return "".join(self.chunks)
+
+    async def stream_response(self, messages, **kwargs):
+        try:
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                self.produced += 1
+                yield chunk
+        finally:
+            self.closed = True
+
+
+def _assistant(llm) -> RAGAssistant:
+    assistant = RAGAssistant(vector_store=None, llm_service=llm)
+    docs = [Document(page_content="Pod 重启排查步骤", metadata={"score": 0.9})]
+
+    async def retrieve(*args, **kwargs):
+        return docs
+
+    async def rerank(query, documents, **kwargs):
+        return documents
+
+    assistant.retriever.retrieve = retrieve
+    assistant.reranker.rerank = rerank
+    return assistant
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_deltas_then_final_with_sources():
+    chunks = ["先检查", "Pod事件，", "再查看容器日志。"]
+    assistant = _assistant(_StreamingLLM(chunks))
+
+    events = [e async for e in assistant.get_answer_stream("Pod为什么重启", "s1")]
+
+    deltas = [e["content"] for e in events if e["type"] == "delta"]
+    assert deltas == chunks
+    assert events[-1]["type"] == "final"
+    final = events[-1]["data"]
+    assert final["answer"] == "".join(chunks)
+    assert final["source_documents"] and final["confidence_score"] > 0
+
+    # 非流式接口结果一致
+    plain = await assistant.get_answer("Pod为什么重启", "s2")
+    assert plain["answer"] == final["answer"]
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_backpressure_and_close_cancels_upstream():
+    llm = _StreamingLLM([f"t{i}" for i in range(200)])
+    assistant = _assistant(llm)
+    original = assistant.config.rag.stream_buffer_size
+    assistant.config.rag.stream_buffer_size = 4
+    try:
+        stream = assistant.get_answer_stream("Pod为什么重启", "s3")
+        first = await stream.__anext__()
+        assert first == {"type": "delta", "content": "t0"}
+        await asyncio.sleep(0.05)
+        # 有界队列已满，上游停在队列之外不再继续生成
+        assert llm.produced <= 4 + 2
+
+        await stream.aclose()
+        await asyncio.sleep(0)
+        assert llm.closed
+        assert llm.produced < 200
+    finally:
+        assistant.config.rag.stream_buffer_size = original
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+@pytest.mark.asyncio
+async def test_websocket_cancel_message_stops_running_handler():
+    started, cancelled = asyncio.Event(), asyncio.Event()
+    handled = []
+
+    async def handler(websocket, message):
+        handled.append(message["question"])
+        if message["question"] == "slow":
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    manager = WebSocketManager(handler)
+    queue, socket = asyncio.Queue(), _FakeSocket()
+    runner = asyncio.create_task(manager.websocket_handler(socket, queue))
+
+    await queue.put(json.dumps({"question": "slow"}))
+    await started.wait()
+    await queue.put(json.dumps({"action": "cancel"}))
+    await queue.put(json.dumps({"question": "next"}))
+    await queue.put(None)
+    await asyncio.wait_for(runner, 1)
+
+    assert cancelled.is_set()
+    assert socket.sent[0]["data"] == {"type": "cancelled"}
+    assert handled == ["slow", "next"]
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 集群级根因分析共享收集与并发分发单元测试
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+
+import numpy as np
+import pytest
+
+from app.core.rca.cluster import ClusterRCAAnalyzer
+from app.core.rca.events_collector import EventsCollector
+from app.core.rca.metrics_collector import MetricsCollector
+from app.core.rca.rca_engine import RCAAnalysisEngine
+from app.models.rca_models import EventData, MetricData, SeverityLevel
+
+
+class _Metrics(MetricsCollector):
+    """记录每次收集的命名空间和指标，并统计最大并发数"""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def initialize(self):
+        return None
+
+    async def collect(self, namespace, start_time, end_time, **kwargs):
+        self.calls.append((namespace, tuple(kwargs.get("metrics") or ())))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        timestamps = np.arange(
+            int(start_time.timestamp()), int(end_time.timestamp()), 60
+        )
+        return [
+            MetricData(name, {}, timestamps, np.zeros(len(timestamps)))
+            for name in kwargs.get("metrics") or ()
+        ]
+
+
+class _Events:
+    max_events_limit = 100
+    max_scan_events = 5000
+
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    async def initialize(self):
+        return None
+
+    async def collect(self, namespace, start_time, end_time, **kwargs):
+        self.calls.append(
+            (namespace, kwargs.get("max_events"), kwargs.get("namespaces"))
+        )
+        return self.events
+
+
+class _Logs(_Events):
+    error_lines = 10
+
+    def __init__(self):
+        super().__init__([])
+
+
+class _LLM:
+    def __init__(self):
+        self.calls = 0
+
+    def __bool__(self):
+        return True
+
+    async def generate_response(self, messages, **kwargs):
+        self.calls += 1
+        namespaces = [item["namespace"] for item in json.loads(messages[0]["content"])]
+        return json.dumps(
+            {
+                "summary": "集群整体结论",
+                "recommendations": {ns: [f"处理{ns}"] for ns in namespaces},
+            },
+            ensure_ascii=False,
+        )
+
+
+def _oom(namespace: str, count: int):
+    now = datetime.now(timezone.utc)
+    return [
+        EventData(
+            now - timedelta(minutes=i + 1),
+            "Warning",
+            "OOMKilled",
+            "container killed",
+            {"kind": "Pod", "name": f"web-{i}", "namespace": namespace},
+            SeverityLevel.CRITICAL,
+            count=3,
+        )
+        for i in range(count)
+    ]
+
+
+def _analyzer(events, max_concurrency=2):
+    metrics, llm = _Metrics(), _LLM()
+    events_collector, logs = _Events(events), _Logs()
+    engine = RCAAnalysisEngine(
+        metrics_collector=metrics,
+        events_collector=events_collector,
+        logs_collector=logs,
+        llm_client=llm,
+    )
+    analyzer = ClusterRCAAnalyzer(engine, max_concurrency=max_concurrency)
+    return analyzer, metrics, events_collector, llm
+
+
+@pytest.mark.asyncio
+async def test_shared_data_collected_once_and_fanned_out():
+    namespaces = ["a", "b", "c", "d"]
+    analyzer, metrics, events, _ = _analyzer(_oom("b", 3), max_concurrency=2)
+
+    result = await analyzer.analyze(
+        namespaces=namespaces,
+        metrics=["node_load1", "container_memory_working_set_bytes"],
+    )
+
+    # 指定命名空间时事件按命名空间分页拉取，不做全集群扫描
+    assert events.calls == [(EventsCollector.ALL_NAMESPACES, 400, namespaces)]
+    shared = [call for call in metrics.calls if call[1] == ("node_load1",)]
+    assert shared == [(EventsCollector.ALL_NAMESPACES, ("node_load1",))]
+    scoped = sorted(ns for ns, names in metrics.calls if names != ("node_load1",))
+    assert scoped == namespaces
+    assert metrics.peak <= 3  # 共享收集 + 2 个命名空间
+
+    assert result["namespaces_analyzed"] == 4
+    assert set(result["details"]) == set(namespaces)
+    assert result["shared"] == {"cluster_metrics": 1, "cluster_events": 3}
+
+
+@pytest.mark.asyncio
+async def test_ranking_and_single_llm_summary():
+    events = _oom("hot", 4) + _oom("warm", 1)
+    analyzer, _, _, llm = _analyzer(events)
+
+    result = await analyzer.analyze(metrics=["node_load1"])
+
+    # 未指定命名空间时使用事件中出现的命名空间
+    assert sorted(result["details"]) == ["hot", "warm"]
+    assert [row["namespace"] for row in result["ranking"]][0] == "hot"
+    assert [row["rank"] for row in result["ranking"]] == [1, 2]
+
+    assert llm.calls == 1
+    assert result["summary"] == "集群整体结论"
+    assert result["details"]["hot"].recommendations == ["处理hot"]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 按token预算打包上下文与稳定提示前缀单元测试
+"""
+
+from langchain_core.documents import Document
+
+from app.core.processors.context_packer import (
+    ContextPacker,
+    TokenCounter,
+    estimate_tokens,
+    split_stable_prefix,
+)
+
+
+def _header(index, doc):
+    return f"[文档{index}]"
+
+
+def _truncate(content, max_chars):
+    return content[:max_chars] + "..." if len(content) > max_chars else content
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("重启") == 2
+    assert estimate_tokens("kubectl get") == 3
+
+
+def test_count_document_is_cached_in_metadata():
+    counter = TokenCounter("heuristic")
+    doc = Document(page_content="pod 重启 排查")
+    assert counter.count_document(doc) == 5
+    assert doc.metadata["token_counts"] == {"heuristic": 5}
+
+    # 已缓存的计数直接复用
+    doc.metadata["token_counts"]["heuristic"] = 42
+    assert counter.count_document(doc) == 42
+
+
+def test_pack_respects_budget_in_priority_order():
+    counter = TokenCounter("heuristic")
+    docs = [
+        Document(page_content="a" * 400),  # 100 tokens
+        Document(page_content="b" * 800),  # 200 tokens
+        Document(page_content="c" * 40),  # 10 tokens
+    ]
+    packed = ContextPacker(counter, min_chunk_tokens=32).pack(
+        docs, 160, _header, _truncate
+    )
+
+    assert packed.used_tokens <= 160
+    assert counter.count(packed.text) <= packed.used_tokens
+    assert packed.text.startswith("[文档1]\n" + "a" * 400)
+    # 第二篇截断放入，第三篇已无足够预算
+    assert packed.included == 2 and packed.truncated == 1 and packed.dropped == 1
+    assert "b..." in packed.text and "c" not in packed.text
+    assert packed.saved_tokens == packed.candidate_tokens - packed.used_tokens > 0
+
+
+def test_pack_skips_oversized_doc_and_keeps_smaller_ones():
+    counter = TokenCounter("heuristic")
+    docs = [Document(page_content="a" * 400), Document(page_content="c" * 40)]
+    packed = ContextPacker(counter, min_chunk_tokens=64).pack(
+        docs, 60, _header, _truncate
+    )
+
+    assert packed.included == 1 and packed.dropped == 1
+    assert packed.text == "[文档1]\n" + "c" * 40
+
+
+def test_split_stable_prefix():
+    template = "你是运维助手，输出 {{json}}。\n资料:\n{context}\n问题: {question}"
+    parts = split_stable_prefix(template)
+    assert parts["prefix"] == "你是运维助手，输出 {json}。\n资料:"
+    body = parts["body"].format(context="C", question="Q")
+    assert body == "C\n问题: Q"
+
+    assert split_stable_prefix("问题: {question}\n{context}") is None
+    assert split_stable_prefix("没有占位符") is None
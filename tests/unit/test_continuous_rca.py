@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 持续根因分析滑动窗口增量更新单元测试
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.core.rca.continuous import ContinuousRCAWorker
+from app.core.rca.metrics_collector import MetricsCollector
+from app.core.rca.rca_engine import RCAAnalysisEngine
+from app.models.rca_models import EventData, MetricData, SeverityLevel
+
+
+class _Metrics(MetricsCollector):
+    """按请求窗口生成每分钟一个点的序列，并记录请求窗口"""
+
+    def __init__(self):
+        self.calls = []
+        self.empty = False
+
+    async def initialize(self):
+        return None
+
+    async def collect(self, namespace, start_time, end_time, **kwargs):
+        self.calls.append((start_time, end_time))
+        if self.empty:
+            empty = np.array([], dtype=np.int64)
+            return [MetricData("cpu", {}, empty, empty)]
+        first = int(start_time.timestamp()) // 60 * 60
+        timestamps = np.arange(first, int(end_time.timestamp()) + 1, 60)
+        return [MetricData("cpu", {}, timestamps, timestamps % 7)]
+
+
+class _Events:
+    def __init__(self):
+        self.batches = []
+
+    async def initialize(self):
+        return None
+
+    async def collect(self, namespace, start_time, end_time, **kwargs):
+        return self.batches.pop(0) if self.batches else []
+
+
+class _Logs(_Events):
+    error_lines = 10
+
+
+def _oom(timestamp, count=1) -> EventData:
+    return EventData(
+        timestamp,
+        "Warning",
+        "OOMKilled",
+        "container killed",
+        {"kind": "Pod", "name": "web-0", "namespace": "default"},
+        SeverityLevel.CRITICAL,
+        count=count,
+        name="web-0.17f3a1",
+    )
+
+
+def _worker():
+    metrics, events, logs = _Metrics(), _Events(), _Logs()
+    engine = RCAAnalysisEngine(
+        metrics_collector=metrics, events_collector=events, logs_collector=logs
+    )
+    worker = ContinuousRCAWorker(engine, "default", window=timedelta(minutes=30))
+    return worker, metrics, events
+
+
+@pytest.mark.asyncio
+async def test_second_tick_only_fetches_delta_and_merges_window():
+    worker, metrics, _ = _worker()
+
+    await worker.tick()
+    await worker.tick()
+
+    (full_start, full_end), (delta_start, _) = metrics.calls
+    assert full_end - full_start == timedelta(minutes=30)
+    assert delta_start == full_end - worker.overlap
+    (cpu,) = worker._metrics.values()
+    assert np.all(np.diff(cpu.timestamps) == 60)
+    assert cpu.size in (30, 31, 32)
+    assert worker.stats == {
+        "ticks": 2,
+        "full_collections": 1,
+        "errors": 0,
+        "changes": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_empty_delta_keeps_accumulated_series():
+    worker, metrics, _ = _worker()
+
+    await worker.tick()
+    (cpu,) = worker._metrics.values()
+    size = cpu.size
+    metrics.empty = True
+    await worker.tick()
+
+    assert worker._metrics["cpu"].size == size
+    assert worker.latest is not None
+
+
+@pytest.mark.asyncio
+async def test_listener_fires_only_when_root_causes_change():
+    worker, _, events = _worker()
+    changes = []
+
+    async def listener(namespace, previous, current):
+        changes.append([cause.cause_type for cause in current.root_causes])
+
+    worker.add_listener(listener)
+    await worker.tick()
+    events.batches.append([_oom(worker.updated_at - timedelta(minutes=1))])
+    await worker.tick()
+    # 事件仍在窗口内，不重复通知
+    await worker.tick()
+
+    assert changes == [["OOM"]]
+    assert worker.latest.root_causes[0].cause_type == "OOM"
+    assert worker.status()["buffered"]["events"] == 1
+
+
+@pytest.mark.asyncio
+async def test_recurring_event_replaces_buffered_copy():
+    worker, _, events = _worker()
+    await worker.tick()
+    first = worker.updated_at - timedelta(minutes=5)
+    events.batches.append([_oom(first)])
+    await worker.tick()
+    # 同一个Event再次发生：时间更新、次数增加
+    events.batches.append([_oom(worker.updated_at, count=2)])
+    await worker.tick()
+
+    (event,) = worker._events.values()
+    assert event.count == 2 and event.timestamp > first
+
+
+@pytest.mark.asyncio
+async def test_service_alerts_when_root_causes_change(monkeypatch):
+    from app.services import notification
+    from app.services.rca_service import RCAService
+
+    alerts = []
+
+    class _Notifier:
+        enabled = True
+
+        async def send_rca_alert(self, root_causes, time_range, metrics_count):
+            alerts.append([cause["metric"] for cause in root_causes])
+            return True
+
+    monkeypatch.setattr(notification, "NotificationService", _Notifier)
+    worker, _, events = _worker()
+    service = RCAService()
+    service._engine = worker.engine
+    service._initialized = True
+
+    service.start_continuous("default", interval_seconds=3600)
+    worker = service._continuous["default"]
+    await worker.stop()
+    await worker.tick()
+    events.batches.append([_oom(worker.updated_at - timedelta(minutes=1))])
+    await worker.tick()
+
+    assert alerts == [["default/OOM"]]
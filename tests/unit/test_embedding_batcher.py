@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 查询嵌入微批处理单元测试
+"""
+
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+import pytest
+
+from app.core.vector.embedding_batcher import EmbeddingBatcher
+
+
+class _CountingEmbeddings(Embeddings):
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def embed_query(self, text):
+        raise AssertionError("应通过批量接口生成嵌入")
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_provider_call():
+    model = _CountingEmbeddings()
+    batcher = EmbeddingBatcher(model, max_batch_size=4, max_wait_ms=20)
+
+    texts = ["a", "bb", "a", "ccc", "dddd", "e"]
+    vectors = await asyncio.gather(*[batcher.embed(t) for t in texts])
+
+    assert [v[0] for v in vectors] == [1.0, 2.0, 1.0, 3.0, 4.0, 1.0]
+    # 写满4条立即发出一批，剩余请求在等待窗口结束后合并发出
+    assert model.batches == [["a", "bb", "ccc"], ["dddd", "e"]]
+
+    stats = batcher.get_stats()
+    assert stats["requests"] == 6 and stats["batches"] == 2
+    assert stats["deduplicated"] == 1 and stats["avg_batch_size"] == 2.5
+    assert stats["queue_wait_seconds"]["max"] >= 0.01
+    assert stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller_and_zero_wait_disables_merging():
+    batcher = EmbeddingBatcher(_CountingEmbeddings(fail=True), max_wait_ms=1)
+    results = await asyncio.gather(
+        batcher.embed("x"), batcher.embed("y"), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.get_stats()["failed_batches"] == 1
+
+    model = _CountingEmbeddings()
+    direct = EmbeddingBatcher(model, max_wait_ms=0)
+    await asyncio.gather(direct.embed("x"), direct.embed("y"))
+    assert model.batches == [["x"], ["y"]]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 事件收集器分页与过滤单元测试
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.rca.events_collector import EventsCollector
+from app.models.rca_models import SeverityLevel
+
+_NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _event(ns: str, name: str, minutes_ago: int, type_: str = "Warning"):
+    return {
+        "metadata": {"name": f"{name}.{minutes_ago}", "namespace": ns},
+        "involved_object": {"kind": "Pod", "name": name, "namespace": ns},
+        "type": type_,
+        "reason": "BackOff",
+        "message": "Back-off restarting failed container",
+        "count": 2,
+        "last_timestamp": _NOW - timedelta(minutes=minutes_ago),
+    }
+
+
+class _PagedK8s:
+    """按 continue 令牌分页返回事件，并记录每次请求"""
+
+    def __init__(self, events, page_size=None):
+        self.events = events
+        self.page_size = page_size
+        self.calls = []
+
+    async def health_check(self):
+        return True
+
+    async def list_events_page(
+        self, namespace=None, field_selector=None, limit=500, continue_token=None
+    ):
+        self.calls.append((namespace, field_selector, continue_token))
+        items = [
+            e
+            for e in self.events
+            if namespace is None or e["metadata"]["namespace"] == namespace
+        ]
+        for selector in filter(None, (field_selector or "").split(",")):
+            key, value = selector.split("=")
+            if key == "type":
+                items = [e for e in items if e["type"] == value]
+            elif key == "involvedObject.name":
+                items = [e for e in items if e["involved_object"]["name"] == value]
+
+        size = self.page_size or limit
+        offset = int(continue_token or 0)
+        page = items[offset : offset + size]
+        next_token = str(offset + size) if offset + size < len(items) else None
+        return page, next_token
+
+
+async def _collector(k8s, **overrides) -> EventsCollector:
+    collector = EventsCollector(k8s_client=k8s)
+    for key, value in overrides.items():
+        setattr(collector, key, value)
+    await collector.initialize()
+    return collector
+
+
+@pytest.mark.asyncio
+async def test_collect_pages_and_filters_time_window():
+    events = [_event("default", f"web-{i}", minutes_ago=i) for i in range(0, 120)]
+    k8s = _PagedK8s(events, page_size=25)
+    collector = await _collector(k8s)
+
+    result = await collector.collect(
+        "default", _NOW - timedelta(minutes=30), _NOW, event_types=["Warning"]
+    )
+
+    assert len(result) == 31
+    assert all(e.involved_object["name"].startswith("web-") for e in result)
+    assert result[0].severity == SeverityLevel.HIGH
+    # 5个分页全部读取，类型过滤下推为字段选择器
+    assert len(k8s.calls) == 5
+    assert {call[1] for call in k8s.calls} == {"type=Warning"}
+
+
+@pytest.mark.asyncio
+async def test_collect_keeps_newest_events_across_all_pages():
+    # 分页按键而非时间排序：越靠后的分页事件越新
+    events = [_event("default", f"web-{i}", minutes_ago=1000 - i) for i in range(1000)]
+    k8s = _PagedK8s(events, page_size=100)
+    collector = await _collector(k8s, max_events_limit=150)
+
+    result = await collector.collect("default", _NOW - timedelta(days=1), _NOW)
+
+    assert len(result) == 150
+    assert len(k8s.calls) == 10
+    names = {e.involved_object["name"] for e in result}
+    assert names == {f"web-{i}" for i in range(850, 1000)}
+
+    # 扫描量达到上限时停止
+    k8s.calls.clear()
+    collector.max_scan_events = 300
+    result = await collector.collect("default", _NOW - timedelta(days=1), _NOW)
+    assert len(k8s.calls) == 3
+    assert {e.involved_object["name"] for e in result} == {
+        f"web-{i}" for i in range(150, 300)
+    }
+
+
+@pytest.mark.asyncio
+async def test_collect_pushes_object_names_and_spans_namespaces():
+    events = [
+        _event("default", "web", 1),
+        _event("default", "db", 2, type_="Normal"),
+        _event("prod", "web", 3),
+        _event("prod", "cache", 4),
+    ]
+    k8s = _PagedK8s(events)
+    collector = await _collector(k8s)
+
+    result = await collector.collect(
+        "default",
+        _NOW - timedelta(hours=1),
+        _NOW,
+        namespaces=["default", "prod"],
+        object_names=["web", "db"],
+    )
+
+    assert sorted(
+        (e.involved_object["namespace"], e.involved_object["name"]) for e in result
+    ) == [("default", "db"), ("default", "web"), ("prod", "web")]
+    assert {call[1] for call in k8s.calls} == {
+        "involvedObject.name=db",
+        "involvedObject.name=web",
+    }
+
+    cluster = await collector.collect(
+        EventsCollector.ALL_NAMESPACES, _NOW - timedelta(hours=1), _NOW
+    )
+    assert len(cluster) == 4
+    assert k8s.calls[-1][0] is None
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: Kubernetes原始JSON列表投影单元测试
+"""
+
+from datetime import datetime, timezone
+import json
+
+from kubernetes import client
+import pytest
+
+from app.core.inspection.rules.base import RuleContext
+from app.core.inspection.rules.health_rules import PodRestartsRule
+from app.core.inspection.rules.security_rules import PrivilegedContainerRule
+from app.services.k8s_projection import project_items, project_list
+from app.services.kubernetes import KubernetesService
+
+_CREATED = datetime(2025, 1, 1, 8, 30, tzinfo=timezone.utc)
+
+
+def _pod(name: str, restarts: int, privileged: bool) -> client.V1Pod:
+    return client.V1Pod(
+        api_version="v1",
+        kind="Pod",
+        metadata=client.V1ObjectMeta(
+            name=name,
+            namespace="default",
+            labels={"app.kubernetes.io/name": "web"},
+            annotations={"kubectl.kubernetes.io/last-applied-configuration": "{}"},
+            creation_timestamp=_CREATED,
+            uid="uid-1",
+            resource_version="42",
+            managed_fields=[
+                client.V1ManagedFieldsEntry(manager="kubectl", operation="Update")
+            ],
+        ),
+        spec=client.V1PodSpec(
+            containers=[
+                client.V1Container(
+                    name="web",
+                    image="nginx:1.25",
+                    security_context=client.V1SecurityContext(privileged=privileged),
+                )
+            ],
+            node_name="node-1",
+        ),
+        status=client.V1PodStatus(
+            phase="Running",
+            conditions=[client.V1PodCondition(type="Ready", status="True")],
+            container_statuses=[
+                client.V1ContainerStatus(
+                    name="web",
+                    image="nginx:1.25",
+                    image_id="sha",
+                    ready=True,
+                    restart_count=restarts,
+                    state=client.V1ContainerState(
+                        running=client.V1ContainerStateRunning(started_at=_CREATED)
+                    ),
+                )
+            ],
+        ),
+    )
+
+
+def _payload(items) -> bytes:
+    body = {"apiVersion": "v1", "kind": "List", "items": items}
+    return json.dumps(client.ApiClient().sanitize_for_serialization(body)).encode()
+
+
+class _RawResponse:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.released = False
+
+    def release_conn(self):
+        self.released = True
+
+
+def test_projection_matches_to_dict_on_kept_fields():
+    pod = _pod("web-0", restarts=4, privileged=True)
+    expected = pod.to_dict()
+
+    (projected,) = project_items(_payload([pod]), "V1Pod")
+
+    meta = projected["metadata"]
+    assert meta["name"] == expected["metadata"]["name"]
+    assert meta["labels"] == expected["metadata"]["labels"]
+    assert meta["creation_timestamp"] == expected["metadata"]["creation_timestamp"]
+    for key in ["managed_fields", "resource_version", "uid", "annotations"]:
+        assert key not in meta
+
+    container = projected["spec"]["containers"][0]
+    assert container["security_context"]["privileged"] is True
+    assert container["image"] == "nginx:1.25"
+
+    status = projected["status"]
+    assert status["phase"] == "Running"
+    assert status["conditions"][0] == {"type": "Ready", "status": "True"}
+    (cs,) = status["container_statuses"]
+    assert cs["restart_count"] == 4
+    assert cs["state"]["running"]["started_at"] == _CREATED
+    # 空字段直接省略，不会出现 waiting: None
+    assert "waiting" not in cs["state"]
+
+
+def test_event_projection_keeps_snake_case_and_times():
+    event = client.CoreV1Event(
+        metadata=client.V1ObjectMeta(name="web-0.1", namespace="default"),
+        involved_object=client.V1ObjectReference(kind="Pod", name="web-0"),
+        reason="BackOff",
+        message="Back-off restarting failed container",
+        type="Warning",
+        count=7,
+        last_timestamp=_CREATED,
+    )
+
+    (projected,) = project_items(_payload([event]), "CoreV1Event")
+
+    assert projected["involved_object"] == {"kind": "Pod", "name": "web-0"}
+    assert projected["last_timestamp"] == _CREATED
+    assert projected["count"] == 7
+
+
+def test_project_list_returns_continue_token():
+    body = b'{"metadata": {"continue": "abc"}, "items": [{"type": "Normal"}]}'
+    assert project_list(body, "CoreV1Event") == ([{"type": "Normal"}], "abc")
+    assert project_list(b'{"metadata": {}, "items": []}', "CoreV1Event") == ([], None)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fast_list", [True, False])
+async def test_get_pods_feeds_inspection_rules(monkeypatch, fast_list):
+    from app.config.settings import config
+
+    monkeypatch.setattr(config.k8s, "fast_list", fast_list)
+    pods = [_pod("web-0", 5, True), _pod("web-1", 0, False)]
+    responses = []
+
+    def list_namespaced_pod(_preload_content=True, **kwargs):
+        if _preload_content:
+            return client.V1PodList(items=pods)
+        responses.append(_RawResponse(_payload(pods)))
+        return responses[-1]
+
+    service = KubernetesService.__new__(KubernetesService)
+    service.initialized = True
+    service.core_v1 = type("CoreV1", (), {})()
+    service.core_v1.list_namespaced_pod = list_namespaced_pod
+
+    result = await service.get_pods(namespace="default")
+
+    assert all(r.released for r in responses)
+    assert len(responses) == (1 if fast_list else 0)
+    ctx = RuleContext(pods=result, events=[], prom={}, namespace="default")
+    assert [f["resource"]["name"] for f in PodRestartsRule().check(ctx)] == ["web-0"]
+    assert [
+        f["resource"]["name"] for f in PrivilegedContainerRule().check(ctx)
+    ] == ["web-0"]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: LLM异步客户端池、并发限制与非阻塞流式读取单元测试
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.config.settings import config
+from app.services.llm import LLMService
+from app.services.llm_pool import close_llm_client_pool, get_llm_client_pool
+
+
+class _NoThreadExecutor(ThreadPoolExecutor):
+    """一旦有任务提交到默认线程池就失败"""
+
+    def submit(self, *args, **kwargs):
+        raise AssertionError("LLM调用不应使用线程池")
+
+
+class _FakeStream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for piece in self.pieces:
+            await asyncio.sleep(0)
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))]
+            )
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeCompletions:
+    """记录同时进行的请求数"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.streams = []
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            stream = _FakeStream(["先检查", "事件"])
+            self.streams.append(stream)
+            return stream
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))]
+        )
+
+
+@pytest.fixture
+def limited_concurrency():
+    original = config.llm.max_concurrency
+    config.llm.max_concurrency = 2
+    yield
+    config.llm.max_concurrency = original
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_bounded_and_off_thread_pool(
+    limited_concurrency, monkeypatch
+):
+    asyncio.get_running_loop().set_default_executor(_NoThreadExecutor())
+    completions = _FakeCompletions()
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    service = LLMService()
+    service.provider = "openai"
+    monkeypatch.setattr(service, "_openai_client", lambda: fake)
+
+    messages = [{"role": "user", "content": "hi"}]
+    # 消息各不相同，避免被调度器合并为同一请求
+    results = await asyncio.gather(
+        *[
+            service.generate_response([{"role": "user", "content": f"q{i}"}])
+            for i in range(6)
+        ]
+    )
+    assert results == ["ok"] * 6
+    assert completions.peak == 2
+
+    # 流式响应在事件循环上异步读取并关闭
+    joined = await service.generate_response(messages, stream=True)
+    deltas = [d async for d in service.stream_response(messages)]
+    assert joined == "先检查事件"
+    assert deltas == ["先检查", "事件"]
+    assert all(stream.closed for stream in completions.streams)
+    await close_llm_client_pool()
+
+
+@pytest.mark.asyncio
+async def test_pool_shares_transport_and_does_not_touch_environment():
+    before = os.environ.get("OLLAMA_HOST")
+    service = LLMService()
+    pool = get_llm_client_pool()
+
+    openai_client = service._openai_client()
+    ollama_client = service._ollama_client()
+    assert service._openai_client() is openai_client
+    assert get_llm_client_pool() is pool
+    assert openai_client._client._transport is ollama_client._client._transport
+    assert str(ollama_client._client.base_url).startswith(service.ollama_host)
+    assert os.environ.get("OLLAMA_HOST") == before
+
+    await close_llm_client_pool()
+    assert get_llm_client_pool() is not pool
+    await close_llm_client_pool()
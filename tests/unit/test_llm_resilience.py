@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: LLM提供商熔断器与对冲请求单元测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.config.settings import config
+from app.services import llm as llm_module, llm_resilience
+from app.services.llm import LLMService
+from app.services.llm_resilience import CircuitBreaker, HedgeStats
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_half_opens_and_recovers():
+    clock = _Clock()
+    breaker = CircuitBreaker(
+        "openai", min_requests=4, failure_rate=0.5, open_seconds=30, clock=clock
+    )
+    for latency in (1.0, 2.0):
+        breaker.record(True, latency)
+    breaker.record(False, 5.0)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False, 5.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.try_acquire()
+
+    clock.now = 31
+    assert breaker.try_acquire()
+    assert not breaker.try_acquire()  # 半开状态只放行一个探测
+    breaker.release()
+    assert breaker.try_acquire()
+    breaker.record(True, 0.5)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    snapshot = breaker.snapshot()
+    assert snapshot["opened_count"] == 1 and snapshot["rejected_requests"] == 2
+
+
+def test_slow_calls_count_as_failures_and_p95():
+    breaker = CircuitBreaker("ollama", min_requests=3, slow_call_seconds=10)
+    assert breaker.p95_latency() is None
+    for latency in (1.0, 2.0, 3.0):
+        breaker.record(True, latency)
+    assert breaker.p95_latency() == 3.0
+    for _ in range(3):
+        breaker.record(True, 20.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_calls_count_toward_latency_and_slowness():
+    clock = _Clock()
+    breaker = CircuitBreaker(
+        "openai", min_requests=3, slow_call_seconds=10, open_seconds=30, clock=clock
+    )
+    for latency in (1.0, 1.0, 1.0):
+        breaker.record(True, latency)
+    for _ in range(3):
+        breaker.record_cancelled(6.0)
+    # 被取消的慢请求拉高P95，但未超过阈值不计为失败
+    assert breaker.p95_latency() == 6.0
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    for _ in range(6):
+        breaker.record_cancelled(12.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 31
+    assert breaker.try_acquire()
+    breaker.record_cancelled(1.0)  # 半开探测被取消时归还名额
+    assert breaker.try_acquire()
+    breaker.record_cancelled(12.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "_breakers", {})
+    stats = HedgeStats()
+    monkeypatch.setattr(llm_resilience, "hedge_stats", stats)
+    monkeypatch.setattr(llm_module, "hedge_stats", stats)
+    service = LLMService()
+    service.provider, service.backup_provider = "openai", "ollama"
+    service.calls = []
+    return service
+
+
+@pytest.mark.asyncio
+async def test_open_primary_routes_straight_to_backup(service, monkeypatch):
+    async def failing_openai(**kwargs):
+        service.calls.append("openai")
+        raise RuntimeError("primary down")
+
+    async def ollama(**kwargs):
+        service.calls.append("ollama")
+        return "backup answer"
+
+    monkeypatch.setattr(service, "_call_openai_api", failing_openai)
+    monkeypatch.setattr(service, "_call_ollama_api", ollama)
+    messages = [{"role": "user", "content": "hi"}]
+
+    for _ in range(config.llm.breaker_min_requests):
+        assert await service.generate_response(messages) == "backup answer"
+    assert llm_resilience.get_circuit_breaker("openai").state == "open"
+
+    service.calls.clear()
+    assert await service.generate_response(messages) == "backup answer"
+    assert service.calls == ["ollama"]
+
+    stats = llm_resilience.get_llm_resilience_stats()
+    assert stats["circuit_breakers"]["openai"]["state"] == "open"
+    assert stats["circuit_breakers"]["ollama"]["window_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_backup_wins_and_slow_primary_is_cancelled(
+    service, monkeypatch
+):
+    cancelled = asyncio.Event()
+
+    async def slow_openai(**kwargs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "primary answer"
+
+    async def ollama(**kwargs):
+        return "backup answer"
+
+    monkeypatch.setattr(service, "_call_openai_api", slow_openai)
+    monkeypatch.setattr(service, "_call_ollama_api", ollama)
+    monkeypatch.setattr(config.llm, "hedge_enabled", True)
+    monkeypatch.setattr(config.llm, "hedge_min_delay", 0.01)
+    monkeypatch.setattr(config.llm, "hedge_max_delay", 0.05)
+
+    started = time.perf_counter()
+    answer = await service.generate_response([{"role": "user", "content": "hi"}])
+
+    assert answer == "backup answer"
+    assert time.perf_counter() - started < 1
+    assert cancelled.is_set()
+    hedging = llm_resilience.get_llm_resilience_stats()["hedging"]
+    assert hedging["hedged_requests"] == 1 and hedging["backup_wins"] == 1
+    # 被取消的主请求耗时计入统计，未超过慢调用阈值时不计为失败
+    primary = llm_resilience.get_circuit_breaker("openai").snapshot()
+    assert primary["window_requests"] == 1 and primary["window_failures"] == 0
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: LLM请求优先级调度、限速与相同请求合并单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.interfaces.llm_client import LLMPriority, llm_priority
+from app.services.llm import LLMService
+from app.services.llm_scheduler import LLMScheduler, get_llm_scheduler
+
+
+def _scheduler(max_concurrency=1, **classes):
+    return LLMScheduler(max_concurrency, classes)
+
+
+@pytest.mark.asyncio
+async def test_free_slot_goes_to_highest_priority_first():
+    scheduler = _scheduler(1)
+    release = asyncio.Event()
+    order = []
+
+    async def job(name, wait=None):
+        if wait:
+            await wait.wait()
+        order.append(name)
+
+    blocker = asyncio.create_task(
+        scheduler.run("background", lambda: job("blocker", release))
+    )
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.create_task(scheduler.run("background", lambda: job("report"))),
+        asyncio.create_task(scheduler.run("analysis", lambda: job("rca"))),
+        asyncio.create_task(scheduler.run("interactive", lambda: job("chat"))),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["classes"]["background"]["queued"] == 1
+
+    release.set()
+    await asyncio.gather(blocker, *queued)
+    assert order == ["blocker", "chat", "rca", "report"]
+    stats = scheduler.stats()["classes"]
+    assert stats["background"]["max_wait_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_class_limits_and_rate_keep_background_from_starving_chat():
+    scheduler = _scheduler(4, background={"concurrency": 1, "rate_per_minute": 600})
+    release = asyncio.Event()
+    started = []
+
+    async def job(name):
+        started.append(name)
+        await release.wait()
+
+    tasks = [
+        asyncio.create_task(scheduler.run("background", lambda: job("r1"))),
+        asyncio.create_task(scheduler.run("background", lambda: job("r2"))),
+        asyncio.create_task(scheduler.run("interactive", lambda: job("chat"))),
+    ]
+    await asyncio.sleep(0.01)
+    assert started == ["r1", "chat"]
+    release.set()
+    await asyncio.gather(*tasks)
+
+    # 令牌桶：10次/秒，突发容量为1，第二个后台请求至少等待约0.1秒
+    waits = scheduler._classes["background"].waits
+    assert max(waits) >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_cancels_when_abandoned():
+    scheduler = _scheduler(4)
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "shared"
+
+    results = await asyncio.gather(
+        *[scheduler.run("interactive", answer, key="k") for _ in range(5)]
+    )
+    assert results == ["shared"] * 5 and len(calls) == 1
+    assert scheduler.stats()["classes"]["interactive"]["coalesced"] == 4
+    assert scheduler.stats()["inflight_keys"] == 0
+
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [
+        asyncio.create_task(scheduler.run("interactive", slow, key="x"))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0.01)
+    waiters[0].cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()  # 仍有调用方等待
+    waiters[1].cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+    assert scheduler.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_llm_service_coalesces_identical_prompts_and_uses_context_priority(
+    monkeypatch,
+):
+    service = LLMService()
+    calls = []
+
+    async def generate(**kwargs):
+        calls.append(kwargs["messages"][-1]["content"])
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    monkeypatch.setattr(service, "_execute_generation_with_fallback", generate)
+    same = [{"role": "user", "content": "Pod为什么重启"}]
+    other = [{"role": "user", "content": "节点NotReady"}]
+
+    with llm_priority(LLMPriority.BACKGROUND):
+        results = await asyncio.gather(
+            service.generate_response(same),
+            service.generate_response(same),
+            service.generate_response(other),
+        )
+    assert results == ["answer"] * 3
+    assert sorted(calls) == sorted(["Pod为什么重启", "节点NotReady"])
+
+    classes = get_llm_scheduler().stats()["classes"]
+    assert classes["background"]["submitted"] == 2
+    assert classes["background"]["coalesced"] == 1
+    assert classes["interactive"]["submitted"] == 0
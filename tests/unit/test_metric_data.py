@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 数组形式MetricData的转换与二进制序列化单元测试
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from app.core.rca.metrics_collector import MetricsCollector
+from app.models.rca_models import MetricData
+
+_START = 1735689600  # 2025-01-01T00:00:00Z
+
+
+def _metric(size: int = 240) -> MetricData:
+    timestamps = _START + 60 * np.arange(size, dtype=np.int64)
+    samples = np.sin(np.arange(size) / 10.0) + 1.0
+    return MetricData(
+        "container_cpu_usage_seconds_total|pod=web-0",
+        {"pod": "web-0"},
+        timestamps,
+        samples,
+        anomaly_score=0.4,
+        trend="increasing",
+    )
+
+
+def test_values_are_rendered_lazily_in_legacy_format():
+    metric = _metric(3)
+
+    assert metric.size == 3
+    first = metric.values[0]
+    assert first == {"timestamp": "2025-01-01T00:00:00.000000Z", "value": 1.0}
+    assert metric.get_latest_point()["timestamp"] == "2025-01-01T00:02:00.000000Z"
+    assert metric.get_latest_value() == metric.values[-1]["value"]
+    assert metric.get_average_value() == np.mean([v["value"] for v in metric.values])
+
+    rebuilt = MetricData.from_values(metric.name, metric.values, metric.labels)
+    np.testing.assert_array_equal(rebuilt.timestamps, metric.timestamps)
+
+
+def test_binary_roundtrip_is_compact():
+    metric = _metric()
+
+    restored = MetricData.from_bytes(metric.to_bytes())
+    np.testing.assert_array_equal(restored.timestamps, metric.timestamps)
+    np.testing.assert_array_equal(restored.samples, metric.samples)
+    assert (restored.name, restored.labels, restored.trend) == (
+        metric.name,
+        metric.labels,
+        metric.trend,
+    )
+
+    # Redis缓存经pickle序列化，同样走二进制格式
+    packed = pickle.dumps([metric])
+    assert pickle.loads(packed)[0].values == metric.values
+    assert len(packed) * 3 < len(pickle.dumps(metric.values))
+
+
+def test_collector_builds_arrays_without_sample_dicts():
+    collector = MetricsCollector.__new__(MetricsCollector)
+    collector._anomaly_cache = {}
+    frame = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                _START + 60 * np.arange(12), unit="s", utc=True
+            ),
+            "value": [1.0, np.nan] + [2.0] * 10,
+        }
+    )
+
+    metric = collector._create_metric_data_fast("m", frame, {})
+
+    assert metric.timestamps.dtype == np.int64
+    assert metric.timestamps[0] == _START
+    assert metric.samples[1] == 0.0
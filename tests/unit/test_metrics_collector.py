@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 指标收集器批量查询单元测试
+"""
+
+from datetime import datetime, timedelta, timezone
+import re
+
+import pytest
+
+from app.core.rca.metrics_collector import MetricsCollector
+
+_END = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+_START = _END - timedelta(minutes=30)
+
+
+def _series(name, pod, base):
+    start = _START.timestamp()
+    return {
+        "metric": {"__name__": name, "pod": pod},
+        "values": [[start + 60 * i, str(base + i % 3)] for i in range(30)],
+    }
+
+
+class _FakePrometheus:
+    """按查询中的 __name__ 选择器返回数据，记录每次查询"""
+
+    def __init__(self, data, aggregated_missing=()):
+        self.data = data
+        self.aggregated_missing = set(aggregated_missing)
+        self.queries = []
+
+    async def health_check(self):
+        return True
+
+    async def query_range_series(self, query, start_time, end_time, step="1m"):
+        self.queries.append(query)
+        match = re.search(r'__name__=~"([^"]+)"', query)
+        names = match.group(1).split("|") if match else [query.split("{")[0]]
+        if "sum by" in query:
+            names = [n for n in names if n not in self.aggregated_missing]
+        result = [s for name in names for s in self.data.get(name, [])]
+        return result or None
+
+
+@pytest.mark.asyncio
+async def test_compatible_metrics_share_one_query():
+    metrics = [
+        "container_cpu_usage_seconds_total",
+        "container_memory_working_set_bytes",
+        "node_cpu_seconds_total",
+        "node_memory_MemFree_bytes",
+    ]
+    prom = _FakePrometheus(
+        {
+            name: [_series(name, "web-0", 1), _series(name, "web-1", 5)]
+            for name in metrics
+        }
+    )
+    collector = MetricsCollector(prometheus_client=prom)
+    await collector.initialize()
+
+    result = await collector.collect("default", _START, _END, metrics=metrics)
+
+    assert len(prom.queries) == 2
+    assert prom.queries[0] == (
+        "sum by (__name__, pod, container) "
+        '({__name__=~"container_cpu_usage_seconds_total'
+        '|container_memory_working_set_bytes",namespace="default"})'
+    )
+    names = sorted(m.name for m in result)
+    assert names == sorted(
+        f"{name}|label_pod:web-{i}" for name in metrics for i in (0, 1)
+    )
+    cpu = next(m for m in result if m.name == f"{metrics[0]}|label_pod:web-1")
+    assert cpu.labels == {"label_pod": "web-1"}
+    assert len(cpu.values) == 30
+    assert cpu.values[0]["value"] == 5.0
+
+    # 20秒后的分析对齐到同一窗口，直接命中缓存
+    shift = timedelta(seconds=20)
+    await collector.collect("default", _START + shift, _END + shift, metrics=metrics)
+    assert len(prom.queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_metrics_fall_back_in_one_query():
+    metrics = [
+        "container_cpu_usage_seconds_total",
+        "container_fs_usage_bytes",
+        "container_network_receive_bytes_total",
+    ]
+    prom = _FakePrometheus(
+        {name: [_series(name, "web-0", 1)] for name in metrics},
+        # 这两个指标没有 namespace 标签，聚合查询查不到
+        aggregated_missing=metrics[1:],
+    )
+    collector = MetricsCollector(prometheus_client=prom)
+    await collector.initialize()
+
+    result = await collector.collect("default", _START, _END, metrics=metrics)
+
+    assert len(prom.queries) == 2
+    assert prom.queries[1] == (
+        '{__name__=~"container_fs_usage_bytes|container_network_receive_bytes_total"}'
+    )
+    assert {m.name.split("|")[0] for m in result} == set(metrics)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 模型注册表与热切换单元测试
+"""
+
+import asyncio
+import os
+import threading
+
+import numpy as np
+from pydantic import ValidationError
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from app.core.prediction import ModelManager, ModelRegistry
+from app.core.prediction.model_registry import MODEL_FILE
+from app.models import ModelReloadRequest, PredictionType
+
+
+def _fit(offset: float, n_features: int = 14):
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, size=(64, n_features))
+    scaler = StandardScaler().fit(X)
+    model = LinearRegression().fit(scaler.transform(X), X[:, 0] + offset)
+    return model, scaler
+
+
+def _manager(tmp_path) -> ModelManager:
+    manager = ModelManager()
+    manager.registry = ModelRegistry(str(tmp_path))
+    manager.model_paths = {
+        pred_type: {
+            "model": str(tmp_path / "missing.pkl"),
+            "scaler": str(tmp_path / "missing_scaler.pkl"),
+            "metadata": str(tmp_path / "missing.json"),
+        }
+        for pred_type in PredictionType
+    }
+    return manager
+
+
+def test_publish_resolve_and_verify(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    model, scaler = _fit(0.0)
+
+    published = registry.publish(
+        PredictionType.QPS, model, scaler, {"algorithm": "linear"}
+    )
+
+    assert registry.current_version(PredictionType.QPS) == published.version
+    resolved = registry.resolve(PredictionType.QPS)
+    assert resolved.checksums == published.checksums
+    assert registry.verify(resolved)
+
+    artifacts = registry.load_artifacts(resolved)
+    assert artifacts["metadata"]["registry_version"] == published.version
+    assert artifacts["metadata"]["algorithm"] == "linear"
+
+    # 篡改产物后校验失败
+    with open(os.path.join(resolved.path, MODEL_FILE), "ab") as f:
+        f.write(b"corrupted")
+    assert not registry.verify(resolved)
+
+
+@pytest.mark.asyncio
+async def test_reload_swaps_only_valid_versions(tmp_path):
+    manager = _manager(tmp_path)
+    first, scaler = _fit(0.0)
+    v1 = manager.registry.publish(PredictionType.QPS, first, scaler, {})
+    await manager.load_models()
+
+    bundle = manager.get_bundle(PredictionType.QPS)
+    assert bundle.version == v1.version
+    assert manager.bundles[PredictionType.CPU].source == "adapted"
+
+    second, scaler2 = _fit(5.0)
+    v2 = manager.registry.publish(
+        PredictionType.QPS, second, scaler2, {}, activate=False
+    )
+    assert await manager.reload_model(PredictionType.QPS, v2.version)
+    assert manager.get_bundle(PredictionType.QPS).version == v2.version
+    # 旧快照引用不受影响
+    assert bundle.version == v1.version
+
+    # 特征数量不匹配的版本验证失败，保留当前版本
+    broken, broken_scaler = _fit(0.0, n_features=3)
+    v3 = manager.registry.publish(
+        PredictionType.QPS, broken, broken_scaler, {}, activate=False
+    )
+    assert not await manager.reload_model(PredictionType.QPS, v3.version)
+    assert manager.get_bundle(PredictionType.QPS).version == v2.version
+    assert manager.registry.current_version(PredictionType.QPS) == v2.version
+
+    # 校验和不匹配的版本不回落到默认模型文件，CURRENT 保持不变
+    corrupt, corrupt_scaler = _fit(1.0)
+    v4 = manager.registry.publish(
+        PredictionType.QPS, corrupt, corrupt_scaler, {}, activate=False
+    )
+    with open(os.path.join(v4.path, MODEL_FILE), "ab") as f:
+        f.write(b"corrupted")
+    assert not await manager.reload_model(PredictionType.QPS, v4.version)
+    assert manager.get_bundle(PredictionType.QPS).version == v2.version
+    assert manager.registry.current_version(PredictionType.QPS) == v2.version
+
+    await manager.stop_watching()
+
+
+@pytest.mark.asyncio
+async def test_validation_runs_off_the_event_loop(tmp_path, monkeypatch):
+    manager = _manager(tmp_path)
+    model, scaler = _fit(0.0)
+    manager.registry.publish(PredictionType.QPS, model, scaler, {})
+    threads = []
+    original = manager._validate_model
+
+    def validate(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    monkeypatch.setattr(manager, "_validate_model", validate)
+    await manager.load_models()
+
+    # 验证完成前先使用已加载的模型
+    assert manager.get_bundle(PredictionType.QPS) is not None
+    await asyncio.gather(*manager._validation_tasks.values())
+    assert manager._validated[PredictionType.QPS] is True
+    assert threads and threading.main_thread() not in threads
+
+    await manager.stop_watching()
+
+
+@pytest.mark.asyncio
+async def test_adapted_bundles_validate_with_qps_features(tmp_path):
+    manager = _manager(tmp_path)
+    model, scaler = _fit(0.0)
+    manager.registry.publish(PredictionType.QPS, model, scaler, {})
+    await manager.load_models()
+    await asyncio.gather(*manager._validation_tasks.values())
+
+    # 复用QPS模型的类型按QPS的14个特征验证，不会被判为无效
+    for pred_type in (PredictionType.CPU, PredictionType.MEMORY, PredictionType.DISK):
+        assert manager._validated[pred_type] is True
+        assert manager.get_bundle(pred_type).source == "adapted"
+
+    assert await manager.reload_model(PredictionType.CPU)
+    assert manager.get_bundle(PredictionType.CPU).source == "adapted"
+
+    await manager.stop_watching()
+
+
+def test_version_names_cannot_escape_registry(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    model, scaler = _fit(0.0)
+    registry.publish(PredictionType.QPS, model, scaler, {}, version="v1")
+
+    for version in ("../../..", "..", "v1/../v1", "/etc"):
+        with pytest.raises(ValidationError):
+            ModelReloadRequest(prediction_type="qps", version=version)
+        assert registry.resolve(PredictionType.QPS, version) is None
+        with pytest.raises(ValueError):
+            registry.activate(PredictionType.QPS, version)
+
+    assert ModelReloadRequest(prediction_type="qps", version="v1.2-rc_1")
+    assert registry.resolve(PredictionType.QPS, "v1").version == "v1"
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 查询扩展合并检索（批量嵌入、一次矩阵检索、RRF融合）单元测试
+"""
+
+from fnmatch import fnmatch
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+import numpy as np
+import pytest
+
+from app.core.agents.enterprise_assistant import DocumentRetriever, RetrievalStrategy
+from app.core.vector import redis_vector_store
+from app.core.vector.redis_vector_store import EnhancedRedisVectorStore, SearchConfig
+
+
+def _b(value):
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return record
+
+    def execute(self):
+        self.client.executed.append([name for name, _, _ in self.calls])
+        return [getattr(self.client, n)(*a, **kw) for n, a, kw in self.calls]
+
+
+class _FakeRedis:
+    """内存版Redis，只实现向量存储用到的命令"""
+
+    def __init__(self):
+        self.data = {}
+        self.executed = []
+
+    def ping(self):
+        return True
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(_b(key))
+
+    def set(self, key, value):
+        self.data[_b(key)] = _b(value)
+
+    def setex(self, key, ttl, value):
+        self.set(key, value)
+
+    def incr(self, key):
+        value = int(self.data.get(_b(key), b"0")) + 1
+        self.data[_b(key)] = _b(value)
+        return value
+
+    def hset(self, key, mapping):
+        self.data[_b(key)] = {_b(k): _b(v) for k, v in mapping.items()}
+
+    def hgetall(self, key):
+        return self.data.get(_b(key), {})
+
+    def sadd(self, key, *members):
+        self.data.setdefault(_b(key), set()).update(_b(m) for m in members)
+
+    def smembers(self, key):
+        return self.data.get(_b(key), set())
+
+    def scan(self, cursor, match="*", count=None):
+        return 0, [k for k in self.data if fnmatch(k.decode(), match)]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(_b(key), None)
+
+
+_TOPICS = ["pod", "重启", "节点", "磁盘"]
+
+
+class _KeywordEmbeddings(Embeddings):
+    """按关键词出现与否生成向量，并记录嵌入调用"""
+
+    def __init__(self):
+        self.document_calls = []
+
+    def _vector(self, text):
+        text = text.lower()
+        return [1.0 if t in text else 0.0 for t in _TOPICS] + [0.1]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return [self._vector(t) for t in texts]
+
+
+@pytest.fixture
+async def store(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setattr(redis_vector_store.redis, "ConnectionPool", lambda **kw: None)
+    monkeypatch.setattr(redis_vector_store.redis, "Redis", lambda **kw: fake)
+    embeddings = _KeywordEmbeddings()
+    store = EnhancedRedisVectorStore(
+        {}, "kb", embeddings, vector_dim=len(_TOPICS) + 1, index_type="FLAT"
+    )
+    await store.add_documents(
+        [
+            Document(page_content="pod 重启 排查 事件"),
+            Document(page_content="pod 调度 失败"),
+            Document(page_content="节点 notready kubelet"),
+            Document(page_content="磁盘 清理 日志"),
+        ]
+    )
+    embeddings.document_calls.clear()
+    fake.executed.clear()
+    return store
+
+
+@pytest.mark.asyncio
+async def test_expansions_run_as_one_batched_search(store):
+    embeddings = store.embedding_model
+    await store.embed_query("pod 重启")  # 语义缓存查找时已生成的问题向量
+
+    queries = ["pod 重启", "pod 重启 原因分析", "pod 重启 故障排查"]
+    results = await store.multi_query_search(
+        queries, k=3, config=SearchConfig(use_cache=False, use_mmr=False)
+    )
+
+    # 已缓存的问题不重复嵌入，其余扩展查询合并为一次嵌入请求
+    assert embeddings.document_calls == [["pod 重启"], queries[1:]]
+    # 倒排索引与文档各只读取一次
+    smembers = [names for names in store.client.executed if "smembers" in names]
+    hgetall = [names for names in store.client.executed if "hgetall" in names]
+    assert len(smembers) == 1 and len(hgetall) == 1
+
+    contents = [doc.page_content for doc, _ in results]
+    assert contents[0] == "pod 重启 排查 事件"
+    assert "磁盘 清理 日志" not in contents
+    assert all(0 < score <= 1.0 for _, score in results)
+
+    # FAISS索引为空时，一次扫描向量完成全部查询的语义检索
+    rows = await store._fallback_semantic_search_batch(
+        np.vstack([store._query_embeddings[q] for q in queries[:2]]), 2
+    )
+    assert len(rows) == 2 and rows[0][0][1] > 0.9
+
+
+@pytest.mark.asyncio
+async def test_retriever_uses_single_multi_query_call(store, monkeypatch):
+    calls = []
+    original = store.multi_query_search
+
+    async def multi_query_search(queries, **kwargs):
+        calls.append(list(queries))
+        return await original(queries, **kwargs)
+
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("扩展查询不应逐个检索")
+
+    monkeypatch.setattr(store, "multi_query_search", multi_query_search)
+    monkeypatch.setattr(store, "similarity_search", unexpected)
+    retriever = DocumentRetriever(store, RetrievalStrategy(initial_k=5, final_k=3))
+
+    docs = await retriever.retrieve(["pod 重启", "pod 重启 解决方案"])
+    assert len(calls) == 1
+    assert docs and docs[0].page_content == "pod 重启 排查 事件"
+    assert docs[0].metadata["score"] > 0
+
+
+@pytest.mark.asyncio
+async def test_large_knowledge_base_still_batches_expansions(store, monkeypatch):
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("扩展查询不应逐个检索")
+
+    # 满足层次化检索条件（文档数和聚类数达到阈值）时仍走批量检索
+    monkeypatch.setattr(store, "_should_use_hierarchical_retrieval", lambda c: True)
+    monkeypatch.setattr(store, "similarity_search", unexpected)
+
+    results = await store.multi_query_search(
+        ["pod 重启", "pod 重启 原因"],
+        k=2,
+        config=SearchConfig(use_cache=False, use_hierarchical_retrieval=True),
+    )
+    assert results[0][0].page_content == "pod 重启 排查 事件"
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: MinHash近重复签名与多样性过滤单元测试
+"""
+
+from langchain_core.documents import Document
+
+from app.core.agents.enterprise_assistant import DocumentRetriever, RetrievalStrategy
+from app.core.retrieval.near_duplicate import (
+    SIGNATURE_KEY,
+    decode_signature,
+    document_signature,
+    encode_signature,
+    estimated_similarity,
+    minhash_signature,
+    select_diverse,
+)
+
+
+def _text(words):
+    return " ".join(f"w{i}" for i in words)
+
+
+def test_signature_estimates_jaccard_and_round_trips():
+    first = minhash_signature(_text(range(0, 40)))
+    second = minhash_signature(_text(range(10, 50)))  # Jaccard = 30/50 = 0.6
+    assert abs(estimated_similarity(first, second) - 0.6) < 0.15
+    assert estimated_similarity(first, first) == 1.0
+    assert estimated_similarity(first, minhash_signature(_text(range(100, 140)))) < 0.1
+
+    assert minhash_signature("   ") is None
+    assert estimated_similarity(None, first) == 0.0
+    assert (decode_signature(encode_signature(first)) == first).all()
+    assert decode_signature("not base64!") is None
+
+
+def test_diversity_filter_drops_near_duplicates_using_stored_signatures():
+    base = _text(range(0, 40))
+    docs = [
+        Document(page_content=base),
+        Document(page_content=base + " w41"),  # 近重复
+        Document(page_content=_text(range(200, 240))),
+        Document(page_content=""),
+        Document(page_content=_text(range(300, 340))),
+    ]
+    # 入库时已保存签名的文档不再重新计算
+    stored = encode_signature(minhash_signature(docs[2].page_content))
+    docs[2].metadata[SIGNATURE_KEY] = stored
+
+    selected = select_diverse(docs, threshold=0.6, limit=3)
+    assert selected == [docs[0], docs[2], docs[3]]
+    assert docs[2].metadata[SIGNATURE_KEY] is stored
+    # 旧数据没有签名时现算一次并写回元数据
+    assert docs[1].metadata[SIGNATURE_KEY]
+    assert document_signature(docs[3]) is None
+
+    retriever = DocumentRetriever(
+        None, RetrievalStrategy(final_k=2, diversity_threshold=0.6)
+    )
+    assert retriever._apply_diversity_filter(docs) == [docs[0], docs[2]]
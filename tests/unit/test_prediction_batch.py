@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 批量预测单元测试
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from app.core.prediction import FeatureExtractor, UnifiedPredictor
+from app.models import PredictionGranularity, PredictionType
+from app.services.prediction_service import PredictionService
+
+
+def _build_predictor(prediction_type: PredictionType) -> UnifiedPredictor:
+    predictor = UnifiedPredictor(
+        model_manager=Mock(), feature_extractor=FeatureExtractor()
+    )
+    features = predictor._get_default_model_features(prediction_type)
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, size=(64, len(features)))
+    model = LinearRegression().fit(X, X[:, 0] * 0.9 + 5)
+
+    predictor.model_manager.get_model.return_value = model
+    predictor.model_manager.get_scaler.return_value = None
+    predictor.model_manager.metadata = {}
+    predictor._initialized = True
+    return predictor
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_matches_single_predictions():
+    predictor = _build_predictor(PredictionType.CPU)
+    history = [{"timestamp": f"t{i}", "value": 40.0 + i} for i in range(30)]
+    current_values = [35.0, 60.0, 82.5]
+
+    batch = await predictor.predict_batch(
+        prediction_type=PredictionType.CPU,
+        current_values=current_values,
+        historical_data_list=[history, [], history],
+        prediction_hours=6,
+        granularity=PredictionGranularity.HOUR,
+    )
+
+    assert len(batch) == 3
+    for value, data, points in zip(current_values, [history, [], history], batch):
+        single = await predictor.predict(
+            prediction_type=PredictionType.CPU,
+            current_value=value,
+            historical_data=data,
+            prediction_hours=6,
+            granularity=PredictionGranularity.HOUR,
+        )
+        assert [p.predicted_value for p in points] == pytest.approx(
+            [p.predicted_value for p in single]
+        )
+        assert [p.confidence_level for p in points] == [
+            p.confidence_level for p in single
+        ]
+
+
+@pytest.mark.asyncio
+async def test_service_predict_batch_streams_every_target():
+    service = PredictionService()
+    service._initialized = True
+    service._predictor = AsyncMock()
+    service._predictor.predict_batch.side_effect = (
+        lambda prediction_type, current_values, **kwargs: [
+            [
+                Mock(
+                    predicted_value=value,
+                    model_dump=Mock(return_value={"predicted_value": value}),
+                )
+            ]
+            for value in current_values
+        ]
+    )
+    service._assemble_prediction_result = AsyncMock(
+        side_effect=lambda **kwargs: {"current_value": kwargs["current_value"]}
+    )
+    service._fetch_historical_data = AsyncMock(return_value=[])
+
+    targets = [
+        {"target_id": "a", "prediction_type": "qps", "current_value": 120.0},
+        {"target_id": "b", "prediction_type": "cpu", "current_value": 55.0},
+        {"target_id": "c", "prediction_type": "cpu", "current_value": 150.0},
+        {"target_id": "d", "prediction_type": "qps", "current_value": 80.0},
+    ]
+
+    lines = [line async for line in service.predict_batch(targets, prediction_hours=6)]
+
+    results = {line["target_id"]: line for line in lines if line["type"] == "result"}
+    assert set(results) == {"a", "b", "c", "d"}
+    assert results["c"]["status"] == "error"
+    assert results["a"]["data"] == {"current_value": 120.0}
+
+    summary = lines[-1]
+    assert summary["type"] == "summary"
+    assert summary["succeeded"] == 3
+    assert summary["failed"] == 1
+
+    # 每种类型一次推理，默认查询的历史数据按类型只拉取一次
+    assert service._predictor.predict_batch.await_count == 2
+    assert service._fetch_historical_data.await_count == 2
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: RCA时间序列滞后互相关与因果链单元测试
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.core.rca.correlation import (
+    CrossCorrelationAnalyzer,
+    lagged_cross_correlation,
+    zscore,
+)
+from app.core.rca.rca_engine import RCAAnalysisEngine
+from app.models.rca_models import EventData, LogData, MetricData, SeverityLevel
+
+_END = datetime(2025, 1, 1, 13, 0, tzinfo=timezone.utc)
+_START = _END - timedelta(hours=1)
+
+
+def _incident():
+    """内存在第20分钟上升，5分钟后出现OOM事件，再过5分钟出现错误日志"""
+    minutes = np.arange(61)
+    timestamps = int(_START.timestamp()) + 60 * minutes
+    rng = np.random.default_rng(7)
+    memory = np.where(minutes >= 20, 0.95, 0.4) + rng.normal(0, 0.01, len(minutes))
+    noise = rng.normal(0, 1, len(minutes))
+    metrics = [
+        MetricData("memory|pod=web-0", {"pod": "web-0"}, timestamps, memory, 0.9),
+        MetricData("unrelated", {}, timestamps, noise, 0.1),
+    ]
+    events = [
+        EventData(
+            _START + timedelta(minutes=m, seconds=10),
+            "Warning",
+            "OOMKilling",
+            "oom",
+            {"kind": "Pod", "name": "web-0"},
+            SeverityLevel.CRITICAL,
+        )
+        for m in range(25, 60)
+    ]
+    logs = [
+        LogData(_START + timedelta(minutes=m, seconds=20), "web-0", "web", "ERROR", "x")
+        for m in range(30, 60)
+    ]
+    return metrics, events, logs
+
+
+def test_fft_cross_correlation_matches_direct_computation():
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=200)
+    matrix, _ = zscore(np.vstack([base, np.roll(base, 6), rng.normal(size=200)]))
+
+    corr, lag = lagged_cross_correlation(matrix, max_lag=20)
+
+    assert lag[0, 1] == 6 and lag[1, 0] == -6
+    expected = np.dot(matrix[0, :-6], matrix[1, 6:]) / 200
+    assert np.isclose(corr[0, 1], expected)
+    assert abs(corr[0, 2]) < 0.4
+
+
+def test_analyzer_ranks_leading_signal_first():
+    metrics, events, logs = _incident()
+    report = CrossCorrelationAnalyzer(max_points=60).analyze(
+        metrics, events, logs, _START, _END
+    )
+
+    top = report.causes[0]
+    assert top["signal"] == "memory|pod=web-0"
+    assert top["lead_time_seconds"] > 0
+    assert set(top["leads"]) == {"event:OOMKilling", "log:web-0"}
+    assert report.change_points["memory|pod=web-0"] == _START + timedelta(minutes=20)
+    assert all("unrelated" not in p["leader"] for p in report.pairs)
+
+
+def test_engine_builds_causal_chain_from_lead_relations():
+    metrics, events, logs = _incident()
+    engine = RCAAnalysisEngine.__new__(RCAAnalysisEngine)
+    report = CrossCorrelationAnalyzer(max_points=60).analyze(
+        metrics, events, logs, _START, _END
+    )
+
+    causal = engine._find_causal_chain({}, {}, {}, report)
+    temporal = engine._find_temporal_correlations({}, {}, {}, _START, _END, report)
+
+    assert causal.evidence[0] == (
+        "因果链: memory|pod=web-0 -> event:OOMKilling -> log:web-0"
+    )
+    assert [t["timestamp"] for t in causal.timeline] == sorted(
+        t["timestamp"] for t in causal.timeline
+    )
+    assert temporal.correlation_type == "temporal"
+    assert "领先" in temporal.evidence[0]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 流式根因分析阶段顺序与取消单元测试
+"""
+
+import asyncio
+
+from httpx import ASGITransport, AsyncClient
+import pytest
+
+from app.core.rca.rca_engine import RCAAnalysisEngine
+
+
+class _Collector:
+    error_lines = 10
+
+    async def initialize(self):
+        return None
+
+    async def collect(self, *args, **kwargs):
+        return []
+
+
+def _engine(recommendation_delay: float, cancelled: list) -> RCAAnalysisEngine:
+    engine = RCAAnalysisEngine(
+        metrics_collector=_Collector(),
+        events_collector=_Collector(),
+        logs_collector=_Collector(),
+    )
+
+    async def recommendations(root_causes):
+        try:
+            await asyncio.sleep(recommendation_delay)
+        except asyncio.CancelledError:
+            cancelled.append("recommendations")
+            raise
+        return ["检查资源配额"]
+
+    async def report(*args):
+        return {"summary": "ok"}
+
+    engine._generate_recommendations = recommendations
+    engine._generate_analysis_report = report
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_data_stages_before_llm_stages():
+    engine = _engine(0.05, [])
+
+    stages = [stage async for stage, _ in engine.analyze_stream("default")]
+
+    assert stages == [
+        "collection",
+        "anomalies",
+        "correlations",
+        "root_causes",
+        "report",
+        "recommendations",
+        "complete",
+    ]
+    result = await engine.analyze("default")
+    assert result.recommendations == ["检查资源配额"]
+    assert result.analysis_metadata["analysis_report"] == {"summary": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_cancels_pending_llm_work():
+    cancelled = []
+    engine = _engine(30, cancelled)
+    stream = engine.analyze_stream("default")
+
+    async for stage, _ in stream:
+        if stage == "report":
+            break
+    await stream.aclose()
+
+    # 关闭流时等待被取消的LLM任务结束，不遗留后台任务
+    assert cancelled == ["recommendations"]
+
+
+class _StreamingService:
+    async def initialize(self):
+        return None
+
+    async def analyze_root_cause_stream(self, namespace, time_window_hours, metrics):
+        yield {"stage": "collection", "data": {"namespace": namespace}}
+        yield {"stage": "complete", "data": {"root_causes": []}}
+
+
+@pytest.mark.asyncio
+async def test_sse_endpoint_streams_stage_events(monkeypatch):
+    from app.api.routes import rca as rca_routes
+    from app.main import app
+
+    monkeypatch.setattr(rca_routes, "rca_service", _StreamingService())
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as ac:
+        resp = await ac.post(
+            "/api/v1/rca/analyze/stream", json={"namespace": "prod"}
+        )
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text.split("\n\n")[:2] == [
+        'event: collection\ndata: {"namespace": "prod"}',
+        'event: complete\ndata: {"root_causes": []}',
+    ]
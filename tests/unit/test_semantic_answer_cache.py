@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 语义答案缓存与智能助手缓存复用单元测试
+"""
+
+from langchain_core.documents import Document
+import pytest
+
+from app.core.agents.enterprise_assistant import RAGAssistant
+from app.core.cache import SemanticAnswerCache
+from app.core.cache.redis_cache_manager import RedisCacheManager
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lookup_threshold_version_and_eviction():
+    clock = _Clock()
+    cache = SemanticAnswerCache(
+        similarity_threshold=0.9, max_entries=2, ttl=60, clock=clock
+    )
+    cache.store([1.0, 0.0], 1, "Pod为什么重启", {"answer": "看事件"})
+
+    hit = cache.lookup([0.98, 0.1], 1)
+    assert hit and hit[0]["answer"] == "看事件" and hit[1] > 0.9
+    assert cache.lookup([0.0, 1.0], 1) is None
+
+    # 返回副本，调用方修改不影响缓存
+    hit[0]["answer"] = "changed"
+    assert cache.lookup([1.0, 0.0], 1)[0]["answer"] == "看事件"
+
+    # 写满时淘汰最久未命中的条目
+    clock.now = 1
+    cache.store([0.0, 1.0], 1, "节点NotReady", {"answer": "查kubelet"})
+    clock.now = 2
+    assert cache.lookup([1.0, 0.0], 1)
+    cache.store([0.7, 0.7], 1, "磁盘满", {"answer": "清理日志"})
+    assert len(cache) == 2
+    assert cache.lookup([1.0, 0.0], 1)[0]["answer"] == "看事件"
+    assert cache.lookup([0.0, 1.0], 1) is None
+
+    # 过期条目不再返回
+    clock.now = 100
+    assert cache.lookup([1.0, 0.0], 1) is None
+
+    # 最相近的条目已过期时返回仍有效的次优条目，过期条目随查找清理
+    clock.now = 200
+    cache.store([1.0, 0.0], 1, "Pod为什么重启", {"answer": "看事件"})
+    clock.now = 230
+    cache.store([0.95, 0.31], 1, "Pod反复重启", {"answer": "看探针"})
+    clock.now = 270
+    assert cache.lookup([1.0, 0.0], 1)[0]["answer"] == "看探针"
+    assert len(cache) == 1 and cache.get_stats()["expired"] >= 1
+
+    # 知识库版本变化时整体失效
+    cache.store([1.0, 0.0], 1, "Pod为什么重启", {"answer": "看事件"})
+    assert cache.lookup([1.0, 0.0], 2) is None
+    assert len(cache) == 0
+    assert cache.get_stats()["invalidations"] == 1
+
+
+class _VectorStore:
+    """按关键词给出问题向量，并记录嵌入次数"""
+
+    def __init__(self):
+        self.version = 1
+        self.embedded = []
+
+    async def embed_query(self, query):
+        self.embedded.append(query)
+        return [1.0, 0.05] if "重启" in query else [0.0, 1.0]
+
+    async def get_knowledge_version(self):
+        return self.version
+
+
+@pytest.fixture
+def assistant():
+    assistant = RAGAssistant(vector_store=_VectorStore(), llm_service=None)
+    assistant.generated = []
+    docs = [Document(page_content="Pod 重启排查步骤", metadata={"score": 0.9})]
+
+    async def retrieve(*args, **kwargs):
+        return docs
+
+    async def rerank(query, documents, **kwargs):
+        return documents
+
+    async def generate(question, *args, **kwargs):
+        assistant.generated.append(question)
+        return {"answer": f"{question}: 先检查Pod事件", "confidence": 0.9}
+
+    assistant.retriever.retrieve = retrieve
+    assistant.reranker.rerank = rerank
+    assistant.generator.generate = generate
+    return assistant
+
+
+@pytest.mark.asyncio
+async def test_paraphrased_question_reuses_answer_until_knowledge_changes(
+    assistant,
+):
+    first = await assistant.get_answer("Pod为什么一直重启？")
+    assert first["cache_hit"] is False
+
+    paraphrased = await assistant.get_answer("pod 重启的原因是什么")
+    assert paraphrased["cache_hit"] is True
+    assert paraphrased["answer"] == first["answer"]
+    assert paraphrased["semantic_similarity"] >= 0.92
+    assert assistant.generated == ["Pod为什么一直重启？"]
+    # 查找用的是检索时同样预处理过的问题
+    assert assistant.vector_store.embedded[0] == "Pod为什么一直重启"
+
+    other = await assistant.get_answer("节点NotReady怎么办")
+    assert other["cache_hit"] is False
+
+    assistant.vector_store.version = 2
+    refreshed = await assistant.get_answer("pod 重启的原因是什么")
+    assert refreshed["cache_hit"] is False
+    assert len(assistant.generated) == 3
+
+    result = await assistant.clear_cache()
+    assert result["details"]["semantic_cache"] == 1
+
+
+class _ExactCache:
+    """按 (问题, 知识库版本) 保存答案的精确缓存"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, question, version=None):
+        entry = self.entries.get((question, version))
+        return dict(entry) if entry else None
+
+    def set(self, question, response, ttl=None, version=None):
+        self.entries[(question, version)] = dict(response)
+
+
+@pytest.mark.asyncio
+async def test_exact_cache_is_keyed_on_knowledge_version(assistant):
+    assistant.cache_manager = _ExactCache()
+    assistant.semantic_cache = None
+
+    await assistant.get_answer("Pod为什么一直重启？")
+    assert (await assistant.get_answer("Pod为什么一直重启？"))["cache_hit"] is True
+
+    # 知识库更新后精确缓存也不再返回旧答案
+    assistant.vector_store.version = 2
+    refreshed = await assistant.get_answer("Pod为什么一直重启？")
+    assert refreshed["cache_hit"] is False
+    assert len(assistant.generated) == 2
+    assert set(assistant.cache_manager.entries) == {
+        ("Pod为什么一直重启？", 1),
+        ("Pod为什么一直重启？", 2),
+    }
+
+
+def test_redis_cache_key_includes_knowledge_version():
+    manager = object.__new__(RedisCacheManager)
+    manager.cache_prefix = "aiops:"
+    manager._shutdown = True
+
+    key = manager._generate_cache_key("Pod为什么重启", version=1)
+    assert key == manager._generate_cache_key("Pod为什么重启", version=1)
+    assert key != manager._generate_cache_key("Pod为什么重启", version=2)
+    assert key != manager._generate_cache_key("Pod为什么重启")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 指标时间序列缓存单元测试
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.rca.series_cache import SeriesCache
+
+STEP = 60
+T0 = 1_735_732_800  # 已按分钟对齐
+
+
+class _Loader:
+    """按请求窗口生成 value = ts / 60 的样本，并记录请求窗口"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, start, end):
+        self.calls.append((start, end))
+        ts = range(start, end + 1, STEP)
+        return [
+            {"metric": {"pod": pod}, "values": [[t, str(t / 60 + i)] for t in ts]}
+            for i, pod in enumerate(["web-0", "web-1"])
+        ]
+
+
+def test_align_floors_to_step():
+    assert SeriesCache.align(T0 + 59.9, T0 + 3600 + 1, STEP) == (T0, T0 + 3600)
+
+
+@pytest.mark.asyncio
+async def test_overlapping_window_fetches_only_tail():
+    cache = SeriesCache()
+    loader = _Loader()
+
+    first = await cache.fetch("q", STEP, T0, T0 + 3600, loader)
+    assert len(first) == 2 and len(first[0].timestamps) == 61
+
+    # 完全包含在缓存内
+    await cache.fetch("q", STEP, T0 + 600, T0 + 3600, loader)
+    assert len(loader.calls) == 1
+
+    # 窗口向后滑动5分钟：只请求缓存末尾之后的部分
+    shifted = await cache.fetch("q", STEP, T0 + 300, T0 + 3900, loader)
+    assert loader.calls[-1] == (T0 + 3600, T0 + 3900)
+    assert cache.stats == {"hits": 1, "partial": 1, "misses": 1}
+
+    web0 = next(b for b in shifted if b.labels["pod"] == "web-0")
+    assert web0.timestamps[0] == T0 + 300 and web0.timestamps[-1] == T0 + 3900
+    assert np.all(np.diff(web0.timestamps) == STEP)
+    np.testing.assert_allclose(web0.values, web0.timestamps / 60)
+
+
+@pytest.mark.asyncio
+async def test_earlier_window_refetches_and_lru_evicts():
+    cache = SeriesCache(max_entries=2)
+    loader = _Loader()
+
+    await cache.fetch("q", STEP, T0 + 600, T0 + 1200, loader)
+    await cache.fetch("q", STEP, T0, T0 + 1200, loader)
+    assert loader.calls[-1] == (T0, T0 + 1200)
+
+    await cache.fetch("a", STEP, T0, T0 + 60, loader)
+    await cache.fetch("b", STEP, T0, T0 + 60, loader)
+    assert len(cache) == 2
+    await cache.fetch("q", STEP, T0, T0 + 1200, loader)
+    assert loader.calls[-1] == (T0, T0 + 1200)
+
+
+@pytest.mark.asyncio
+async def test_failed_query_is_not_cached():
+    cache = SeriesCache()
+    calls = []
+
+    async def failing(start, end):
+        calls.append((start, end))
+        return None
+
+    assert await cache.fetch("q", STEP, T0, T0 + 600, failing) is None
+    assert await cache.fetch("q", STEP, T0, T0 + 600, failing) is None
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_partial_fetches_keep_series_sorted():
+    cache = SeriesCache()
+    loader = _Loader()
+    await cache.fetch("q", STEP, T0, T0 + 600, loader)
+
+    release = asyncio.Event()
+
+    async def slow(start, end):
+        await release.wait()
+        return await loader(start, end)
+
+    # 两个增量查询都从同一个缓存末尾开始，短窗口的结果后合并
+    longer = asyncio.create_task(cache.fetch("q", STEP, T0, T0 + 1200, slow))
+    shorter = asyncio.create_task(cache.fetch("q", STEP, T0, T0 + 900, slow))
+    await asyncio.sleep(0)
+    release.set()
+    await longer
+    await shorter
+
+    (web0, _) = await cache.fetch("q", STEP, T0, T0 + 1200, loader)
+    assert web0.timestamps[0] == T0 and web0.timestamps[-1] == T0 + 1200
+    assert np.all(np.diff(web0.timestamps) == STEP)
+    np.testing.assert_allclose(web0.values, web0.timestamps / 60)
+
+
+@pytest.mark.asyncio
+async def test_empty_result_is_not_cached():
+    cache = SeriesCache()
+    calls = []
+
+    async def empty(start, end):
+        calls.append((start, end))
+        return []
+
+    assert await cache.fetch("q", STEP, T0, T0 + 600, empty) == []
+    assert len(cache) == 0
+    await cache.fetch("q", STEP, T0, T0 + 600, empty)
+    assert len(calls) == 2
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 会话存储（过期淘汰、内存上限、Redis共享）单元测试
+"""
+
+import asyncio
+import hashlib
+import threading
+
+from redis.exceptions import WatchError
+
+from app.core.agents.enterprise_assistant import ContextManager
+from app.core.agents.fallback_models import SessionManager
+from app.core.cache.session_store import (
+    SessionStore,
+    append_history,
+    new_session_record,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.versions = {}
+        self.on_watch = None
+
+    def get(self, key):
+        return self.data.get(key, (None,))[0]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, ex)
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def delete(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+        return 1 if self.data.pop(key, None) else 0
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    """模拟 WATCH/MULTI/EXEC：被监视的键在提交前被修改时抛出 WatchError"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.watched = None
+        self.queued = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, key):
+        self.watched = (key, self.redis.versions.get(key, 0))
+        self.queued = []
+        if self.redis.on_watch is not None:
+            self.redis.on_watch()
+
+    def get(self, key):
+        return self.redis.get(key)
+
+    def multi(self):
+        pass
+
+    def set(self, key, value, ex=None):
+        self.queued.append((key, value, ex))
+
+    def execute(self):
+        key, version = self.watched
+        if self.redis.versions.get(key, 0) != version:
+            raise WatchError()
+        for item in self.queued:
+            self.redis.set(*item)
+
+
+def test_memory_store_expires_and_evicts():
+    clock = _Clock()
+    store = SessionStore(ttl=60, max_sessions=2, clock=clock)
+    for i, session_id in enumerate(["a", "b", "c"]):
+        clock.now += 1
+        store.save(session_id, new_session_record(clock.now, mode=i))
+
+    # 超过会话数上限时淘汰最早写入的会话
+    assert store.get("a") is None
+    assert store.get("c")["fields"]["mode"] == 2
+    assert store.get_stats()["evicted"] == 1
+
+    clock.now += 59
+    store.save("c", store.get("c"))
+    clock.now += 2
+    assert store.get("b") is None
+    assert store.get("c") is not None
+    assert len(store) == 1
+
+
+def test_history_is_capped_per_session_and_globally():
+    store = SessionStore(max_history=10, max_session_bytes=2048, max_total_bytes=4096)
+    record = new_session_record(0)
+    for i in range(40):
+        noise = "".join(
+            hashlib.sha256(f"{i}-{j}".encode()).hexdigest() for j in range(8)
+        )
+        append_history(record, "user", f"问题{i} {noise}", i)
+    store.save("s1", record)
+
+    saved = store.get("s1")
+    assert len(saved["history"]) < 10
+    assert saved["history"][-1][1].startswith("问题39")
+    assert saved["message_count"] == 40
+    assert store.get_stats()["local_bytes"] <= 2048
+
+    for i in range(2, 8):
+        store.save(f"s{i}", record)
+    assert store.get_stats()["local_bytes"] <= 4096
+    assert store.get("s1") is None
+
+
+async def test_managers_share_sessions_through_redis():
+    redis = _FakeRedis()
+    worker1 = ContextManager(store=SessionStore(ttl=300, redis_client=redis))
+    worker2 = ContextManager(store=SessionStore(ttl=300, redis_client=redis))
+
+    await worker1.update_context("user_1_abc", {"recent_queries": ["Pod为什么重启"]})
+    await worker2.update_context("user_1_abc", {"assistant_response": "先看事件"})
+
+    context = await worker1.get_context("user_1_abc")
+    assert list(context["recent_queries"]) == ["Pod为什么重启"]
+    assert [m["type"] for m in context["conversation_history"]] == [
+        "user",
+        "assistant",
+    ]
+    details = await worker2.get_session_details("user_1_abc")
+    assert details["message_count"] == 2 and details["status"] == "active"
+    assert redis.data["aiops:session:user_1_abc"][1] == 300
+
+    # 备用实现读取同一份会话，不再单独保存副本
+    fallback = SessionManager(store=worker2.store)
+    assert fallback.get_session("user_1_abc").history == ["Pod为什么重启"]
+    assert fallback.update_session("user_1_abc", "节点NotReady")
+    assert (await worker1.get_context("user_1_abc"))["query_count"] == 2
+
+
+async def test_concurrent_updates_do_not_lose_history():
+    redis = _FakeRedis()
+    worker1 = ContextManager(store=SessionStore(ttl=300, redis_client=redis))
+    worker2 = SessionStore(ttl=300, redis_client=redis)
+    worker2.save("s1", new_session_record(0))
+
+    # worker1 读取后、提交前，另一个worker先追加了一条消息
+    def interleave():
+        redis.on_watch = None
+        record = worker2.get("s1")
+        append_history(record, "user", "来自worker2", 1)
+        worker2.save("s1", record)
+
+    redis.on_watch = interleave
+    await worker1.update_context("s1", {"recent_queries": ["来自worker1"]})
+
+    context = await worker1.get_context("s1")
+    history = [m["content"] for m in context["conversation_history"]]
+    assert history == ["来自worker2", "来自worker1"]
+    assert worker1.store.get_stats()["update_conflicts"] == 1
+
+
+async def test_memory_updates_from_threads_are_atomic():
+    store = SessionStore()
+
+    def add(i):
+        def mutate(record):
+            record = record or new_session_record(0)
+            append_history(record, "user", f"问题{i}", i)
+            return record
+
+        store.update("s1", mutate)
+
+    await asyncio.gather(*(asyncio.to_thread(add, i) for i in range(20)))
+    assert store.get("s1")["query_count"] == 20
+
+
+async def test_fallback_answer_reuses_history_off_loop(monkeypatch):
+    from app.core.agents import fallback_models
+    from app.services.assistant_service import OptimizedAssistantService
+
+    loop_thread = threading.get_ident()
+    redis = _FakeRedis()
+    threads = set()
+    original_get = redis.get
+
+    def tracked_get(key):
+        threads.add(threading.get_ident())
+        return original_get(key)
+
+    redis.get = tracked_get
+    store = SessionStore(ttl=300, redis_client=redis)
+    monkeypatch.setattr(fallback_models, "get_session_store", lambda: store)
+
+    # 助手准备阶段已把问题写入共享会话，随后调用失败转入备用实现
+    manager = ContextManager(store=store)
+    await manager.update_context("user_1_abc", {"recent_queries": ["Pod为什么重启"]})
+    threads.clear()
+
+    result = await OptimizedAssistantService()._use_fallback_response(
+        "Pod为什么重启", "user_1_abc", "超时"
+    )
+
+    assert result["fallback_used"]
+    # Redis 读写都放到线程中执行，不阻塞事件循环
+    assert threads and loop_thread not in threads
+    record = store.get("user_1_abc")
+    assert record["query_count"] == 1 and len(record["history"]) == 1
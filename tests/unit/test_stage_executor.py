@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI-CloudOps-aiops
+Author: Bamboo
+Email: bamboocloudops@gmail.com
+License: Apache 2.0
+Description: 阶段DAG执行器与AI增强预测并行阶段单元测试
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from app.core.prediction import FeatureExtractor, IntelligentPredictor
+from app.core.prediction.stage_executor import Stage, StageExecutor
+from app.models import PredictionGranularity, PredictionType
+
+
+def _sleeper(delay, value):
+    async def run(results):
+        await asyncio.sleep(delay)
+        return value
+
+    return run
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_overlap_and_dependents_see_results():
+    async def combine(results):
+        return results["a"] + results["b"]
+
+    executor = StageExecutor(
+        [
+            Stage("a", _sleeper(0.1, 1)),
+            Stage("b", _sleeper(0.1, 2)),
+            Stage("sum", combine, ("a", "b")),
+        ]
+    )
+    started = time.perf_counter()
+    results, timings = await executor.run()
+
+    assert time.perf_counter() - started < 0.18
+    assert results["sum"] == 3
+    assert set(timings) == {"a", "b", "sum"}
+    assert timings["sum"]["start_seconds"] >= timings["a"]["duration_seconds"]
+    assert all(t["status"] == "completed" for t in timings.values())
+
+
+@pytest.mark.asyncio
+async def test_timeouts_budget_and_required_failures():
+    results, timings = await StageExecutor(
+        [
+            Stage("slow", _sleeper(1.0, "late"), timeout=0.05, fallback="fallback"),
+            Stage("after", _sleeper(0.0, "ok"), ("slow",)),
+        ],
+        budget=0.04,
+    ).run()
+    assert results == {"slow": "fallback", "after": None}
+    assert timings["slow"]["status"] == "timeout"
+    assert timings["after"]["status"] == "skipped"
+
+    async def boom(results):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await StageExecutor(
+            [Stage("x", boom, required=True), Stage("y", _sleeper(5, None))]
+        ).run()
+
+    with pytest.raises(ValueError):
+        StageExecutor([Stage("a", boom, ("b",)), Stage("b", boom, ("a",))])
+
+
+class _SlowLLM:
+    """每次调用固定延迟的LLM"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.prompts = []
+
+    def __bool__(self):
+        return True
+
+    async def generate_response(self, messages, **kwargs):
+        self.prompts.append(messages[-1]["content"])
+        await asyncio.sleep(self.delay)
+        return "## 分析\n- 负载平稳"
+
+
+def _predictor(llm):
+    predictor = IntelligentPredictor(Mock(), FeatureExtractor(), llm_client=llm)
+    unified = predictor.unified_predictor
+    features = unified._get_default_model_features(PredictionType.CPU)
+    X = np.random.default_rng(0).uniform(0, 100, size=(32, len(features)))
+    unified.model_manager.get_model.return_value = LinearRegression().fit(
+        X, X[:, 0]
+    )
+    unified.model_manager.get_scaler.return_value = None
+    unified.model_manager.metadata = {}
+    unified._initialized = True
+    predictor._initialized = True
+    return predictor
+
+
+async def _analyze(predictor):
+    return await predictor.predict_with_ai_analysis(
+        prediction_type=PredictionType.CPU,
+        current_value=50.0,
+        historical_data=[{"timestamp": f"t{i}", "value": 40.0 + i} for i in range(30)],
+        prediction_hours=6,
+        granularity=PredictionGranularity.HOUR,
+    )
+
+
+@pytest.mark.asyncio
+async def test_predict_with_ai_analysis_runs_llm_stages_concurrently():
+    predictor = _predictor(_SlowLLM(0.2))
+    predictor.ground_stages = False
+    result = await _analyze(predictor)
+
+    timings = result["stage_timings"]
+    assert set(timings) == {
+        "forecast",
+        "context",
+        "interpretation",
+        "insights",
+        "reports",
+    }
+    # 上下文分析与预测同时启动，解读和洞察不等待上下文分析结束
+    context = timings["context"]
+    context_end = context["start_seconds"] + context["duration_seconds"]
+    assert context["start_seconds"] <= timings["forecast"]["duration_seconds"]
+    for stage in ("interpretation", "insights"):
+        assert timings[stage]["start_seconds"] < context_end
+    assert timings["reports"]["start_seconds"] >= context_end
+    assert result["ai_reports"] is not None
+    # 串行需要5轮LLM调用（报告内部2轮），DAG下关键路径为3轮
+    assert result["processing_time_seconds"] < 0.8
+
+
+@pytest.mark.asyncio
+async def test_grounded_stages_wait_for_context_and_run_in_parallel():
+    llm = _SlowLLM(0.2)
+    predictor = _predictor(llm)
+    assert predictor.ground_stages
+    result = await _analyze(predictor)
+
+    timings = result["stage_timings"]
+    context = timings["context"]
+    context_end = context["start_seconds"] + context["duration_seconds"]
+    interpretation, insights = timings["interpretation"], timings["insights"]
+    interpretation_end = (
+        interpretation["start_seconds"] + interpretation["duration_seconds"]
+    )
+    # 解读与洞察都在上下文分析之后启动，两者之间并行
+    for stage in (interpretation, insights):
+        assert stage["start_seconds"] >= context_end
+    assert insights["start_seconds"] < interpretation_end
+    # 报告不必等待解读与洞察依次完成，关键路径比串行少一轮LLM调用
+    assert timings["reports"]["start_seconds"] < (
+        interpretation_end + insights["duration_seconds"]
+    )
+
+    # 洞察提示中包含上下文分析的结果
+    insights_prompt = next(p for p in llm.prompts if "关键洞察" in p)
+    assert '"context_insights": {}' not in insights_prompt